@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Project: "Surprising Minds" at Sea Life Brighton, by Danbee Kim, Kerry Perkins, Clive Ramble, Hazel Garnade, Goncalo Lopes, Dario Quinones, Reanna Campbell-Russo, Robb Barrett, Martin Stopps, The EveryMind Team, and Adam Kampff.
+Benchmark: import time of stage scripts and the shared surprisingMinds package
+
+Imports every stage script and surprisingMinds module in a fresh python process (like a joblib/loky or multiprocessing worker does).
+Fails if any import takes longer than the budget, runs script work at import time, or pulls in a heavy library (cv2, matplotlib, scipy, sklearn, joblib, IPython).
+
+Optional flags:
+"--budget": Maximum seconds for importing one module in a cold worker (current default = 1.0)
+"--repeats": Number of cold imports per module, the fastest one is compared to the budget (current default = 3)
+
+@author: Adam R Kampff and Danbee Kim
+"""
+import os
+import sys
+import glob
+import json
+import argparse
+import tempfile
+import subprocess
+
+###################################
+# SET CURRENT WORKING DIRECTORY
+###################################
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+###################################
+# FUNCTIONS
+###################################
+heavy_modules = ['cv2', 'matplotlib', 'scipy', 'sklearn', 'joblib', 'IPython']
+stage_folders = ['preprocessing', 'pupilMotion', 'pupilSize', 'saccadeDetector']
+
+# runs in the fresh worker process: import one file by path, report import seconds and heavy modules loaded
+import_probe = '''
+import sys, time, json, importlib.util
+module_path, repo_root = sys.argv[1:3]
+# surprisingMinds modules import each other through the package, as the stage scripts do
+sys.path.insert(0, repo_root)
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("probed_module", module_path)
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+elapsed = time.perf_counter() - start
+heavy = sorted(set(name.split('.')[0] for name in sys.modules) & set(sys.argv[3:]))
+print(json.dumps({"seconds": elapsed, "heavy": heavy}))
+'''
+
+def list_modules_to_import():
+    module_paths = sorted(glob.glob(os.path.join(repo_root, 'surprisingMinds', '*.py')))
+    for folder in stage_folders:
+        module_paths.extend(sorted(glob.glob(os.path.join(repo_root, folder, '*.py'))))
+    return module_paths
+
+def compiles(module_path):
+    try:
+        with open(module_path, 'r', encoding='utf-8') as module_file:
+            compile(module_file.read(), module_path, 'exec')
+        return True
+    except SyntaxError:
+        return False
+
+def cold_import(module_path, work_folder):
+    # import in a fresh interpreter, from an empty folder so nothing (e.g. log files) is written into the repo
+    completed = subprocess.run([sys.executable, '-c', import_probe, module_path, repo_root] + heavy_modules, cwd=work_folder, capture_output=True, text=True, timeout=120)
+    if completed.returncode != 0:
+        return None, completed.stderr.strip().split('\n')[-1]
+    result = json.loads(completed.stdout.strip().split('\n')[-1])
+    return result, None
+
+def check_module(module_path, budget, repeats, work_folder):
+    # list of problems with this module, empty if it imports fast and lightly
+    results = []
+    for repeat in range(repeats):
+        result, error = cold_import(module_path, work_folder)
+        if error is not None:
+            return None, ['import failed: %s' % (error)]
+        results.append(result)
+    fastest = min(result['seconds'] for result in results)
+    problems = []
+    if fastest > budget:
+        problems.append('import took %.3fs, budget is %.3fs' % (fastest, budget))
+    if results[0]['heavy']:
+        problems.append('heavy modules imported: %s' % (', '.join(results[0]['heavy'])))
+    if os.listdir(work_folder):
+        problems.append('wrote files at import time: %s' % (', '.join(os.listdir(work_folder))))
+    return fastest, problems
+
+##########################################################
+# BEGIN SCRIPT
+##########################################################
+if __name__=='__main__':
+    parser = argparse.ArgumentParser(description='''Import time benchmark.
+        Imports every stage script and surprisingMinds module in a cold python process and checks it against the import budget.''')
+    parser.add_argument("--budget", type=float, default=1.0, help="Maximum seconds for importing one module in a cold worker")
+    parser.add_argument("--repeats", type=int, default=3, help="Number of cold imports per module, the fastest one is compared to the budget")
+    args = parser.parse_args()
+    failed_modules = 0
+    for module_path in list_modules_to_import():
+        module_name = os.path.relpath(module_path, repo_root)
+        if not compiles(module_path):
+            print('SKIP %s (does not compile)' % (module_name))
+            continue
+        with tempfile.TemporaryDirectory() as work_folder:
+            fastest, problems = check_module(module_path, args.budget, args.repeats, work_folder)
+        if problems:
+            failed_modules = failed_modules + 1
+            print('FAIL %s: %s' % (module_name, '; '.join(problems)))
+        else:
+            print('ok   %s %.3fs' % (module_name, fastest))
+    if failed_modules > 0:
+        print('%d module(s) over the import budget' % (failed_modules))
+        sys.exit(1)
+    print('All modules within the %.3fs import budget' % (args.budget))
+    # FIN
@@ -0,0 +1,520 @@
+# -*- coding: utf-8 -*-
+"""
+Project: "Surprising Minds" at Sea Life Brighton, by Danbee Kim, Kerry Perkins, Clive Ramble, Hazel Garnade, Goncalo Lopes, Dario Quinones, Reanna Campbell-Russo, Robb Barrett, Martin Stopps, The EveryMind Team, and Adam Kampff.
+Benchmark: throughput and peak memory of each hot path of the stage scripts
+
+Runs every stage on the same fixed synthetic inputs (made once by surprisingMinds.syntheticData and kept in the data folder).
+Each stage has an 'original' implementation (copied from the first version of the stage scripts, in originalStages) and the 'current' one,
+so old and new code can be timed side by side on the same machine.
+Stages:
+find_pupil: pupil detection of Average_Clip_Per_Day_PupilDetection.py on one eye video (300 frames per unit of scale),
+    also coarse to fine at half (pyramid1) and quarter (pyramid2) resolution, with their agreement with full resolution detection
+time_bucketing: 4ms time bucket of every eye frame, as done inside find_pupil
+load_daily_pupils: loading and downsampling of one day of pupil csv files (pp01)
+measure_speeds: interpolated pupil speed of every pupil csv (sd01)
+detect_saccades: saccade ("peak") detection in every speed trace (sd02)
+pupil_movement: movement, average motion and saccade sweep of the downsampled pupil positions (pm01)
+worldcam_supersampling: world cam frames and raw live stim luminance per 4ms time bucket of one 5 second world video clip (psa01)
+delay_sweep: phase means and linear regressions of pupil size vs luminance for 25 delays and 4 eye analyses (psa03)
+luminance_csvs: loading and time bucket averaging of the world cam LuminancePerFrame csv files (pp02)
+Every (stage, implementation) runs in its own python process, so peak memory (RSS) belongs to that run only.
+Reports seconds, frames/s, trials/s and MB/s (of input files, or of decoded video frames) and writes everything as json, with machine info and git commit.
+
+Optional flags:
+"--scale": Size of the synthetic inputs, 1 = one exhibit day of ~20 trials (current default = 1)
+"--repeats": Number of timed runs of each stage, the median is reported (current default = 3)
+"--stages": Only run these stages (current default = all)
+"--implementations": Only run these implementations (current default = original, current, and pyramid1/pyramid2 of find_pupil)
+"--data": Folder for the synthetic inputs, reused between runs (current default = benchmarks/data)
+"--output": Json results file (current default = benchmarks/results/stages_<date-time>.json)
+"--seed": Random seed of the synthetic inputs (current default = 0)
+
+@author: Adam R Kampff and Danbee Kim
+"""
+import os
+import sys
+import json
+import time
+import glob
+import shutil
+import argparse
+import datetime
+import platform
+import subprocess
+import numpy as np
+# make the shared surprisingMinds package (in the repo root) importable
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+from surprisingMinds import syntheticData
+from surprisingMinds.stimLuminance import timestamp_bucket_indices
+from surprisingMinds.memoryBudget import peak_rss_mb
+
+###################################
+# FUNCTIONS
+###################################
+benchmarks_folder = os.path.dirname(os.path.abspath(__file__))
+MB = 1024*1024
+# 4ms time buckets in the stage scripts, 40ms after downsampling
+original_bucket_size_ms = 4
+downsampled_bucket_size_ms = 40
+downsampled_no_of_time_buckets = 60000/downsampled_bucket_size_ms
+bad_trial_cutoff = 200
+
+def load_stage_script(relative_path):
+    # stage scripts are not a package, import them by path (script work is behind their __main__ guards)
+    import importlib.util
+    module_path = os.path.join(repo_root, relative_path)
+    module_name = os.path.splitext(os.path.basename(module_path))[0]
+    spec = importlib.util.spec_from_file_location(module_name, module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def git_info():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=repo_root, capture_output=True, text=True, check=True).stdout.strip()
+        changes = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=repo_root, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return {'commit': None, 'dirty': None}
+    return {'commit': commit, 'dirty': len(changes) > 0}
+
+def machine_info():
+    info = {'hostname': platform.node(),
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'python': platform.python_version(),
+            'numpy': np.__version__}
+    try:
+        info['memory_mb'] = os.sysconf('SC_PAGE_SIZE')*os.sysconf('SC_PHYS_PAGES')/MB
+    except (AttributeError, ValueError, OSError):
+        info['memory_mb'] = None
+    for library in ['cv2', 'scipy']:
+        try:
+            info[library] = __import__(library).__version__
+        except ImportError:
+            info[library] = None
+    return info
+
+def files_size(paths):
+    return sum(os.path.getsize(path) for path in paths)
+
+###################################
+# SYNTHETIC INPUTS
+###################################
+def inputs_folder_for(data_folder, scale, seed):
+    return os.path.join(data_folder, 'scale%d_seed%d' % (scale, seed))
+
+def prepare_inputs(data_folder, scale, seed):
+    # one exhibit day of pupil csvs and luminance csvs (no videos) plus one trial with eye and world videos
+    # made once, later runs with the same scale and seed reuse them
+    inputs_folder = inputs_folder_for(data_folder, scale, seed)
+    ready_path = os.path.join(inputs_folder, 'inputs.json')
+    if os.path.exists(ready_path):
+        return inputs_folder
+    if os.path.exists(inputs_folder):
+        # left over from an interrupted run
+        shutil.rmtree(inputs_folder)
+    print('Generating synthetic inputs in %s (once for this scale and seed)' % (inputs_folder))
+    raw_stim_lums = syntheticData.make_raw_stim_luminances(seed)
+    syntheticData.write_raw_stim_luminances(raw_stim_lums, syntheticData.dataset_folders(inputs_folder)['raw_stim_lums'])
+    day_date = datetime.date(2017, 7, 1)
+    syntheticData.make_day(inputs_folder, day_date, 20*scale, raw_stim_lums, seed, 1, write_videos=False)
+    # the video trial gets its own random stream, after the days
+    trial_start_us = int((datetime.datetime(2017, 7, 1, 10) - datetime.datetime(1970, 1, 1)).total_seconds()*1e6)
+    trial_folder = os.path.join(inputs_folder, 'videos', '2017-07-01_10-00-00')
+    trial = syntheticData.make_trial(trial_start_us, 'stimuli024', raw_stim_lums, np.random.default_rng([seed, 1000]), trial_folder=trial_folder)
+    right_eye = trial['eyes']['right']
+    np.savez(os.path.join(inputs_folder, 'videos', 'righteye_truth.npz'), timestamps_us=right_eye['timestamps_us'], **right_eye['trajectory'])
+    with open(ready_path, 'w') as ready_file:
+        json.dump({'scale': scale, 'seed': seed, 'day': day_date.isoformat()}, ready_file)
+    return inputs_folder
+
+def day_csv_folder(inputs_folder):
+    return os.path.join(syntheticData.dataset_folders(inputs_folder)['analysed_drive'], 'SurprisingMinds_2017-07-01', 'Analysis', 'csv')
+
+def video_trial_file(inputs_folder, suffix):
+    return glob.glob(os.path.join(inputs_folder, 'videos', '*', '*_' + suffix))[0]
+
+def load_timestamps(csv_path):
+    return list(np.genfromtxt(csv_path, dtype=str, delimiter=' '))
+
+def raw_stim_dict(inputs_folder):
+    # rawStimLum_dict as psa01 builds it from the rawStimLums csv files
+    rawStimLum_dict = {}
+    for rSL_file in glob.glob(syntheticData.dataset_folders(inputs_folder)['raw_stim_lums'] + os.sep + '*.csv'):
+        stim_phase = os.path.basename(rSL_file).split('_')[0]
+        stim_lums = np.genfromtxt(rSL_file, delimiter=',')
+        rawStimLum_dict[stim_phase] = {'Number of Frames': len(stim_lums), 'Luminance per Frame': stim_lums}
+    return rawStimLum_dict
+
+###################################
+# STAGES
+# setup_<stage>(inputs_folder, scale) loads the inputs (not timed) and returns the work for the implementations
+# work['units'] is what one run processes: frames, trials and/or bytes
+###################################
+def setup_find_pupil(inputs_folder, scale):
+    import cv2
+    # no debug windows (and often no display) on benchmark machines
+    for gui_function in ['namedWindow', 'imshow', 'destroyAllWindows']:
+        setattr(cv2, gui_function, lambda *args: None)
+    cv2.waitKey = lambda *args: -1
+    timestamps = load_timestamps(video_trial_file(inputs_folder, 'righteye.csv'))
+    no_of_frames = min(300*scale, len(timestamps))
+    output_folder = os.path.join(inputs_folder, 'scratch', 'find_pupil')
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+    with np.load(os.path.join(inputs_folder, 'videos', 'righteye_truth.npz')) as truth:
+        truth = {key: truth[key][:no_of_frames] for key in truth.files}
+    return {'video_path': video_trial_file(inputs_folder, 'righteye.avi'), 'timestamps': timestamps[:no_of_frames], 'output_folder': output_folder, 'truth': truth,
+            'stage_script': load_stage_script(os.path.join('preprocessing', 'Average_Clip_Per_Day_PupilDetection.py')),
+            'units': {'frames': no_of_frames, 'bytes': no_of_frames*800*600*3}}
+
+def find_pupil_original(work):
+    from originalStages import averageClip
+    averageClip.find_pupil('right', 'stimuli024', 0, work['video_path'], work['timestamps'], 0, work['output_folder'], original_bucket_size_ms)
+    return os.path.join(work['output_folder'], 'right_stimuli024_0000.csv')
+
+def find_pupil_current(work):
+    work['stage_script'].find_pupil('right', 'stimuli024', 0, work['video_path'], work['timestamps'], 0, work['output_folder'], original_bucket_size_ms)
+    return os.path.join(work['output_folder'], 'right_stimuli024_0000.csv')
+
+def find_pupil_pyramid(work, level):
+    # circle found at 1/2**level resolution, ellipse fit at full resolution
+    work['pyramid_level'] = level
+    work['stage_script'].find_pupil('right', 'stimuli024', 0, work['video_path'], work['timestamps'], 0, work['output_folder'], original_bucket_size_ms, pyramid_level=level)
+    return os.path.join(work['output_folder'], 'right_stimuli024_0000.csv')
+
+def find_pupil_pyramid1(work):
+    return find_pupil_pyramid(work, 1)
+
+def find_pupil_pyramid2(work):
+    return find_pupil_pyramid(work, 2)
+
+def find_pupil_accuracy(work, csv_file):
+    # contour centre of the time bucket of each frame vs the true pupil centre drawn into that frame
+    pupils = np.loadtxt(csv_file, delimiter=',', ndmin=2)
+    truth = work['truth']
+    bucket_indices, no_of_buckets = timestamp_bucket_indices(syntheticData.exhibit_timestamps_us(truth['timestamps_us']), original_bucket_size_ms)
+    visible = truth['visible']
+    found = pupils[bucket_indices, 2] > 0
+    errors = np.hypot(pupils[bucket_indices, 0] - truth['x'], pupils[bucket_indices, 1] - truth['y'])[visible & found]
+    accuracy = {'visible_frames': int(visible.sum()),
+                'detection_rate': float(found[visible].mean()) if visible.any() else None,
+                'false_detections': int((found & ~visible).sum()),
+                'median_error_px': float(np.median(errors)) if len(errors) > 0 else None,
+                'p95_error_px': float(np.percentile(errors, 95)) if len(errors) > 0 else None}
+    if work.get('pyramid_level'):
+        accuracy['full_resolution_agreement'] = find_pupil_agreement(work, pupils)
+    return accuracy
+
+def find_pupil_agreement(work, pupils):
+    # pyramid detection vs the full resolution detection of the same frames, time bucket by time bucket
+    full_resolution_folder = os.path.join(work['output_folder'], 'full_resolution')
+    if not os.path.exists(full_resolution_folder):
+        os.makedirs(full_resolution_folder)
+    work['stage_script'].find_pupil('right', 'stimuli024', 0, work['video_path'], work['timestamps'], 0, full_resolution_folder, original_bucket_size_ms)
+    full_resolution = np.loadtxt(os.path.join(full_resolution_folder, 'right_stimuli024_0000.csv'), delimiter=',', ndmin=2)
+    both_found = (pupils[:, 2] > 0) & (full_resolution[:, 2] > 0)
+    centre_diffs = np.hypot(pupils[both_found, 0] - full_resolution[both_found, 0], pupils[both_found, 1] - full_resolution[both_found, 1])
+    area_diffs = np.abs(pupils[both_found, 2] - full_resolution[both_found, 2])/full_resolution[both_found, 2]
+    frames = full_resolution[:, 2] != -5
+    return {'same_code': float(np.mean(np.where(both_found, True, pupils[:, 2] == full_resolution[:, 2])[frames])),
+            'median_centre_diff_px': float(np.median(centre_diffs)) if len(centre_diffs) > 0 else None,
+            'p95_centre_diff_px': float(np.percentile(centre_diffs, 95)) if len(centre_diffs) > 0 else None,
+            'max_centre_diff_px': float(np.max(centre_diffs)) if len(centre_diffs) > 0 else None,
+            'p95_area_rel_diff': float(np.percentile(area_diffs, 95)) if len(area_diffs) > 0 else None}
+
+def setup_time_bucketing(inputs_folder, scale):
+    # both eyes of the video trial, repeated for larger scales
+    eye_timestamps = [load_timestamps(video_trial_file(inputs_folder, eye + 'eye.csv')) for eye in ['right', 'left']]*scale
+    return {'eye_timestamps': eye_timestamps, 'units': {'frames': sum(len(timestamps) for timestamps in eye_timestamps), 'trials': len(eye_timestamps)}}
+
+def time_bucketing_original(work):
+    from originalStages import averageClip
+    all_keys = []
+    for video_timestamps in work['eye_timestamps']:
+        pupil_buckets = averageClip.make_time_buckets(video_timestamps[0], original_bucket_size_ms, video_timestamps[-1], [-5,-5,-5,-5,-5,-5])
+        bucket_window = datetime.timedelta(milliseconds=original_bucket_size_ms)
+        for timestamp in video_timestamps:
+            timestamp = timestamp.split('+')[0][:-3]
+            timestamp_dt = datetime.datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S.%f")
+            all_keys.append(averageClip.find_nearest_timestamp_key(timestamp_dt, pupil_buckets, bucket_window))
+    return all_keys
+
+def time_bucketing_current(work):
+    from surprisingMinds.timeBuckets import parse_timestamp, make_time_buckets, find_nearest_timestamp_key
+    all_keys = []
+    for video_timestamps in work['eye_timestamps']:
+        pupil_buckets = make_time_buckets(video_timestamps[0], original_bucket_size_ms, video_timestamps[-1], [-5,-5,-5,-5,-5,-5], copy_fill=True)
+        bucket_window = datetime.timedelta(milliseconds=original_bucket_size_ms)
+        for timestamp in video_timestamps:
+            all_keys.append(find_nearest_timestamp_key(parse_timestamp(timestamp), pupil_buckets, bucket_window))
+    return all_keys
+
+def setup_load_daily_pupils(inputs_folder, scale):
+    csv_folder = day_csv_folder(inputs_folder)
+    csv_paths = glob.glob(csv_folder + os.sep + '*.csv')
+    return {'csv_folder': csv_folder, 'units': {'trials': len(csv_paths), 'bytes': files_size(csv_paths)}}
+
+def load_daily_pupils_original(work):
+    from originalStages import pp01
+    return [pp01.load_daily_pupils(eye, work['csv_folder'], downsampled_no_of_time_buckets, original_bucket_size_ms, downsampled_bucket_size_ms, bad_trial_cutoff) for eye in ['right', 'left']]
+
+def load_daily_pupils_current(work):
+    from surprisingMinds.pupilData import load_daily_pupils
+    return [load_daily_pupils(eye, work['csv_folder'], downsampled_no_of_time_buckets, original_bucket_size_ms, downsampled_bucket_size_ms, bad_trial_cutoff) for eye in ['right', 'left']]
+
+def setup_measure_speeds(inputs_folder, scale):
+    csv_paths = sorted(glob.glob(day_csv_folder(inputs_folder) + os.sep + '*.csv'))
+    all_data = [np.genfromtxt(csv_path, delimiter=',') for csv_path in csv_paths]
+    return {'all_data': all_data, 'stage_script': load_stage_script(os.path.join('saccadeDetector', 'sd01_measure_speeds.py')), 'units': {'trials': len(all_data), 'frames': sum(len(data) for data in all_data), 'bytes': sum(data.nbytes for data in all_data)}}
+
+def measure_speeds_current(work):
+    return [work['stage_script'].measure_speed(data, bad_trial_cutoff) for data in work['all_data']]
+
+def setup_detect_saccades(inputs_folder, scale):
+    work = setup_measure_speeds(inputs_folder, scale)
+    speeds = [measured[3] for measured in measure_speeds_current(work) if measured is not None]
+    return {'speeds': speeds, 'stage_script': load_stage_script(os.path.join('saccadeDetector', 'sd02_detect_saccades.py')), 'units': {'trials': len(speeds), 'frames': sum(len(speed) for speed in speeds), 'bytes': sum(speed.nbytes for speed in speeds)}}
+
+def detect_saccades_current(work):
+    return [work['stage_script'].detect_peaks(speed, 0.5, 1.5) for speed in work['speeds']]
+
+def setup_pupil_movement(inputs_folder, scale):
+    # downsampled contour and circle positions (x and y) of both eyes, by stimulus, as pp01 saves them for pm01
+    from surprisingMinds.pupilData import load_daily_pupils, threshold_to_nan
+    # trials are -6 padded to 60 seconds, cropped here to the time buckets every trial covers
+    # (savgol_filter of current scipy refuses the all nan tail at the end of the average motion)
+    all_positions = []
+    csv_folder = day_csv_folder(inputs_folder)
+    all_pupil_data = [load_daily_pupils(eye, csv_folder, downsampled_no_of_time_buckets, original_bucket_size_ms, downsampled_bucket_size_ms, bad_trial_cutoff) for eye in ['right', 'left']]
+    trial_lengths = [np.flatnonzero(trial[:-1] != -6)[-1] + 1 for pupil_data in all_pupil_data for trial in pupil_data[0] if trial[-1] != -6]
+    no_of_buckets = min(trial_lengths)
+    for pupil_data in all_pupil_data:
+        for measurement, pixel_limit in [(0, 798), (1, 599), (3, 798), (4, 599)]:
+            for stim_num in [24.0, 25.0, 26.0, 27.0, 28.0, 29.0]:
+                trials = [trial[:no_of_buckets].copy() for trial in pupil_data[measurement] if trial[-1] == stim_num]
+                for trial in trials:
+                    threshold_to_nan(trial, pixel_limit, 'upper')
+                    threshold_to_nan(trial, 0, 'lower')
+                all_positions.append(trials)
+    return {'all_positions': all_positions, 'stage_script': load_stage_script(os.path.join('pupilMotion', 'pm01_calc_mvmnt.py')), 'units': {'trials': sum(len(trials) for trials in all_positions)}}
+
+# pm01 parameters
+saccade_thresholds = [2.5, 5, 10, 20, 30, 40, 50, 60] # pixels
+dropped_frames_threshold = 2000/downsampled_bucket_size_ms
+smoothing_window = 25
+peaks_window = 40
+
+def pupil_movement_original(work):
+    from originalStages import pm01
+    all_movements = [pm01.calc_mvmnt_from_pos(positions, dropped_frames_threshold, 100, -100) for positions in work['all_positions']]
+    all_movements = [movements for movements in all_movements if len(movements) > 0]
+    avg_motion = [pm01.calc_avg_motion_and_peaks(movements, smoothing_window) for movements in all_movements]
+    all_saccades = []
+    for movements in all_movements:
+        this_stim_N = len(movements)
+        windowed_count_thresholds = [this_stim_N/(i*2) for i in range(1, len(saccade_thresholds)+1)]
+        all_saccades.append([pm01.find_saccades(movements, s_thresh, this_stim_N/10, peaks_window, w_thresh) for s_thresh, w_thresh in zip(saccade_thresholds, windowed_count_thresholds)])
+    return avg_motion, all_saccades
+
+def pupil_movement_current(work):
+    calc_mvmnt = work['stage_script']
+    all_movements = [calc_mvmnt.calc_mvmnt_from_pos(positions, dropped_frames_threshold, 100, -100) for positions in work['all_positions']]
+    all_movements = [movements for movements in all_movements if len(movements) > 0]
+    # pm01 reduces per-day movement partials, here each stimulus' trials are split in two "days"
+    all_partials = []
+    for movements in all_movements:
+        half = len(movements)//2
+        all_partials.append(calc_mvmnt.add_movement_partials(calc_mvmnt.movement_partial(movements[:half], saccade_thresholds), calc_mvmnt.movement_partial(movements[half:], saccade_thresholds)))
+    avg_motion = calc_mvmnt.smooth_avg_motion_and_peaks(calc_mvmnt.avg_motion_from_partials(all_partials), smoothing_window)
+    all_saccades = []
+    for partial in all_partials:
+        this_stim_N = partial['trials']
+        windowed_count_thresholds = [this_stim_N/(i*2) for i in range(1, len(saccade_thresholds)+1)]
+        all_saccades.append(calc_mvmnt.find_saccades_from_counts(partial['participants'], saccade_thresholds, this_stim_N/10, peaks_window, windowed_count_thresholds))
+    return avg_motion, all_saccades
+
+def setup_worldcam_supersampling(inputs_folder, scale):
+    # the original keeps a float64 copy of a world cam frame in every 4ms time bucket, so the clip is 5 seconds at every scale
+    import cv2
+    video_path = video_trial_file(inputs_folder, 'world.avi')
+    timestamps = load_timestamps(video_trial_file(inputs_folder, 'world.csv'))[:150]
+    world_video = cv2.VideoCapture(video_path)
+    frame_bytes = int(world_video.get(3))*int(world_video.get(4))*3
+    world_video.release()
+    output_folder = os.path.join(inputs_folder, 'scratch', 'worldcam_supersampling')
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+    return {'video_path': video_path, 'timestamps': timestamps, 'raw_stim_dict': raw_stim_dict(inputs_folder), 'output_folder': output_folder,
+            'stage_script': load_stage_script(os.path.join('pupilSize', 'psa01_MonthlyMeans_WorldCam_RawLiveStim.py')),
+            'units': {'frames': len(timestamps), 'bytes': len(timestamps)*frame_bytes}}
+
+def worldcam_supersampling_original(work):
+    from originalStages import psa01
+    return psa01.supersampled_worldCam_rawLiveVid(work['video_path'], work['timestamps'], work['raw_stim_dict'], work['output_folder'], original_bucket_size_ms)
+
+def worldcam_supersampling_current(work):
+    return work['stage_script'].supersampled_worldCam_rawLiveVid(work['video_path'], work['timestamps'], work['raw_stim_dict'], work['output_folder'], original_bucket_size_ms)
+
+def setup_delay_sweep(inputs_folder, scale):
+    # normed pupil sizes (trials x 40ms time buckets) of each unique stimulus, for 4 eye analyses
+    # phase lengths in 40ms time buckets of the synthetic stimuli
+    rng = np.random.default_rng(0)
+    calib_len = int(syntheticData.calib_length_frames/syntheticData.world_fps*25)
+    octo_len = int(syntheticData.octo_length_frames/syntheticData.world_fps*25)
+    unique_lens = [int(syntheticData.unique_lengths_frames[stim_name]/syntheticData.world_fps*25) for stim_name in syntheticData.stim_names]
+    delays = 25
+    trial_len = calib_len + 1 + max(unique_lens) + 1 + octo_len + delays
+    allEyeAnalyses_normedPupils = []
+    for eye_analysis in range(4):
+        normedPupils = []
+        for stim in range(6):
+            trials = rng.normal(0, 0.2, (4*scale, trial_len))
+            trials[rng.random(trials.shape) < 0.1] = np.nan
+            normedPupils.append(trials)
+        allEyeAnalyses_normedPupils.append(normedPupils)
+    lum_allPhases = [rng.uniform(20, 230, phase_len) for phase_len in [calib_len, octo_len] + unique_lens]
+    return {'normedPupils': allEyeAnalyses_normedPupils, 'calib_len': calib_len, 'unique_lens': unique_lens, 'octo_len': octo_len, 'delays': delays, 'lum_allPhases': lum_allPhases,
+            'stage_script': load_stage_script(os.path.join('pupilSize', 'psa03_PupilSizeVLum.py')),
+            'units': {'trials': 4*6*4*scale, 'bytes': sum(trials.nbytes for normedPupils in allEyeAnalyses_normedPupils for trials in normedPupils)}}
+
+def delay_sweep_original(work):
+    from originalStages import psa03
+    return psa03.linRegress_allEyeAnalyses_perDelay(work['delays'], work['normedPupils'], work['calib_len'], work['unique_lens'], work['octo_len'], work['lum_allPhases'])
+
+def delay_sweep_current(work):
+    pupil_size_v_lum = work['stage_script']
+    phase_means = pupil_size_v_lum.phaseMeans_allDelays_allEyeAnalyses(np.arange(work['delays']), work['normedPupils'], work['calib_len'], work['unique_lens'], work['octo_len'])
+    return pupil_size_v_lum.linRegress_allEyeAnalyses_allPhases_allDelays(phase_means, work['lum_allPhases'])
+
+def setup_luminance_csvs(inputs_folder, scale):
+    luminance_data_paths = sorted(glob.glob(syntheticData.dataset_folders(inputs_folder)['luminance_per_frame'] + os.sep + '*_stimuli*_world_LuminancePerFrame.csv'))
+    paths_by_stim = {}
+    for data_path in luminance_data_paths:
+        paths_by_stim.setdefault(data_path.split("_")[-3], []).append(data_path)
+    no_of_frames = 0
+    for data_path in luminance_data_paths:
+        with open(data_path) as data_file:
+            no_of_frames = no_of_frames + sum(1 for line in data_file)
+    return {'paths_by_stim': paths_by_stim, 'units': {'trials': len(luminance_data_paths), 'frames': no_of_frames, 'bytes': files_size(luminance_data_paths)}}
+
+def luminance_csvs_original(work):
+    from originalStages import pp02
+    return {stim: pp02.build_timebucket_avg_luminance(pp02.load_luminance_csvs(paths), downsampled_bucket_size_ms, downsampled_no_of_time_buckets) for stim, paths in work['paths_by_stim'].items()}
+
+def luminance_csvs_current(work):
+    from surprisingMinds.stimLuminance import build_timebucket_avg_luminance
+    return {stim: build_timebucket_avg_luminance(paths, downsampled_bucket_size_ms, downsampled_no_of_time_buckets) for stim, paths in work['paths_by_stim'].items()}
+
+# stage name -> setup, implementations and optional accuracy check of the result
+stages = {
+    'find_pupil': {'setup': setup_find_pupil, 'implementations': {'original': find_pupil_original, 'current': find_pupil_current, 'pyramid1': find_pupil_pyramid1, 'pyramid2': find_pupil_pyramid2}, 'accuracy': find_pupil_accuracy},
+    'time_bucketing': {'setup': setup_time_bucketing, 'implementations': {'original': time_bucketing_original, 'current': time_bucketing_current}},
+    'load_daily_pupils': {'setup': setup_load_daily_pupils, 'implementations': {'original': load_daily_pupils_original, 'current': load_daily_pupils_current}},
+    'measure_speeds': {'setup': setup_measure_speeds, 'implementations': {'current': measure_speeds_current}},
+    'detect_saccades': {'setup': setup_detect_saccades, 'implementations': {'current': detect_saccades_current}},
+    'pupil_movement': {'setup': setup_pupil_movement, 'implementations': {'original': pupil_movement_original, 'current': pupil_movement_current}},
+    'worldcam_supersampling': {'setup': setup_worldcam_supersampling, 'implementations': {'original': worldcam_supersampling_original, 'current': worldcam_supersampling_current}},
+    'delay_sweep': {'setup': setup_delay_sweep, 'implementations': {'original': delay_sweep_original, 'current': delay_sweep_current}},
+    'luminance_csvs': {'setup': setup_luminance_csvs, 'implementations': {'original': luminance_csvs_original, 'current': luminance_csvs_current}},
+}
+
+###################################
+# RUNNING STAGES
+###################################
+def run_stage(stage_name, implementation_name, inputs_folder, scale, repeats):
+    # runs in the child process: set up once, then time every repeat
+    stage = stages[stage_name]
+    run = stage['implementations'][implementation_name]
+    work = stage['setup'](inputs_folder, scale)
+    setup_peak_rss_mb = peak_rss_mb()
+    seconds = []
+    for repeat in range(repeats):
+        start = time.perf_counter()
+        result = run(work)
+        seconds.append(time.perf_counter() - start)
+    measurement = {'stage': stage_name, 'implementation': implementation_name, 'units': work['units'], 'seconds': seconds,
+                   'median_seconds': float(np.median(seconds)), 'setup_peak_rss_mb': setup_peak_rss_mb, 'peak_rss_mb': peak_rss_mb()}
+    measurement['throughput'] = throughput(work['units'], measurement['median_seconds'])
+    if 'accuracy' in stage:
+        measurement['accuracy'] = stage['accuracy'](work, result)
+    return measurement
+
+def throughput(units, seconds):
+    rates = {}
+    for unit_name, rate_name, per_unit in [('frames', 'frames_per_s', 1), ('trials', 'trials_per_s', 1), ('bytes', 'MB_per_s', MB)]:
+        if unit_name in units and seconds > 0:
+            rates[rate_name] = units[unit_name]/per_unit/seconds
+    return rates
+
+def run_stage_in_child(stage_name, implementation_name, inputs_folder, scale, repeats):
+    # a fresh python process per run, so its peak memory is not inflated by earlier stages
+    command = [sys.executable, os.path.abspath(__file__), '--child', stage_name, implementation_name, '--inputs', inputs_folder, '--scale', str(scale), '--repeats', str(repeats)]
+    completed = subprocess.run(command, cwd=benchmarks_folder, capture_output=True, text=True)
+    if completed.returncode != 0:
+        error = completed.stderr.strip().split('\n')[-1] if completed.stderr.strip() else 'exit code %d' % (completed.returncode)
+        return {'stage': stage_name, 'implementation': implementation_name, 'error': error}
+    return json.loads(completed.stdout.strip().split('\n')[-1])
+
+def format_measurement(measurement, original_seconds=None):
+    if 'error' in measurement:
+        return '%-24s %-9s FAILED: %s' % (measurement['stage'], measurement['implementation'], measurement['error'])
+    rates = ', '.join('%.1f %s' % (rate, rate_name.replace('_per_', '/')) for rate_name, rate in measurement['throughput'].items())
+    line = '%-24s %-9s %9.3fs  %s' % (measurement['stage'], measurement['implementation'], measurement['median_seconds'], rates)
+    if measurement['peak_rss_mb'] is not None:
+        line = line + ', peak RSS %.0f MB' % (measurement['peak_rss_mb'])
+    if original_seconds is not None and measurement['implementation'] != 'original' and measurement['median_seconds'] > 0:
+        line = line + ', %.1fx original' % (original_seconds/measurement['median_seconds'])
+    if 'accuracy' in measurement:
+        line = line + ', accuracy %s' % (json.dumps(measurement['accuracy']))
+    return line
+
+##########################################################
+# BEGIN SCRIPT
+##########################################################
+if __name__=='__main__':
+    parser = argparse.ArgumentParser(description='''Stage benchmarks.
+        Times each hot path of the stage scripts (original and current implementations) on fixed synthetic inputs and records throughput and peak memory.''')
+    parser.add_argument("--scale", type=int, default=1, help="Size of the synthetic inputs, 1 = one exhibit day of ~20 trials")
+    parser.add_argument("--repeats", type=int, default=3, help="Number of timed runs of each stage, the median is reported")
+    parser.add_argument("--stages", nargs='+', choices=list(stages.keys()), default=list(stages.keys()), help="Only run these stages")
+    parser.add_argument("--implementations", nargs='+', default=['original', 'current', 'pyramid1', 'pyramid2'], help="Only run these implementations (pyramid1 and pyramid2 are the coarse to fine modes of find_pupil)")
+    parser.add_argument("--data", default=os.path.join(benchmarks_folder, 'data'), help="Folder for the synthetic inputs, reused between runs")
+    parser.add_argument("--output", default=None, help="Json results file")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the synthetic inputs")
+    # used by run_stage_in_child
+    parser.add_argument("--child", nargs=2, metavar=('STAGE', 'IMPLEMENTATION'), help=argparse.SUPPRESS)
+    parser.add_argument("--inputs", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child is not None:
+        print(json.dumps(run_stage(args.child[0], args.child[1], args.inputs, args.scale, args.repeats)))
+        sys.exit(0)
+    started = datetime.datetime.now()
+    output_path = args.output
+    if output_path is None:
+        output_path = os.path.join(benchmarks_folder, 'results', 'stages_' + started.strftime('%Y%m%d-%H%M%S') + '.json')
+    inputs_folder = prepare_inputs(args.data, args.scale, args.seed)
+    measurements = []
+    for stage_name in args.stages:
+        original_seconds = None
+        for implementation_name in stages[stage_name]['implementations']:
+            if implementation_name not in args.implementations:
+                continue
+            measurement = run_stage_in_child(stage_name, implementation_name, inputs_folder, args.scale, args.repeats)
+            measurements.append(measurement)
+            if implementation_name == 'original' and 'error' not in measurement:
+                original_seconds = measurement['median_seconds']
+            print(format_measurement(measurement, original_seconds))
+    results = {'started': started.isoformat(timespec='seconds'), 'git': git_info(), 'machine': machine_info(),
+               'settings': {'scale': args.scale, 'repeats': args.repeats, 'seed': args.seed}, 'measurements': measurements}
+    if os.path.dirname(os.path.abspath(output_path)) and not os.path.exists(os.path.dirname(os.path.abspath(output_path))):
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)))
+    with open(output_path + '.tmp', 'w') as output_file:
+        json.dump(results, output_file, indent=1)
+    os.replace(output_path + '.tmp', output_path)
+    print('Saved stage benchmarks to %s' % (output_path))
+    if any('error' in measurement for measurement in measurements):
+        sys.exit(1)
+    # FIN
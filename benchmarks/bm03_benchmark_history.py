@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+"""
+Project: "Surprising Minds" at Sea Life Brighton, by Danbee Kim, Kerry Perkins, Clive Ramble, Hazel Garnade, Goncalo Lopes, Dario Quinones, Reanna Campbell-Russo, Robb Barrett, Martin Stopps, The EveryMind Team, and Adam Kampff.
+Benchmark: history of stage benchmark results and regression gate
+
+Keeps the json results of bm02_stage_benchmarks.py in a local history folder, one file per git commit (and machine, scale and seed).
+A new run is compared against the rolling baseline: the median of the last runs on the same machine with the same scale and seed.
+A stage of the 'current' implementation regresses when its throughput drops, or its peak memory grows, by more than the tolerance.
+The tolerance grows with the noise of the measurements (spread of the baseline runs and of the repeats of the new run), so noisy stages do not flag on every run.
+Writes a compact text report (printed) and an html report with the throughput and peak memory trend of every stage.
+Exits with code 1 if any stage regressed, so it can gate a commit or a nightly run.
+Runs from dirty working trees are compared but not recorded (their commit does not describe the code that ran).
+Runs with an unknown commit (no git) are named by their start time, and never replace each other.
+
+Usage: python bm03_benchmark_history.py [results.json]
+Without a results file, only the report of the recorded history is written.
+
+Optional flags:
+"--history": Folder with the recorded results (current default = benchmarks/results/history)
+"--window": Number of recent recorded runs in the rolling baseline (current default = 5)
+"--tolerance": Smallest relative throughput drop that is flagged (current default = 0.10)
+"--memory_tolerance": Smallest relative peak memory growth that is flagged (current default = 0.10)
+"--noise": Number of noise spreads (scaled median absolute deviations) added to the tolerance (current default = 3.0)
+"--trend": Number of recorded runs shown in the trend (current default = 20)
+"--report": Html report file (current default = report.html in the history folder)
+"--no_record": Compare and report without adding the run to the history
+"--record_dirty": Also record runs from a dirty working tree
+
+@author: Adam R Kampff and Danbee Kim
+"""
+import os
+import sys
+import glob
+import json
+import argparse
+import numpy as np
+
+###################################
+# SET CURRENT WORKING DIRECTORY
+###################################
+benchmarks_folder = os.path.dirname(os.path.abspath(__file__))
+###################################
+# FUNCTIONS
+###################################
+# only the current code is gated, the original implementations are there for comparison
+gated_implementation = 'current'
+# blocks for the text trend, lowest to highest
+spark_blocks = u'▁▂▃▄▅▆▇█'
+
+def load_results(results_path):
+    with open(results_path, 'r') as results_file:
+        return json.load(results_file)
+
+def run_key(results):
+    # runs are only comparable on the same machine with the same synthetic inputs
+    settings = results['settings']
+    return (results['machine']['hostname'], settings['scale'], settings['seed'])
+
+def commit_label(results, length=12):
+    # abbreviated commit of a run, 'unknown' for runs outside a git checkout (or without git)
+    commit = results['git']['commit']
+    return commit[:length] if commit is not None else 'unknown'
+
+def same_commit(results, other_results):
+    # runs with an unknown commit are never the same commit as another run
+    return results['git']['commit'] is not None and results['git']['commit'] == other_results['git']['commit']
+
+def history_file_name(results):
+    # named by start time (and commit, when known)
+    hostname, scale, seed = run_key(results)
+    started = results['started'].replace(':', '').replace('-', '')
+    if results['git']['commit'] is None:
+        return '%s_scale%d_seed%d_%s.json' % (hostname, scale, seed, started)
+    return '%s_scale%d_seed%d_%s_%s.json' % (hostname, scale, seed, started, commit_label(results))
+
+def load_recorded(history_folder):
+    # (history file, results) of every readable recorded run, in any order
+    recorded = []
+    for history_path in glob.glob(os.path.join(history_folder, '*.json')):
+        try:
+            recorded.append((history_path, load_results(history_path)))
+        except (ValueError, OSError):
+            print('Skipping unreadable history file %s' % (history_path))
+    return recorded
+
+def load_history(history_folder, key):
+    # recorded runs with this machine, scale and seed, oldest first
+    history = [results for history_path, results in load_recorded(history_folder) if run_key(results) == key]
+    history.sort(key=lambda results: results['started'])
+    return history
+
+def record_run(history_folder, results):
+    # one run per commit: a rerun of the same commit replaces the earlier one (runs with an unknown commit are all kept)
+    if not os.path.exists(history_folder):
+        os.makedirs(history_folder)
+    for history_path, results_before in load_recorded(history_folder):
+        if run_key(results_before) == run_key(results) and same_commit(results_before, results):
+            os.remove(history_path)
+    history_path = os.path.join(history_folder, history_file_name(results))
+    with open(history_path + '.tmp', 'w') as history_file:
+        json.dump(results, history_file, indent=1)
+    os.replace(history_path + '.tmp', history_path)
+    return history_path
+
+def measurements_by_stage(results, implementation):
+    return {measurement['stage']: measurement for measurement in results['measurements']
+            if measurement['implementation'] == implementation and 'error' not in measurement}
+
+def main_rate(measurement):
+    # frames/s where a stage has frames, else trials/s, else MB/s
+    for rate_name in ['frames_per_s', 'trials_per_s', 'MB_per_s']:
+        if rate_name in measurement['throughput']:
+            return rate_name, measurement['throughput'][rate_name]
+    return None, None
+
+def relative_spread(values):
+    # scaled median absolute deviation, relative to the median (0 for fewer than 2 values)
+    values = np.asarray([value for value in values if value is not None], dtype=float)
+    if len(values) < 2 or np.median(values) <= 0:
+        return 0.0
+    return float(1.4826*np.median(np.abs(values - np.median(values)))/np.median(values))
+
+def repeat_rates(measurement, rate):
+    # throughput of every repeat of a run, from the rate of its median
+    seconds = np.asarray(measurement['seconds'], dtype=float)
+    return list(rate*measurement['median_seconds']/seconds[seconds > 0])
+
+def compare_stage(stage_name, measurement, baseline_measurements, tolerance, memory_tolerance, noise):
+    # one row of the regression table
+    rate_name, rate = main_rate(measurement)
+    row = {'stage': stage_name, 'rate_name': rate_name, 'rate': rate, 'peak_rss_mb': measurement['peak_rss_mb'], 'baseline_runs': len(baseline_measurements), 'regressions': []}
+    baseline_rates = [main_rate(baseline)[1] for baseline in baseline_measurements if main_rate(baseline)[0] == rate_name]
+    if rate is not None and baseline_rates:
+        row['baseline_rate'] = float(np.median(baseline_rates))
+        rate_noise = np.sqrt(relative_spread(baseline_rates)**2 + relative_spread(repeat_rates(measurement, rate))**2)
+        row['rate_tolerance'] = max(tolerance, noise*rate_noise)
+        row['rate_change'] = rate/row['baseline_rate'] - 1
+        if row['rate_change'] < -row['rate_tolerance']:
+            row['regressions'].append('throughput')
+    baseline_rss = [baseline['peak_rss_mb'] for baseline in baseline_measurements if baseline['peak_rss_mb'] is not None]
+    if measurement['peak_rss_mb'] is not None and baseline_rss:
+        row['baseline_rss_mb'] = float(np.median(baseline_rss))
+        row['rss_tolerance'] = max(memory_tolerance, noise*relative_spread(baseline_rss))
+        row['rss_change'] = measurement['peak_rss_mb']/row['baseline_rss_mb'] - 1
+        if row['rss_change'] > row['rss_tolerance']:
+            row['regressions'].append('peak memory')
+    return row
+
+def compare_run(results, baseline_runs, tolerance, memory_tolerance, noise):
+    # regression rows of every gated stage of the new run, plus stages that used to run and now fail
+    new_stages = measurements_by_stage(results, gated_implementation)
+    rows = []
+    for stage_name, measurement in new_stages.items():
+        baseline_measurements = [measurements_by_stage(baseline, gated_implementation)[stage_name] for baseline in baseline_runs
+                                 if stage_name in measurements_by_stage(baseline, gated_implementation)]
+        rows.append(compare_stage(stage_name, measurement, baseline_measurements, tolerance, memory_tolerance, noise))
+    for measurement in results['measurements']:
+        if measurement['implementation'] == gated_implementation and 'error' in measurement:
+            rows.append({'stage': measurement['stage'], 'rate_name': None, 'rate': None, 'peak_rss_mb': None, 'baseline_runs': len(baseline_runs), 'regressions': ['failed: %s' % (measurement['error'])]})
+    return rows
+
+def format_change(row, change_name, tolerance_name):
+    if change_name not in row:
+        return '%16s' % ('no baseline')
+    return '%+6.1f%% (tol %2.0f%%)' % (100*row[change_name], 100*row[tolerance_name])
+
+def format_comparison(rows):
+    lines = ['%-24s %18s %18s %10s %18s  %s' % ('stage', 'throughput', 'vs baseline', 'peak RSS', 'vs baseline', 'status')]
+    for row in rows:
+        rate = '%.1f %s' % (row['rate'], row['rate_name'].replace('_per_', '/')) if row['rate'] is not None else '-'
+        rss = '%.0f MB' % (row['peak_rss_mb']) if row['peak_rss_mb'] is not None else '-'
+        status = 'REGRESSED: ' + ', '.join(row['regressions']) if row['regressions'] else 'ok'
+        lines.append('%-24s %18s %18s %10s %18s  %s' % (row['stage'], rate, format_change(row, 'rate_change', 'rate_tolerance'), rss, format_change(row, 'rss_change', 'rss_tolerance'), status))
+    return '\n'.join(lines)
+
+def stage_trends(history, trend_length):
+    # per stage: (commit, main rate, peak RSS) of each of the last recorded runs
+    trends = {}
+    for results in history[-trend_length:]:
+        for stage_name, measurement in measurements_by_stage(results, gated_implementation).items():
+            rate_name, rate = main_rate(measurement)
+            trends.setdefault(stage_name, {'rate_name': rate_name, 'points': []})
+            if rate_name is not None:
+                trends[stage_name]['rate_name'] = rate_name
+            trends[stage_name]['points'].append((commit_label(results, 8), rate, measurement['peak_rss_mb']))
+    return trends
+
+def sparkline(values):
+    values = [value for value in values if value is not None]
+    if not values:
+        return ''
+    low, high = min(values), max(values)
+    if high <= low:
+        return spark_blocks[len(spark_blocks)//2]*len(values)
+    return ''.join(spark_blocks[int(round((value - low)/(high - low)*(len(spark_blocks) - 1)))] for value in values)
+
+def format_rate(rate, rate_name):
+    # n/a for a run that has no rate for the stage
+    if rate is None:
+        return 'n/a'
+    return '%.1f %s' % (rate, rate_name.replace('_per_', '/'))
+
+def format_trends(trends):
+    lines = []
+    for stage_name, trend in trends.items():
+        rates = [point[1] for point in trend['points']]
+        rss = [point[2] for point in trend['points']]
+        lines.append('%-24s %s %-20s last %s, peak RSS %s %s' % (stage_name, 'throughput', sparkline(rates), format_rate(rates[-1], trend['rate_name']),
+                                                                    sparkline(rss), '%.0f MB' % (rss[-1]) if rss[-1] is not None else '-'))
+    return '\n'.join(lines)
+
+def svg_polyline(values, width=240, height=40, color='#1f77b4'):
+    # small inline trend chart for the html report
+    points = [(index, value) for index, value in enumerate(values) if value is not None]
+    if not points:
+        return ''
+    low, high = min(value for index, value in points), max(value for index, value in points)
+    x_step = width/max(len(values) - 1, 1)
+    y_range = high - low if high > low else 1.0
+    coordinates = ' '.join('%.1f,%.1f' % (index*x_step, height - 2 - (value - low)/y_range*(height - 4)) for index, value in points)
+    return '<svg width="%d" height="%d"><polyline fill="none" stroke="%s" stroke-width="1.5" points="%s"/></svg>' % (width, height, color, coordinates)
+
+def html_report(key, rows, trends):
+    hostname, scale, seed = key
+    html = ['<!DOCTYPE html><html><head><meta charset="utf-8"><title>Stage benchmark history</title>',
+            '<style>body{font-family:sans-serif;font-size:13px} td,th{padding:3px 8px;text-align:right} td:first-child,th:first-child{text-align:left} .regressed{color:#c00;font-weight:bold}</style></head><body>',
+            '<h2>Stage benchmark history: %s, scale %d, seed %d</h2>' % (hostname, scale, seed)]
+    if rows:
+        html.append('<h3>Latest run vs rolling baseline</h3><table><tr><th>stage</th><th>throughput</th><th>vs baseline</th><th>peak RSS</th><th>vs baseline</th><th>status</th></tr>')
+        for row in rows:
+            rate = '%.1f %s' % (row['rate'], row['rate_name'].replace('_per_', '/')) if row['rate'] is not None else '-'
+            rss = '%.0f MB' % (row['peak_rss_mb']) if row['peak_rss_mb'] is not None else '-'
+            status = '<span class="regressed">REGRESSED: %s</span>' % (', '.join(row['regressions'])) if row['regressions'] else 'ok'
+            html.append('<tr><td>%s</td><td>%s</td><td>%s</td><td>%s</td><td>%s</td><td>%s</td></tr>' % (row['stage'], rate, format_change(row, 'rate_change', 'rate_tolerance'), rss, format_change(row, 'rss_change', 'rss_tolerance'), status))
+        html.append('</table>')
+    html.append('<h3>Trend of the recorded runs (oldest to newest)</h3><table><tr><th>stage</th><th>throughput</th><th>last</th><th>peak RSS</th><th>last</th><th>commits</th></tr>')
+    for stage_name, trend in trends.items():
+        rates = [point[1] for point in trend['points']]
+        rss = [point[2] for point in trend['points']]
+        html.append('<tr><td>%s</td><td>%s</td><td>%s</td><td>%s</td><td>%s</td><td>%s</td></tr>' % (stage_name, svg_polyline(rates), format_rate(rates[-1], trend['rate_name']),
+                    svg_polyline(rss, color='#ff7f0e'), '%.0f MB' % (rss[-1]) if rss[-1] is not None else '-', ' '.join(point[0] for point in trend['points'])))
+    html.append('</table></body></html>')
+    return '\n'.join(html)
+
+##########################################################
+# BEGIN SCRIPT
+##########################################################
+if __name__=='__main__':
+    parser = argparse.ArgumentParser(description='''Stage benchmark history.
+        Records stage benchmark results per git commit, compares a new run against the rolling baseline and reports throughput and peak memory trends.''')
+    parser.add_argument("results", nargs='?', default=None, help="Json results file of bm02_stage_benchmarks.py")
+    parser.add_argument("--history", default=os.path.join(benchmarks_folder, 'results', 'history'), help="Folder with the recorded results")
+    parser.add_argument("--window", type=int, default=5, help="Number of recent recorded runs in the rolling baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Smallest relative throughput drop that is flagged")
+    parser.add_argument("--memory_tolerance", type=float, default=0.10, help="Smallest relative peak memory growth that is flagged")
+    parser.add_argument("--noise", type=float, default=3.0, help="Number of noise spreads added to the tolerance")
+    parser.add_argument("--trend", type=int, default=20, help="Number of recorded runs shown in the trend")
+    parser.add_argument("--report", default=None, help="Html report file")
+    parser.add_argument("--no_record", action='store_true', help="Compare and report without adding the run to the history")
+    parser.add_argument("--record_dirty", action='store_true', help="Also record runs from a dirty working tree")
+    args = parser.parse_args()
+    report_path = args.report if args.report is not None else os.path.join(args.history, 'report.html')
+    rows = []
+    if args.results is not None:
+        results = load_results(args.results)
+        key = run_key(results)
+        # the rolling baseline: recent recorded runs of other commits
+        history = [recorded for recorded in load_history(args.history, key) if not same_commit(recorded, results)]
+        baseline_runs = history[-args.window:]
+        rows = compare_run(results, baseline_runs, args.tolerance, args.memory_tolerance, args.noise)
+        print('Run of %s (commit %s%s) vs baseline of %d recorded run(s)' % (results['started'], commit_label(results), ', dirty' if results['git']['dirty'] else '', len(baseline_runs)))
+        print(format_comparison(rows))
+        if args.no_record:
+            print('Not recorded (--no_record)')
+        elif results['git']['dirty'] and not args.record_dirty:
+            print('Not recorded: working tree was dirty (use --record_dirty to record anyway)')
+        else:
+            print('Recorded in %s' % (record_run(args.history, results)))
+    else:
+        # report only: the machine, scale and seed of the most recent recorded run
+        recorded = load_recorded(args.history)
+        if not recorded:
+            print('No readable recorded runs in %s' % (args.history))
+            sys.exit(0)
+        key = run_key(max((results for history_path, results in recorded), key=lambda results: results['started']))
+    trends = stage_trends(load_history(args.history, key), args.trend)
+    if trends:
+        print('Trend of the last %d recorded run(s):' % (max(len(trend['points']) for trend in trends.values())))
+        print(format_trends(trends))
+    if os.path.dirname(os.path.abspath(report_path)) and not os.path.exists(os.path.dirname(os.path.abspath(report_path))):
+        os.makedirs(os.path.dirname(os.path.abspath(report_path)))
+    with open(report_path + '.tmp', 'w', encoding='utf-8') as report_file:
+        report_file.write(html_report(key, rows, trends))
+    os.replace(report_path + '.tmp', report_path)
+    print('Saved report to %s' % (report_path))
+    regressed = [row['stage'] for row in rows if row['regressions']]
+    if regressed:
+        print('%d stage(s) regressed: %s' % (len(regressed), ', '.join(regressed)))
+        sys.exit(1)
+    # FIN
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Project: "Surprising Minds" at Sea Life Brighton, by Danbee Kim, Kerry Perkins, Clive Ramble, Hazel Garnade, Goncalo Lopes, Dario Quinones, Reanna Campbell-Russo, Robb Barrett, Martin Stopps, The EveryMind Team, and Adam Kampff.
+Benchmark data: generate a synthetic Surprising Minds dataset for scale and regression testing
+
+Writes, under the output folder:
+SurprisingMinds/SurprisingMinds_YYYY-MM-DD.zip (one folder per trial with world/righteye/lefteye .avi and timestamp .csv files)
+dataPythonWorkflows/SurprisingMinds_YYYY-MM-DD/Analysis/csv (pupil csv files in the format written by find_pupil)
+dataPythonWorkflows/rawStimLums (luminance per frame of each raw stimulus video)
+LuminancePerFrame (*_world_LuminancePerFrame.csv of every trial)
+groundTruth/SurprisingMinds_YYYY-MM-DD (true pupil position and shape in every eye video frame, .npz per trial and eye)
+intermediates (empty, for stage outputs)
+Point the load_data() functions of the stage scripts at these folders. Like the real dataset, the stage scripts skip the first day.
+Days that already have a zip are skipped, so an interrupted run can be continued.
+
+Optional flags:
+"--days": Number of exhibit days (current default = 1)
+"--trials_per_day": Mean number of trials per day (current default = 20)
+"--start_date": Date of the first day (current default = 2017-07-01)
+"--eye_size": Eye video frame size, widthxheight (current default = 800x600)
+"--world_size": World video frame size, widthxheight (current default = 160x120)
+"--no_videos": Leave the .avi files out of the zips (much faster, for stages that only read csv files)
+"--seed": Random seed, the same seed gives the same dataset (current default = 0)
+"--workers": Number of days generated in parallel (current default = 1)
+
+@author: Adam R Kampff and Danbee Kim
+"""
+import os
+import sys
+import datetime
+import argparse
+# make the shared surprisingMinds package (in the repo root) importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from surprisingMinds.syntheticData import dataset_folders, make_raw_stim_luminances, write_raw_stim_luminances, make_day
+
+###################################
+# FUNCTIONS
+###################################
+def frame_size(size_string):
+    width, height = size_string.lower().split('x')
+    return (int(width), int(height))
+
+def make_one_day(output_folder, day_date, trials_per_day, raw_stim_lums, seed, day_number, eye_size, world_size, write_videos):
+    if make_day(output_folder, day_date, trials_per_day, raw_stim_lums, seed, day_number, eye_size, world_size, write_videos):
+        print('Generated %s' % (day_date.strftime('%Y-%m-%d')))
+    else:
+        print('%s already exists, skipping' % (day_date.strftime('%Y-%m-%d')))
+
+##########################################################
+# BEGIN SCRIPT
+##########################################################
+if __name__=='__main__':
+    parser = argparse.ArgumentParser(description='''Generate a synthetic Surprising Minds dataset.
+        Same on-disk layout as the real exhibit data, with known pupil trajectories in the eye videos.''')
+    parser.add_argument("output", help="Folder for the synthetic dataset")
+    parser.add_argument("--days", type=int, default=1, help="Number of exhibit days")
+    parser.add_argument("--trials_per_day", type=float, default=20, help="Mean number of trials per day")
+    parser.add_argument("--start_date", default='2017-07-01', help="Date of the first day, YYYY-MM-DD")
+    parser.add_argument("--eye_size", type=frame_size, default='800x600', help="Eye video frame size, widthxheight")
+    parser.add_argument("--world_size", type=frame_size, default='160x120', help="World video frame size, widthxheight")
+    parser.add_argument("--no_videos", action='store_true', help="Leave the .avi files out of the zips")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed, the same seed gives the same dataset")
+    parser.add_argument("--workers", type=int, default=1, help="Number of days generated in parallel")
+    args = parser.parse_args()
+    ###################################
+    # OUTPUT FOLDERS
+    ###################################
+    folders = dataset_folders(args.output)
+    for folder in folders.values():
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+    print('Writing synthetic dataset to %s' % (args.output))
+    ###################################
+    # RAW STIMULUS LUMINANCE
+    ###################################
+    raw_stim_lums = make_raw_stim_luminances(args.seed)
+    write_raw_stim_luminances(raw_stim_lums, folders['raw_stim_lums'])
+    ###################################
+    # EXHIBIT DAYS
+    ###################################
+    start_date = datetime.datetime.strptime(args.start_date, '%Y-%m-%d').date()
+    # day numbers start at 1, random stream 0 is used for the raw stimulus luminance
+    day_dates = [(day_number + 1, start_date + datetime.timedelta(days=day_number)) for day_number in range(args.days)]
+    if args.workers > 1:
+        from joblib import Parallel, delayed
+        Parallel(n_jobs=args.workers)(delayed(make_one_day)(args.output, day_date, args.trials_per_day, raw_stim_lums, args.seed, day_number, args.eye_size, args.world_size, not args.no_videos) for day_number, day_date in day_dates)
+    else:
+        for day_number, day_date in day_dates:
+            make_one_day(args.output, day_date, args.trials_per_day, raw_stim_lums, args.seed, day_number, args.eye_size, args.world_size, not args.no_videos)
+    print('Finished synthetic dataset: %d days' % (args.days))
+    # FIN
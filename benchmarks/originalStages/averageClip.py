@@ -0,0 +1,216 @@
+### --------------------------------------------------------------------------- ###
+# original pupil detection of Average_Clip_Per_Day_PupilDetection.py, for side by side benchmarks
+# time buckets are a dict searched front to back for every frame
+# np.int replaced by int (removed from numpy), float circle coordinates made int for cv2 drawing functions
+### --------------------------------------------------------------------------- ###
+import os
+import math
+import datetime
+import numpy as np
+
+def make_time_buckets(start_timestamp, bucket_size_ms, end_timestamp, fill_pattern): 
+    start_timestamp = start_timestamp.split('+')[0][:-3]
+    end_timestamp = end_timestamp.split('+')[0][:-3]
+    buckets_start_time = datetime.datetime.strptime(start_timestamp, "%Y-%m-%dT%H:%M:%S.%f")
+    buckets_end_time = datetime.datetime.strptime(end_timestamp, "%Y-%m-%dT%H:%M:%S.%f")
+
+    current_bucket = buckets_start_time
+    time_buckets = []
+    window = datetime.timedelta(milliseconds=bucket_size_ms)
+    while current_bucket <= buckets_end_time:
+        time_buckets.append(current_bucket)
+        current_bucket = current_bucket + window
+
+    bucket_list = {key:fill_pattern.copy() for key in time_buckets}
+    # -5 remains in a time bucket, this means no 'near-enough timestamp' frame was found in video
+
+    return bucket_list
+
+def find_nearest_timestamp_key(timestamp_to_check, dict_of_timestamps, time_window):
+    for key in dict_of_timestamps.keys():
+        if key <= timestamp_to_check <= (key + time_window):
+            return key
+
+def find_darkest_circle(list_of_circles, source_image):
+    import cv2
+    #print("Finding darkest circle in {list}...".format(list=list_of_circles))
+    # starting parameters
+    darkest_intensity = 255
+    darkest_index = 0
+    # check that source_image is a grayscaled image
+    if len(source_image.shape) > 2: 
+        print("{Image} is not grayscale!".format(Image=source_image))
+        exit()
+    for i in range(len(list_of_circles)):
+        # make a copy of the source image
+        copied_image = source_image.copy()
+        # create a mask image that is the same size as source_image
+        mask = np.zeros(copied_image.shape, copied_image.dtype)
+        # get center coordinates and radius of circle from list_of_circle
+        # HoughCircles gives float circles, drawing functions need whole pixels
+        center = (int(list_of_circles[i][0]), int(list_of_circles[i][1]))
+        radius = int(list_of_circles[i][2])
+        #print("Center: {x},{y}".format(x=center[0], y=center[1]))
+        # draw mask circle at coordinates and w/radius of circle from list_of_circles
+        mask_circle = cv2.circle(mask, center, radius, 255, -1)
+        ## for debugging
+        # this_circle = cv2.circle(copied_image, center, radius, (0, 0, 255), 2)
+        # plt.imshow(copied_image)
+        # plt.show()
+        # get coordinates of mask circle pixels
+        where = np.where(mask==255)
+        # find those same coordinates in source_image
+        intensity_inside_circle_on_source_image = source_image[where[0], where[1]]
+        # take average of those pixels in source_image
+        average_intensity = np.average(intensity_inside_circle_on_source_image)
+        #print("Average intensity of circle {number}: {intensity}".format(number=i, intensity=average_intensity))
+        # check this circle's intensity against darkest circle found so far
+        if (average_intensity < darkest_intensity):
+            darkest_intensity = average_intensity
+            darkest_index = i
+    #print("Darkest circle: {number}, intensity {intensity}".format(number=darkest_index, intensity=darkest_intensity))
+    return list_of_circles[darkest_index]
+
+def find_pupil(which_eye, which_stimuli, trial_number, video_path, video_timestamps, align_frame, csv_path, bucket_size_ms):
+    import cv2
+    ### row = timestamp, not frame #
+    # Open eye video and world video
+    video = cv2.VideoCapture(video_path)
+    # Jump to specific frame (position) for alignment purposes 
+    ret = video.set(cv2.CAP_PROP_POS_FRAMES, align_frame)
+    # Open display window for debugging
+    video_name = video_path.split(os.sep)[-1]
+    debug_name = "Eye"+"_"+video_name
+    cv2.namedWindow(debug_name)
+    # each time bucket = 4ms (eye cameras ran at 60fps, aka 16.6666 ms per frame)
+    # octobpus clip to thank you screen is 16.2 seconds
+    first_timestamp = video_timestamps[align_frame]
+    last_timestamp = video_timestamps[-1]
+    initialize_pattern = [-5,-5,-5,-5,-5,-5]
+    pupil_buckets = make_time_buckets(first_timestamp, bucket_size_ms, last_timestamp, initialize_pattern)
+
+    # Loop through 4ms time buckets of eye video to find nearest frame and save pupil xy positon and area
+    timestamps_to_check = video_timestamps[align_frame:]
+    for timestamp in timestamps_to_check:
+        # find the time bucket into which this frame falls
+        timestamp = timestamp.split('+')[0][:-3]
+        timestamp_dt = datetime.datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S.%f")
+        bucket_window = datetime.timedelta(milliseconds=bucket_size_ms)
+        current_key = find_nearest_timestamp_key(timestamp_dt, pupil_buckets, bucket_window)
+        # Read frame at current position
+        ret, frame = video.read()
+        mask = np.copy(frame)
+        # Make sure the frame exists!
+        if frame is not None:
+            # Magically find pupil...
+            # Convert to grayscale
+            gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+            # Median blur
+            blurred = cv2.medianBlur(gray, 25)
+            # Hough circle detection
+            rows = blurred.shape[0]
+            ## sometimes the image seems really clean and easy to find the pupil and yet it still fails
+            circles = cv2.HoughCircles(blurred, cv2.HOUGH_GRADIENT, 1.0, rows / 9.0,
+                                    param1=55, param2=20,
+                                    minRadius=10, maxRadius=150)
+            # If there are no circles, then what??
+            if circles is not None:
+                #print("Circles found: {circles}".format(circles=circles))
+                # check that we are taking the darkest circle
+                darkest_circle = find_darkest_circle(circles[0], blurred)
+                #print("Darkest circle: {circle}".format(circle=darkest_circle))
+                # Using the best circle...crop around center
+                # Threshold
+                # Fit an ellipse
+                # Crop
+                eye_circle = np.uint16(np.around(darkest_circle))
+                left = eye_circle[0] - 64
+                top = eye_circle[1] - 64
+                crop_size = 128
+                # Check boundarys of image
+                if( (left >= 0) and (top >= 0) and ((left + crop_size) < 800) and ((top + crop_size) < 600) ):
+                    cropped = blurred[top:(top + crop_size), left:(left+crop_size)]
+                    # Compute average and stdev of all pixel luminances along border
+                    ## this currently averages the rightmost and leftmost edges of the cropped window, because we assume that these pixels are not the pupil
+                    avg = (np.mean(cropped[:, 0]) + np.mean(cropped[:, -1])) / 2
+                    std = (np.std(cropped[:, 0]) + np.std(cropped[:, -1])) / 2
+                    ## Find shape of pupil
+                    # Threshold
+                    thresholded = np.uint8(cv2.threshold(cropped, avg-(std*4.5), 255, cv2.THRESH_BINARY_INV)[1])
+                    # Find contours
+                    contours, heirarchy = cv2.findContours(thresholded, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+                    # if more than one contour
+                    if len(contours) > 0:
+                        # Get largest contour
+                        largest_contour = max(contours, key=cv2.contourArea)
+                        # sanity check size of largest contour
+                        ## SHOULD MAKE SURE THAT LARGEST CONTOUR ISN'T BIGGER THAN CROPPED
+                        #####
+                        # make sure contour is large enough to fit an ellipse to it
+                        if(len(largest_contour) > 5):
+                            # Fit ellipse to largest contour
+                            ellipse = cv2.fitEllipse(largest_contour)
+                            # Shift ellipse back to full frame coordinates
+                            shifted_center = (int(ellipse[0][0]) + left, int(ellipse[0][1]) + top)
+                            # Draw circles
+                            frame_copy = frame.copy()
+                            circles = np.uint16(np.around(circles))
+                            for i in circles[0, :]:
+                                center = (i[0], i[1])
+                                # circle center
+                                cv2.circle(frame_copy, center, 5, (0, 100, 100), 1)
+                                # circle outline
+                                radius = i[2]
+                                cv2.circle(frame_copy, center, radius, (255, 0, 255), 1)
+                            # Draw ellipse around largest contour
+                            axes = (int(ellipse[1][0]/2),int(ellipse[1][1]/2)) 
+                            angle = int(ellipse[2])
+                            frame_copy = cv2.ellipse(frame_copy, shifted_center, axes, angle, 0, 360, (0, 255, 0), 3, cv2.LINE_AA, 0)
+                            # Draw debugging circle around darkest circle
+                            axes = (int(darkest_circle[2]), int(darkest_circle[2]))
+                            angle = 0
+                            frame_copy = cv2.ellipse(frame_copy, (int(darkest_circle[0]), int(darkest_circle[1])), axes, angle, 0, 360, (0, 0, 255), 2, cv2.LINE_AA, 0)
+                            # Save Data
+                            darkest_circle_area = np.pi*(darkest_circle[2])**2
+                            # save data from both findContours and find_darkest_circle
+                            pupil_buckets[current_key][0] = shifted_center[0]
+                            pupil_buckets[current_key][1] = shifted_center[1]
+                            pupil_buckets[current_key][2] = cv2.contourArea(largest_contour)
+                            pupil_buckets[current_key][3] = darkest_circle[0]
+                            pupil_buckets[current_key][4] = darkest_circle[1]
+                            pupil_buckets[current_key][5] = (darkest_circle[2]**2) * math.pi
+                            # Fill debug displays and show
+                            cv2.imshow(debug_name, frame_copy)
+                            ret = cv2.waitKey(1)
+                        else:
+                            #print("Pupil Size: n/a (too small)")
+                            pupil_buckets[current_key][2] = -1
+                            pupil_buckets[current_key][5] = -1
+                    else:
+                        #print("Pupil Size: n/a (pupil off screen)")
+                        pupil_buckets[current_key][2] = -2
+                        pupil_buckets[current_key][5] = -2
+                else:
+                    #print("Pupil Size: n/a (no contour)")
+                    pupil_buckets[current_key][2] = -3
+                    pupil_buckets[current_key][5] = -3
+            else:
+                #print("Pupil Size: n/a (no circles)")
+                pupil_buckets[current_key][2] = -4
+                pupil_buckets[current_key][5] = -4
+    # Save pupil size data
+    time_chunks = []
+    for key in pupil_buckets.keys():
+        time_chunks.append(key)
+    time_chunks = sorted(time_chunks)
+    pupils = []
+    for time in time_chunks:
+        pupil = pupil_buckets[time]
+        pupils.append(pupil)
+    #print("Saving csv of positions and areas for {eye} eye...".format(eye=which_eye))
+    padded_filename = which_eye + "_" + which_stimuli + "_" + str(trial_number).zfill(4) + ".csv"
+    csv_file = os.path.join(csv_path, padded_filename)
+    np.savetxt(csv_file, pupils, fmt='%.2f', delimiter=',')
+    # release video capture
+    video.release()
+    cv2.destroyAllWindows()
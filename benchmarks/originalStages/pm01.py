@@ -0,0 +1,154 @@
+### --------------------------------------------------------------------------- ###
+# original movement, average motion and saccade finding of pm01_calc_mvmnt.py, for side by side benchmarks
+### --------------------------------------------------------------------------- ###
+import numpy as np
+from itertools import groupby
+from operator import itemgetter
+from collections import defaultdict
+
+def threshold_to_nan(input_array, threshold, upper_or_lower):
+    for index in range(len(input_array)): 
+        if upper_or_lower=='upper':
+            if np.isnan(input_array[index])==False and input_array[index]>threshold:
+                input_array[index] = np.nan
+        if upper_or_lower=='lower':
+            if np.isnan(input_array[index])==False and input_array[index]<threshold:
+                input_array[index] = np.nan
+    return input_array
+
+def find_windowed_peaks(time_bucket_dict, window, threshold):
+    windowed_peaks = {}
+    key_list = []
+    for ptime in time_bucket_dict.keys():
+        key_list.append(ptime)
+    key_list.sort()
+    for k,g in groupby(enumerate(key_list), lambda ix: ix[0] - ix[1]):
+        consecutive_ptimes = list(map(itemgetter(1), g))
+        #print(consecutive_ptimes)
+        if len(consecutive_ptimes)<=window:
+            max_val = threshold
+            this_group_count = 0
+            for time in consecutive_ptimes:
+                this_group_count = this_group_count + time_bucket_dict[time]
+            if this_group_count>max_val:
+                max_time = np.median(consecutive_ptimes)
+                windowed_peaks[int(max_time)] = this_group_count
+        else:
+            max_val = threshold
+            max_times = {}
+            for time in consecutive_ptimes:
+                center = time
+                start = int(center-(window/2))
+                end = int(center+(window/2))
+                this_group_count = 0
+                for t in range(int(start),int(end)):
+                    this_group_count = this_group_count + time_bucket_dict.get(t,0)
+                if this_group_count>max_val:
+                    if not max_times:
+                        max_times[center] = this_group_count
+                        max_val = this_group_count
+                    else:
+                        overlap = [x for x in max_times.keys() if start<x<end]
+                        filtered_overlap = {}
+                        for o in overlap:
+                            temp_val = max_times.pop(o)
+                            if temp_val>this_group_count:
+                                filtered_overlap[o] = [temp_val]
+                        if not filtered_overlap:
+                            max_times[center] = this_group_count
+                            max_val = this_group_count
+                        else:
+                            for f in filtered_overlap.items():
+                                max_times[f[0]] = f[1]
+            for max_time in max_times.keys():
+                windowed_peaks[max_time] = max_times[max_time]
+    return windowed_peaks
+
+def calc_mvmnt_from_pos(list_of_positon_arrays, nans_threshold, movement_threshold_upper, movement_threshold_lower):
+    this_stim_movements = []
+    for trial in list_of_positon_arrays:
+        trial_movements_min_len = len(trial)
+        this_trial_movement = []
+        nans_in_a_row = 0
+        prev = np.nan
+        for i in range(len(trial)):
+            now = trial[i]
+            #print("now: "+str(now))
+            #print("prev: "+str(prev))
+            if np.isnan(now):
+                # keep the nan to understand where the dropped frames are
+                this_trial_movement.append(np.nan)
+                nans_in_a_row = nans_in_a_row + 1
+                continue
+            if nans_in_a_row>(nans_threshold):
+                break
+            if i==0:
+                this_trial_movement.append(0)
+                prev = now
+                continue
+            if not np.isnan(prev):
+                movement = now - prev
+                this_trial_movement.append(movement)
+                prev = now
+                nans_in_a_row = 0 
+            #print("movements: " + str(this_trial_movement))
+            #print("consecutive nans: " + str(nans_in_a_row))
+        # filter out movements too large to be realistic saccades (120 pixels)
+        trial_movement_array = np.array(this_trial_movement)
+        trial_movement_array = threshold_to_nan(trial_movement_array, movement_threshold_upper, 'upper')
+        trial_movement_array = threshold_to_nan(trial_movement_array, movement_threshold_lower, 'lower')
+        this_stim_movements.append(trial_movement_array)  
+    # filter for trial movements that are less than 4000 bins long
+    output = [x for x in this_stim_movements if len(x)>=trial_movements_min_len]
+    return output
+
+def calc_avg_motion_and_peaks(list_of_movement_arrays, window):
+    from scipy.signal import savgol_filter, find_peaks
+    total_motion = np.zeros(len(list_of_movement_arrays[0]))
+    nan_count = np.zeros(len(list_of_movement_arrays[0]))
+    # for each frame, sum the abs(movements) on that frame
+    for trial in list_of_movement_arrays:
+        for t in range(len(trial)):
+            if np.isnan(trial[t]):
+                nan_count[t] = nan_count[t] + 1
+            if not np.isnan(trial[t]):
+                total_motion[t] = total_motion[t] + abs(trial[t])
+    avg_motion = np.zeros(len(list_of_movement_arrays[0]))
+    for f in range(len(total_motion)):
+        valid_subjects_this_tbucket = len(list_of_movement_arrays) - nan_count[f]
+        avg_motion[f] = total_motion[f]/valid_subjects_this_tbucket
+    # smooth the average motion
+    # smoothing window must be odd!
+    # apply savitzky-golay filter to smooth
+    avg_motion_smoothed = savgol_filter(avg_motion, window, 3)
+    # find peaks in average motion
+    peaks, _ = find_peaks(avg_motion_smoothed, height=(2,10), prominence=0.75)
+    return avg_motion_smoothed, peaks
+
+def find_saccades(list_of_movement_arrays, saccade_threshold, raw_count_threshold, window_size, windowed_count_threshold):
+    all_trials_peaks = []
+    for trial in range(len(list_of_movement_arrays)):
+        all_trials_peaks.append([])
+        this_trial = list_of_movement_arrays[trial]
+        for time_bucket in range(len(this_trial)):
+            # find timebuckets where abs(movement)>threshold
+            if abs(this_trial[time_bucket])>=saccade_threshold:
+                all_trials_peaks[trial].append(time_bucket)
+    # count number of subjects who had peaks in the same timebuckets
+    trial_peaks_totals = {}
+    trial_peaks_totals = defaultdict(lambda:0, trial_peaks_totals)
+    for trial in all_trials_peaks:
+        for tbucket in trial:
+            trial_peaks_totals[tbucket] = trial_peaks_totals[tbucket] + 1
+    # filter for timebuckets when "enough" subjects had peaks
+    peak_tbuckets_filtered = {}
+    # combine counts of peaks within time windows
+    for key in trial_peaks_totals.keys():
+        count = trial_peaks_totals[key]
+        if count>=raw_count_threshold:
+            #print(t, count)
+            peak_tbuckets_filtered[key] = count
+    # combine counts of peaks within time windows
+    peak_tbuckets_windowed = find_windowed_peaks(peak_tbuckets_filtered, window_size, windowed_count_threshold)
+    saccades = {tbucket:total for tbucket,total in peak_tbuckets_windowed.items()}
+    return saccades
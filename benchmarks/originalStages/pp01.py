@@ -0,0 +1,159 @@
+### --------------------------------------------------------------------------- ###
+# original pupil csv loading and downsampling of pp01_extract_pupil_CSV_downsample.py, for side by side benchmarks
+# np.float replaced by float (removed from numpy)
+### --------------------------------------------------------------------------- ###
+import os
+import glob
+import math
+import logging
+import itertools
+import numpy as np
+
+def load_daily_pupils(which_eye, day_csv_folder_path, max_no_of_buckets, original_bucket_size, new_bucket_size, bad_trial_cutoff): 
+    if (new_bucket_size % original_bucket_size == 0):
+        new_sample_rate = int(new_bucket_size/original_bucket_size)
+        max_no_of_buckets = int(max_no_of_buckets)
+        #print("New bucket window = {size}, need to average every {sample_rate} buckets".format(size=new_bucket_size, sample_rate=new_sample_rate))
+        # List all csv trial files
+        trial_files = glob.glob(day_csv_folder_path + os.sep + which_eye + "*.csv")
+        num_trials = len(trial_files)
+        good_trials = num_trials
+        # contours
+        data_contours_X = np.empty((num_trials, max_no_of_buckets+1))
+        data_contours_X[:] = -6
+        data_contours_Y = np.empty((num_trials, max_no_of_buckets+1))
+        data_contours_Y[:] = -6
+        data_contours = np.empty((num_trials, max_no_of_buckets+1))
+        data_contours[:] = -6
+        # circles
+        data_circles_X = np.empty((num_trials, max_no_of_buckets+1))
+        data_circles_X[:] = -6
+        data_circles_Y = np.empty((num_trials, max_no_of_buckets+1))
+        data_circles_Y[:] = -6
+        data_circles = np.empty((num_trials, max_no_of_buckets+1))
+        data_circles[:] = -6
+
+        index = 0
+        for trial_file in trial_files:
+            trial_name = trial_file.split(os.sep)[-1]
+            trial_stimulus = trial_name.split("_")[1]
+            trial_stim_number = float(trial_stimulus[-2:])
+            trial = np.genfromtxt(trial_file, dtype=float, delimiter=",")
+            # if there are too many -5 rows (frames) in a row, don't analyse this trial
+            bad_frame_count = []
+            for frame in trial:
+                if frame[0]==-5:
+                    bad_frame_count.append(1)
+                else:
+                    bad_frame_count.append(0)
+            clusters =  [(x[0], len(list(x[1]))) for x in itertools.groupby(bad_frame_count)]
+            longest_cluster = 0
+            for cluster in clusters:
+                if cluster[0] == 1 and cluster[1]>longest_cluster:
+                    longest_cluster = cluster[1]
+            #print("For trial {name}, the longest cluster is {length}".format(name=trial_name, length=longest_cluster))
+            if longest_cluster<bad_trial_cutoff:
+                no_of_samples = math.ceil(len(trial)/new_sample_rate)
+                this_trial_contours_X = []
+                this_trial_contours_Y = []
+                this_trial_contours = []
+                this_trial_circles_X = []
+                this_trial_circles_Y = []
+                this_trial_circles = []
+                # loop through the trial at given sample rate
+                for sample in range(no_of_samples):
+                    start = sample * new_sample_rate
+                    end = (sample * new_sample_rate) + (new_sample_rate - 1)
+                    this_slice = trial[start:end]
+                    for line in this_slice:
+                        if (line<0).any():
+                            line[:] = np.nan
+                        if (line>15000).any():
+                            line[:] = np.nan
+                    # extract pupil sizes and locations from valid time buckets
+                    this_slice_contours_X = []
+                    this_slice_contours_Y = []
+                    this_slice_contours = []
+                    this_slice_circles_X = []
+                    this_slice_circles_Y = []
+                    this_slice_circles = []
+                    for frame in this_slice:
+                        # contour x,y
+                        ## DON'T PAIR X-Y YET
+                        this_slice_contours_X.append(frame[0])
+                        this_slice_contours_Y.append(frame[1])
+                        # contour area
+                        this_slice_contours.append(frame[2])
+                        # circles x,y
+                        ## DON'T PAIR X-Y YET
+                        this_slice_circles_X.append(frame[3])
+                        this_slice_circles_Y.append(frame[4])
+                        # circles area
+                        this_slice_circles.append(frame[5])
+                    # average the pupil size and movement in this sample slice
+                    this_slice_avg_contour_X = np.nanmean(this_slice_contours_X)
+                    this_slice_avg_contour_Y = np.nanmean(this_slice_contours_Y)
+                    this_slice_avg_contour = np.nanmean(this_slice_contours) 
+                    this_slice_avg_circle_X = np.nanmean(this_slice_circles_X)
+                    this_slice_avg_circle_Y = np.nanmean(this_slice_circles_Y)       
+                    this_slice_avg_circle = np.nanmean(this_slice_circles)
+                    # append to list of downsampled pupil sizes and movements
+                    this_trial_contours_X.append(this_slice_avg_contour_X)
+                    this_trial_contours_Y.append(this_slice_avg_contour_Y)
+                    this_trial_contours.append(this_slice_avg_contour)
+                    this_trial_circles_X.append(this_slice_avg_circle_X)
+                    this_trial_circles_Y.append(this_slice_avg_circle_Y)
+                    this_trial_circles.append(this_slice_avg_circle)
+                # Find count of bad measurements
+                bad_count_contours_X = sum(np.isnan(this_trial_contours_X))
+                bad_count_contours_Y = sum(np.isnan(this_trial_contours_Y))
+                bad_count_contours = sum(np.isnan(this_trial_contours))
+                bad_count_circles_X = sum(np.isnan(this_trial_circles_X))
+                bad_count_circles_Y = sum(np.isnan(this_trial_circles_Y))
+                bad_count_circles = sum(np.isnan(this_trial_circles))
+                # if more than half of the trial is NaN, then throw away this trial
+                # otherwise, if it's a good enough trial...
+                bad_threshold = no_of_samples/2
+                if (bad_count_contours_X<bad_threshold): 
+                    this_chunk_length = len(this_trial_contours_X)
+                    data_contours_X[index][0:this_chunk_length] = this_trial_contours_X
+                    data_contours_X[index][-1] = trial_stim_number
+                if (bad_count_contours_Y<bad_threshold): 
+                    this_chunk_length = len(this_trial_contours_Y)
+                    data_contours_Y[index][0:this_chunk_length] = this_trial_contours_Y
+                    data_contours_Y[index][-1] = trial_stim_number
+                if (bad_count_contours<bad_threshold) or (bad_count_circles<bad_threshold): 
+                    this_chunk_length = len(this_trial_contours)
+                    data_contours[index][0:this_chunk_length] = this_trial_contours
+                    data_contours[index][-1] = trial_stim_number
+                if (bad_count_circles_X<bad_threshold): 
+                    this_chunk_length = len(this_trial_circles_X)
+                    data_circles_X[index][0:this_chunk_length] = this_trial_circles_X
+                    data_circles_X[index][-1] = trial_stim_number
+                if (bad_count_circles_Y<bad_threshold): 
+                    this_chunk_length = len(this_trial_circles_Y)
+                    data_circles_Y[index][0:this_chunk_length] = this_trial_circles_Y
+                    data_circles_Y[index][-1] = trial_stim_number
+                if (bad_count_circles<bad_threshold): 
+                    this_chunk_length = len(this_trial_circles)
+                    data_circles[index][0:this_chunk_length] = this_trial_circles
+                    data_circles[index][-1] = trial_stim_number
+                index = index + 1
+            else:
+                #print("Discarding trial {name}".format(name=trial_name))
+                index = index + 1
+                good_trials = good_trials - 1
+        return data_contours_X, data_contours_Y, data_contours, data_circles_X, data_circles_Y, data_circles, num_trials, good_trials
+    else: 
+        print("Sample rate must be a multiple of {bucket}".format(bucket=original_bucket_size))
+        logging.info("Sample rate must be a multiple of {bucket}".format(bucket=original_bucket_size))
+
+def threshold_to_nan(input_array, threshold, upper_or_lower):
+    for index in range(len(input_array)): 
+        if upper_or_lower=='upper':
+            if np.isnan(input_array[index])==False and input_array[index]>threshold:
+                input_array[index] = np.nan
+        if upper_or_lower=='lower':
+            if np.isnan(input_array[index])==False and input_array[index]<threshold:
+                input_array[index] = np.nan
+    return input_array
@@ -0,0 +1,87 @@
+### --------------------------------------------------------------------------- ###
+# original luminance per frame averaging of pp02_extract_stim_info.py, for side by side benchmarks
+### --------------------------------------------------------------------------- ###
+import datetime
+import numpy as np
+
+def build_timebucket_avg_luminance(timestamps_and_luminance_array, bucket_size_ms, max_no_of_timebuckets):
+    bucket_window = datetime.timedelta(milliseconds=bucket_size_ms)
+    max_no_of_timebuckets = int(max_no_of_timebuckets)
+    avg_luminance_by_timebucket = []
+    index = 0
+    for trial in timestamps_and_luminance_array:
+        first_timestamp = trial[0][0]
+        end_timestamp = trial[-1][0]
+        this_trial_timebuckets = make_luminance_time_buckets(first_timestamp, bucket_size_ms, end_timestamp)
+        this_trial = np.empty(max_no_of_timebuckets)
+        this_trial[:] = np.nan
+        for frame in trial:
+            timestamp = frame[0]
+            lum_val = int(frame[1])
+            timestamp = timestamp.split('+')[0][:-3]
+            timestamp_dt = datetime.datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S.%f")
+            this_bucket = find_nearest_timestamp_key(timestamp_dt, this_trial_timebuckets, bucket_window)
+            if this_trial_timebuckets[this_bucket] == [-5]:
+                this_trial_timebuckets[this_bucket] = [lum_val]
+            else:
+                this_trial_timebuckets[this_bucket].append(lum_val)
+        sorted_keys = sorted(list(this_trial_timebuckets.keys()))
+        key_index = 0
+        for key in sorted_keys:
+            avg_luminance_for_this_bucket = np.mean(this_trial_timebuckets[key])
+            this_trial[key_index] = avg_luminance_for_this_bucket
+            key_index = key_index + 1
+        avg_luminance_by_timebucket.append(this_trial)
+        index = index + 1
+    avg_lum_by_tb_thresholded = []
+    for lum_array in avg_luminance_by_timebucket:
+        lum_array_thresholded = threshold_to_nan(lum_array, 0, 'lower')
+        avg_lum_by_tb_thresholded.append(lum_array_thresholded)
+    avg_lum_by_tb_thresh_array = np.array(avg_lum_by_tb_thresholded)
+    avg_lum_final = np.nanmean(avg_lum_by_tb_thresh_array, axis=0)
+    return avg_lum_final
+
+def make_luminance_time_buckets(start_timestamp, bucket_size_ms, end_timestamp): 
+    start_timestamp = start_timestamp.split('+')[0][:-3]
+    end_timestamp = end_timestamp.split('+')[0][:-3]
+    buckets_start_time = datetime.datetime.strptime(start_timestamp, "%Y-%m-%dT%H:%M:%S.%f")
+    buckets_end_time = datetime.datetime.strptime(end_timestamp, "%Y-%m-%dT%H:%M:%S.%f")
+
+    current_bucket = buckets_start_time
+    time_buckets = []
+    window = datetime.timedelta(milliseconds=bucket_size_ms)
+    while current_bucket <= buckets_end_time:
+        time_buckets.append(current_bucket)
+        current_bucket = current_bucket + window
+
+    bucket_list = dict.fromkeys(time_buckets)
+
+    for key in time_buckets: 
+        bucket_list[key] = [-5]
+    # -5 remains in a time bucket, this means no 'near-enough timestamp' frame was found in video
+
+    return bucket_list
+
+def find_nearest_timestamp_key(timestamp_to_check, dict_of_timestamps, time_window):
+    for key in dict_of_timestamps.keys():
+        if key <= timestamp_to_check <= (key + time_window):
+            return key
+
+def threshold_to_nan(input_array, threshold, upper_or_lower):
+    for index in range(len(input_array)): 
+        if upper_or_lower=='upper':
+            if np.isnan(input_array[index])==False and input_array[index]>threshold:
+                input_array[index] = np.nan
+        if upper_or_lower=='lower':
+            if np.isnan(input_array[index])==False and input_array[index]<threshold:
+                input_array[index] = np.nan
+    return input_array
+
+def load_luminance_csvs(luminance_data_paths):
+    # csv loading of the original main script: one (frame x [timestamp, luminance]) string array per trial
+    luminances = []
+    for data_path in luminance_data_paths: 
+        luminance_values = np.genfromtxt(data_path, dtype=str, delimiter='  ')
+        luminance_values = np.array(luminance_values)
+        luminances.append(luminance_values)
+    return luminances
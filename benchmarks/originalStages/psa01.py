@@ -0,0 +1,114 @@
+### --------------------------------------------------------------------------- ###
+# original world cam and raw live stim supersampling of psa01_MonthlyMeans_WorldCam_RawLiveStim.py, for side by side benchmarks
+# every time bucket holds a full float64 copy of a world cam frame, so only run it on short clips
+### --------------------------------------------------------------------------- ###
+import os
+import datetime
+import numpy as np
+
+def make_time_buckets(start_timestamp, bucket_size_ms, end_timestamp, fill_pattern): 
+    start_timestamp = start_timestamp.split('+')[0][:-3]
+    end_timestamp = end_timestamp.split('+')[0][:-3]
+    buckets_start_time = datetime.datetime.strptime(start_timestamp, "%Y-%m-%dT%H:%M:%S.%f")
+    buckets_end_time = datetime.datetime.strptime(end_timestamp, "%Y-%m-%dT%H:%M:%S.%f")
+    current_bucket = buckets_start_time
+    time_buckets = []
+    window = datetime.timedelta(milliseconds=bucket_size_ms)
+    while current_bucket <= buckets_end_time:
+        time_buckets.append(current_bucket)
+        current_bucket = current_bucket + window
+    bucket_list = dict.fromkeys(time_buckets)
+    for key in time_buckets: 
+        bucket_list[key] = fill_pattern
+    return bucket_list
+
+def find_nearest_timestamp_key(timestamp_to_check, dict_of_timestamps, time_window):
+    for key in dict_of_timestamps.keys():
+        if key <= timestamp_to_check <= (key + time_window):
+            return key
+
+def supersampled_worldCam_rawLiveVid(video_path, video_timestamps, rawStimVidData_dict, output_folder, bucket_size_ms):
+    import cv2
+    # Get video file details
+    video_name = video_path.split(os.sep)[-1]
+    video_date = video_name.split('_')[0]
+    video_time = video_name.split('_')[1]
+    video_stim_number = video_name.split('_')[2]
+    # Open world video
+    world_vid = cv2.VideoCapture(video_path)
+    vid_width = int(world_vid.get(3))
+    vid_height = int(world_vid.get(4))
+    # create rawLiveVid output array
+    first_timestamp = video_timestamps[0]
+    last_timestamp = video_timestamps[-1]
+    rawLiveVid_initializePattern = np.nan
+    rawLiveVid_buckets = make_time_buckets(first_timestamp, bucket_size_ms, last_timestamp, rawLiveVid_initializePattern)
+    sanityCheck_initializePattern = np.empty((vid_height*vid_width,))
+    sanityCheck_initializePattern[:] = np.nan
+    worldCam_sanityCheck_buckets = make_time_buckets(first_timestamp, bucket_size_ms, last_timestamp, sanityCheck_initializePattern)
+    # Loop through 4ms time buckets of world video to find nearest frame and save 2-d matrix of pixel values in that frame
+    # stimStructure = ['DoNotMove-English', 'Calibration', 'stimuli024', 'stimuli025', 'stimuli026', 'stimuli027', 'stimuli028', 'stimuli029', ]
+    doNotMove_frameCount = rawStimVidData_dict['DoNotMove-English']['Number of Frames']
+    calib_frameCount = rawStimVidData_dict['Calibration']['Number of Frames']
+    # keep track of how many frames have been processed
+    frame_count = 0
+    for timestamp in video_timestamps: 
+        # find the time bucket into which this frame falls
+        timestamp = timestamp.split('+')[0][:-3]
+        timestamp_dt = datetime.datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S.%f")
+        bucket_window = datetime.timedelta(milliseconds=bucket_size_ms)
+        # fill in luminance values from world cam video as a sanity check
+        currentKey_sanityCheck = find_nearest_timestamp_key(timestamp_dt, worldCam_sanityCheck_buckets, bucket_window)
+        # Read frame at current position
+        # should this be at current key??
+        ret, frame = world_vid.read()
+        # Make sure the frame exists!
+        if frame is not None:
+            # Convert to grayscale
+            gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+            # flatten the frame into a list
+            flattened_gray = gray.ravel()
+            flattened_gray = flattened_gray.astype(None)
+            # append to dictionary stim_buckets
+            worldCam_sanityCheck_buckets[currentKey_sanityCheck] = flattened_gray
+        # fill in luminance values from raw videos based on timing of framerate in world camera timestamps
+        currentKey_rLV = find_nearest_timestamp_key(timestamp_dt, rawLiveVid_buckets, bucket_window)
+        if frame_count < doNotMove_frameCount:
+            rawVidPhase = 'DoNotMove-English'
+            frame_index = frame_count
+        if doNotMove_frameCount <= frame_count < doNotMove_frameCount + calib_frameCount:
+            rawVidPhase = 'Calibration'
+            frame_index = frame_count - doNotMove_frameCount
+        if doNotMove_frameCount + calib_frameCount <= frame_count:
+            rawVidPhase = video_stim_number
+            if frame_count < doNotMove_frameCount + calib_frameCount + rawStimVidData_dict[rawVidPhase]['Number of Frames']:
+                frame_index = frame_count - doNotMove_frameCount - calib_frameCount
+            else:
+                break
+        rawLiveVid_buckets[currentKey_rLV] = rawStimVidData_dict[rawVidPhase]['Luminance per Frame'][frame_index]
+        #print('Processing frame %d from %s phase (total frame count: %d)' % (frame_index, rawVidPhase, frame_count))
+        frame_count = frame_count + 1
+    # release video capture
+    world_vid.release()
+    # generate rawLiveVid luminance array output
+    supersampled_rawLiveVid = []
+    current_lumVal = 0
+    for timestamp in sorted(rawLiveVid_buckets.keys()):
+        if rawLiveVid_buckets[timestamp] is not np.nan:
+            supersampled_rawLiveVid.append(rawLiveVid_buckets[timestamp])
+            current_lumVal = rawLiveVid_buckets[timestamp]
+        else:
+            supersampled_rawLiveVid.append(current_lumVal)
+    supersampled_rawLiveVid_array = np.array(supersampled_rawLiveVid)
+    # generate worldCam sanityCheck luminance array output
+    supersampled_worldCam = []
+    current_frame = sanityCheck_initializePattern
+    for timestamp in sorted(worldCam_sanityCheck_buckets.keys()):
+        if worldCam_sanityCheck_buckets[timestamp] is not np.nan:
+            supersampled_worldCam.append(worldCam_sanityCheck_buckets[timestamp])
+            current_frame = worldCam_sanityCheck_buckets[timestamp]
+        else:
+            supersampled_worldCam.append(current_frame)
+    supersampled_worldCam_array = np.array(supersampled_worldCam)
+    # return worldCam sanity check
+    return vid_width, vid_height, supersampled_worldCam_array, supersampled_rawLiveVid_array
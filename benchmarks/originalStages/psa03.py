@@ -0,0 +1,59 @@
+### --------------------------------------------------------------------------- ###
+# original one-delay-at-a-time phase means and linear regressions of psa03_PupilSizeVLum.py, for side by side benchmarks
+### --------------------------------------------------------------------------- ###
+import numpy as np
+
+def phaseMeans_withDelay(delay_tb, normedPupils_array, calib_len_tb, allunique_lens_tb, octo_len_tb):
+    allCalib = []
+    allOcto = []
+    allUnique = []
+    # Split trials into calib, octo, and unique
+    for i, uniqueStim in enumerate(normedPupils_array):
+        thisUnique = []
+        uniqueLen_tb = allunique_lens_tb[i]
+        for normed_trial in uniqueStim:
+            thisTrial_calib = normed_trial[delay_tb : delay_tb+calib_len_tb]
+            allCalib.append(thisTrial_calib)
+            thisTrial_unique = normed_trial[delay_tb+calib_len_tb+1 : delay_tb+calib_len_tb+1+uniqueLen_tb]
+            thisUnique.append(thisTrial_unique)
+            thisTrial_octo = normed_trial[delay_tb+calib_len_tb+1+uniqueLen_tb+1 : delay_tb+calib_len_tb+1+uniqueLen_tb+1+octo_len_tb]
+            allOcto.append(thisTrial_octo)
+        allUnique.append(thisUnique)
+    calib_mean = np.nanmean(allCalib, axis=0)
+    octo_mean = np.nanmean(allOcto, axis=0)
+    unique_means = []
+    for unique in allUnique:
+        thisUnique_mean = np.nanmean(unique, axis=0)
+        unique_means.append(thisUnique_mean)
+    return calib_mean, octo_mean, unique_means
+
+def leastSquares_pupilSize_lum(pupilSize_array, lum_array):
+    from scipy import stats
+    # remove tb where pupil sizes are nans
+    meanPupil_nonan = pupilSize_array[np.logical_not(np.isnan(pupilSize_array))]
+    meanLum_nonan = lum_array[np.logical_not(np.isnan(pupilSize_array))]
+    # remove tb where luminances are nans
+    meanPupil_nonan = meanPupil_nonan[np.logical_not(np.isnan(meanLum_nonan))]
+    meanLum_nonan = meanLum_nonan[np.logical_not(np.isnan(meanLum_nonan))]
+    # calculate least squares regression line
+    slope, intercept, rval, pval, stderr = stats.linregress(meanLum_nonan, meanPupil_nonan)
+    return slope, intercept, rval, pval, stderr
+
+def linRegress_allEyeAnalyses_perDelay(delays, allEyeAnalyses_normedPupils, calib_len_tb, unique_lens_tb, octo_len_tb, lum_array):
+    # the original delay sweep: splitPupils_withDelay_plotScatterLinRegress for every delay and eye analysis, without saving or plotting
+    # returns (eye analysis x delay x phase x [slope, intercept, rval, pval, stderr]), phases ordered [allPhases, calib, octo, unique1, ..., unique6]
+    all_linRegress = []
+    for pupilSize_array in allEyeAnalyses_normedPupils:
+        this_eyeAnalysis = []
+        for delay_tb in range(delays):
+            pupil_calib_mean, pupil_octo_mean, pupil_unique_means = phaseMeans_withDelay(delay_tb, pupilSize_array, calib_len_tb, unique_lens_tb, octo_len_tb)
+            all_phases_pupil_sizes = np.concatenate([pupil_calib_mean, pupil_octo_mean] + pupil_unique_means, axis=0)
+            all_phases_mean_lum = np.concatenate(lum_array, axis=0)
+            this_delay = [leastSquares_pupilSize_lum(all_phases_pupil_sizes, all_phases_mean_lum)]
+            this_delay.append(leastSquares_pupilSize_lum(pupil_calib_mean, lum_array[0]))
+            this_delay.append(leastSquares_pupilSize_lum(pupil_octo_mean, lum_array[1]))
+            for unique in range(6):
+                this_delay.append(leastSquares_pupilSize_lum(pupil_unique_means[unique], lum_array[2+unique]))
+            this_eyeAnalysis.append(this_delay)
+        all_linRegress.append(this_eyeAnalysis)
+    return np.array(all_linRegress)
@@ -1,49 +1,32 @@
 import os
 import glob
-import cv2
 import datetime
 import numpy as np
-import matplotlib.pyplot as plt
 import zipfile
 import shutil
 import fnmatch
 import sys
-import math
 import csv
+import json
 import logging
+import argparse
+# make the shared surprisingMinds package (in the repo root) importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from surprisingMinds.timeBuckets import parse_timestamp, make_time_buckets, find_nearest_timestamp_key
+from surprisingMinds.dataFiles import unpack_to_temp, list_sub_folders
+from surprisingMinds.instrumentation import StageInstruments, FrameProfile, write_run_summary, format_summary, format_profile_summary
+from surprisingMinds.workQueue import WorkQueue
+from surprisingMinds.frameCache import FrameCache
+from surprisingMinds.pupilRecords import PupilRecords, timestamps_to_ns, save_pupil_records
+from surprisingMinds.pupilDetection import pupil_frame_codes, pupil_detection_params, scale_pupil_detection_params, blur_frame, detect_pupil, detect_pupil_pyramid
 
+###################################
+# SET CURRENT WORKING DIRECTORY
+###################################
+current_working_directory = os.getcwd()
 ### FUNCTIONS ###
-def unpack_to_temp(path_to_zipped, path_to_temp):
-    try:
-        # copy zip file to current working directory
-        #print("Copying {folder} to current working directory...".format(folder=path_to_zipped))
-        current_working_directory = os.getcwd()
-        copied_zipped = shutil.copy2(path_to_zipped, current_working_directory)
-        path_to_copied_zipped = os.path.join(current_working_directory, copied_zipped.split(sep=os.sep)[-1])
-        # unzip the folder
-        #print("Unzipping files in {folder}...".format(folder=path_to_copied_zipped))
-        day_unzipped = zipfile.ZipFile(path_to_copied_zipped, mode="r")
-        # extract files into temp folder
-        day_unzipped.extractall(path_to_temp)
-        # close the unzipped file
-        day_unzipped.close()
-        #print("Finished unzipping {folder}!".format(folder=path_to_copied_zipped))
-        # destroy copied zipped file
-        #print("Deleting {file}...".format(file=path_to_copied_zipped))
-        os.remove(path_to_copied_zipped)
-        #print("Deleted {file}!".format(file=path_to_copied_zipped))
-        return True
-    except Exception: 
-        print("Could not unzip {folder}".format(folder=path_to_zipped))    
-        return False
-
-def list_sub_folders(path_to_root_folder):
-    # List all sub folders
-    sub_folders = []
-    for folder in os.listdir(path_to_root_folder):
-        if(os.path.isdir(os.path.join(path_to_root_folder, folder))):
-            sub_folders.append(os.path.join(path_to_root_folder, folder))
-    return sub_folders
+# timers of find_pupil that run once per frame, profiled frame by frame with --profile
+pupil_frame_steps = ['decode', 'pyramid', 'blur', 'hough', 'darkest_circle', 'contour', 'ellipse', 'display']
 
 def find_target_frame(ref_timestamps_csv, target_timestamps_csv, ref_frame):
     # Find the frame in one video that best matches the timestamp of ref frame from another video
@@ -63,73 +46,47 @@ def find_target_frame(ref_timestamps_csv, target_timestamps_csv, ref_frame):
         frame_counter = frame_counter + 1
     return frame_counter
 
-def find_darkest_circle(list_of_circles, source_image):
-    #print("Finding darkest circle in {list}...".format(list=list_of_circles))
-    # starting parameters
-    darkest_intensity = 255
-    darkest_index = 0
-    # check that source_image is a grayscaled image
-    if len(source_image.shape) > 2: 
-        print("{Image} is not grayscale!".format(Image=source_image))
-        exit()
-    for i in range(len(list_of_circles)):
-        # make a copy of the source image
-        copied_image = source_image.copy()
-        # create a mask image that is the same size as source_image
-        mask = np.zeros(copied_image.shape, copied_image.dtype)
-        # get center coordinates and radius of circle from list_of_circle
-        center = (list_of_circles[i][0], list_of_circles[i][1])
-        radius = list_of_circles[i][2]
-        #print("Center: {x},{y}".format(x=center[0], y=center[1]))
-        # draw mask circle at coordinates and w/radius of circle from list_of_circles
-        mask_circle = cv2.circle(mask, center, radius, 255, -1)
-        ## for debugging
-        # this_circle = cv2.circle(copied_image, center, radius, (0, 0, 255), 2)
-        # plt.imshow(copied_image)
-        # plt.show()
-        # get coordinates of mask circle pixels
-        where = np.where(mask==255)
-        # find those same coordinates in source_image
-        intensity_inside_circle_on_source_image = source_image[where[0], where[1]]
-        # take average of those pixels in source_image
-        average_intensity = np.average(intensity_inside_circle_on_source_image)
-        #print("Average intensity of circle {number}: {intensity}".format(number=i, intensity=average_intensity))
-        # check this circle's intensity against darkest circle found so far
-        if (average_intensity < darkest_intensity):
-            darkest_intensity = average_intensity
-            darkest_index = i
-    #print("Darkest circle: {number}, intensity {intensity}".format(number=darkest_index, intensity=darkest_intensity))
-    return list_of_circles[darkest_index]
-
-def make_time_buckets(start_timestamp, bucket_size_ms, end_timestamp, fill_pattern): 
-    start_timestamp = start_timestamp.split('+')[0][:-3]
-    end_timestamp = end_timestamp.split('+')[0][:-3]
-    buckets_start_time = datetime.datetime.strptime(start_timestamp, "%Y-%m-%dT%H:%M:%S.%f")
-    buckets_end_time = datetime.datetime.strptime(end_timestamp, "%Y-%m-%dT%H:%M:%S.%f")
-
-    current_bucket = buckets_start_time
-    time_buckets = []
-    window = datetime.timedelta(milliseconds=bucket_size_ms)
-    while current_bucket <= buckets_end_time:
-        time_buckets.append(current_bucket)
-        current_bucket = current_bucket + window
-
-    bucket_list = {key:fill_pattern.copy() for key in time_buckets}
-    # -5 remains in a time bucket, this means no 'near-enough timestamp' frame was found in video
+def draw_pupil(frame, circles, darkest_circle, ellipse, shifted_center):
+    import cv2
+    # debug display: hough circles, ellipse around largest contour and the darkest circle, on a copy of the frame
+    frame_copy = frame.copy()
+    circles = np.uint16(np.around(circles))
+    for i in circles[0, :]:
+        center = (i[0], i[1])
+        # circle center
+        cv2.circle(frame_copy, center, 5, (0, 100, 100), 1)
+        # circle outline
+        radius = i[2]
+        cv2.circle(frame_copy, center, radius, (255, 0, 255), 1)
+    # Draw ellipse around largest contour
+    axes = (int(ellipse[1][0]/2),int(ellipse[1][1]/2)) 
+    angle = int(ellipse[2])
+    frame_copy = cv2.ellipse(frame_copy, shifted_center, axes, angle, 0, 360, (0, 255, 0), 3, cv2.LINE_AA, 0)
+    # Draw debugging circle around darkest circle
+    axes = (int(darkest_circle[2]), int(darkest_circle[2]))
+    angle = 0
+    frame_copy = cv2.ellipse(frame_copy, (int(darkest_circle[0]), int(darkest_circle[1])), axes, angle, 0, 360, (0, 0, 255), 2, cv2.LINE_AA, 0)
+    return frame_copy
 
-    return bucket_list
-
-def find_nearest_timestamp_key(timestamp_to_check, dict_of_timestamps, time_window):
-    for key in dict_of_timestamps.keys():
-        if key <= timestamp_to_check <= (key + time_window):
-            return key
-
-def find_pupil(which_eye, which_stimuli, trial_number, video_path, video_timestamps, align_frame, csv_path, bucket_size_ms):
+def find_pupil(which_eye, which_stimuli, trial_number, video_path, video_timestamps, align_frame, csv_path, bucket_size_ms, instruments=None, cached_frames=None, params=None, pyramid_level=0, sparse_output=False):
+    import cv2
+    # timers and counters of each sub-step, off unless the caller passes StageInstruments
+    if instruments is None:
+        instruments = StageInstruments(enabled=False)
+    # cached_frames: CachedFrames (surprisingMinds.frameCache) of this eye video, read instead of decoding video_path
+    # params: pupil detection parameters at full resolution (default pupil_detection_params), scaled to downscaled cached frames
+    # pyramid_level: find the pupil circle at 1/2**pyramid_level resolution, then fit the ellipse at full resolution (see detect_pupil_pyramid)
+    # sparse_output: save one record per frame (surprisingMinds.pupilRecords) instead of the csv of 4ms time buckets
+    if params is None:
+        params = pupil_detection_params
+    if cached_frames is not None:
+        params = scale_pupil_detection_params(params, cached_frames.scale)
     ### row = timestamp, not frame #
     # Open eye video and world video
-    video = cv2.VideoCapture(video_path)
-    # Jump to specific frame (position) for alignment purposes 
-    ret = video.set(cv2.CAP_PROP_POS_FRAMES, align_frame)
+    if cached_frames is None:
+        video = cv2.VideoCapture(video_path)
+        # Jump to specific frame (position) for alignment purposes 
+        ret = video.set(cv2.CAP_PROP_POS_FRAMES, align_frame)
     # Open display window for debugging
     video_name = video_path.split(os.sep)[-1]
     debug_name = "Eye"+"_"+video_name
@@ -138,118 +95,78 @@ def find_pupil(which_eye, which_stimuli, trial_number, video_path, video_timesta
     # octobpus clip to thank you screen is 16.2 seconds
     first_timestamp = video_timestamps[align_frame]
     last_timestamp = video_timestamps[-1]
-    initialize_pattern = [-5,-5,-5,-5,-5,-5]
-    pupil_buckets = make_time_buckets(first_timestamp, bucket_size_ms, last_timestamp, initialize_pattern)
+    if sparse_output:
+        # frame number, code and pupil measurements of every decoded frame
+        frame_records = []
+    else:
+        initialize_pattern = [-5,-5,-5,-5,-5,-5]
+        pupil_buckets = make_time_buckets(first_timestamp, bucket_size_ms, last_timestamp, initialize_pattern, copy_fill=True)
 
     # Loop through 4ms time buckets of eye video to find nearest frame and save pupil xy positon and area
     timestamps_to_check = video_timestamps[align_frame:]
-    for timestamp in timestamps_to_check:
-        # find the time bucket into which this frame falls
-        timestamp = timestamp.split('+')[0][:-3]
-        timestamp_dt = datetime.datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S.%f")
-        bucket_window = datetime.timedelta(milliseconds=bucket_size_ms)
-        current_key = find_nearest_timestamp_key(timestamp_dt, pupil_buckets, bucket_window)
+    for frame_number, timestamp in enumerate(timestamps_to_check, align_frame):
+        if not sparse_output:
+            # find the time bucket into which this frame falls
+            timestamp_dt = parse_timestamp(timestamp)
+            bucket_window = datetime.timedelta(milliseconds=bucket_size_ms)
+            current_key = find_nearest_timestamp_key(timestamp_dt, pupil_buckets, bucket_window)
         # Read frame at current position
-        ret, frame = video.read()
-        mask = np.copy(frame)
+        with instruments.timer('decode'):
+            if cached_frames is None:
+                ret, frame = video.read()
+            else:
+                frame = cached_frames[frame_number]
+        frame_code = 'no_frame'
         # Make sure the frame exists!
         if frame is not None:
+            instruments.count('frames')
             # Magically find pupil...
-            # Convert to grayscale
-            gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
-            # Median blur
-            blurred = cv2.medianBlur(gray, 25)
-            # Hough circle detection
-            rows = blurred.shape[0]
-            ## sometimes the image seems really clean and easy to find the pupil and yet it still fails
-            circles = cv2.HoughCircles(blurred, cv2.HOUGH_GRADIENT, 1.0, rows / 9.0,
-                                    param1=55, param2=20,
-                                    minRadius=10, maxRadius=150)
-            # If there are no circles, then what??
-            if circles is not None:
-                #print("Circles found: {circles}".format(circles=circles))
-                # check that we are taking the darkest circle
-                darkest_circle = find_darkest_circle(circles[0], blurred)
-                #print("Darkest circle: {circle}".format(circle=darkest_circle))
-                # Using the best circle...crop around center
-                # Threshold
-                # Fit an ellipse
-                # Crop
-                eye_circle = np.uint16(np.around(darkest_circle))
-                left = eye_circle[0] - 64
-                top = eye_circle[1] - 64
-                crop_size = 128
-                # Check boundarys of image
-                if( (left >= 0) and (top >= 0) and ((left + crop_size) < 800) and ((top + crop_size) < 600) ):
-                    cropped = blurred[top:(top + crop_size), left:(left+crop_size)]
-                    # Compute average and stdev of all pixel luminances along border
-                    ## this currently averages the rightmost and leftmost edges of the cropped window, because we assume that these pixels are not the pupil
-                    avg = (np.mean(cropped[:, 0]) + np.mean(cropped[:, -1])) / 2
-                    std = (np.std(cropped[:, 0]) + np.std(cropped[:, -1])) / 2
-                    ## Find shape of pupil
-                    # Threshold
-                    thresholded = np.uint8(cv2.threshold(cropped, avg-(std*4.5), 255, cv2.THRESH_BINARY_INV)[1])
-                    # Find contours
-                    contours, heirarchy = cv2.findContours(thresholded, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
-                    # if more than one contour
-                    if len(contours) > 0:
-                        # Get largest contour
-                        largest_contour = max(contours, key=cv2.contourArea)
-                        # sanity check size of largest contour
-                        ## SHOULD MAKE SURE THAT LARGEST CONTOUR ISN'T BIGGER THAN CROPPED
-                        #####
-                        # make sure contour is large enough to fit an ellipse to it
-                        if(len(largest_contour) > 5):
-                            # Fit ellipse to largest contour
-                            ellipse = cv2.fitEllipse(largest_contour)
-                            # Shift ellipse back to full frame coordinates
-                            shifted_center = (np.int(ellipse[0][0]) + left, np.int(ellipse[0][1]) + top)
-                            # Draw circles
-                            frame_copy = frame.copy()
-                            circles = np.uint16(np.around(circles))
-                            for i in circles[0, :]:
-                                center = (i[0], i[1])
-                                # circle center
-                                cv2.circle(frame_copy, center, 5, (0, 100, 100), 1)
-                                # circle outline
-                                radius = i[2]
-                                cv2.circle(frame_copy, center, radius, (255, 0, 255), 1)
-                            # Draw ellipse around largest contour
-                            axes = (np.int(ellipse[1][0]/2),np.int(ellipse[1][1]/2)) 
-                            angle = np.int(ellipse[2])
-                            frame_copy = cv2.ellipse(frame_copy, shifted_center, axes, angle, 0, 360, (0, 255, 0), 3, cv2.LINE_AA, 0)
-                            # Draw debugging circle around darkest circle
-                            axes = (darkest_circle[2], darkest_circle[2]) 
-                            angle = 0
-                            frame_copy = cv2.ellipse(frame_copy, (darkest_circle[0], darkest_circle[1]), axes, angle, 0, 360, (0, 0, 255), 2, cv2.LINE_AA, 0)
-                            # Save Data
-                            darkest_circle_area = np.pi*(darkest_circle[2])**2
-                            # save data from both findContours and find_darkest_circle
-                            pupil_buckets[current_key][0] = shifted_center[0]
-                            pupil_buckets[current_key][1] = shifted_center[1]
-                            pupil_buckets[current_key][2] = cv2.contourArea(largest_contour)
-                            pupil_buckets[current_key][3] = darkest_circle[0]
-                            pupil_buckets[current_key][4] = darkest_circle[1]
-                            pupil_buckets[current_key][5] = (darkest_circle[2]**2) * math.pi
-                            # Fill debug displays and show
-                            cv2.imshow(debug_name, frame_copy)
-                            ret = cv2.waitKey(1)
-                        else:
-                            #print("Pupil Size: n/a (too small)")
-                            pupil_buckets[current_key][2] = -1
-                            pupil_buckets[current_key][5] = -1
-                    else:
-                        #print("Pupil Size: n/a (pupil off screen)")
-                        pupil_buckets[current_key][2] = -2
-                        pupil_buckets[current_key][5] = -2
+            if pyramid_level == 0:
+                with instruments.timer('blur'):
+                    # Convert to grayscale (cached frames are grayscale already)
+                    gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY) if cached_frames is None else frame
+                    # Median blur
+                    blurred = blur_frame(gray, params)
+                code, pupil, drawn = detect_pupil(blurred, params, instruments)
+            else:
+                with instruments.timer('pyramid'):
+                    gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY) if cached_frames is None else frame
+                code, pupil, drawn = detect_pupil_pyramid(gray, params, pyramid_level, instruments)
+            frame_code = pupil_frame_codes[code]
+            if pupil is not None:
+                # Fill debug displays and show
+                with instruments.timer('display'):
+                    cv2.imshow(debug_name, draw_pupil(frame if cached_frames is None else cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR), *drawn))
+                    ret = cv2.waitKey(1)
+                if cached_frames is not None:
+                    # back to source video pixels
+                    pupil[0], pupil[1] = cached_frames.to_source(pupil[0], pupil[1])
+                    pupil[3], pupil[4] = cached_frames.to_source(pupil[3], pupil[4])
+                    pupil[2] = cached_frames.area_to_source(pupil[2])
+                    pupil[5] = cached_frames.area_to_source(pupil[5])
+                # Save Data
+                if sparse_output:
+                    frame_records.append((frame_number, code, pupil))
                 else:
-                    #print("Pupil Size: n/a (no contour)")
-                    pupil_buckets[current_key][2] = -3
-                    pupil_buckets[current_key][5] = -3
+                    pupil_buckets[current_key][:] = pupil
+            elif sparse_output:
+                frame_records.append((frame_number, code, [np.nan]*6))
             else:
-                #print("Pupil Size: n/a (no circles)")
-                pupil_buckets[current_key][2] = -4
-                pupil_buckets[current_key][5] = -4
+                # no pupil: contour and circle areas hold the frame code
+                pupil_buckets[current_key][2] = code
+                pupil_buckets[current_key][5] = code
+        instruments.end_frame(frame_code)
+    padded_filename = which_eye + "_" + which_stimuli + "_" + str(trial_number).zfill(4)
+    if sparse_output:
+        frame_numbers = np.array([record[0] for record in frame_records], dtype=np.int32)
+        frame_timestamps = timestamps_to_ns(video_timestamps)
+        records = PupilRecords(frame_timestamps[frame_numbers], frame_numbers, [record[2] for record in frame_records], [record[1] for record in frame_records], frame_timestamps[align_frame], frame_timestamps[-1])
+        with instruments.timer('records_write', items=len(records)):
+            save_pupil_records(os.path.join(csv_path, padded_filename + ".npz"), records)
+        if cached_frames is None:
+            video.release()
+        cv2.destroyAllWindows()
+        return
     # Save pupil size data
     time_chunks = []
     for key in pupil_buckets.keys():
@@ -260,14 +177,24 @@ def find_pupil(which_eye, which_stimuli, trial_number, video_path, video_timesta
         pupil = pupil_buckets[time]
         pupils.append(pupil)
     #print("Saving csv of positions and areas for {eye} eye...".format(eye=which_eye))
-    padded_filename = which_eye + "_" + which_stimuli + "_" + str(trial_number).zfill(4) + ".csv"
-    csv_file = os.path.join(csv_path, padded_filename)
-    np.savetxt(csv_file, pupils, fmt='%.2f', delimiter=',')
+    csv_file = os.path.join(csv_path, padded_filename + ".csv")
+    with instruments.timer('csv_write', items=len(pupils)):
+        # write to a temp file first, so a worker that dies while saving never leaves a partial csv behind
+        np.savetxt(csv_file + '.tmp', pupils, fmt='%.2f', delimiter=',')
+        os.replace(csv_file + '.tmp', csv_file)
     # release video capture
-    video.release()
+    if cached_frames is None:
+        video.release()
     cv2.destroyAllWindows()
 
+def save_pupil_profile(profile_path, day_profile, trial_profiles):
+    # compact json of the per-frame profile of one day: the day summary, then one summary per eye video
+    with open(profile_path + '.tmp', 'w') as profile_file:
+        json.dump({'day': day_profile, 'trials': trial_profiles}, profile_file, indent=1)
+    os.replace(profile_path + '.tmp', profile_path)
+
 def save_average_clip_images(which_eye, no_of_seconds, save_folder_path, images):
+    import cv2
     # Save images from trial clip to folder
     #print("Saving averaged frames from {eye}...".format(eye=which_eye))
     for f in range(no_of_seconds):
@@ -284,155 +211,266 @@ def save_average_clip_images(which_eye, no_of_seconds, save_folder_path, images)
         # Write to image file
         ret = cv2.imwrite(image_file_path, gray)
 
-###################################
-# SCRIPT LOGGER
-###################################
-# grab today's date
-now = datetime.datetime.now()
-todays_datetime = datetime.datetime.today().strftime('%Y%m%d-%H%M%S')
-logging.basicConfig(filename="PupilDetection_" + todays_datetime + ".log", filemode='w', level=logging.INFO)
-### -------------------------------------------- ###
-### LET THE ANALYSIS BEGIN!! ###
-### ------------------------------------------- ###
-# list all folders in Synology drive
-# on lab computer
-data_drive = r"\\Diskstation\SurprisingMinds"
-### FOR DEBUGGING ON LAPTOP ###
-#data_drive = r'C:\Users\taunsquared\Desktop\SM_temp'
-# get the subfolders, sort their names
-data_folders = sorted(os.listdir(data_drive))
-zipped_data = fnmatch.filter(data_folders, '*.zip')
-zipped_names = [item[:-4] for item in zipped_data]
-# skip first day because it was an exhibit debugging day
-zipped_data = zipped_data[1:]
-# figure out which days have already been analysed
-# when working from local drive, lab computer
-analysed_drive = r"C:\Users\Kampff_Lab\Dropbox\SurprisingMinds\analysis\dataPythonWorkflows"
-# when working from laptop
-#analysed_drive = r"C:\Users\taunsquared\Dropbox\SurprisingMinds\analysis\dataPythonWorkflows"
-analysed_folders = sorted(os.listdir(analysed_drive))
-already_analysed = [item for item in zipped_names if item in analysed_folders]
-# unzip each folder, do the analysis
-for item in zipped_data:
-    
-    # check to see if this folder has already been analyzed
-    if item[:-4] in already_analysed:
-        print("Folder {name} has already been analysed".format(name=item))
-        continue
-    
-    # if this folder hasn't already been analysed, full speed ahead!
-    print("Working on folder {name}".format(name=item))
-    this_day_date = item[:-4].split('_')[1]
-    # grab a folder 
-    day_zipped = os.path.join(data_drive, item)
+##########################################################
+# BEGIN SCRIPT
+##########################################################
+if __name__=='__main__':
+    parser = argparse.ArgumentParser(description='''Pupil detection.
+        Finds the pupil in every frame of the eye videos of every day and saves pupil position and size per 4ms time bucket as csv files.''')
+    parser.add_argument("--profile", action='store_true', help="Time every step of every frame and count frame result codes, saved per day as find_pupil_profile.json in the Analysis folder")
+    parser.add_argument("--queue", nargs='?', const='', default=None, help="Claim days from a work queue folder on the shared filesystem (default: queues/PupilDetection on the data drive), so several machines running with the same queue share the days")
+    parser.add_argument("--lease", type=float, default=600, help="Seconds without a heartbeat after which another worker retries a claimed day (default: 600)")
+    parser.add_argument("--frame_cache", default=None, help="Folder of a cache of decoded grayscale eye frames, repeat runs over cached days skip the unzip and decode")
+    parser.add_argument("--cache_quota_mb", type=float, default=50000, help="Disk space of the frame cache, least recently used trials are deleted beyond it (default: 50000)")
+    parser.add_argument("--cache_scale", type=float, default=1.0, help="Downscale factor of cached frames, detection parameters are scaled to match (default: 1.0, full resolution)")
+    parser.add_argument("--cache_crop", default=None, help="Region of the eye frames to cache, as left,top,width,height in pixels (default: whole frames)")
+    parser.add_argument("--pyramid_level", type=int, choices=[0, 1, 2], default=0, help="Find the pupil circle at half (1) or quarter (2) resolution and fit the ellipse at full resolution, about 2x or 3x faster; contour centres stay within 3 px and contour areas mostly within 4%% of full resolution detection (default: 0, full resolution)")
+    parser.add_argument("--sparse_output", action='store_true', help="Save one record per eye frame (timestamp, frame number, pupil measurements, frame code) as <eye>_<stimulus>_<trial>.npz instead of the csv of 4ms time buckets; about 5x smaller, and load_daily_pupils resamples it to any bucket size")
+    args = parser.parse_args()
+    # heavy imports are only needed when running the detection
+    import cv2
+    import matplotlib.pyplot as plt
+    ###################################
+    # SCRIPT LOGGER
+    ###################################
+    # grab today's date
+    now = datetime.datetime.now()
+    todays_datetime = datetime.datetime.today().strftime('%Y%m%d-%H%M%S')
+    logging.basicConfig(filename="PupilDetection_" + todays_datetime + ".log", filemode='w', level=logging.INFO)
+    # timers and counters of every step, as json lines in the instrumentation folder
+    instrumentation_folder = os.path.join(current_working_directory, "instrumentation")
+    instrumentation_run = "PupilDetection_" + todays_datetime
+    frame_profile = FrameProfile(pupil_frame_steps) if args.profile else None
+    instruments = StageInstruments(instrumentation_run, instrumentation_folder, stage='find_pupil', frame_profile=frame_profile)
+    # decoded eye frames of every trial, so the next run over the same days only runs detection
+    if args.frame_cache is not None:
+        cache_crop = [int(value) for value in args.cache_crop.split(',')] if args.cache_crop is not None else None
+        frame_cache = FrameCache(args.frame_cache, args.cache_quota_mb, args.cache_scale, cache_crop)
+        logging.info('FRAME CACHE: %s (%.0f of %.0f MB used)' % (args.frame_cache, frame_cache.size_mb(), args.cache_quota_mb))
+        print('FRAME CACHE: %s (%.0f of %.0f MB used)' % (args.frame_cache, frame_cache.size_mb(), args.cache_quota_mb))
+    else:
+        frame_cache = None
+    ### -------------------------------------------- ###
+    ### LET THE ANALYSIS BEGIN!! ###
+    ### ------------------------------------------- ###
+    # list all folders in Synology drive
+    # on lab computer
+    data_drive = r"\\Diskstation\SurprisingMinds"
+    ### FOR DEBUGGING ON LAPTOP ###
+    #data_drive = r'C:\Users\taunsquared\Desktop\SM_temp'
+    # get the subfolders, sort their names
+    data_folders = sorted(os.listdir(data_drive))
+    zipped_data = fnmatch.filter(data_folders, '*.zip')
+    zipped_names = [item[:-4] for item in zipped_data]
+    # skip first day because it was an exhibit debugging day
+    zipped_data = zipped_data[1:]
+    # figure out which days have already been analysed
+    # when working from local drive, lab computer
+    analysed_drive = r"C:\Users\Kampff_Lab\Dropbox\SurprisingMinds\analysis\dataPythonWorkflows"
+    # when working from laptop
+    #analysed_drive = r"C:\Users\taunsquared\Dropbox\SurprisingMinds\analysis\dataPythonWorkflows"
+    analysed_folders = sorted(os.listdir(analysed_drive))
+    already_analysed = [item for item in zipped_names if item in analysed_folders]
+    if args.queue is None:
+        work_queue = None
+        days_to_analyse = zipped_data
+        # create a temp folder in current working directory to store data (contents of unzipped folder)
+        day_folder = os.path.join(current_working_directory, "temp")
+    else:
+        # analyse the days this worker claims from the queue, alongside the workers of other machines using the same queue
+        # days analysed before the queue was started are skipped, days the queue knows about are retried even if their folder exists
+        queue_folder = args.queue or os.path.join(data_drive, 'queues', 'PupilDetection')
+        logging.info('WORK QUEUE: %s' % (queue_folder))
+        print('WORK QUEUE: %s' % (queue_folder))
+        work_queue = WorkQueue(queue_folder, args.lease)
+        queued_days = [item[:-4] for item in zipped_data if item[:-4] not in already_analysed or work_queue.known(item[:-4])]
+        days_to_analyse = (day + '.zip' for day in work_queue.claimed(queued_days))
+        # every worker in this working directory unzips into its own temp folder
+        day_folder = os.path.join(current_working_directory, "temp_" + work_queue.worker)
+    # unzip each folder, do the analysis
+    for item in days_to_analyse:
+
+        # check to see if this folder has already been analyzed
+        if work_queue is None and item[:-4] in already_analysed:
+            print("Folder {name} has already been analysed".format(name=item))
+            continue
 
-    # Build relative analysis paths in a folder with same name as zip folder
-    analysis_folder = os.path.join(analysed_drive, item[:-4], "Analysis")
+        # if this folder hasn't already been analysed, full speed ahead!
+        print("Working on folder {name}".format(name=item))
+        this_day_date = item[:-4].split('_')[1]
+        # grab a folder 
+        day_zipped = os.path.join(data_drive, item)
 
-    # Analysis subfolders
-    csv_folder = os.path.join(analysis_folder, "csv")
-    alignment_folder = os.path.join(analysis_folder, "alignment")
+        # Build relative analysis paths in a folder with same name as zip folder
+        analysis_folder = os.path.join(analysed_drive, item[:-4], "Analysis")
 
-    # Create analysis folder (and sub-folders) if it (they) does (do) not exist
-    if not os.path.exists(analysis_folder):
-        #print("Creating analysis folder.")
-        os.makedirs(analysis_folder)
-    if not os.path.exists(csv_folder):
-        #print("Creating csv folder.")
-        os.makedirs(csv_folder)
-    if not os.path.exists(alignment_folder):
-        #print("Creating alignment folder.")
-        os.makedirs(alignment_folder)
+        # Analysis subfolders
+        csv_folder = os.path.join(analysis_folder, "csv")
+        alignment_folder = os.path.join(analysis_folder, "alignment")
 
-    # create a temp folder in current working directory to store data (contents of unzipped folder)
-    day_folder = os.path.join(current_working_directory, "temp")
+        # Create analysis folder (and sub-folders) if it (they) does (do) not exist
+        if not os.path.exists(analysis_folder):
+            #print("Creating analysis folder.")
+            os.makedirs(analysis_folder)
+        if not os.path.exists(csv_folder):
+            #print("Creating csv folder.")
+            os.makedirs(csv_folder)
+        if not os.path.exists(alignment_folder):
+            #print("Creating alignment folder.")
+            os.makedirs(alignment_folder)
 
-    # unzip current zipped folder into temp folder, this function checks whether the folder is unzippable
-    # if it unzips, the function returns True; if it doesn't unzip, the function returns False
-    if unpack_to_temp(day_zipped, day_folder):
+        # a day whose eye frames are all cached (and whose alignment frames were saved) needs no unzipping
+        cached_trials = frame_cache.cached_trials(item[:-4]) if frame_cache is not None else None
+        if cached_trials is not None and not all(os.path.exists(os.path.join(alignment_folder, trial_name + ".png")) for trial_name, stimuli_name in cached_trials):
+            cached_trials = None
+        if cached_trials is not None:
+            print("Reading decoded frames of {name} from the frame cache".format(name=item))
+            logging.info("Reading decoded frames of {name} from the frame cache".format(name=item))
+            day_unzipped = True
+        else:
+            # unzip current zipped folder into temp folder, this function checks whether the folder is unzippable
+            # if it unzips, the function returns True; if it doesn't unzip, the function returns False
+            with instruments.timer('unzip'):
+                day_unzipped = unpack_to_temp(day_zipped, day_folder)
+        if day_unzipped:
 
-        # List all trial folders
-        trial_folders = list_sub_folders(day_folder)
-        num_trials = len(trial_folders)
-        current_trial = 0
-        stim_vids = [24.0, 25.0, 26.0, 27.0, 28.0, 29.0]
-        stim_name_to_float = {"stimuli024": 24.0, "stimuli025": 25.0, "stimuli026": 26.0, "stimuli027": 27.0, "stimuli028": 28.0, "stimuli029": 29.0}
-        stim_float_to_name = {24.0: "stimuli024", 25.0: "stimuli025", 26.0: "stimuli026", 27.0: "stimuli027", 28.0: "stimuli028", 29.0: "stimuli029"}
-        for trial_folder in trial_folders:
-            # add exception handling so that a weird day doesn't totally break everything 
-            try:
-                trial_name = trial_folder.split(os.sep)[-1]
-                # Load CSVs and create timestamps
-                # ------------------------------
-                # Get world movie timestamp csv path
-                world_csv_path = glob.glob(trial_folder + '/*world.csv')[0]
-                stimuli_name = world_csv_path.split("_")[-2]
-                stimuli_number = stim_name_to_float[stimuli_name]
-                # at what time resolution to build eye and world camera data?
-                bucket_size = 4 #milliseconds
+            # List all trial folders (cached days list them in the order they were first analysed, so trial numbers stay the same)
+            if cached_trials is None:
+                trial_folders = list_sub_folders(day_folder)
+            else:
+                trial_folders = [trial_name for trial_name, stimuli_name in cached_trials]
+            # [trial name, stimuli name] of the trials whose eye frames went into the frame cache
+            day_cached_trials = []
+            trial_profiles = []
+            num_trials = len(trial_folders)
+            current_trial = 0
+            stim_vids = [24.0, 25.0, 26.0, 27.0, 28.0, 29.0]
+            stim_name_to_float = {"stimuli024": 24.0, "stimuli025": 25.0, "stimuli026": 26.0, "stimuli027": 27.0, "stimuli028": 28.0, "stimuli029": 29.0}
+            stim_float_to_name = {24.0: "stimuli024", 25.0: "stimuli025", 26.0: "stimuli026", 27.0: "stimuli027", 28.0: "stimuli028", 29.0: "stimuli029"}
+            for trial_folder in trial_folders:
+                # add exception handling so that a weird day doesn't totally break everything 
+                try:
+                    trial_name = trial_folder.split(os.sep)[-1]
+                    # at what time resolution to build eye and world camera data?
+                    bucket_size = 4 #milliseconds
+                    if cached_trials is not None:
+                        # eye frames and timestamps from the frame cache
+                        stimuli_name = cached_trials[current_trial][1]
+                        right_frames = frame_cache.get(item[:-4], trial_name, "right")
+                        left_frames = frame_cache.get(item[:-4], trial_name, "left")
+                        if right_frames is None or left_frames is None:
+                            raise IOError("{trial} was deleted from the frame cache".format(trial=trial_name))
+                        right_video_path, right_eye_timestamps = right_frames.video, right_frames.timestamps
+                        left_video_path, left_eye_timestamps = left_frames.video, left_frames.timestamps
+                    else:
+                        # Load CSVs and create timestamps
+                        # ------------------------------
+                        # Get world movie timestamp csv path
+                        world_csv_path = glob.glob(trial_folder + '/*world.csv')[0]
+                        stimuli_name = world_csv_path.split("_")[-2]
+                        stimuli_number = stim_name_to_float[stimuli_name]
 
-                # Load world CSV
-                world_timestamps = np.genfromtxt(world_csv_path, dtype=np.str, delimiter=' ')
+                        # Load world CSV
+                        world_timestamps = np.genfromtxt(world_csv_path, dtype=str, delimiter=' ')
 
-                # Get eye timestamp csv paths
-                right_eye_csv_path = glob.glob(trial_folder + '/*righteye.csv')[0]
-                left_eye_csv_path = glob.glob(trial_folder + '/*lefteye.csv')[0]
+                        # Get eye timestamp csv paths
+                        right_eye_csv_path = glob.glob(trial_folder + '/*righteye.csv')[0]
+                        left_eye_csv_path = glob.glob(trial_folder + '/*lefteye.csv')[0]
 
-                # Load eye CSVs
-                right_eye_timestamps = np.genfromtxt(right_eye_csv_path, dtype=np.str, delimiter=' ')
-                left_eye_timestamps = np.genfromtxt(left_eye_csv_path, dtype=np.str, delimiter=' ')
-                # Get world video filepath
-                world_video_path = glob.glob(trial_folder + '/*world.avi')[0]
-                # Open world video
-                world_video = cv2.VideoCapture(world_video_path)
-                ### NOW WE ARE FINDING PUPILS FOR THE WHOLE STIMULI SEQUENCE ###
-                # Show the frame to check where we are starting pupil finding (ground truth)
-                fig_name = trial_name + ".png"
-                fig_path = os.path.join(alignment_folder, fig_name)
-                ret, frame = world_video.read()
-                plt.imshow(frame)
-                plt.savefig(fig_path)
-                plt.show(block=False)
-                plt.pause(1)
-                plt.close()
-                # ------------------------------
-                world_video.release()
-                # ------------------------------
-                # ------------------------------
-                # Now start pupil detection                
-                # ------------------------------
-                # Get right eye video filepath
-                right_video_path = glob.glob(trial_folder + '/*righteye.avi')[0]
-                # Get left eye video filepath
-                left_video_path = glob.glob(trial_folder + '/*lefteye.avi')[0]
-                
-                # Find right eye pupils and save pupil data
-                print("Finding right eye pupils...")
-                find_pupil("right", stimuli_name, current_trial, right_video_path, right_eye_timestamps, 0, csv_folder, bucket_size)
-                # Find left eye pupils and save pupil data
-                print("Finding left eye pupils...")
-                find_pupil("left", stimuli_name, current_trial, left_video_path, left_eye_timestamps, 0, csv_folder, bucket_size)
-                   
-                # Report progress
-                cv2.destroyAllWindows()
-                print("Finished Trial: {trial}".format(trial=current_trial))
-                current_trial = current_trial + 1
-            except Exception: 
-                cv2.destroyAllWindows()
-                print("Trial {trial} failed!".format(trial=current_trial))
-                current_trial = current_trial + 1
+                        # Load eye CSVs
+                        right_eye_timestamps = np.genfromtxt(right_eye_csv_path, dtype=str, delimiter=' ')
+                        left_eye_timestamps = np.genfromtxt(left_eye_csv_path, dtype=str, delimiter=' ')
+                        # Get world video filepath
+                        world_video_path = glob.glob(trial_folder + '/*world.avi')[0]
+                        # Open world video
+                        world_video = cv2.VideoCapture(world_video_path)
+                        ### NOW WE ARE FINDING PUPILS FOR THE WHOLE STIMULI SEQUENCE ###
+                        # Show the frame to check where we are starting pupil finding (ground truth)
+                        fig_name = trial_name + ".png"
+                        fig_path = os.path.join(alignment_folder, fig_name)
+                        ret, frame = world_video.read()
+                        plt.imshow(frame)
+                        plt.savefig(fig_path)
+                        plt.show(block=False)
+                        plt.pause(1)
+                        plt.close()
+                        # ------------------------------
+                        world_video.release()
+                        # ------------------------------
+                        # ------------------------------
+                        # Now start pupil detection                
+                        # ------------------------------
+                        # Get right eye video filepath
+                        right_video_path = glob.glob(trial_folder + '/*righteye.avi')[0]
+                        # Get left eye video filepath
+                        left_video_path = glob.glob(trial_folder + '/*lefteye.avi')[0]
+                        # decode both eye videos into the frame cache, detection then reads the cached frames
+                        right_frames = left_frames = None
+                        if frame_cache is not None:
+                            with instruments.timer('cache_decode'):
+                                right_frames = frame_cache.put(item[:-4], trial_name, "right", right_video_path, right_eye_timestamps)
+                                left_frames = frame_cache.put(item[:-4], trial_name, "left", left_video_path, left_eye_timestamps)
+                            day_cached_trials.append([trial_name, stimuli_name])
 
-        # report progress
-        world_video.release()
-        cv2.destroyAllWindows()
-        print("Finished {day}".format(day=day_zipped[:-4]))
+                    # Find right eye pupils and save pupil data
+                    print("Finding right eye pupils...")
+                    find_pupil("right", stimuli_name, current_trial, right_video_path, right_eye_timestamps, 0, csv_folder, bucket_size, instruments, right_frames, pyramid_level=args.pyramid_level, sparse_output=args.sparse_output)
+                    if frame_profile is not None:
+                        trial_profiles.append(frame_profile.end_trial(trial=trial_name, eye="right"))
+                    # Find left eye pupils and save pupil data
+                    print("Finding left eye pupils...")
+                    find_pupil("left", stimuli_name, current_trial, left_video_path, left_eye_timestamps, 0, csv_folder, bucket_size, instruments, left_frames, pyramid_level=args.pyramid_level, sparse_output=args.sparse_output)
+                    if frame_profile is not None:
+                        trial_profiles.append(frame_profile.end_trial(trial=trial_name, eye="left"))
+
+                    # Report progress
+                    cv2.destroyAllWindows()
+                    print("Finished Trial: {trial}".format(trial=current_trial))
+                    instruments.count('trials')
+                    instruments.flush('trial', trial_name, day=this_day_date)
+                    current_trial = current_trial + 1
+                except Exception: 
+                    cv2.destroyAllWindows()
+                    print("Trial {trial} failed!".format(trial=current_trial))
+                    instruments.count('failed_trials')
+                    if frame_profile is not None:
+                        trial_profiles.append(frame_profile.end_trial(trial=trial_folder.split(os.sep)[-1], failed=True))
+                    instruments.flush('trial', trial_folder.split(os.sep)[-1], day=this_day_date)
+                    current_trial = current_trial + 1
+
+            # report progress
+            cv2.destroyAllWindows()
+            print("Finished {day}".format(day=day_zipped[:-4]))
 
-        # delete temporary file with unzipped data contents
-        print("Deleting temp folder of unzipped data...")
-        shutil.rmtree(day_folder)
-        print("Delete successful!")
+            if cached_trials is None:
+                # the next run reads this day from the frame cache if every trial made it in
+                if frame_cache is not None and len(day_cached_trials) == num_trials:
+                    frame_cache.save_manifest(item[:-4], day_cached_trials)
+                # delete temporary file with unzipped data contents
+                print("Deleting temp folder of unzipped data...")
+                with instruments.timer('cleanup'):
+                    shutil.rmtree(day_folder)
+                print("Delete successful!")
+            instruments.count('days')
+            instruments.flush('day', this_day_date, day=this_day_date)
+            if frame_profile is not None:
+                day_profile = frame_profile.end_day(day=this_day_date)
+                save_pupil_profile(os.path.join(analysis_folder, "find_pupil_profile.json"), day_profile, trial_profiles)
+                print("Profile of {day}: {profile}".format(day=this_day_date, profile=format_profile_summary(day_profile)))
+                logging.info("Profile of {day}: {profile}".format(day=this_day_date, profile=format_profile_summary(day_profile)))
+            if work_queue is not None:
+                work_queue.complete(item[:-4], trials=current_trial)
+        elif work_queue is not None:
+            work_queue.fail(item[:-4], 'could not unzip')
 
-#FIN
-print("Completed analysis on all data folders in this drive!")
-# close logfile
-sys.stdout.close()
\ No newline at end of file
+    #FIN
+    print("Completed analysis on all data folders in this drive!")
+    instruments.close()
+    run_summary, summary_path = write_run_summary(instrumentation_folder, instrumentation_run)
+    for line in format_summary(run_summary):
+        print(line)
+        logging.info(line)
+    print("Saved timing summary to {path}".format(path=summary_path))
+    logging.info("Saved timing summary to {path}".format(path=summary_path))
+    # close logfile
+    sys.stdout.close()
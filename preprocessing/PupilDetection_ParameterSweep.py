@@ -0,0 +1,277 @@
+### --------------------------------------------------------------------------- ###
+# sweeps pupil detection parameters over a sample of trials, to choose the settings of Average_Clip_Per_Day_PupilDetection.py
+# loads daily .zip files of eye videos (and their timestamp csvs) from the data drive (see SOURCE DATA AND OUTPUT FILE LOCATIONS below),
+# decodes the sampled eye videos once into the frame cache (shared with Average_Clip_Per_Day_PupilDetection.py --frame_cache),
+# and detects the pupil in every frame with every combination of the given parameter values
+# outputs PupilDetectionSweep_<datetime>.csv in the working directory: one line per setting with its parameters,
+# detection rate (overall and of the worst eye video), rate of each failure frame code, contour centre steps, jump rate and area change between frames
+# prints the 5 best settings (highest detection rate, then steadiest contour centre), and saves a timing summary in the instrumentation folder
+# NOTE: in command line run with optional tags
+#       1) '--blur_size', '--param1', '--param2', '--min_radius', '--max_radius', '--crop_size', '--threshold_factor' followed by one or more values to try
+#          (default: the single value in surprisingMinds.pupilDetection.pupil_detection_params)
+#       2) '--days NAME ...' to sample only these days (default: every day but the first, a debugging session)
+#       3) '--trials_per_day N' trials sampled per day, both eyes of each are swept (default: 2)
+#       4) '--seed N' seed of the trial sampling (default: 0)
+#       5) '--jump_px PX' contour centre steps between consecutive frames larger than this count as jumps (default: 20)
+#       6) '--workers N' processes detecting pupils in parallel (default: 24)
+#       7) '--frame_cache FOLDER', '--cache_quota_mb MB', '--cache_scale FACTOR', '--cache_crop left,top,width,height' location, disk quota,
+#          downscaling and crop of the frame cache (default: frame_cache in the working directory, 50000 MB, full resolution, whole frames)
+### --------------------------------------------------------------------------- ###
+import os
+import sys
+import glob
+import random
+import shutil
+import fnmatch
+import logging
+import argparse
+import datetime
+import itertools
+import numpy as np
+# make the shared surprisingMinds package (in the repo root) importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from surprisingMinds.dataFiles import unpack_to_temp, list_sub_folders
+from surprisingMinds.frameCache import FrameCache
+from surprisingMinds.pupilDetection import pupil_frame_codes, pupil_detection_params, hough_params, scale_pupil_detection_params, blur_frame, find_pupil_circle, fit_pupil
+from surprisingMinds.instrumentation import StageInstruments, write_run_summary, format_summary
+
+###################################
+# SET CURRENT WORKING DIRECTORY
+###################################
+current_working_directory = os.getcwd()
+### FUNCTIONS ###
+# frame codes of failed detections, reported as a rate per setting
+failure_codes = [code for code in sorted(pupil_frame_codes, reverse=True) if code != 0]
+
+def parameter_grid(values):
+    # values: parameter name -> values to try, every combination is one setting (a full set of pupil_detection_params)
+    names = list(pupil_detection_params)
+    return [dict(zip(names, combination)) for combination in itertools.product(*[values[name] for name in names])]
+
+def setting_groups(settings):
+    # [(blur size, [(hough setting, [indices of the settings using both])])], so each frame is blurred once per blur size
+    # and searched for circles once per Hough setting, only the crop and threshold are redone for every setting
+    groups = {}
+    for index, setting in enumerate(settings):
+        hough_setting = tuple(setting[name] for name in hough_params)
+        groups.setdefault(setting['blur_size'], {}).setdefault(hough_setting, []).append(index)
+    return [(blur_size, list(hough_groups.items())) for blur_size, hough_groups in groups.items()]
+
+def sweep_frames(frames_path, frame_numbers, settings):
+    # detect the pupil with every setting in frames frame_numbers of a cached eye video (settings in cached frame pixels)
+    # returns (settings x frames) frame codes and (settings x frames x 3) contour x, contour y and contour area in cached frame pixels
+    frames = np.load(frames_path, mmap_mode='r')
+    codes = np.zeros((len(settings), len(frame_numbers)), dtype=np.int8)
+    pupils = np.full((len(settings), len(frame_numbers), 3), np.nan, dtype=np.float32)
+    groups = setting_groups(settings)
+    for i, frame_number in enumerate(frame_numbers):
+        gray = np.asarray(frames[frame_number])
+        for blur_size, hough_groups in groups:
+            blurred = blur_frame(gray, {'blur_size': blur_size})
+            for hough_setting, setting_indices in hough_groups:
+                code, circles, darkest_circle = find_pupil_circle(blurred, settings[setting_indices[0]])
+                for index in setting_indices:
+                    if code != 0:
+                        codes[index, i] = code
+                        continue
+                    codes[index, i], pupil, fitted = fit_pupil(blurred, darkest_circle, settings[index])
+                    if pupil is not None:
+                        pupils[index, i] = pupil[:3]
+    return codes, pupils
+
+class SweepMetrics(object):
+    # detection rate and stability of every setting, summed over the eye videos of the sweep
+    # stability: how far the contour centre moves (and how much its area changes) between consecutive frames that both found a pupil
+    def __init__(self, no_of_settings, jump_px):
+        self.jump_px = jump_px
+        self.frames = 0
+        self.code_counts = np.zeros((no_of_settings, len(failure_codes) + 1), dtype=np.int64)
+        self.video_detection_rates = []
+        self.steps = [[] for setting in range(no_of_settings)]
+        self.area_changes = [[] for setting in range(no_of_settings)]
+
+    def add(self, codes, pupils):
+        # codes and pupils of one eye video, as returned by sweep_frames (in source video pixels)
+        found = codes == 0
+        self.frames = self.frames + codes.shape[1]
+        self.code_counts[:, 0] += found.sum(axis=1)
+        for column, code in enumerate(failure_codes, 1):
+            self.code_counts[:, column] += (codes == code).sum(axis=1)
+        self.video_detection_rates.append(found.mean(axis=1))
+        pairs = found[:, 1:] & found[:, :-1]
+        steps = np.hypot(np.diff(pupils[:, :, 0], axis=1), np.diff(pupils[:, :, 1], axis=1))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            area_changes = np.abs(np.diff(pupils[:, :, 2], axis=1))/pupils[:, :-1, 2]
+        for setting in range(len(codes)):
+            self.steps[setting].append(steps[setting][pairs[setting]])
+            self.area_changes[setting].append(area_changes[setting][pairs[setting] & np.isfinite(area_changes[setting])])
+
+    def rows(self):
+        # one dict of metrics per setting
+        rows = []
+        worst_video = np.min(self.video_detection_rates, axis=0)
+        for setting in range(len(self.code_counts)):
+            steps = np.concatenate(self.steps[setting])
+            area_changes = np.concatenate(self.area_changes[setting])
+            row = {'frames': self.frames, 'detection_rate': self.code_counts[setting, 0]/max(self.frames, 1), 'worst_video_detection_rate': worst_video[setting]}
+            for column, code in enumerate(failure_codes, 1):
+                row[pupil_frame_codes[code] + '_rate'] = self.code_counts[setting, column]/max(self.frames, 1)
+            row['median_step_px'] = np.median(steps) if len(steps) > 0 else np.nan
+            row['p95_step_px'] = np.percentile(steps, 95) if len(steps) > 0 else np.nan
+            row['jump_rate'] = np.mean(steps > self.jump_px) if len(steps) > 0 else np.nan
+            row['median_area_change'] = np.median(area_changes) if len(area_changes) > 0 else np.nan
+            rows.append(row)
+        return rows
+
+def save_sweep_csv(csv_path, settings, rows):
+    # one line per setting: its parameters, then its metrics
+    columns = list(pupil_detection_params) + list(rows[0])
+    with open(csv_path + '.tmp', 'w') as csv_file:
+        csv_file.write(','.join(columns) + '\n')
+        for setting, row in zip(settings, rows):
+            values = [setting[name] for name in pupil_detection_params] + list(row.values())
+            csv_file.write(','.join(('%.6g' % value) if isinstance(value, (float, np.floating)) else str(value) for value in values) + '\n')
+    os.replace(csv_path + '.tmp', csv_path)
+
+def cached_eye_video(frame_cache, day, trial_name, eye, day_folder, instruments):
+    # CachedFrames of an eye video, decoded into the frame cache from the unzipped day folder if it is not cached yet
+    cached_frames = frame_cache.get(day, trial_name, eye)
+    if cached_frames is not None:
+        return cached_frames
+    trial_folder = os.path.join(day_folder, trial_name)
+    video_path = glob.glob(trial_folder + '/*' + eye + 'eye.avi')[0]
+    timestamps = np.genfromtxt(glob.glob(trial_folder + '/*' + eye + 'eye.csv')[0], dtype=str, delimiter=' ')
+    with instruments.timer('cache_decode'):
+        return frame_cache.put(day, trial_name, eye, video_path, timestamps)
+
+if __name__=='__main__':
+    from joblib import Parallel, delayed
+    parser = argparse.ArgumentParser(description='''Pupil detection parameter sweep.
+        Decodes a sample of trials once (into the frame cache) and runs pupil detection with every combination of the given parameter values on the same frames.
+        Saves the detection rate and stability of each setting as a csv file.''')
+    for name, default in pupil_detection_params.items():
+        parser.add_argument("--" + name, type=type(default), nargs='+', default=[default], help="Values of %s to try (default: %s)" % (name, default))
+    parser.add_argument("--days", nargs='+', default=None, help="Names of the days to sample trials from (default: every day)")
+    parser.add_argument("--trials_per_day", type=int, default=2, help="Trials sampled from each day, both eyes of each are swept (default: 2)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the trial sampling (default: 0)")
+    parser.add_argument("--jump_px", type=float, default=20, help="Contour centre steps between consecutive frames larger than this count as jumps (default: 20)")
+    parser.add_argument("--workers", type=int, default=24, help="Processes detecting pupils in parallel, each on its own chunk of frames (default: 24)")
+    parser.add_argument("--frame_cache", default=os.path.join(current_working_directory, "frame_cache"), help="Folder of the cache of decoded eye frames, can be shared with Average_Clip_Per_Day_PupilDetection.py --frame_cache (default: frame_cache in the working directory)")
+    parser.add_argument("--cache_quota_mb", type=float, default=50000, help="Disk space of the frame cache, least recently used trials are deleted beyond it (default: 50000)")
+    parser.add_argument("--cache_scale", type=float, default=1.0, help="Downscale factor of cached frames, detection parameters are scaled to match (default: 1.0, full resolution)")
+    parser.add_argument("--cache_crop", default=None, help="Region of the eye frames to cache, as left,top,width,height in pixels (default: whole frames)")
+    args = parser.parse_args()
+    ###################################
+    # SCRIPT LOGGER
+    ###################################
+    # grab today's date
+    now = datetime.datetime.now()
+    todays_datetime = datetime.datetime.today().strftime('%Y%m%d-%H%M%S')
+    logging.basicConfig(filename="PupilDetectionSweep_" + todays_datetime + ".log", filemode='w', level=logging.INFO)
+    # timers and counters of every step, as json lines in the instrumentation folder
+    instrumentation_folder = os.path.join(current_working_directory, "instrumentation")
+    instrumentation_run = "PupilDetectionSweep_" + todays_datetime
+    instruments = StageInstruments(instrumentation_run, instrumentation_folder, stage='pupil_detection_sweep')
+    ###################################
+    # SOURCE DATA AND OUTPUT FILE LOCATIONS
+    ###################################
+    # on lab computer
+    data_drive = r"\\Diskstation\SurprisingMinds"
+    ### FOR DEBUGGING ON LAPTOP ###
+    #data_drive = r'C:\Users\taunsquared\Desktop\SM_temp'
+    sweep_csv_path = os.path.join(current_working_directory, "PupilDetectionSweep_" + todays_datetime + ".csv")
+    # every sampled trial is unzipped here until it is in the frame cache
+    day_folder = os.path.join(current_working_directory, "sweep_temp")
+    cache_crop = [int(value) for value in args.cache_crop.split(',')] if args.cache_crop is not None else None
+    frame_cache = FrameCache(args.frame_cache, args.cache_quota_mb, args.cache_scale, cache_crop)
+    logging.info('DATA DRIVE: %s \n FRAME CACHE: %s \n OUTPUT FILE: %s' % (data_drive, args.frame_cache, sweep_csv_path))
+    print('DATA DRIVE: %s \n FRAME CACHE: %s \n OUTPUT FILE: %s' % (data_drive, args.frame_cache, sweep_csv_path))
+    ###################################
+    # PARAMETER GRID
+    ###################################
+    settings = parameter_grid({name: getattr(args, name) for name in pupil_detection_params})
+    # the same settings in pixels of the cached frames
+    scaled_settings = [scale_pupil_detection_params(setting, args.cache_scale) for setting in settings]
+    groups = setting_groups(scaled_settings)
+    logging.info('%d settings: %d blur sizes, %d circle searches per frame' % (len(settings), len(groups), sum(len(hough_groups) for blur_size, hough_groups in groups)))
+    print('%d settings: %d blur sizes, %d circle searches per frame' % (len(settings), len(groups), sum(len(hough_groups) for blur_size, hough_groups in groups)))
+    ###################################
+    # SAMPLE TRIALS
+    ###################################
+    # first day was a debugging session, so skip it
+    day_names = [item[:-4] for item in fnmatch.filter(sorted(os.listdir(data_drive)), '*.zip')][1:]
+    if args.days is not None:
+        day_names = [day for day in day_names if day in args.days]
+    sample_random = random.Random(args.seed)
+    metrics = SweepMetrics(len(settings), args.jump_px)
+    ###################################
+    # SWEEP
+    ###################################
+    with Parallel(n_jobs=args.workers) as parallel:
+        for day in day_names:
+            # trials of a fully cached day are listed by its manifest, other days are unzipped to list (and cache) them
+            cached_trials = frame_cache.cached_trials(day)
+            day_unzipped = False
+            if cached_trials is not None:
+                trial_names = [trial_name for trial_name, stimuli_name in cached_trials]
+            else:
+                with instruments.timer('unzip'):
+                    day_unzipped = unpack_to_temp(os.path.join(data_drive, day + '.zip'), day_folder)
+                if not day_unzipped:
+                    continue
+                trial_names = [trial_folder.split(os.sep)[-1] for trial_folder in list_sub_folders(day_folder)]
+            sampled_trials = sample_random.sample(sorted(trial_names), min(args.trials_per_day, len(trial_names)))
+            print("Sweeping {day}: {trials}".format(day=day, trials=", ".join(sampled_trials)))
+            logging.info("Sweeping {day}: {trials}".format(day=day, trials=", ".join(sampled_trials)))
+            for trial_name in sampled_trials:
+                for eye in ['right', 'left']:
+                    # add exception handling so that a weird trial doesn't totally break everything
+                    try:
+                        cached_frames = cached_eye_video(frame_cache, day, trial_name, eye, day_folder, instruments)
+                    except Exception:
+                        print("Could not decode the {eye} eye video of {trial}".format(eye=eye, trial=trial_name))
+                        logging.warning("Could not decode the {eye} eye video of {trial}".format(eye=eye, trial=trial_name))
+                        instruments.count('failed_videos')
+                        continue
+                    # a few chunks of frames per worker, so workers that get easy frames pick up more chunks
+                    chunks = [chunk for chunk in np.array_split(np.arange(len(cached_frames)), args.workers*4) if len(chunk) > 0]
+                    with instruments.timer('sweep', items=len(cached_frames)*len(settings)):
+                        results = parallel(delayed(sweep_frames)(os.path.join(cached_frames.entry_folder, 'frames.npy'), chunk, scaled_settings) for chunk in chunks)
+                    codes = np.concatenate([chunk_codes for chunk_codes, chunk_pupils in results], axis=1)
+                    pupils = np.concatenate([chunk_pupils for chunk_codes, chunk_pupils in results], axis=1)
+                    # back to source video pixels
+                    pupils[:, :, 0], pupils[:, :, 1] = cached_frames.to_source(pupils[:, :, 0], pupils[:, :, 1])
+                    pupils[:, :, 2] = cached_frames.area_to_source(pupils[:, :, 2])
+                    metrics.add(codes, pupils)
+                    instruments.count('videos')
+                    instruments.count('frames', len(cached_frames))
+            if day_unzipped:
+                # delete temporary file with unzipped data contents
+                with instruments.timer('cleanup'):
+                    shutil.rmtree(day_folder)
+            instruments.flush('day', day, day=day)
+    ###################################
+    # SAVE METRICS
+    ###################################
+    if metrics.frames == 0:
+        print("No eye videos were swept!")
+        logging.warning("No eye videos were swept!")
+    else:
+        rows = metrics.rows()
+        save_sweep_csv(sweep_csv_path, settings, rows)
+        print("Saved metrics of {settings} settings over {frames} frames to {path}".format(settings=len(settings), frames=metrics.frames, path=sweep_csv_path))
+        logging.info("Saved metrics of {settings} settings over {frames} frames to {path}".format(settings=len(settings), frames=metrics.frames, path=sweep_csv_path))
+        # best settings: highest detection rate, then the steadiest contour centre
+        ranked = sorted(range(len(settings)), key=lambda index: (-rows[index]['detection_rate'], np.nan_to_num(rows[index]['median_step_px'], nan=np.inf)))
+        for index in ranked[:5]:
+            line = '%s: detection rate %.3f, median step %.2f px, jump rate %.4f' % (', '.join('%s %s' % (name, settings[index][name]) for name in pupil_detection_params), rows[index]['detection_rate'], rows[index]['median_step_px'], rows[index]['jump_rate'])
+            print(line)
+            logging.info(line)
+    #FIN
+    instruments.close()
+    run_summary, summary_path = write_run_summary(instrumentation_folder, instrumentation_run)
+    for line in format_summary(run_summary):
+        print(line)
+        logging.info(line)
+    print("Saved timing summary to {path}".format(path=summary_path))
+    logging.info("Saved timing summary to {path}".format(path=summary_path))
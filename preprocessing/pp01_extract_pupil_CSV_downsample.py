@@ -19,12 +19,15 @@ import os
 import glob
 import datetime
 import numpy as np
-import math
-import itertools
-from itertools import groupby
 import csv
 import logging
-from joblib import Parallel, delayed
+import argparse
+import sys
+# make the shared surprisingMinds package (in the repo root) importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from surprisingMinds.pupilData import load_daily_pupils, filter_to_nan
+from surprisingMinds.instrumentation import StageInstruments, write_run_summary, format_summary
+from surprisingMinds.workQueue import WorkQueue
 ###################################
 # SET CURRENT WORKING DIRECTORY
 ###################################
@@ -46,223 +49,10 @@ def load_data():
     return dataset_dir, intermediates_dir
 ##########################################################
 
-def load_daily_pupils(which_eye, day_csv_folder_path, max_no_of_buckets, original_bucket_size, new_bucket_size, bad_trial_cutoff): 
-    if (new_bucket_size % original_bucket_size == 0):
-        new_sample_rate = int(new_bucket_size/original_bucket_size)
-        max_no_of_buckets = int(max_no_of_buckets)
-        #print("New bucket window = {size}, need to average every {sample_rate} buckets".format(size=new_bucket_size, sample_rate=new_sample_rate))
-        # List all csv trial files
-        trial_files = glob.glob(day_csv_folder_path + os.sep + which_eye + "*.csv")
-        num_trials = len(trial_files)
-        good_trials = num_trials
-        # contours
-        data_contours_X = np.empty((num_trials, max_no_of_buckets+1))
-        data_contours_X[:] = -6
-        data_contours_Y = np.empty((num_trials, max_no_of_buckets+1))
-        data_contours_Y[:] = -6
-        data_contours = np.empty((num_trials, max_no_of_buckets+1))
-        data_contours[:] = -6
-        # circles
-        data_circles_X = np.empty((num_trials, max_no_of_buckets+1))
-        data_circles_X[:] = -6
-        data_circles_Y = np.empty((num_trials, max_no_of_buckets+1))
-        data_circles_Y[:] = -6
-        data_circles = np.empty((num_trials, max_no_of_buckets+1))
-        data_circles[:] = -6
-
-        index = 0
-        for trial_file in trial_files:
-            trial_name = trial_file.split(os.sep)[-1]
-            trial_stimulus = trial_name.split("_")[1]
-            trial_stim_number = np.float(trial_stimulus[-2:])
-            trial = np.genfromtxt(trial_file, dtype=np.float, delimiter=",")
-            # if there are too many -5 rows (frames) in a row, don't analyse this trial
-            bad_frame_count = []
-            for frame in trial:
-                if frame[0]==-5:
-                    bad_frame_count.append(1)
-                else:
-                    bad_frame_count.append(0)
-            clusters =  [(x[0], len(list(x[1]))) for x in itertools.groupby(bad_frame_count)]
-            longest_cluster = 0
-            for cluster in clusters:
-                if cluster[0] == 1 and cluster[1]>longest_cluster:
-                    longest_cluster = cluster[1]
-            #print("For trial {name}, the longest cluster is {length}".format(name=trial_name, length=longest_cluster))
-            if longest_cluster<bad_trial_cutoff:
-                no_of_samples = math.ceil(len(trial)/new_sample_rate)
-                this_trial_contours_X = []
-                this_trial_contours_Y = []
-                this_trial_contours = []
-                this_trial_circles_X = []
-                this_trial_circles_Y = []
-                this_trial_circles = []
-                # loop through the trial at given sample rate
-                for sample in range(no_of_samples):
-                    start = sample * new_sample_rate
-                    end = (sample * new_sample_rate) + (new_sample_rate - 1)
-                    this_slice = trial[start:end]
-                    for line in this_slice:
-                        if (line<0).any():
-                            line[:] = np.nan
-                        if (line>15000).any():
-                            line[:] = np.nan
-                    # extract pupil sizes and locations from valid time buckets
-                    this_slice_contours_X = []
-                    this_slice_contours_Y = []
-                    this_slice_contours = []
-                    this_slice_circles_X = []
-                    this_slice_circles_Y = []
-                    this_slice_circles = []
-                    for frame in this_slice:
-                        # contour x,y
-                        ## DON'T PAIR X-Y YET
-                        this_slice_contours_X.append(frame[0])
-                        this_slice_contours_Y.append(frame[1])
-                        # contour area
-                        this_slice_contours.append(frame[2])
-                        # circles x,y
-                        ## DON'T PAIR X-Y YET
-                        this_slice_circles_X.append(frame[3])
-                        this_slice_circles_Y.append(frame[4])
-                        # circles area
-                        this_slice_circles.append(frame[5])
-                    # average the pupil size and movement in this sample slice
-                    this_slice_avg_contour_X = np.nanmean(this_slice_contours_X)
-                    this_slice_avg_contour_Y = np.nanmean(this_slice_contours_Y)
-                    this_slice_avg_contour = np.nanmean(this_slice_contours) 
-                    this_slice_avg_circle_X = np.nanmean(this_slice_circles_X)
-                    this_slice_avg_circle_Y = np.nanmean(this_slice_circles_Y)       
-                    this_slice_avg_circle = np.nanmean(this_slice_circles)
-                    # append to list of downsampled pupil sizes and movements
-                    this_trial_contours_X.append(this_slice_avg_contour_X)
-                    this_trial_contours_Y.append(this_slice_avg_contour_Y)
-                    this_trial_contours.append(this_slice_avg_contour)
-                    this_trial_circles_X.append(this_slice_avg_circle_X)
-                    this_trial_circles_Y.append(this_slice_avg_circle_Y)
-                    this_trial_circles.append(this_slice_avg_circle)
-                # Find count of bad measurements
-                bad_count_contours_X = sum(np.isnan(this_trial_contours_X))
-                bad_count_contours_Y = sum(np.isnan(this_trial_contours_Y))
-                bad_count_contours = sum(np.isnan(this_trial_contours))
-                bad_count_circles_X = sum(np.isnan(this_trial_circles_X))
-                bad_count_circles_Y = sum(np.isnan(this_trial_circles_Y))
-                bad_count_circles = sum(np.isnan(this_trial_circles))
-                # if more than half of the trial is NaN, then throw away this trial
-                # otherwise, if it's a good enough trial...
-                bad_threshold = no_of_samples/2
-                if (bad_count_contours_X<bad_threshold): 
-                    this_chunk_length = len(this_trial_contours_X)
-                    data_contours_X[index][0:this_chunk_length] = this_trial_contours_X
-                    data_contours_X[index][-1] = trial_stim_number
-                if (bad_count_contours_Y<bad_threshold): 
-                    this_chunk_length = len(this_trial_contours_Y)
-                    data_contours_Y[index][0:this_chunk_length] = this_trial_contours_Y
-                    data_contours_Y[index][-1] = trial_stim_number
-                if (bad_count_contours<bad_threshold) or (bad_count_circles<bad_threshold): 
-                    this_chunk_length = len(this_trial_contours)
-                    data_contours[index][0:this_chunk_length] = this_trial_contours
-                    data_contours[index][-1] = trial_stim_number
-                if (bad_count_circles_X<bad_threshold): 
-                    this_chunk_length = len(this_trial_circles_X)
-                    data_circles_X[index][0:this_chunk_length] = this_trial_circles_X
-                    data_circles_X[index][-1] = trial_stim_number
-                if (bad_count_circles_Y<bad_threshold): 
-                    this_chunk_length = len(this_trial_circles_Y)
-                    data_circles_Y[index][0:this_chunk_length] = this_trial_circles_Y
-                    data_circles_Y[index][-1] = trial_stim_number
-                if (bad_count_circles<bad_threshold): 
-                    this_chunk_length = len(this_trial_circles)
-                    data_circles[index][0:this_chunk_length] = this_trial_circles
-                    data_circles[index][-1] = trial_stim_number
-                index = index + 1
-            else:
-                #print("Discarding trial {name}".format(name=trial_name))
-                index = index + 1
-                good_trials = good_trials - 1
-        return data_contours_X, data_contours_Y, data_contours, data_circles_X, data_circles_Y, data_circles, num_trials, good_trials
-    else: 
-        print("Sample rate must be a multiple of {bucket}".format(bucket=original_bucket_size))
-        logging.info("Sample rate must be a multiple of {bucket}".format(bucket=original_bucket_size))
-
-def threshold_to_nan(input_array, threshold, upper_or_lower):
-    for index in range(len(input_array)): 
-        if upper_or_lower=='upper':
-            if np.isnan(input_array[index])==False and input_array[index]>threshold:
-                input_array[index] = np.nan
-        if upper_or_lower=='lower':
-            if np.isnan(input_array[index])==False and input_array[index]<threshold:
-                input_array[index] = np.nan
-    return input_array
-
-def filter_to_nan(list_of_dicts, upper_threshold, lower_threshold):
-    for dictionary in list_of_dicts:
-        for key in dictionary:
-            for trial in dictionary[key]:
-                trial = threshold_to_nan(trial, upper_threshold, 'upper')
-                trial = threshold_to_nan(trial, lower_threshold, 'lower')
-    return list_of_dicts
-
-##########################################################
-# BEGIN SCRIPT
-##########################################################
-###################################
-# SCRIPT LOGGER
-###################################
-# grab today's date
-now = datetime.datetime.now()
-todays_datetime = datetime.datetime.today().strftime('%Y%m%d-%H%M%S')
-logging.basicConfig(filename="pp01ExtractPupilCSVDownsample_" + todays_datetime + ".log", filemode='a', level=logging.INFO)
-###################################
-# SOURCE DATA AND OUTPUT FILE LOCATIONS 
-###################################
-pupil_csv_folder, output_folder = load_data()
-downsampled_pupils_folder = os.path.join(output_folder, "downsampled_pupils")
-# Create intermediates folder if it does not exist
-if not os.path.exists(downsampled_pupils_folder):
-    #print("Creating downsampled_pupils_folder.")
-    os.makedirs(downsampled_pupils_folder)
-
-logging.info('DATA FOLDER: %s \n OUTPUT FOLDER: %s' % (pupil_csv_folder, downsampled_pupils_folder))
-print('DATA FOLDER: %s \n OUTPUT FOLDER: %s' % (pupil_csv_folder, downsampled_pupils_folder))
-###################################
-# PARAMETERS
-###################################
-N_CPU_available = 24
-###################################
-# FIND DAILY PUPIL TRACKING DATA
-###################################
-daily_folders = glob.glob(pupil_csv_folder + os.sep + 'SurprisingMinds_*')
-# If you only want to find saccades in a subset of the data...
-#daily_folders = daily_folders[10:100]
-# first day was a debugging session, so skip it
-pupil_folders = daily_folders[1:]
-### --------------------------------------------- ###
-### REMOVE THIS LINE WHEN PUPIL FINDING IS DONE!! ###
-# if currently still running pupil finding analysis...
-#pupil_folders = daily_folders[:-1]
-### --------------------------------------------- ###
-###################################
-# DOWNSAMPLE
-###################################
-# collect data from every 40ms or other multiples of 20
-downsampled_bucket_size_ms = 40
-original_bucket_size_in_ms = 4
-max_length_of_stim_vid = 60000 # milliseconds
-no_of_time_buckets = max_length_of_stim_vid/original_bucket_size_in_ms
-downsampled_no_of_time_buckets = max_length_of_stim_vid/downsampled_bucket_size_ms
-new_time_bucket_sample_rate = downsampled_bucket_size_ms/original_bucket_size_in_ms
-milliseconds_for_baseline = 3000
-baseline_no_buckets = int(milliseconds_for_baseline/new_time_bucket_sample_rate)
-###################################
-# CUTOFF FOR DISCARDING TRIALS
-###################################
-bad_trial_cutoff = 200
-###################################
-# BEGIN PUPIL DATA EXTRACTION
-###################################
-stim_vids = [24.0, 25.0, 26.0, 27.0, 28.0, 29.0]
-def process_day(day_folder):
+def process_day(day_folder, pupil_csv_folder, downsampled_pupils_folder, todays_datetime, stim_vids, downsampled_no_of_time_buckets, original_bucket_size_in_ms, downsampled_bucket_size_ms, baseline_no_buckets, bad_trial_cutoff, instrumentation_folder=None, instrumentation_run=None):
+    # downsample, filter and baseline one day of pupil tracking data, save as one .npz file
+    # with an instrumentation folder and run name, the timers and counters of the day go to this worker's records file
+    # returns True if the day was saved
     logging.basicConfig(filename="pm01AnalyzeCSVPupilPosition_" + todays_datetime + ".log", filemode='a', level=logging.INFO)
     # for each day...
     day_folder_path = os.path.join(pupil_csv_folder, day_folder)
@@ -271,10 +61,12 @@ def process_day(day_folder):
     world_folder = os.path.join(analysis_folder, "world")
     # Print/save number of users per day
     day_name = day_folder.split("_")[-1]
+    instruments = StageInstruments(instrumentation_run, instrumentation_folder, stage='pp01', enabled=instrumentation_run is not None)
     try: 
         ## EXTRACT PUPIL SIZE AND POSITION
-        right_area_contours_X, right_area_contours_Y, right_area_contours, right_area_circles_X, right_area_circles_Y, right_area_circles, num_right_activations, num_good_right_trials = load_daily_pupils("right", csv_folder, downsampled_no_of_time_buckets, original_bucket_size_in_ms, downsampled_bucket_size_ms, bad_trial_cutoff)
-        left_area_contours_X, left_area_contours_Y, left_area_contours, left_area_circles_X, left_area_circles_Y, left_area_circles, num_left_activations, num_good_left_trials = load_daily_pupils("left", csv_folder, downsampled_no_of_time_buckets, original_bucket_size_in_ms, downsampled_bucket_size_ms, bad_trial_cutoff)
+        right_area_contours_X, right_area_contours_Y, right_area_contours, right_area_circles_X, right_area_circles_Y, right_area_circles, num_right_activations, num_good_right_trials = load_daily_pupils("right", csv_folder, downsampled_no_of_time_buckets, original_bucket_size_in_ms, downsampled_bucket_size_ms, bad_trial_cutoff, instruments=instruments)
+        left_area_contours_X, left_area_contours_Y, left_area_contours, left_area_circles_X, left_area_circles_Y, left_area_circles, num_left_activations, num_good_left_trials = load_daily_pupils("left", csv_folder, downsampled_no_of_time_buckets, original_bucket_size_in_ms, downsampled_bucket_size_ms, bad_trial_cutoff, instruments=instruments)
+        instruments.count('trials', num_right_activations + num_left_activations)
         print("On {day}, exhibit was activated {right_count} times (right) and {left_count} times (left), with {right_good_count} good right trials and {left_good_count} good left trials".format(day=day_name, right_count=num_right_activations, left_count=num_left_activations, right_good_count=num_good_right_trials, left_good_count=num_good_left_trials))
         logging.info("On {day}, exhibit was activated {right_count} times (right) and {left_count} times (left), with {right_good_count} good right trials and {left_good_count} good left trials".format(day=day_name, right_count=num_right_activations, left_count=num_left_activations, right_good_count=num_good_right_trials, left_good_count=num_good_left_trials))
         # separate by stimulus number
@@ -310,10 +102,11 @@ def process_day(day_folder):
         # eye positions that are not realistic
         # time buckets with no corresponding frames
         # video pixel limits are (798,599)
-        all_position_X_data = filter_to_nan(all_position_X_data, 798, 0)
-        all_position_Y_data = filter_to_nan(all_position_Y_data, 599, 0)
-        # contours/circles that are too big
-        all_size_data = filter_to_nan(all_size_data, 15000, 0)
+        with instruments.timer('filter'):
+            all_position_X_data = filter_to_nan(all_position_X_data, 798, 0)
+            all_position_Y_data = filter_to_nan(all_position_Y_data, 599, 0)
+            # contours/circles that are too big
+            all_size_data = filter_to_nan(all_size_data, 15000, 0)
         # create a baseline for size data
         R_contours_baseline = {key:[] for key in stim_vids}
         R_circles_baseline = {key:[] for key in stim_vids}
@@ -327,18 +120,123 @@ def process_day(day_folder):
                     all_size_baselines[dataset][stimulus].append(baseline)
         # save to .npz file
         this_day_all_data_path = downsampled_pupils_folder + os.sep + day_name + '_totalR{right_count}_totalL{left_count}_goodR{right_good_count}_goodL{left_good_count}.npz'.format(right_count=num_right_activations, left_count=num_left_activations, right_good_count=num_good_right_trials, left_good_count=num_good_left_trials)
-        np.savez(this_day_all_data_path, all_pos_x=all_position_X_data, all_pos_y=all_position_Y_data, all_size=all_size_data, all_size_base=all_size_baselines)
+        with instruments.timer('save'):
+            # write to a temp file first, so a worker that dies while saving never leaves a partial day behind
+            with open(this_day_all_data_path + '.tmp', 'wb') as day_file:
+                np.savez(day_file, all_pos_x=all_position_X_data, all_pos_y=all_position_Y_data, all_size=all_size_data, all_size_base=all_size_baselines)
+            os.replace(this_day_all_data_path + '.tmp', this_day_all_data_path)
         print("Day {day} succeeded!".format(day=day_name))
         logging.info("Day {day} succeeded!".format(day=day_name))
+        instruments.count('days')
+        day_saved = True
     except Exception as e:
         print("Day {day} failed!".format(day=day_name))
         print(e)
         logging.info("Day {day} failed!".format(day=day_name))
         logging.info(e)
+        instruments.count('failed_days')
+        day_saved = False
+    instruments.flush('day', day_name)
+    instruments.close()
+    return day_saved
 
-Parallel(n_jobs=N_CPU_available)(delayed(process_day)(day_folder) for day_folder in pupil_folders)
-###################################
-# EXTRACTION COMPLETE
-###################################
+def process_queued_days(queue_folder, lease_s, day_folders, *process_day_args):
+    # one worker of the work queue: process_day every day it claims from the queue folder on the shared filesystem, until no days are left
+    # process_day_args: the arguments of process_day after day_folder
+    work_queue = WorkQueue(queue_folder, lease_s)
+    day_folders = {os.path.basename(day_folder): day_folder for day_folder in day_folders}
+    for day in work_queue.claimed(day_folders):
+        if process_day(day_folders[day], *process_day_args):
+            work_queue.complete(day)
+        else:
+            work_queue.fail(day, 'day failed')
+
+##########################################################
+# BEGIN SCRIPT
+##########################################################
+if __name__=='__main__':
+    from joblib import Parallel, delayed
+    parser = argparse.ArgumentParser(description='''Consolidate daily eye position and size data.
+        Extracts, filters, and downsamples the pupil tracking data of every day and saves one .npz file per day.''')
+    parser.add_argument("--queue", nargs='?', const='', default=None, help="Claim days from a work queue folder on the shared filesystem (default: queues/pp01 in the intermediates folder), so several machines running with the same queue share the days")
+    parser.add_argument("--lease", type=float, default=600, help="Seconds without a heartbeat after which another worker retries a claimed day (default: 600)")
+    args = parser.parse_args()
+    ###################################
+    # SCRIPT LOGGER
+    ###################################
+    # grab today's date
+    now = datetime.datetime.now()
+    todays_datetime = datetime.datetime.today().strftime('%Y%m%d-%H%M%S')
+    logging.basicConfig(filename="pp01ExtractPupilCSVDownsample_" + todays_datetime + ".log", filemode='a', level=logging.INFO)
+    # timers and counters of every day, as json lines (one file per worker) in the instrumentation folder
+    instrumentation_folder = os.path.join(current_working_directory, "instrumentation")
+    instrumentation_run = "pp01ExtractPupilCSVDownsample_" + todays_datetime
+    ###################################
+    # SOURCE DATA AND OUTPUT FILE LOCATIONS 
+    ###################################
+    pupil_csv_folder, output_folder = load_data()
+    downsampled_pupils_folder = os.path.join(output_folder, "downsampled_pupils")
+    # Create intermediates folder if it does not exist
+    if not os.path.exists(downsampled_pupils_folder):
+        #print("Creating downsampled_pupils_folder.")
+        os.makedirs(downsampled_pupils_folder)
+
+    logging.info('DATA FOLDER: %s \n OUTPUT FOLDER: %s' % (pupil_csv_folder, downsampled_pupils_folder))
+    print('DATA FOLDER: %s \n OUTPUT FOLDER: %s' % (pupil_csv_folder, downsampled_pupils_folder))
+    ###################################
+    # PARAMETERS
+    ###################################
+    N_CPU_available = 24
+    ###################################
+    # FIND DAILY PUPIL TRACKING DATA
+    ###################################
+    daily_folders = glob.glob(pupil_csv_folder + os.sep + 'SurprisingMinds_*')
+    # If you only want to find saccades in a subset of the data...
+    #daily_folders = daily_folders[10:100]
+    # first day was a debugging session, so skip it
+    pupil_folders = daily_folders[1:]
+    ### --------------------------------------------- ###
+    ### REMOVE THIS LINE WHEN PUPIL FINDING IS DONE!! ###
+    # if currently still running pupil finding analysis...
+    #pupil_folders = daily_folders[:-1]
+    ### --------------------------------------------- ###
+    ###################################
+    # DOWNSAMPLE
+    ###################################
+    # collect data from every 40ms or other multiples of 20
+    downsampled_bucket_size_ms = 40
+    original_bucket_size_in_ms = 4
+    max_length_of_stim_vid = 60000 # milliseconds
+    no_of_time_buckets = max_length_of_stim_vid/original_bucket_size_in_ms
+    downsampled_no_of_time_buckets = max_length_of_stim_vid/downsampled_bucket_size_ms
+    new_time_bucket_sample_rate = downsampled_bucket_size_ms/original_bucket_size_in_ms
+    milliseconds_for_baseline = 3000
+    baseline_no_buckets = int(milliseconds_for_baseline/new_time_bucket_sample_rate)
+    ###################################
+    # CUTOFF FOR DISCARDING TRIALS
+    ###################################
+    bad_trial_cutoff = 200
+    ###################################
+    # BEGIN PUPIL DATA EXTRACTION
+    ###################################
+    stim_vids = [24.0, 25.0, 26.0, 27.0, 28.0, 29.0]
+    if args.queue is None:
+        Parallel(n_jobs=N_CPU_available)(delayed(process_day)(day_folder, pupil_csv_folder, downsampled_pupils_folder, todays_datetime, stim_vids, downsampled_no_of_time_buckets, original_bucket_size_in_ms, downsampled_bucket_size_ms, baseline_no_buckets, bad_trial_cutoff, instrumentation_folder, instrumentation_run) for day_folder in pupil_folders)
+    else:
+        # every local worker claims days from the queue, alongside the workers of other machines using the same queue
+        queue_folder = args.queue or os.path.join(output_folder, 'queues', 'pp01')
+        logging.info('WORK QUEUE: %s' % (queue_folder))
+        print('WORK QUEUE: %s' % (queue_folder))
+        Parallel(n_jobs=N_CPU_available)(delayed(process_queued_days)(queue_folder, args.lease, pupil_folders, pupil_csv_folder, downsampled_pupils_folder, todays_datetime, stim_vids, downsampled_no_of_time_buckets, original_bucket_size_in_ms, downsampled_bucket_size_ms, baseline_no_buckets, bad_trial_cutoff, instrumentation_folder, instrumentation_run) for worker in range(N_CPU_available))
+    ###################################
+    # EXTRACTION COMPLETE
+    ###################################
+    # merge the timers and counters of all workers
+    run_summary, summary_path = write_run_summary(instrumentation_folder, instrumentation_run)
+    for line in format_summary(run_summary):
+        print(line)
+        logging.info(line)
+    print("Saved timing summary to {path}".format(path=summary_path))
+    logging.info("Saved timing summary to {path}".format(path=summary_path))
 
-# FIN
\ No newline at end of file
+    # FIN
@@ -6,6 +6,7 @@ Analysis: Measure speed of pupil
 Loads daily .npz files with x position, y position, size, and size baseline data.
 Calculate movement from one frame to the next and find movement peaks (saccades).
 Split into calibration, unique, and octopus sequences.
+Optional: '--memory_budget MB' to cap the memory used by days processed in parallel, '--trace_memory' to name the source lines holding the most memory in the memory report.
 
 @author: Adam R Kampff and Danbee Kim
 """
@@ -13,15 +14,16 @@ import os
 import glob
 import datetime
 import numpy as np
-import matplotlib.pyplot as plt
 import itertools
-from collections import defaultdict
-from scipy.signal import savgol_filter
-from itertools import groupby
-from operator import itemgetter
-from scipy.signal import find_peaks
 import csv
 import logging
+import argparse
+import shutil
+import sys
+# make the shared surprisingMinds package (in the repo root) importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from surprisingMinds.pupilData import threshold_to_nan
+from surprisingMinds.memoryBudget import MB, MemoryBudget, format_report
 
 ###################################
 # SET CURRENT WORKING DIRECTORY
@@ -40,133 +42,52 @@ def load_data():
     return dataset_dir
 ##########################################################
 
-def threshold_to_nan(input_array, threshold, upper_or_lower):
-    for index in range(len(input_array)): 
-        if upper_or_lower=='upper':
-            if np.isnan(input_array[index])==False and input_array[index]>threshold:
-                input_array[index] = np.nan
-        if upper_or_lower=='lower':
-            if np.isnan(input_array[index])==False and input_array[index]<threshold:
-                input_array[index] = np.nan
-    return input_array
-
-def filter_to_nan(list_of_dicts, upper_threshold, lower_threshold):
-    for dictionary in list_of_dicts:
-        for key in dictionary:
-            for trial in dictionary[key]:
-                trial = threshold_to_nan(trial, upper_threshold, 'upper')
-                trial = threshold_to_nan(trial, lower_threshold, 'lower')
-    return list_of_dicts
-
-def make_luminance_time_buckets(start_timestamp, bucket_size_ms, end_timestamp): 
-    start_timestamp = start_timestamp.split('+')[0][:-3]
-    end_timestamp = end_timestamp.split('+')[0][:-3]
-    buckets_start_time = datetime.datetime.strptime(start_timestamp, "%Y-%m-%dT%H:%M:%S.%f")
-    buckets_end_time = datetime.datetime.strptime(end_timestamp, "%Y-%m-%dT%H:%M:%S.%f")
-
-    current_bucket = buckets_start_time
-    time_buckets = []
-    window = datetime.timedelta(milliseconds=bucket_size_ms)
-    while current_bucket <= buckets_end_time:
-        time_buckets.append(current_bucket)
-        current_bucket = current_bucket + window
-
-    bucket_list = dict.fromkeys(time_buckets)
-
-    for key in time_buckets: 
-        bucket_list[key] = [-5]
-    # -5 remains in a time bucket, this means no 'near-enough timestamp' frame was found in video
-
-    return bucket_list
-
-def find_nearest_timestamp_key(timestamp_to_check, dict_of_timestamps, time_window):
-    for key in dict_of_timestamps.keys():
-        if key <= timestamp_to_check <= (key + time_window):
-            return key
-
-def build_timebucket_avg_luminance(timestamps_and_luminance_array, bucket_size_ms, max_no_of_timebuckets):
-    bucket_window = datetime.timedelta(milliseconds=bucket_size_ms)
-    max_no_of_timebuckets = int(max_no_of_timebuckets)
-    avg_luminance_by_timebucket = []
-    index = 0
-    for trial in timestamps_and_luminance_array:
-        first_timestamp = trial[0][0]
-        end_timestamp = trial[-1][0]
-        this_trial_timebuckets = make_luminance_time_buckets(first_timestamp, bucket_size_ms, end_timestamp)
-        this_trial = np.empty(max_no_of_timebuckets)
-        this_trial[:] = np.nan
-        for frame in trial:
-            timestamp = frame[0]
-            lum_val = int(frame[1])
-            timestamp = timestamp.split('+')[0][:-3]
-            timestamp_dt = datetime.datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S.%f")
-            this_bucket = find_nearest_timestamp_key(timestamp_dt, this_trial_timebuckets, bucket_window)
-            if this_trial_timebuckets[this_bucket] == [-5]:
-                this_trial_timebuckets[this_bucket] = [lum_val]
-            else:
-                this_trial_timebuckets[this_bucket].append(lum_val)
-        sorted_keys = sorted(list(this_trial_timebuckets.keys()))
-        key_index = 0
-        for key in sorted_keys:
-            avg_luminance_for_this_bucket = np.mean(this_trial_timebuckets[key])
-            this_trial[key_index] = avg_luminance_for_this_bucket
-            key_index = key_index + 1
-        avg_luminance_by_timebucket.append(this_trial)
-        index = index + 1
-    avg_lum_by_tb_thresholded = []
-    for lum_array in avg_luminance_by_timebucket:
-        lum_array_thresholded = threshold_to_nan(lum_array, 0, 'lower')
-        avg_lum_by_tb_thresholded.append(lum_array_thresholded)
-    avg_lum_by_tb_thresh_array = np.array(avg_lum_by_tb_thresholded)
-    avg_lum_final = np.nanmean(avg_lum_by_tb_thresh_array, axis=0)
-    return avg_lum_final
-
-def find_windowed_peaks(time_bucket_dict, window, threshold):
+def find_windowed_peaks(filtered_bucket_counts, window, threshold):
+    # filtered_bucket_counts: participant count per time bucket, zero where the bucket was filtered out
+    filtered_bucket_counts = np.asarray(filtered_bucket_counts)
+    no_of_buckets = len(filtered_bucket_counts)
     windowed_peaks = {}
-    key_list = []
-    for ptime in time_bucket_dict.keys():
-        key_list.append(ptime)
-    key_list.sort()
-    for k,g in groupby(enumerate(key_list), lambda ix: ix[0] - ix[1]):
-        consecutive_ptimes = list(map(itemgetter(1), g))
-        #print(consecutive_ptimes)
-        if len(consecutive_ptimes)<=window:
-            max_val = threshold
-            this_group_count = 0
-            for time in consecutive_ptimes:
-                this_group_count = this_group_count + time_bucket_dict[time]
-            if this_group_count>max_val:
-                max_time = np.median(consecutive_ptimes)
-                windowed_peaks[int(max_time)] = this_group_count
-        else:
-            max_val = threshold
-            max_times = {}
-            for time in consecutive_ptimes:
-                center = time
-                start = int(center-(window/2))
-                end = int(center+(window/2))
-                this_group_count = 0
-                for t in range(int(start),int(end)):
-                    this_group_count = this_group_count + time_bucket_dict.get(t,0)
-                if this_group_count>max_val:
-                    if not max_times:
-                        max_times[center] = this_group_count
-                        max_val = this_group_count
-                    else:
-                        overlap = [x for x in max_times.keys() if start<x<end]
-                        filtered_overlap = {}
-                        for o in overlap:
-                            temp_val = max_times.pop(o)
-                            if temp_val>this_group_count:
-                                filtered_overlap[o] = [temp_val]
-                        if not filtered_overlap:
-                            max_times[center] = this_group_count
-                            max_val = this_group_count
-                        else:
-                            for f in filtered_overlap.items():
-                                max_times[f[0]] = f[1]
-            for max_time in max_times.keys():
-                windowed_peaks[max_time] = max_times[max_time]
+    key_list = np.flatnonzero(filtered_bucket_counts)
+    if len(key_list)==0:
+        return windowed_peaks
+    # windowed count centered on each time bucket, [center-window/2, center+window/2), via cumulative sums (box convolution)
+    cumulative_counts = np.concatenate(([0], np.cumsum(filtered_bucket_counts)))
+    centers = np.arange(no_of_buckets)
+    starts = np.trunc(centers - window/2).astype(int)
+    ends = np.trunc(centers + window/2).astype(int)
+    windowed_counts = cumulative_counts[np.clip(ends, 0, no_of_buckets)] - cumulative_counts[np.clip(starts, 0, no_of_buckets)]
+    # group consecutive time buckets into runs
+    run_starts = np.flatnonzero(np.diff(key_list, prepend=-2) != 1)
+    run_lengths = np.diff(np.append(run_starts, len(key_list)))
+    run_ids = np.repeat(np.arange(len(run_starts)), run_lengths)
+    # short runs: total count of the run, at its (lower) median time bucket
+    short_runs = np.flatnonzero(run_lengths<=window)
+    if len(short_runs)>0:
+        run_totals = np.add.reduceat(filtered_bucket_counts[key_list], run_starts)
+        for run in short_runs:
+            if run_totals[run]>threshold:
+                median_time = key_list[run_starts[run]] + (run_lengths[run]-1)//2
+                windowed_peaks[int(median_time)] = int(run_totals[run])
+    # long runs: keep windowed counts that beat every earlier windowed count in the run (and the threshold)
+    in_long_run = run_lengths[run_ids]>window
+    long_times = key_list[in_long_run]
+    if len(long_times)>0:
+        long_run_ids = run_ids[in_long_run]
+        long_counts = windowed_counts[long_times]
+        # running max restarts at each run: offset each run above every earlier run
+        offset = long_counts.max() + 1 - min(threshold, 0)
+        offset_counts = long_counts + long_run_ids*offset
+        previous_max = np.maximum.accumulate(np.concatenate(([-np.inf], offset_counts[:-1])))
+        previous_max = np.maximum(previous_max - long_run_ids*offset, threshold)
+        records = np.flatnonzero(long_counts>previous_max)
+        record_times = long_times[records]
+        record_runs = long_run_ids[records]
+        # a record is dropped when the next record of the same run overlaps it
+        next_in_same_run = np.append(record_runs[1:]==record_runs[:-1], False)
+        next_starts = np.append(starts[record_times[1:]], 0)
+        survives = ~next_in_same_run | (next_starts>=record_times)
+        for max_time, count in zip(record_times[survives], long_counts[records][survives]):
+            windowed_peaks[int(max_time)] = int(count)
     return windowed_peaks
 
 def calc_mvmnt_from_pos(list_of_positon_arrays, nans_threshold, movement_threshold_upper, movement_threshold_lower):
@@ -207,372 +128,458 @@ def calc_mvmnt_from_pos(list_of_positon_arrays, nans_threshold, movement_thresho
     output = [x for x in this_stim_movements if len(x)>=trial_movements_min_len]
     return output
 
-def calc_avg_motion_and_peaks(list_of_movement_arrays, window):
-    total_motion = np.zeros(len(list_of_movement_arrays[0]))
-    nan_count = np.zeros(len(list_of_movement_arrays[0]))
-    # for each frame, sum the abs(movements) on that frame
-    for trial in list_of_movement_arrays:
-        for t in range(len(trial)):
-            if np.isnan(trial[t]):
-                nan_count[t] = nan_count[t] + 1
-            if not np.isnan(trial[t]):
-                total_motion[t] = total_motion[t] + abs(trial[t])
-    avg_motion = np.zeros(len(list_of_movement_arrays[0]))
-    for f in range(len(total_motion)):
-        valid_subjects_this_tbucket = len(list_of_movement_arrays) - nan_count[f]
-        avg_motion[f] = total_motion[f]/valid_subjects_this_tbucket
+def smooth_avg_motion_and_peaks(avg_motion, window):
+    from scipy.signal import savgol_filter, find_peaks
+    # avg_motion has shape (combination x buckets)
     # smooth the average motion
     # smoothing window must be odd!
     # apply savitzky-golay filter to smooth
-    avg_motion_smoothed = savgol_filter(avg_motion, window, 3)
+    avg_motion_smoothed = savgol_filter(avg_motion, window, 3, axis=-1)
     # find peaks in average motion
-    peaks, _ = find_peaks(avg_motion_smoothed, height=(2,10), prominence=0.75)
-    return avg_motion_smoothed, peaks
+    all_peaks = []
+    for combination in avg_motion_smoothed:
+        peaks, _ = find_peaks(combination, height=(2,10), prominence=0.75)
+        all_peaks.append(peaks)
+    return avg_motion_smoothed, all_peaks
+
+def count_saccade_participants_sweep(movement_arrays, saccade_thresholds):
+    # count number of subjects with abs(movement)>=threshold in each timebucket, for every threshold in one pass
+    # returns a (threshold x bucket) count matrix, rows in the order of saccade_thresholds
+    abs_movements = np.abs(np.asarray(movement_arrays))
+    saccade_thresholds = np.asarray(saccade_thresholds, dtype=float)
+    no_of_thresholds = len(saccade_thresholds)
+    no_of_buckets = abs_movements.shape[-1]
+    threshold_order = np.argsort(saccade_thresholds)
+    # number of (sorted) thresholds each movement reaches, nans reach none
+    thresholds_reached = np.searchsorted(saccade_thresholds[threshold_order], abs_movements, side='right')
+    thresholds_reached[np.isnan(abs_movements)] = 0
+    # histogram of thresholds reached, per time bucket
+    bucket_index = np.broadcast_to(np.arange(no_of_buckets), abs_movements.shape)
+    reached_hist = np.bincount((bucket_index*(no_of_thresholds+1) + thresholds_reached).ravel(), minlength=no_of_buckets*(no_of_thresholds+1))
+    reached_hist = reached_hist.reshape(no_of_buckets, no_of_thresholds+1)
+    # subjects reaching sorted threshold j are those that reached more than j thresholds
+    sorted_counts = np.cumsum(reached_hist[:, ::-1], axis=1)[:, ::-1][:, 1:].T
+    counts = np.empty_like(sorted_counts)
+    counts[threshold_order] = sorted_counts
+    return counts
 
-def find_saccades(list_of_movement_arrays, saccade_threshold, raw_count_threshold, window_size, windowed_count_threshold):
-    all_trials_peaks = []
-    for trial in range(len(list_of_movement_arrays)):
-        all_trials_peaks.append([])
-        this_trial = list_of_movement_arrays[trial]
-        for time_bucket in range(len(this_trial)):
-            # find timebuckets where abs(movement)>threshold
-            if abs(this_trial[time_bucket])>=saccade_threshold:
-                all_trials_peaks[trial].append(time_bucket)
-    # count number of subjects who had peaks in the same timebuckets
-    trial_peaks_totals = {}
-    trial_peaks_totals = defaultdict(lambda:0, trial_peaks_totals)
-    for trial in all_trials_peaks:
-        for tbucket in trial:
-            trial_peaks_totals[tbucket] = trial_peaks_totals[tbucket] + 1
+def find_saccades_from_counts(all_trials_peaks_totals, saccade_thresholds, raw_count_threshold, window_size, windowed_count_thresholds):
+    # saccades for a list of saccade thresholds, paired with a list of windowed count thresholds,
+    # from the (threshold x bucket) participant counts of count_saccade_participants_sweep
     # filter for timebuckets when "enough" subjects had peaks
-    peak_tbuckets_filtered = {}
-    # combine counts of peaks within time windows
-    for key in trial_peaks_totals.keys():
-        count = trial_peaks_totals[key]
-        if count>=raw_count_threshold:
-            #print(t, count)
-            peak_tbuckets_filtered[key] = count
-    # combine counts of peaks within time windows
-    peak_tbuckets_windowed = find_windowed_peaks(peak_tbuckets_filtered, window_size, windowed_count_threshold)
-    saccades = {tbucket:total for tbucket,total in peak_tbuckets_windowed.items()}
-    return saccades
+    all_peak_tbuckets_filtered = np.where(all_trials_peaks_totals>=raw_count_threshold, all_trials_peaks_totals, 0)
+    saccades_by_threshold = {}
+    for s_thresh, w_thresh, peak_tbuckets_filtered in zip(saccade_thresholds, windowed_count_thresholds, all_peak_tbuckets_filtered):
+        saccades_by_threshold[s_thresh] = find_windowed_peaks(peak_tbuckets_filtered, window_size, w_thresh)
+    return saccades_by_threshold
 
-##########################################################
-# BEGIN SCRIPT
-##########################################################
-###################################
-# SCRIPT LOGGER
-###################################
-# grab today's date
-now = datetime.datetime.now()
-todays_datetime = datetime.datetime.today().strftime('%Y%m%d-%H%M%S')
-logging.basicConfig(filename="pm01CalcMvmnt_" + todays_datetime + ".log", filemode='w', level=logging.INFO)
-###################################
-# SOURCE DATA AND OUTPUT FILE LOCATIONS 
-###################################
-data_folder = load_data()
-# set up input folders
-pupil_data_downsampled = os.path.join(data_folder, 'downsampled_pupils')
-# set up various output folders
-calib_mvmnt_folder = os.path.join(data_folder, 'calib_movement')
-octo_mvmnt_folder = os.path.join(data_folder, 'octo_movement')
-unique_mvmnt_folder = os.path.join(data_folder, 'unique_movement')
-# Create plots folder (and sub-folders) if it (they) does (do) not exist
-if not os.path.exists(calib_mvmnt_folder):
-    os.makedirs(calib_mvmnt_folder)
-if not os.path.exists(octo_mvmnt_folder):
-    os.makedirs(octo_mvmnt_folder)
-if not os.path.exists(unique_mvmnt_folder):
-    os.makedirs(unique_mvmnt_folder)
+def movement_partial(movement_arrays, saccade_thresholds):
+    # per time bucket sums of one stimulus' trials that add up across days to the full dataset:
+    # number of trials, sum of abs(movement) and number of non-nan movements (average motion is their ratio, same as nanmean),
+    # and the (threshold x bucket) saccade participant counts of count_saccade_participants_sweep
+    # None if there are no trials
+    if len(movement_arrays)==0:
+        return None
+    abs_movements = np.abs(np.asarray(movement_arrays, dtype=float))
+    valid = ~np.isnan(abs_movements)
+    return {'trials': len(abs_movements), 'abs_sums': np.where(valid, abs_movements, 0).sum(axis=0), 'valid_counts': valid.sum(axis=0), 'participants': count_saccade_participants_sweep(movement_arrays, saccade_thresholds)}
 
-logging.info('PUPIL DATA FOLDER: %s \n CALIB MOVEMENT FOLDER: %s \n OCTO MOVEMENT FOLDER: %s \n UNIQUE MOVEMENT FOLDER: %s' % (pupil_data_downsampled, calib_mvmnt_folder, octo_mvmnt_folder, unique_mvmnt_folder))
-print('PUPIL DATA FOLDER: %s \n CALIB MOVEMENT FOLDER: %s \n OCTO MOVEMENT FOLDER: %s \n UNIQUE MOVEMENT FOLDER: %s' % (pupil_data_downsampled, calib_mvmnt_folder, octo_mvmnt_folder, unique_mvmnt_folder))
-###################################
-# PARAMETERS
-###################################
-downsampled_bucket_size_ms = 40 # milliseconds
-smoothing_window = 25 # in time buckets, must be odd! for savgol_filter
-###################################
-# SORT DATA BY STIMULUS TYPE
-###################################
-stim_vids = [24.0, 25.0, 26.0, 27.0, 28.0, 29.0]
-all_right_trials_contours_X = {key:[] for key in stim_vids}
-all_right_trials_contours_Y = {key:[] for key in stim_vids}
-all_right_trials_circles_X = {key:[] for key in stim_vids}
-all_right_trials_circles_Y = {key:[] for key in stim_vids}
-all_left_trials_contours_X = {key:[] for key in stim_vids}
-all_left_trials_contours_Y = {key:[] for key in stim_vids}
-all_left_trials_circles_X = {key:[] for key in stim_vids}
-all_left_trials_circles_Y = {key:[] for key in stim_vids}
-all_trials_position_X_data = [all_right_trials_contours_X, all_right_trials_circles_X, all_left_trials_contours_X, all_left_trials_circles_X]
-all_trials_position_Y_data = [all_right_trials_contours_Y, all_right_trials_circles_Y, all_left_trials_contours_Y, all_left_trials_circles_Y]
-activation_count = []
-analysed_count = []
-#########################################################
-# LOAD PUPIL POSITIONS FROM CONSOLIDATED DAILY PUPIL DATA
-#########################################################
-daily_folders = glob.glob(pupil_data_downsampled + os.sep + '*.npz')
-for daily_pupil_data in daily_folders:
+def add_movement_partials(partial, other_partial):
+    # sum of two movement partials of the same stimulus (e.g. two days), either can be None
+    if partial is None:
+        return other_partial
+    if other_partial is None:
+        return partial
+    return {key: partial[key] + other_partial[key] for key in partial}
+
+def avg_motion_from_partials(partials):
+    # (partial x bucket) average abs(movement) across valid (non-nan) trials of each partial, the same as a nanmean over its trials
+    # rows of partials without trials are nan
+    no_of_buckets = max([len(partial['abs_sums']) for partial in partials if partial is not None])
+    avg_motion = np.full((len(partials), no_of_buckets), np.nan)
+    for combination, partial in enumerate(partials):
+        if partial is not None:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                avg_motion[combination, :len(partial['abs_sums'])] = partial['abs_sums']/partial['valid_counts']
+    return avg_motion
+
+def movement_partial_key(side, c_axis, stimuli):
+    return '%d_%d_%d' % (side, c_axis, stimuli)
+
+def process_day(daily_pupil_data, movement_partials_folder, stim_vids, dropped_frames_threshold, saccade_thresholds):
+    # measure the movement of every trial of one day and save it (one array per side, cAxis and stimulus) to movement_partials_folder
+    # returns the movement partials of the day, partials[side][c_axis][stimuli]
     pupil_data = np.load(daily_pupil_data, allow_pickle=True)
     this_day_x_pos = pupil_data['all_pos_x']
     this_day_y_pos = pupil_data['all_pos_y']
-    # extract activation and good trials count
-    file_info = os.path.basename(daily_pupil_data).split('_')
-    this_date = file_info[0]
-    num_right_activations = int(file_info[1][6:])
-    num_left_activations = int(file_info[2][6:])
-    num_good_right_trials = int(file_info[3][5:])
-    num_good_left_trials = int(file_info[4].split('.')[0][5:])
-    analysed_count.append((num_good_right_trials, num_good_left_trials))
-    activation_count.append((num_right_activations, num_left_activations))
-    # append position data to global data structure
-    for i in range(len(this_day_x_pos)):
-        for stimulus in this_day_x_pos[i]:
-            for index in range(len(this_day_x_pos[i][stimulus])):
-                all_trials_position_X_data[i][stimulus].append(this_day_x_pos[i][stimulus][index])
-    for i in range(len(this_day_y_pos)):
-        for stimulus in this_day_y_pos[i]:
-            for index in range(len(this_day_y_pos[i][stimulus])):
-                all_trials_position_Y_data[i][stimulus].append(this_day_y_pos[i][stimulus][index])
+    # positions of each side in cAxis order (contours X, contours Y, circles X, circles Y)
+    # all_pos_x and all_pos_y hold right contours, right circles, left contours, left circles
+    day_positions = [[this_day_x_pos[0], this_day_y_pos[0], this_day_x_pos[1], this_day_y_pos[1]], [this_day_x_pos[2], this_day_y_pos[2], this_day_x_pos[3], this_day_y_pos[3]]]
+    day_movements = {}
+    day_partials = []
+    for side, side_positions in enumerate(day_positions):
+        day_partials.append([])
+        for c_axis, positions in enumerate(side_positions):
+            day_partials[side].append({})
+            for stimuli in stim_vids:
+                movements = calc_mvmnt_from_pos(positions.get(stimuli, []), dropped_frames_threshold, 100, -100)
+                day_partials[side][c_axis][stimuli] = movement_partial(movements, saccade_thresholds)
+                if len(movements)>0:
+                    day_movements[movement_partial_key(side, c_axis, stimuli)] = np.array(movements)
+    # write to a temp file first, so an interrupted day never leaves a partial file behind
+    partial_path = os.path.join(movement_partials_folder, os.path.basename(daily_pupil_data))
+    with open(partial_path + '.tmp', 'wb') as partial_file:
+        np.savez(partial_file, **day_movements)
+    os.replace(partial_path + '.tmp', partial_path)
+    return day_partials
 
-#########################################################
-# ACTIVATION / GOOD TRIALS
-#########################################################
-total_activation = sum(count[0] for count in activation_count)
-total_days_activated = len(activation_count)
-good_trials_right = [count[0] for count in analysed_count]
-good_trials_left = [count[1] for count in analysed_count]
-total_good_trials_right = sum(good_trials_right)
-total_good_trials_left = sum(good_trials_left)
-print("Total number of exhibit activations: {total}".format(total=total_activation))
-print("Total number of good right eye camera trials: {good_total}".format(good_total=total_good_trials_right))
-print("Total number of good left eye camera trials: {good_total}".format(good_total=total_good_trials_left))
-logging.info("Total number of exhibit activations: {total}".format(total=total_activation))
-logging.info("Total number of good right eye camera trials: {good_total}".format(good_total=total_good_trials_right))
-logging.info("Total number of good left eye camera trials: {good_total}".format(good_total=total_good_trials_left))
-activation_array = np.array(activation_count)
-analysed_array_right = np.array(good_trials_right)
-analysed_array_left = np.array(good_trials_left)
-###################################
-# CALCULATE PUPIL MOVEMENT
-###################################
-all_trials_position_right_data = [all_right_trials_contours_X, all_right_trials_contours_Y, all_right_trials_circles_X, all_right_trials_circles_Y]
-all_trials_position_left_data = [all_left_trials_contours_X, all_left_trials_contours_Y, all_left_trials_circles_X, all_left_trials_circles_Y]
-all_positions = [all_trials_position_right_data, all_trials_position_left_data]
-# currently we are not pairing right and left eye coordinates
-# measure movement from one frame to next
-all_right_contours_movement_X = {key:[] for key in stim_vids}
-all_right_circles_movement_X = {key:[] for key in stim_vids}
-all_right_contours_movement_Y = {key:[] for key in stim_vids}
-all_right_circles_movement_Y = {key:[] for key in stim_vids}
-all_left_contours_movement_X = {key:[] for key in stim_vids}
-all_left_circles_movement_X = {key:[] for key in stim_vids}
-all_left_contours_movement_Y = {key:[] for key in stim_vids}
-all_left_circles_movement_Y = {key:[] for key in stim_vids}
-all_movement_right = [all_right_contours_movement_X, all_right_contours_movement_Y, all_right_circles_movement_X, all_right_circles_movement_Y]
-all_movement_left = [all_left_contours_movement_X, all_left_contours_movement_Y, all_left_circles_movement_X, all_left_circles_movement_Y]
-all_movements = [all_movement_right, all_movement_left]
-side_names = ['Right', 'Left']
-cAxis_names = ['contoursX', 'contoursY', 'circlesX', 'circlesY']
-### calculate movement ###
-for side in range(len(all_positions)):
-    for c_axis in range(len(all_positions[side])):
-        for stimuli in all_positions[side][c_axis]:
-            print('Calculating movements for {side} side, {cAxis_type}, stimulus {stim}'.format(side=side_names[side], cAxis_type=cAxis_names[c_axis], stim=stimuli))
-            logging.info('Calculating movements for {side} side, {cAxis_type}, stimulus {stim}'.format(side=side_names[side], cAxis_type=cAxis_names[c_axis], stim=stimuli))
-            # if there are nans (dropped frames) for more than 2 seconds of video time, then toss that trial
-            dropped_frames_threshold = 2000/downsampled_bucket_size_ms
-            all_movements[side][c_axis][stimuli] = calc_mvmnt_from_pos(all_positions[side][c_axis][stimuli], dropped_frames_threshold, 100, -100)
+def partial_movement_rows(partial_files, key, start, end):
+    # time buckets [start:end] of the movement of every trial saved under key, one day at a time
+    for partial_file in partial_files:
+        with np.load(partial_file) as day_movements:
+            if key in day_movements.files:
+                yield day_movements[key][:, start:end]
 
-###################################
-# CALCULATE PUPIL MOTION (abs val of movement)
-###################################
-all_right_contours_X_avg_motion = {key:[] for key in stim_vids}
-all_right_circles_X_avg_motion = {key:[] for key in stim_vids}
-all_right_contours_Y_avg_motion = {key:[] for key in stim_vids}
-all_right_circles_Y_avg_motion = {key:[] for key in stim_vids}
-all_left_contours_X_avg_motion = {key:[] for key in stim_vids}
-all_left_circles_X_avg_motion = {key:[] for key in stim_vids}
-all_left_contours_Y_avg_motion = {key:[] for key in stim_vids}
-all_left_circles_Y_avg_motion = {key:[] for key in stim_vids}
-all_avg_motion_right = [all_right_contours_X_avg_motion, all_right_contours_Y_avg_motion, all_right_circles_X_avg_motion, all_right_circles_Y_avg_motion]
-all_avg_motion_left = [all_left_contours_X_avg_motion, all_left_contours_Y_avg_motion, all_left_circles_X_avg_motion, all_left_circles_Y_avg_motion]
-all_avg_motion = [all_avg_motion_right, all_avg_motion_left]
-# motion peaks
-all_RcontoursX_avg_motion_peaks = {key:[] for key in stim_vids}
-all_RcirclesX_avg_motion_peaks = {key:[] for key in stim_vids}
-all_RcontoursY_avg_motion_peaks = {key:[] for key in stim_vids}
-all_RcirclesY_avg_motion_peaks = {key:[] for key in stim_vids}
-all_LcontoursX_avg_motion_peaks = {key:[] for key in stim_vids}
-all_LcirclesX_avg_motion_peaks = {key:[] for key in stim_vids}
-all_LcontoursY_avg_motion_peaks = {key:[] for key in stim_vids}
-all_LcirclesY_avg_motion_peaks = {key:[] for key in stim_vids}
-all_avg_motion_right_peaks = [all_RcontoursX_avg_motion_peaks, all_RcontoursY_avg_motion_peaks, all_RcirclesX_avg_motion_peaks, all_RcirclesY_avg_motion_peaks]
-all_avg_motion_left_peaks = [all_LcontoursX_avg_motion_peaks, all_LcontoursY_avg_motion_peaks, all_LcirclesX_avg_motion_peaks, all_LcirclesY_avg_motion_peaks]
-all_avg_motion_peaks = [all_avg_motion_right_peaks, all_avg_motion_left_peaks]
-# find average pixel motion per time_bucket for each stimulus
-for side in range(len(all_movements)):
-    for c_axis in range(len(all_movements[side])):
-        for stimuli in all_movements[side][c_axis]:
-            print('Calculating average motion for {side} side, {cAxis_type}, stimulus {stim}'.format(side=side_names[side], cAxis_type=cAxis_names[c_axis], stim=stimuli))
-            logging.info('Calculating average motion for {side} side, {cAxis_type}, stimulus {stim}'.format(side=side_names[side], cAxis_type=cAxis_names[c_axis], stim=stimuli))
-            avg_motion_this_stim, peaks_this_stim = calc_avg_motion_and_peaks(all_movements[side][c_axis][stimuli], smoothing_window)
-            all_avg_motion[side][c_axis][stimuli] = avg_motion_this_stim
-            all_avg_motion_peaks[side][c_axis][stimuli] = peaks_this_stim
+def sequence_shape(no_of_trials, no_of_buckets, start, end):
+    # shape of the movement array of one sequence, (0,) without trials like np.array([])
+    if no_of_trials==0:
+        return (0,)
+    return (no_of_trials, len(range(no_of_buckets)[start:end]))
 
-###################################
-# FIND PEAKS IN MOVEMENT
-###################################
-all_right_contours_X_peaks = {key:{} for key in stim_vids}
-all_right_circles_X_peaks = {key:{} for key in stim_vids}
-all_right_contours_Y_peaks = {key:{} for key in stim_vids}
-all_right_circles_Y_peaks = {key:{} for key in stim_vids}
-all_left_contours_X_peaks = {key:{} for key in stim_vids}
-all_left_circles_X_peaks = {key:{} for key in stim_vids}
-all_left_contours_Y_peaks = {key:{} for key in stim_vids}
-all_left_circles_Y_peaks = {key:{} for key in stim_vids}
-all_peaks_right = [all_right_contours_X_peaks, all_right_contours_Y_peaks, all_right_circles_X_peaks, all_right_circles_Y_peaks]
-all_peaks_left = [all_left_contours_X_peaks, all_left_contours_Y_peaks, all_left_circles_X_peaks, all_left_circles_Y_peaks]
-all_peaks = [all_peaks_right, all_peaks_left]
-# filter through the movement to find peaks in individual traces
-for side in range(len(all_movements)):
-    for c_axis in range(len(all_movements[side])):
-        for stim in all_movements[side][c_axis]:
-            saccade_thresholds = [2.5, 5, 10, 20, 30, 40, 50, 60] # pixels
-            all_peaks[side][c_axis][stim] = {key:{} for key in saccade_thresholds}
-            this_stim_N = len(all_movements[side][c_axis][stim])
-            count_threshold = this_stim_N/10
-            windowed_count_thresholds = [this_stim_N/(i*2) for i in range(1, len(saccade_thresholds)+1)]
-            for thresh in range(len(saccade_thresholds)):
-                print('Looking for movements greater than {p} pixels in {side} side, {cAxis_type}, stimulus {s}'.format(p=saccade_thresholds[thresh], side=side_names[side], cAxis_type=cAxis_names[c_axis], s=stim))
-                logging.info('Looking for movements greater than {p} pixels in {side} side, {cAxis_type}, stimulus {s}'.format(p=saccade_thresholds[thresh], side=side_names[side], cAxis_type=cAxis_names[c_axis], s=stim))
-                peaks_window = 40 # timebuckets
-                s_thresh = saccade_thresholds[thresh]
-                w_thresh = windowed_count_thresholds[thresh]
-                all_peaks[side][c_axis][stim][s_thresh] = find_saccades(all_movements[side][c_axis][stim], s_thresh, count_threshold, peaks_window, w_thresh)
+def write_npz_streamed(npz_path, arrays):
+    # arrays: name -> (shape, chunks of rows), chunks fill the float64 array of that shape row by row
+    # loads the same as np.savez(npz_path, **arrays), but only one chunk is ever held in memory
+    import zipfile
+    with zipfile.ZipFile(npz_path + '.tmp', mode='w', compression=zipfile.ZIP_STORED, allowZip64=True) as npz_file:
+        for name, (shape, chunks) in arrays.items():
+            with npz_file.open(name + '.npy', mode='w', force_zip64=True) as npy_file:
+                np.lib.format.write_array_header_1_0(npy_file, {'descr': np.lib.format.dtype_to_descr(np.dtype(np.float64)), 'fortran_order': False, 'shape': shape})
+                no_of_values = 0
+                for chunk in chunks:
+                    chunk = np.ascontiguousarray(chunk, dtype=np.float64)
+                    npy_file.write(chunk.tobytes())
+                    no_of_values = no_of_values + chunk.size
+                if no_of_values != int(np.prod(shape)):
+                    raise ValueError('%s: %d values written to an array of shape %s' % (name, no_of_values, shape))
+    os.replace(npz_path + '.tmp', npz_path)
 
-###################################
-# SPLIT INTO OCTO, UNIQUE, CALIB
-###################################
-stim_old_to_new = {24.0: 0, 25.0: 1, 26.0: 2, 27.0: 3, 28.0: 4, 29.0: 5}
-# timing info in 40ms resolution (as opposed to timing info in sd02_detect_saccades.py, which is in 4ms resolution)
-calib_start = 0
-calib_end = 443
-unique_start = 443
-unique_ends = {0: 596, 1: 602, 2: 666, 3: 608, 4: 667, 5: 719}
-octo_len = 398
+##########################################################
+# BEGIN SCRIPT
+##########################################################
+if __name__=='__main__':
+    from joblib import Parallel, delayed
+    ###################################
+    # SCRIPT LOGGER
+    ###################################
+    # grab today's date
+    now = datetime.datetime.now()
+    todays_datetime = datetime.datetime.today().strftime('%Y%m%d-%H%M%S')
+    logging.basicConfig(filename="pm01CalcMvmnt_" + todays_datetime + ".log", filemode='w', level=logging.INFO)
+    # peak memory and the largest data structures at each step
+    # parse command line input
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--memory_budget", type=float, default=None, help="MB this script may use, fewer days are processed in parallel when more would not fit (default: 80%% of available memory)")
+    parser.add_argument("--trace_memory", action='store_true', help="Trace python allocations with tracemalloc, so the memory report names the source lines holding the most memory (slower)")
+    args = parser.parse_args()
+    memory_budget = MemoryBudget('pm01', args.memory_budget, trace=args.trace_memory)
+    memory_report_path = os.path.join(current_working_directory, "instrumentation", "pm01Memory_" + todays_datetime + ".json")
+    ###################################
+    # SOURCE DATA AND OUTPUT FILE LOCATIONS 
+    ###################################
+    data_folder = load_data()
+    # set up input folders
+    pupil_data_downsampled = os.path.join(data_folder, 'downsampled_pupils')
+    # set up various output folders
+    calib_mvmnt_folder = os.path.join(data_folder, 'calib_movement')
+    octo_mvmnt_folder = os.path.join(data_folder, 'octo_movement')
+    unique_mvmnt_folder = os.path.join(data_folder, 'unique_movement')
+    # Create plots folder (and sub-folders) if it (they) does (do) not exist
+    if not os.path.exists(calib_mvmnt_folder):
+        os.makedirs(calib_mvmnt_folder)
+    if not os.path.exists(octo_mvmnt_folder):
+        os.makedirs(octo_mvmnt_folder)
+    if not os.path.exists(unique_mvmnt_folder):
+        os.makedirs(unique_mvmnt_folder)
+
+    logging.info('PUPIL DATA FOLDER: %s \n CALIB MOVEMENT FOLDER: %s \n OCTO MOVEMENT FOLDER: %s \n UNIQUE MOVEMENT FOLDER: %s' % (pupil_data_downsampled, calib_mvmnt_folder, octo_mvmnt_folder, unique_mvmnt_folder))
+    print('PUPIL DATA FOLDER: %s \n CALIB MOVEMENT FOLDER: %s \n OCTO MOVEMENT FOLDER: %s \n UNIQUE MOVEMENT FOLDER: %s' % (pupil_data_downsampled, calib_mvmnt_folder, octo_mvmnt_folder, unique_mvmnt_folder))
+    ###################################
+    # PARAMETERS
+    ###################################
+    downsampled_bucket_size_ms = 40 # milliseconds
+    smoothing_window = 25 # in time buckets, must be odd! for savgol_filter
+    # if there are nans (dropped frames) for more than 2 seconds of video time, then toss that trial
+    dropped_frames_threshold = 2000/downsampled_bucket_size_ms
+    saccade_thresholds = [2.5, 5, 10, 20, 30, 40, 50, 60] # pixels
+    peaks_window = 40 # timebuckets
+    N_CPU_available = 24
+    stim_vids = [24.0, 25.0, 26.0, 27.0, 28.0, 29.0]
+    side_names = ['Right', 'Left']
+    cAxis_names = ['contoursX', 'contoursY', 'circlesX', 'circlesY']
+    #########################################################
+    # ACTIVATION / GOOD TRIALS (from the names of the consolidated daily pupil data files)
+    #########################################################
+    daily_folders = glob.glob(pupil_data_downsampled + os.sep + '*.npz')
+    activation_count = []
+    analysed_count = []
+    for daily_pupil_data in daily_folders:
+        # extract activation and good trials count
+        file_info = os.path.basename(daily_pupil_data).split('_')
+        this_date = file_info[0]
+        num_right_activations = int(file_info[1][6:])
+        num_left_activations = int(file_info[2][6:])
+        num_good_right_trials = int(file_info[3][5:])
+        num_good_left_trials = int(file_info[4].split('.')[0][5:])
+        analysed_count.append((num_good_right_trials, num_good_left_trials))
+        activation_count.append((num_right_activations, num_left_activations))
+    total_activation = sum(count[0] for count in activation_count)
+    total_days_activated = len(activation_count)
+    good_trials_right = [count[0] for count in analysed_count]
+    good_trials_left = [count[1] for count in analysed_count]
+    total_good_trials_right = sum(good_trials_right)
+    total_good_trials_left = sum(good_trials_left)
+    print("Total number of exhibit activations: {total}".format(total=total_activation))
+    print("Total number of good right eye camera trials: {good_total}".format(good_total=total_good_trials_right))
+    print("Total number of good left eye camera trials: {good_total}".format(good_total=total_good_trials_left))
+    logging.info("Total number of exhibit activations: {total}".format(total=total_activation))
+    logging.info("Total number of good right eye camera trials: {good_total}".format(good_total=total_good_trials_right))
+    logging.info("Total number of good left eye camera trials: {good_total}".format(good_total=total_good_trials_left))
+    activation_array = np.array(activation_count)
+    analysed_array_right = np.array(good_trials_right)
+    analysed_array_left = np.array(good_trials_left)
+    ###################################
+    # CALCULATE PUPIL MOVEMENT, ONE DAY AT A TIME
+    ###################################
+    # currently we are not pairing right and left eye coordinates
+    # each worker measures the movement from one frame to next for every trial of one day, saves it for the split into sequences,
+    # and returns the day's movement partials (abs(movement) sums, non-nan counts and saccade participant counts per time bucket)
+    # partials are summed as days finish, so memory holds a few days and the sums, however many days there are
+    movement_partials_folder = os.path.join(data_folder, 'movement_partials')
+    if os.path.exists(movement_partials_folder):
+        shutil.rmtree(movement_partials_folder)
+    os.makedirs(movement_partials_folder)
+    # run fewer days at once if their positions and movements would not fit in the memory budget
+    day_memory_mb = 4*max([os.path.getsize(daily_pupil_data) for daily_pupil_data in daily_folders] + [0])/MB
+    n_jobs = N_CPU_available
+    while n_jobs>1 and not memory_budget.fits(n_jobs*day_memory_mb, 'movements of %d days at once' % (n_jobs)):
+        n_jobs = n_jobs//2
+    # all_movement_partials[side][c_axis][stimuli], summed over all days
+    all_movement_partials = [[{key:None for key in stim_vids} for c_axis in cAxis_names] for side in side_names]
+    day_results = Parallel(n_jobs=n_jobs, return_as='generator')(delayed(process_day)(daily_pupil_data, movement_partials_folder, stim_vids, dropped_frames_threshold, saccade_thresholds) for daily_pupil_data in daily_folders)
+    for day_number, day_partials in enumerate(day_results):
+        for side in range(len(day_partials)):
+            for c_axis in range(len(day_partials[side])):
+                for stimuli in stim_vids:
+                    all_movement_partials[side][c_axis][stimuli] = add_movement_partials(all_movement_partials[side][c_axis][stimuli], day_partials[side][c_axis][stimuli])
+        print('Calculated movements for {day} ({n} of {total} days)'.format(day=os.path.basename(daily_folders[day_number]).split('_')[0], n=day_number+1, total=len(daily_folders)))
+        logging.info('Calculated movements for {day} ({n} of {total} days)'.format(day=os.path.basename(daily_folders[day_number]).split('_')[0], n=day_number+1, total=len(daily_folders)))
+    # saved movements of each day, in the order trials were collected before
+    movement_partial_files = [os.path.join(movement_partials_folder, os.path.basename(daily_pupil_data)) for daily_pupil_data in daily_folders]
+    memory_budget.checkpoint('movement partials of %d days' % (len(daily_folders)), all_movement_partials=all_movement_partials)
+
+    ###################################
+    # CALCULATE PUPIL MOTION (abs val of movement)
+    ###################################
+    all_right_contours_X_avg_motion = {key:[] for key in stim_vids}
+    all_right_circles_X_avg_motion = {key:[] for key in stim_vids}
+    all_right_contours_Y_avg_motion = {key:[] for key in stim_vids}
+    all_right_circles_Y_avg_motion = {key:[] for key in stim_vids}
+    all_left_contours_X_avg_motion = {key:[] for key in stim_vids}
+    all_left_circles_X_avg_motion = {key:[] for key in stim_vids}
+    all_left_contours_Y_avg_motion = {key:[] for key in stim_vids}
+    all_left_circles_Y_avg_motion = {key:[] for key in stim_vids}
+    all_avg_motion_right = [all_right_contours_X_avg_motion, all_right_contours_Y_avg_motion, all_right_circles_X_avg_motion, all_right_circles_Y_avg_motion]
+    all_avg_motion_left = [all_left_contours_X_avg_motion, all_left_contours_Y_avg_motion, all_left_circles_X_avg_motion, all_left_circles_Y_avg_motion]
+    all_avg_motion = [all_avg_motion_right, all_avg_motion_left]
+    # motion peaks
+    all_RcontoursX_avg_motion_peaks = {key:[] for key in stim_vids}
+    all_RcirclesX_avg_motion_peaks = {key:[] for key in stim_vids}
+    all_RcontoursY_avg_motion_peaks = {key:[] for key in stim_vids}
+    all_RcirclesY_avg_motion_peaks = {key:[] for key in stim_vids}
+    all_LcontoursX_avg_motion_peaks = {key:[] for key in stim_vids}
+    all_LcirclesX_avg_motion_peaks = {key:[] for key in stim_vids}
+    all_LcontoursY_avg_motion_peaks = {key:[] for key in stim_vids}
+    all_LcirclesY_avg_motion_peaks = {key:[] for key in stim_vids}
+    all_avg_motion_right_peaks = [all_RcontoursX_avg_motion_peaks, all_RcontoursY_avg_motion_peaks, all_RcirclesX_avg_motion_peaks, all_RcirclesY_avg_motion_peaks]
+    all_avg_motion_left_peaks = [all_LcontoursX_avg_motion_peaks, all_LcontoursY_avg_motion_peaks, all_LcirclesX_avg_motion_peaks, all_LcirclesY_avg_motion_peaks]
+    all_avg_motion_peaks = [all_avg_motion_right_peaks, all_avg_motion_left_peaks]
+    # find average pixel motion per time_bucket for each stimulus, from the summed partials
+    # all c_axis x stimulus combinations of one side are smoothed in one batch
+    for side in range(len(all_movement_partials)):
+        print('Calculating average motion for {side} side, all cAxis types and stimuli'.format(side=side_names[side]))
+        logging.info('Calculating average motion for {side} side, all cAxis types and stimuli'.format(side=side_names[side]))
+        combinations = [(c_axis, stimuli) for c_axis in range(len(all_movement_partials[side])) for stimuli in stim_vids]
+        avg_motion = avg_motion_from_partials([all_movement_partials[side][c_axis][stimuli] for c_axis, stimuli in combinations])
+        avg_motion_all_combos, peaks_all_combos = smooth_avg_motion_and_peaks(avg_motion, smoothing_window)
+        for combination, (c_axis, stimuli) in enumerate(combinations):
+            all_avg_motion[side][c_axis][stimuli] = avg_motion_all_combos[combination]
+            all_avg_motion_peaks[side][c_axis][stimuli] = peaks_all_combos[combination]
+
+    ###################################
+    # FIND PEAKS IN MOVEMENT
+    ###################################
+    all_right_contours_X_peaks = {key:{} for key in stim_vids}
+    all_right_circles_X_peaks = {key:{} for key in stim_vids}
+    all_right_contours_Y_peaks = {key:{} for key in stim_vids}
+    all_right_circles_Y_peaks = {key:{} for key in stim_vids}
+    all_left_contours_X_peaks = {key:{} for key in stim_vids}
+    all_left_circles_X_peaks = {key:{} for key in stim_vids}
+    all_left_contours_Y_peaks = {key:{} for key in stim_vids}
+    all_left_circles_Y_peaks = {key:{} for key in stim_vids}
+    all_peaks_right = [all_right_contours_X_peaks, all_right_contours_Y_peaks, all_right_circles_X_peaks, all_right_circles_Y_peaks]
+    all_peaks_left = [all_left_contours_X_peaks, all_left_contours_Y_peaks, all_left_circles_X_peaks, all_left_circles_Y_peaks]
+    all_peaks = [all_peaks_right, all_peaks_left]
+    # filter through the summed saccade participant counts to find peaks in individual traces
+    for side in range(len(all_movement_partials)):
+        for c_axis in range(len(all_movement_partials[side])):
+            for stim in stim_vids:
+                movement_partial_this_stim = all_movement_partials[side][c_axis][stim]
+                this_stim_N = movement_partial_this_stim['trials'] if movement_partial_this_stim is not None else 0
+                count_threshold = this_stim_N/10
+                windowed_count_thresholds = [this_stim_N/(i*2) for i in range(1, len(saccade_thresholds)+1)]
+                print('Looking for movements greater than {p} pixels in {side} side, {cAxis_type}, stimulus {s}'.format(p=saccade_thresholds, side=side_names[side], cAxis_type=cAxis_names[c_axis], s=stim))
+                logging.info('Looking for movements greater than {p} pixels in {side} side, {cAxis_type}, stimulus {s}'.format(p=saccade_thresholds, side=side_names[side], cAxis_type=cAxis_names[c_axis], s=stim))
+                participant_counts = movement_partial_this_stim['participants'] if movement_partial_this_stim is not None else np.zeros((len(saccade_thresholds), 0), dtype=np.int64)
+                all_peaks[side][c_axis][stim] = find_saccades_from_counts(participant_counts, saccade_thresholds, count_threshold, peaks_window, windowed_count_thresholds)
+    memory_budget.checkpoint('movement peaks', all_movement_partials=all_movement_partials, all_avg_motion=all_avg_motion, all_peaks=all_peaks)
 
-for side in range(len(all_movements)):
-    for c_axis in range(len(all_movements[side])):  
-        # INITIATE ARRAY STRUCTURE FOR EACH SEQUENCE
-        # movements
-        all_calib_mvmnts = []
-        all_octo_mvmnts = []
-        all_unique_mvmnts = {'0':[], '1':[], '2':[], '3':[], '4':[], '5':[]}
-        # avg motion
-        all_calib_avg_motion = []
-        all_octo_avg_motion = []
-        all_unique_avg_motion = {'0':[], '1':[], '2':[], '3':[], '4':[], '5':[]}
-        # avg motion peaks
-        all_calib_avg_motion_peaks = []
-        all_octo_avg_motion_peaks = []
-        all_unique_avg_motion_peaks = {'0':[], '1':[], '2':[], '3':[], '4':[], '5':[]}
-        # movement peaks
-        all_calib_mvmnt_peaks = {}
-        all_octo_mvmnt_peaks = {}
-        all_unique_mvmnts_peaks = {0:{}, 1:{}, 2:{}, 3:{}, 4:{}, 5:{}}
-        # chunk and save
-        for stimuli in all_movements[side][c_axis]:
-            new_stim_number = stim_old_to_new[stimuli]
-            print('Chunking into calibration, octopus, and unique sequences for {side} side, {cAxis_type}, old stim number {stim}, new stim number {new_stim}'.format(side=side_names[side], cAxis_type=cAxis_names[c_axis], stim=stimuli, new_stim=new_stim_number))
-            logging.info('Chunking into calibration, octopus, and unique sequences for {side} side, {cAxis_type}, old stim number {stim}, new stim number {new_stim}'.format(side=side_names[side], cAxis_type=cAxis_names[c_axis], stim=stimuli, new_stim=new_stim_number))
-            # MOVEMENT
-            for trial in all_movements[side][c_axis][stimuli]:
-                this_trial_calib = trial[:calib_end]
-                all_calib_mvmnts.append(this_trial_calib)
-                this_trial_unique = trial[calib_end:unique_ends[new_stim_number]]
-                all_unique_mvmnts[str(new_stim_number)].append(this_trial_unique)
-                this_trial_octo = trial[unique_ends[new_stim_number]:unique_ends[new_stim_number]+octo_len]
-                all_octo_mvmnts.append(this_trial_octo)
-            # AVG MOTION
-            this_stim_calib_avg_motion = all_avg_motion[side][c_axis][stimuli][:calib_end]
-            all_calib_avg_motion.append(this_stim_calib_avg_motion)
-            this_stim_unique_avg_motion = all_avg_motion[side][c_axis][stimuli][calib_end:unique_ends[new_stim_number]]
-            all_unique_avg_motion[str(new_stim_number)].append(this_stim_unique_avg_motion)
-            this_stim_octo_avg_motion = all_avg_motion[side][c_axis][stimuli][unique_ends[new_stim_number]:unique_ends[new_stim_number]+octo_len]
-            all_octo_avg_motion.append(this_stim_octo_avg_motion)
-            # AVG MOTION PEAKS
-            this_stim_calib_avg_motion_peaks = [x for x in all_avg_motion_peaks[side][c_axis][stimuli] if x<calib_end]
-            all_calib_avg_motion_peaks.append(this_stim_calib_avg_motion_peaks)
-            this_stim_unique_avg_motion_peaks = [x for x in all_avg_motion_peaks[side][c_axis][stimuli] if calib_end<x<unique_ends[new_stim_number]]
-            all_unique_avg_motion_peaks[str(new_stim_number)].append(this_stim_unique_avg_motion_peaks)
-            this_stim_octo_avg_motion_peaks = [x for x in all_avg_motion_peaks[side][c_axis][stimuli] if unique_ends[new_stim_number]<x<unique_ends[new_stim_number]+octo_len]
-            all_octo_avg_motion_peaks.append(this_stim_octo_avg_motion_peaks)
-            # MOVEMENT PEAKS
-            for saccade_threshold in all_peaks[side][c_axis][stimuli]:
-                this_saccade_thresh_calib = []
-                this_saccade_thresh_unique = {'0':[], '1':[], '2':[], '3':[], '4':[], '5':[]}
-                this_saccade_thresh_octo = []
-                for time_bucket in all_peaks[side][c_axis][stimuli][saccade_threshold]:
-                    if time_bucket<calib_end:
-                        this_saccade_thresh_calib.append((time_bucket, all_peaks[side][c_axis][stimuli][saccade_threshold][time_bucket]))
-                    if calib_end<time_bucket<unique_ends[new_stim_number]:
-                        this_saccade_thresh_unique[str(new_stim_number)].append((time_bucket, all_peaks[side][c_axis][stimuli][saccade_threshold][time_bucket]))
-                    if unique_ends[new_stim_number]<time_bucket<unique_ends[new_stim_number]+octo_len:
-                        this_saccade_thresh_octo.append((time_bucket, all_peaks[side][c_axis][stimuli][saccade_threshold][time_bucket]))
-                all_calib_mvmnt_peaks[saccade_threshold] = this_saccade_thresh_calib
-                all_unique_mvmnts_peaks[new_stim_number][saccade_threshold] = this_saccade_thresh_unique
-                all_octo_mvmnt_peaks[saccade_threshold] = this_saccade_thresh_octo
-        # SAVE
-        # movements
-        all_calib_mvmnts = np.array(all_calib_mvmnts)
-        all_octo_mvmnts = np.array(all_octo_mvmnts)
-        N_per_unique = []
-        for unique in all_unique_mvmnts:
-            all_unique_mvmnts[unique] = np.array(all_unique_mvmnts[unique])
-            N_per_unique.append(str(len(all_unique_mvmnts[unique])))
-        unique_N_str = '-'.join(N_per_unique)
-        calib_path = calib_mvmnt_folder + os.sep + side_names[side] + '_' + cAxis_names[c_axis] + '_calib_mvmnt_' + str(len(all_calib_mvmnts)) + '.npz'
-        octo_path = octo_mvmnt_folder + os.sep + side_names[side] + '_' + cAxis_names[c_axis] + '_octo_mvmnt_' + str(len(all_octo_mvmnts)) + '.npz'
-        unique_path = unique_mvmnt_folder + os.sep + side_names[side] + '_' + cAxis_names[c_axis] + '_uniques_mvmnt_' + unique_N_str + '_' + '.npz'
-        print('Saving movement data to file, Calib = {c}, Octo = {o}, Unique = {u}'.format(c=len(all_calib_mvmnts), o=len(all_octo_mvmnts), u=unique_N_str))
-        logging.info('Saving movement data to file, Calib = {c}, Octo = {o}, Unique = {u}'.format(c=len(all_calib_mvmnts), o=len(all_octo_mvmnts), u=unique_N_str))
-        np.savez(calib_path, all_calib_mvmnts)
-        np.savez(octo_path, all_octo_mvmnts)
-        np.savez(unique_path, **all_unique_mvmnts)
-        # avg motion
-        all_calib_avg_motion = np.array(all_calib_avg_motion)
-        all_octo_avg_motion = np.array(all_octo_avg_motion)
-        N_per_unique = []
-        for unique in all_unique_avg_motion:
-            all_unique_avg_motion[unique] = np.array(all_unique_avg_motion[unique])
-            N_per_unique.append(str(len(all_unique_avg_motion[unique])))
-        unique_N_str = '-'.join(N_per_unique)
-        calib_path = calib_mvmnt_folder + os.sep + side_names[side] + '_' + cAxis_names[c_axis] + '_calib_avgMotion_' + str(len(all_calib_avg_motion)) + '.npz'
-        octo_path = octo_mvmnt_folder + os.sep + side_names[side] + '_' + cAxis_names[c_axis] + '_octo_avgMotion_' + str(len(all_octo_avg_motion)) + '.npz'
-        unique_path = unique_mvmnt_folder + os.sep + side_names[side] + '_' + cAxis_names[c_axis] + '_uniques_avgMotion_' + unique_N_str + '_' + '.npz'
-        print('Saving avg motion data to file, Calib = {c}, Octo = {o}, Unique = {u}'.format(c=len(all_calib_avg_motion), o=len(all_octo_avg_motion), u=unique_N_str))
-        logging.info('Saving avg motion data to file, Calib = {c}, Octo = {o}, Unique = {u}'.format(c=len(all_calib_avg_motion), o=len(all_octo_avg_motion), u=unique_N_str))
-        np.savez(calib_path, all_calib_avg_motion)
-        np.savez(octo_path, all_octo_avg_motion)
-        np.savez(unique_path, **all_unique_avg_motion)
-        # avg motion peaks
-        all_calib_avg_motion_peaks = np.array(all_calib_avg_motion_peaks)
-        all_octo_avg_motion_peaks = np.array(all_octo_avg_motion_peaks)
-        N_per_unique = []
-        for unique in all_unique_avg_motion_peaks:
-            all_unique_avg_motion_peaks[unique] = np.array(all_unique_avg_motion_peaks[unique])
-            N_per_unique.append(str(len(all_unique_avg_motion_peaks[unique])))
-        unique_N_str = '-'.join(N_per_unique)
-        calib_path = calib_mvmnt_folder + os.sep + side_names[side] + '_' + cAxis_names[c_axis] + '_calib_avgMotionPeaks_' + str(len(all_calib_avg_motion_peaks)) + '.npz'
-        octo_path = octo_mvmnt_folder + os.sep + side_names[side] + '_' + cAxis_names[c_axis] + '_octo_avgMotionPeaks_' + str(len(all_octo_avg_motion_peaks)) + '.npz'
-        unique_path = unique_mvmnt_folder + os.sep + side_names[side] + '_' + cAxis_names[c_axis] + '_uniques_avgMotionPeaks_' + unique_N_str + '_' + '.npz'
-        print('Saving avg motion peaks data to file, Calib = {c}, Octo = {o}, Unique = {u}'.format(c=len(all_calib_avg_motion_peaks), o=len(all_octo_avg_motion_peaks), u=unique_N_str))
-        logging.info('Saving avg motion peaks data to file, Calib = {c}, Octo = {o}, Unique = {u}'.format(c=len(all_calib_avg_motion_peaks), o=len(all_octo_avg_motion_peaks), u=unique_N_str))
-        np.savez(calib_path, all_calib_avg_motion_peaks)
-        np.savez(octo_path, all_octo_avg_motion_peaks)
-        np.savez(unique_path, **all_unique_avg_motion_peaks)
-        # movement peaks (saccades)
+    ###################################
+    # SPLIT INTO OCTO, UNIQUE, CALIB
+    ###################################
+    stim_old_to_new = {24.0: 0, 25.0: 1, 26.0: 2, 27.0: 3, 28.0: 4, 29.0: 5}
+    # timing info in 40ms resolution (as opposed to timing info in sd02_detect_saccades.py, which is in 4ms resolution)
+    calib_start = 0
+    calib_end = 443
+    unique_start = 443
+    unique_ends = {0: 596, 1: 602, 2: 666, 3: 608, 4: 667, 5: 719}
+    octo_len = 398
 
+    for side in range(len(all_movement_partials)):
+        for c_axis in range(len(all_movement_partials[side])):  
+            # INITIATE ARRAY STRUCTURE FOR EACH SEQUENCE
+            # movements are streamed from the saved daily movements when saved, only the trial counts are collected here
+            calib_mvmnt_rows = []
+            octo_mvmnt_rows = []
+            unique_mvmnt_rows = {'0':[], '1':[], '2':[], '3':[], '4':[], '5':[]}
+            # avg motion
+            all_calib_avg_motion = []
+            all_octo_avg_motion = []
+            all_unique_avg_motion = {'0':[], '1':[], '2':[], '3':[], '4':[], '5':[]}
+            # avg motion peaks
+            all_calib_avg_motion_peaks = []
+            all_octo_avg_motion_peaks = []
+            all_unique_avg_motion_peaks = {'0':[], '1':[], '2':[], '3':[], '4':[], '5':[]}
+            # movement peaks
+            all_calib_mvmnt_peaks = {}
+            all_octo_mvmnt_peaks = {}
+            all_unique_mvmnts_peaks = {0:{}, 1:{}, 2:{}, 3:{}, 4:{}, 5:{}}
+            # chunk and save
+            for stimuli in stim_vids:
+                new_stim_number = stim_old_to_new[stimuli]
+                print('Chunking into calibration, octopus, and unique sequences for {side} side, {cAxis_type}, old stim number {stim}, new stim number {new_stim}'.format(side=side_names[side], cAxis_type=cAxis_names[c_axis], stim=stimuli, new_stim=new_stim_number))
+                logging.info('Chunking into calibration, octopus, and unique sequences for {side} side, {cAxis_type}, old stim number {stim}, new stim number {new_stim}'.format(side=side_names[side], cAxis_type=cAxis_names[c_axis], stim=stimuli, new_stim=new_stim_number))
+                # MOVEMENT
+                # (key, number of trials, number of time buckets, start, end) of the time buckets each sequence takes from this stimulus
+                movement_partial_this_stim = all_movement_partials[side][c_axis][stimuli]
+                if movement_partial_this_stim is not None:
+                    key = movement_partial_key(side, c_axis, stimuli)
+                    this_stim_N = movement_partial_this_stim['trials']
+                    this_stim_buckets = len(movement_partial_this_stim['abs_sums'])
+                    calib_mvmnt_rows.append((key, this_stim_N, this_stim_buckets, calib_start, calib_end))
+                    unique_mvmnt_rows[str(new_stim_number)].append((key, this_stim_N, this_stim_buckets, calib_end, unique_ends[new_stim_number]))
+                    octo_mvmnt_rows.append((key, this_stim_N, this_stim_buckets, unique_ends[new_stim_number], unique_ends[new_stim_number]+octo_len))
+                # AVG MOTION
+                this_stim_calib_avg_motion = all_avg_motion[side][c_axis][stimuli][:calib_end]
+                all_calib_avg_motion.append(this_stim_calib_avg_motion)
+                this_stim_unique_avg_motion = all_avg_motion[side][c_axis][stimuli][calib_end:unique_ends[new_stim_number]]
+                all_unique_avg_motion[str(new_stim_number)].append(this_stim_unique_avg_motion)
+                this_stim_octo_avg_motion = all_avg_motion[side][c_axis][stimuli][unique_ends[new_stim_number]:unique_ends[new_stim_number]+octo_len]
+                all_octo_avg_motion.append(this_stim_octo_avg_motion)
+                # AVG MOTION PEAKS
+                this_stim_calib_avg_motion_peaks = [x for x in all_avg_motion_peaks[side][c_axis][stimuli] if x<calib_end]
+                all_calib_avg_motion_peaks.append(this_stim_calib_avg_motion_peaks)
+                this_stim_unique_avg_motion_peaks = [x for x in all_avg_motion_peaks[side][c_axis][stimuli] if calib_end<x<unique_ends[new_stim_number]]
+                all_unique_avg_motion_peaks[str(new_stim_number)].append(this_stim_unique_avg_motion_peaks)
+                this_stim_octo_avg_motion_peaks = [x for x in all_avg_motion_peaks[side][c_axis][stimuli] if unique_ends[new_stim_number]<x<unique_ends[new_stim_number]+octo_len]
+                all_octo_avg_motion_peaks.append(this_stim_octo_avg_motion_peaks)
+                # MOVEMENT PEAKS
+                for saccade_threshold in all_peaks[side][c_axis][stimuli]:
+                    this_saccade_thresh_calib = []
+                    this_saccade_thresh_unique = {'0':[], '1':[], '2':[], '3':[], '4':[], '5':[]}
+                    this_saccade_thresh_octo = []
+                    for time_bucket in all_peaks[side][c_axis][stimuli][saccade_threshold]:
+                        if time_bucket<calib_end:
+                            this_saccade_thresh_calib.append((time_bucket, all_peaks[side][c_axis][stimuli][saccade_threshold][time_bucket]))
+                        if calib_end<time_bucket<unique_ends[new_stim_number]:
+                            this_saccade_thresh_unique[str(new_stim_number)].append((time_bucket, all_peaks[side][c_axis][stimuli][saccade_threshold][time_bucket]))
+                        if unique_ends[new_stim_number]<time_bucket<unique_ends[new_stim_number]+octo_len:
+                            this_saccade_thresh_octo.append((time_bucket, all_peaks[side][c_axis][stimuli][saccade_threshold][time_bucket]))
+                    all_calib_mvmnt_peaks[saccade_threshold] = this_saccade_thresh_calib
+                    all_unique_mvmnts_peaks[new_stim_number][saccade_threshold] = this_saccade_thresh_unique
+                    all_octo_mvmnt_peaks[saccade_threshold] = this_saccade_thresh_octo
+            # SAVE
+            # movements, written one day at a time from the saved daily movements
+            calib_N = sum([rows[1] for rows in calib_mvmnt_rows])
+            octo_N = sum([rows[1] for rows in octo_mvmnt_rows])
+            N_per_unique = [str(sum([rows[1] for rows in unique_mvmnt_rows[unique]])) for unique in unique_mvmnt_rows]
+            unique_N_str = '-'.join(N_per_unique)
+            calib_path = calib_mvmnt_folder + os.sep + side_names[side] + '_' + cAxis_names[c_axis] + '_calib_mvmnt_' + str(calib_N) + '.npz'
+            octo_path = octo_mvmnt_folder + os.sep + side_names[side] + '_' + cAxis_names[c_axis] + '_octo_mvmnt_' + str(octo_N) + '.npz'
+            unique_path = unique_mvmnt_folder + os.sep + side_names[side] + '_' + cAxis_names[c_axis] + '_uniques_mvmnt_' + unique_N_str + '_' + '.npz'
+            print('Saving movement data to file, Calib = {c}, Octo = {o}, Unique = {u}'.format(c=calib_N, o=octo_N, u=unique_N_str))
+            logging.info('Saving movement data to file, Calib = {c}, Octo = {o}, Unique = {u}'.format(c=calib_N, o=octo_N, u=unique_N_str))
+            for sequence_path, sequence_rows in [(calib_path, {'arr_0': calib_mvmnt_rows}), (octo_path, {'arr_0': octo_mvmnt_rows}), (unique_path, unique_mvmnt_rows)]:
+                sequence_arrays = {}
+                for name, rows in sequence_rows.items():
+                    # trials of every stimulus in the sequence are stacked, stimuli in stim_vids order and each stimulus' trials in day order
+                    shape = sequence_shape(sum([row[1] for row in rows]), rows[0][2] if rows else 0, rows[0][3] if rows else 0, rows[0][4] if rows else 0)
+                    chunks = itertools.chain.from_iterable(partial_movement_rows(movement_partial_files, key, start, end) for key, N, no_of_buckets, start, end in rows)
+                    sequence_arrays[name] = (shape, chunks)
+                write_npz_streamed(sequence_path, sequence_arrays)
+            # avg motion
+            all_calib_avg_motion = np.array(all_calib_avg_motion)
+            all_octo_avg_motion = np.array(all_octo_avg_motion)
+            N_per_unique = []
+            for unique in all_unique_avg_motion:
+                all_unique_avg_motion[unique] = np.array(all_unique_avg_motion[unique])
+                N_per_unique.append(str(len(all_unique_avg_motion[unique])))
+            unique_N_str = '-'.join(N_per_unique)
+            calib_path = calib_mvmnt_folder + os.sep + side_names[side] + '_' + cAxis_names[c_axis] + '_calib_avgMotion_' + str(len(all_calib_avg_motion)) + '.npz'
+            octo_path = octo_mvmnt_folder + os.sep + side_names[side] + '_' + cAxis_names[c_axis] + '_octo_avgMotion_' + str(len(all_octo_avg_motion)) + '.npz'
+            unique_path = unique_mvmnt_folder + os.sep + side_names[side] + '_' + cAxis_names[c_axis] + '_uniques_avgMotion_' + unique_N_str + '_' + '.npz'
+            print('Saving avg motion data to file, Calib = {c}, Octo = {o}, Unique = {u}'.format(c=len(all_calib_avg_motion), o=len(all_octo_avg_motion), u=unique_N_str))
+            logging.info('Saving avg motion data to file, Calib = {c}, Octo = {o}, Unique = {u}'.format(c=len(all_calib_avg_motion), o=len(all_octo_avg_motion), u=unique_N_str))
+            np.savez(calib_path, all_calib_avg_motion)
+            np.savez(octo_path, all_octo_avg_motion)
+            np.savez(unique_path, **all_unique_avg_motion)
+            # avg motion peaks
+            all_calib_avg_motion_peaks = np.array(all_calib_avg_motion_peaks)
+            all_octo_avg_motion_peaks = np.array(all_octo_avg_motion_peaks)
+            N_per_unique = []
+            for unique in all_unique_avg_motion_peaks:
+                all_unique_avg_motion_peaks[unique] = np.array(all_unique_avg_motion_peaks[unique])
+                N_per_unique.append(str(len(all_unique_avg_motion_peaks[unique])))
+            unique_N_str = '-'.join(N_per_unique)
+            calib_path = calib_mvmnt_folder + os.sep + side_names[side] + '_' + cAxis_names[c_axis] + '_calib_avgMotionPeaks_' + str(len(all_calib_avg_motion_peaks)) + '.npz'
+            octo_path = octo_mvmnt_folder + os.sep + side_names[side] + '_' + cAxis_names[c_axis] + '_octo_avgMotionPeaks_' + str(len(all_octo_avg_motion_peaks)) + '.npz'
+            unique_path = unique_mvmnt_folder + os.sep + side_names[side] + '_' + cAxis_names[c_axis] + '_uniques_avgMotionPeaks_' + unique_N_str + '_' + '.npz'
+            print('Saving avg motion peaks data to file, Calib = {c}, Octo = {o}, Unique = {u}'.format(c=len(all_calib_avg_motion_peaks), o=len(all_octo_avg_motion_peaks), u=unique_N_str))
+            logging.info('Saving avg motion peaks data to file, Calib = {c}, Octo = {o}, Unique = {u}'.format(c=len(all_calib_avg_motion_peaks), o=len(all_octo_avg_motion_peaks), u=unique_N_str))
+            np.savez(calib_path, all_calib_avg_motion_peaks)
+            np.savez(octo_path, all_octo_avg_motion_peaks)
+            np.savez(unique_path, **all_unique_avg_motion_peaks)
+            # movement peaks (saccades)
+            memory_budget.checkpoint('split %s %s' % (side_names[side], cAxis_names[c_axis]), all_movement_partials=all_movement_partials, all_avg_motion=all_avg_motion, all_peaks=all_peaks)
+    # daily movements are all in the sequence files now
+    shutil.rmtree(movement_partials_folder)
 
-#FIN
\ No newline at end of file
+    ###################################
+    # MEMORY REPORT
+    ###################################
+    if not os.path.exists(os.path.dirname(memory_report_path)):
+        os.makedirs(os.path.dirname(memory_report_path))
+    for line in format_report(memory_budget.save(memory_report_path)):
+        logging.info(line)
+        print(line)
+    memory_budget.close()
+    #FIN
@@ -11,11 +11,8 @@
 import logging
 import os
 import glob
-import cv2
 import datetime
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.image as mpimg
 import zipfile
 import shutil
 import fnmatch
@@ -24,17 +21,18 @@ import math
 import csv
 import argparse
 import time
+# make the shared surprisingMinds package (in the repo root) importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from surprisingMinds.weightedMeanAggregates import WeightedMeanAggregate
+from surprisingMinds.timeBuckets import parse_timestamp, find_timestamp_bucket_index
+from surprisingMinds.dataFiles import unpack_to_temp, list_sub_folders
+from surprisingMinds.memoryBudget import MemoryBudget, format_report, MB
+from surprisingMinds.workQueue import WorkQueue
 ###################################
 # SET CURRENT WORKING DIRECTORY
 ###################################
 current_working_directory = os.getcwd()
 ###################################
-# SCRIPT LOGGER
-###################################
-# grab today's date
-now = datetime.datetime.now()
-logging.basicConfig(filename="psa01_MonthlyMeans_WorldCam_RawLiveStim_" + now.strftime("%Y-%m-%d_%H-%M-%S") + ".log", filemode='w', level=logging.INFO, format='%(asctime)s %(name)-12s %(levelname)-8s %(message)s', datefmt='%m-%d %H:%M')
-###################################
 # FUNCTIONS
 ###################################
 
@@ -63,60 +61,8 @@ def load_data(location='laptop'):
     return data_drive, analysed_drive, rawStimLum_data, analysed_folders, daily_csv_files, monthly_extracted_data
 
 ##########################################################
-def unpack_to_temp(path_to_zipped, path_to_temp):
-    try:
-        # copy zip file to current working directory
-        #print("Copying {folder} to current working directory...".format(folder=path_to_zipped))
-        current_working_directory = os.getcwd()
-        copied_zipped = shutil.copy2(path_to_zipped, current_working_directory)
-        path_to_copied_zipped = os.path.join(current_working_directory, copied_zipped.split(sep=os.sep)[-1])
-        # unzip the folder
-        #print("Unzipping files in {folder}...".format(folder=path_to_copied_zipped))
-        day_unzipped = zipfile.ZipFile(path_to_copied_zipped, mode="r")
-        # extract files into temp folder
-        day_unzipped.extractall(path_to_temp)
-        # close the unzipped file
-        day_unzipped.close()
-        #print("Finished unzipping {folder}!".format(folder=path_to_copied_zipped))
-        # destroy copied zipped file
-        #print("Deleting {file}...".format(file=path_to_copied_zipped))
-        os.remove(path_to_copied_zipped)
-        #print("Deleted {file}!".format(file=path_to_copied_zipped))
-        return True
-    except Exception: 
-        logging.warning("Could not unzip {folder}".format(folder=path_to_zipped))    
-        return False
-
-def list_sub_folders(path_to_root_folder):
-    # List all sub folders
-    sub_folders = []
-    for folder in os.listdir(path_to_root_folder):
-        if(os.path.isdir(os.path.join(path_to_root_folder, folder))):
-            sub_folders.append(os.path.join(path_to_root_folder, folder))
-    return sub_folders
-
-def make_time_buckets(start_timestamp, bucket_size_ms, end_timestamp, fill_pattern): 
-    start_timestamp = start_timestamp.split('+')[0][:-3]
-    end_timestamp = end_timestamp.split('+')[0][:-3]
-    buckets_start_time = datetime.datetime.strptime(start_timestamp, "%Y-%m-%dT%H:%M:%S.%f")
-    buckets_end_time = datetime.datetime.strptime(end_timestamp, "%Y-%m-%dT%H:%M:%S.%f")
-    current_bucket = buckets_start_time
-    time_buckets = []
-    window = datetime.timedelta(milliseconds=bucket_size_ms)
-    while current_bucket <= buckets_end_time:
-        time_buckets.append(current_bucket)
-        current_bucket = current_bucket + window
-    bucket_list = dict.fromkeys(time_buckets)
-    for key in time_buckets: 
-        bucket_list[key] = fill_pattern
-    return bucket_list
-
-def find_nearest_timestamp_key(timestamp_to_check, dict_of_timestamps, time_window):
-    for key in dict_of_timestamps.keys():
-        if key <= timestamp_to_check <= (key + time_window):
-            return key
-
 def supersampled_worldCam_rawLiveVid(video_path, video_timestamps, rawStimVidData_dict, output_folder, bucket_size_ms):
+    import cv2
     # Get video file details
     video_name = video_path.split(os.sep)[-1]
     video_date = video_name.split('_')[0]
@@ -126,15 +72,19 @@ def supersampled_worldCam_rawLiveVid(video_path, video_timestamps, rawStimVidDat
     world_vid = cv2.VideoCapture(video_path)
     vid_width = int(world_vid.get(3))
     vid_height = int(world_vid.get(4))
-    # create rawLiveVid output array
-    first_timestamp = video_timestamps[0]
-    last_timestamp = video_timestamps[-1]
-    rawLiveVid_initializePattern = np.nan
-    rawLiveVid_buckets = make_time_buckets(first_timestamp, bucket_size_ms, last_timestamp, rawLiveVid_initializePattern)
-    sanityCheck_initializePattern = np.empty((vid_height*vid_width,))
-    sanityCheck_initializePattern[:] = np.nan
-    worldCam_sanityCheck_buckets = make_time_buckets(first_timestamp, bucket_size_ms, last_timestamp, sanityCheck_initializePattern)
-    # Loop through 4ms time buckets of world video to find nearest frame and save 2-d matrix of pixel values in that frame
+    # time buckets span first to last timestamp (same buckets as make_time_buckets)
+    bucket_window = datetime.timedelta(milliseconds=bucket_size_ms)
+    first_bucket_dt = parse_timestamp(video_timestamps[0])
+    last_bucket_dt = parse_timestamp(video_timestamps[-1])
+    num_buckets = (last_bucket_dt - first_bucket_dt)//bucket_window + 1
+    # rawLiveVid luminance per time bucket, nan where no frame landed
+    rawLiveVid_buckets = np.full(num_buckets, np.nan)
+    # world cam sanity check: index of the decoded frame in each time bucket (-1 where no frame landed)
+    # plus a compact stack of only the decoded frames that land in a time bucket
+    worldCam_frame_index = np.full(num_buckets, -1, dtype=np.int64)
+    worldCam_decoded_frames = np.empty((len(video_timestamps), vid_height*vid_width), dtype=np.uint8)
+    num_decoded_frames = 0
+    # Loop through world video frames to find the 4ms time bucket each frame falls into
     # stimStructure = ['DoNotMove-English', 'Calibration', 'stimuli024', 'stimuli025', 'stimuli026', 'stimuli027', 'stimuli028', 'stimuli029', ]
     doNotMove_frameCount = rawStimVidData_dict['DoNotMove-English']['Number of Frames']
     calib_frameCount = rawStimVidData_dict['Calibration']['Number of Frames']
@@ -142,11 +92,8 @@ def supersampled_worldCam_rawLiveVid(video_path, video_timestamps, rawStimVidDat
     frame_count = 0
     for timestamp in video_timestamps: 
         # find the time bucket into which this frame falls
-        timestamp = timestamp.split('+')[0][:-3]
-        timestamp_dt = datetime.datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S.%f")
-        bucket_window = datetime.timedelta(milliseconds=bucket_size_ms)
-        # fill in luminance values from world cam video as a sanity check
-        currentKey_sanityCheck = find_nearest_timestamp_key(timestamp_dt, worldCam_sanityCheck_buckets, bucket_window)
+        timestamp_dt = parse_timestamp(timestamp)
+        current_bucket = find_timestamp_bucket_index(timestamp_dt, first_bucket_dt, bucket_window)
         # Read frame at current position
         # should this be at current key??
         ret, frame = world_vid.read()
@@ -154,13 +101,12 @@ def supersampled_worldCam_rawLiveVid(video_path, video_timestamps, rawStimVidDat
         if frame is not None:
             # Convert to grayscale
             gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
-            # flatten the frame into a list
-            flattened_gray = gray.ravel()
-            flattened_gray = flattened_gray.astype(None)
-            # append to dictionary stim_buckets
-            worldCam_sanityCheck_buckets[currentKey_sanityCheck] = flattened_gray
+            # a later frame in the same time bucket replaces the earlier one, so reuse its slot in the stack
+            if worldCam_frame_index[current_bucket] < 0:
+                worldCam_frame_index[current_bucket] = num_decoded_frames
+                num_decoded_frames = num_decoded_frames + 1
+            worldCam_decoded_frames[worldCam_frame_index[current_bucket]] = gray.ravel()
         # fill in luminance values from raw videos based on timing of framerate in world camera timestamps
-        currentKey_rLV = find_nearest_timestamp_key(timestamp_dt, rawLiveVid_buckets, bucket_window)
         if frame_count < doNotMove_frameCount:
             rawVidPhase = 'DoNotMove-English'
             frame_index = frame_count
@@ -173,48 +119,35 @@ def supersampled_worldCam_rawLiveVid(video_path, video_timestamps, rawStimVidDat
                 frame_index = frame_count - doNotMove_frameCount - calib_frameCount
             else:
                 break
-        rawLiveVid_buckets[currentKey_rLV] = rawStimVidData_dict[rawVidPhase]['Luminance per Frame'][frame_index]
+        rawLiveVid_buckets[current_bucket] = rawStimVidData_dict[rawVidPhase]['Luminance per Frame'][frame_index]
         #print('Processing frame %d from %s phase (total frame count: %d)' % (frame_index, rawVidPhase, frame_count))
         frame_count = frame_count + 1
     # release video capture
     world_vid.release()
-    # generate rawLiveVid luminance array output
-    supersampled_rawLiveVid = []
-    current_lumVal = 0
-    for timestamp in sorted(rawLiveVid_buckets.keys()):
-        if rawLiveVid_buckets[timestamp] is not np.nan:
-            supersampled_rawLiveVid.append(rawLiveVid_buckets[timestamp])
-            current_lumVal = rawLiveVid_buckets[timestamp]
-        else:
-            supersampled_rawLiveVid.append(current_lumVal)
-    supersampled_rawLiveVid_array = np.array(supersampled_rawLiveVid)
-    # generate worldCam sanityCheck luminance array output
-    supersampled_worldCam = []
-    current_frame = sanityCheck_initializePattern
-    for timestamp in sorted(worldCam_sanityCheck_buckets.keys()):
-        if worldCam_sanityCheck_buckets[timestamp] is not np.nan:
-            supersampled_worldCam.append(worldCam_sanityCheck_buckets[timestamp])
-            current_frame = worldCam_sanityCheck_buckets[timestamp]
-        else:
-            supersampled_worldCam.append(current_frame)
-    supersampled_worldCam_array = np.array(supersampled_worldCam)
-    # return worldCam sanity check
-    return vid_width, vid_height, supersampled_worldCam_array, supersampled_rawLiveVid_array
+    # generate rawLiveVid luminance array output, forward filling empty time buckets (0 before the first frame)
+    filled = ~np.isnan(rawLiveVid_buckets)
+    last_filled_bucket = np.maximum.accumulate(np.where(filled, np.arange(num_buckets), -1))
+    supersampled_rawLiveVid_array = np.where(last_filled_bucket >= 0, rawLiveVid_buckets[np.maximum(last_filled_bucket, 0)], 0.0)
+    # return worldCam sanity check as frame index map plus decoded frames
+    return vid_width, vid_height, worldCam_frame_index, worldCam_decoded_frames[:num_decoded_frames], supersampled_rawLiveVid_array
 
-def add_to_daily_worldCam_dict(this_trial_world_vid_frames, this_trial_stim_num, daily_world_vid_dict):
+def add_to_daily_worldCam_dict(this_trial_frame_index, this_trial_decoded_frames, this_trial_stim_num, daily_world_vid_dict):
     # keep track of how many videos are going into the average for this stim
     daily_world_vid_dict[this_trial_stim_num]['Vid Count'] = daily_world_vid_dict[this_trial_stim_num].get('Vid Count', 0) + 1
-    this_trial_stim_vid = {}
-    for tb, row in enumerate(this_trial_world_vid_frames):
-        tbucket_num = tb
-        flattened_frame = row
-        this_trial_stim_vid[tbucket_num] = flattened_frame
-    for tbucket in this_trial_stim_vid.keys():
+    # each decoded frame is added once, to the time bucket it landed in
+    # time buckets where no frame landed make the summed frame nan (these are dropped as non-keyframes when saving daily means)
+    for tbucket, frame_index in enumerate(this_trial_frame_index):
         if tbucket in daily_world_vid_dict[this_trial_stim_num].keys():
-            daily_world_vid_dict[this_trial_stim_num][tbucket]['Trial Count'] = daily_world_vid_dict[this_trial_stim_num][tbucket]['Trial Count'] + 1
-            daily_world_vid_dict[this_trial_stim_num][tbucket]['Summed Frame'] = daily_world_vid_dict[this_trial_stim_num][tbucket]['Summed Frame'] + this_trial_stim_vid[tbucket]
-        else: 
-            daily_world_vid_dict[this_trial_stim_num][tbucket] = {'Trial Count': 1, 'Summed Frame': this_trial_stim_vid[tbucket]}
+            this_tbucket = daily_world_vid_dict[this_trial_stim_num][tbucket]
+            this_tbucket['Trial Count'] = this_tbucket['Trial Count'] + 1
+            if frame_index < 0 or np.isscalar(this_tbucket['Summed Frame']):
+                this_tbucket['Summed Frame'] = np.nan
+            else:
+                this_tbucket['Summed Frame'] += this_trial_decoded_frames[frame_index]
+        elif frame_index < 0:
+            daily_world_vid_dict[this_trial_stim_num][tbucket] = {'Trial Count': 1, 'Summed Frame': np.nan}
+        else:
+            daily_world_vid_dict[this_trial_stim_num][tbucket] = {'Trial Count': 1, 'Summed Frame': this_trial_decoded_frames[frame_index].astype(np.float64)}
 
 def add_to_daily_rawLiveVid_dict(this_trial_rawLive_vid_frames, this_trial_stim_num, daily_rawLive_vid_dict):
     # keep track of how many videos are going into the average for this stim
@@ -231,134 +164,138 @@ def add_to_daily_rawLiveVid_dict(this_trial_rawLive_vid_frames, this_trial_stim_
         else: 
             daily_rawLive_vid_dict[this_trial_stim_num][tbucket] = {'Trial Count': 1, 'Summed Luminance': this_trial_stim_vid[tbucket]}
 
-def calculate_meanPerDay_worldCam(day_worldCam_tbDict):
-    # intialize time bucket dict for mean worldcam for each day
-    meanPerDay_worldCam = {key:{'Vid Count':0} for key in stim_vids}
+def build_daily_worldCam_aggregate(day_worldCam_tbDict):
+    # keep only world cam keyframes: timebuckets where every trial had a frame (summed frame not nan) and the mean frame is not all zero
+    daily_worldCam = WeightedMeanAggregate()
     for stim_num in day_worldCam_tbDict.keys():
+        keyframes = []
+        summed_frames = []
+        trial_counts = []
         for key in day_worldCam_tbDict[stim_num].keys():
             if key == 'Vid Count':
-                meanPerDay_worldCam[stim_num]['Vid Count'] = meanPerDay_worldCam[stim_num]['Vid Count'] + day_worldCam_tbDict[stim_num]['Vid Count']
-            else: 
-                meanFrame = day_worldCam_tbDict[stim_num][key]['Summed Frame'] / day_worldCam_tbDict[stim_num][key]['Trial Count']
-                meanPerDay_worldCam[stim_num][key] = {'Mean Frame': meanFrame, 'Trial Count': day_worldCam_tbDict[stim_num][key]['Trial Count']}
-    return meanPerDay_worldCam
+                continue
+            summed_frame = day_worldCam_tbDict[stim_num][key]['Summed Frame']
+            if np.isscalar(summed_frame) or np.nansum(summed_frame) == 0:
+                continue
+            keyframes.append(key)
+            summed_frames.append(summed_frame)
+            trial_counts.append(day_worldCam_tbDict[stim_num][key]['Trial Count'])
+        daily_worldCam.add(stim_num, keyframes, summed_frames, trial_counts, day_worldCam_tbDict[stim_num]['Vid Count'])
+    return daily_worldCam
 
-def calculate_meanPerDay_rawLiveVid(day_rawLiveVid_tbDict):
-    # intialize time bucket dict for mean worldcam for each day
-    meanPerDay_rawLiveVid = {key:{'Vid Count':0} for key in stim_vids}
+def build_daily_rawLiveVid_aggregate(day_rawLiveVid_tbDict):
+    daily_rawLiveVid = WeightedMeanAggregate()
     for stim_num in day_rawLiveVid_tbDict.keys():
-        for key in day_rawLiveVid_tbDict[stim_num].keys():
-            if key == 'Vid Count':
-                meanPerDay_rawLiveVid[stim_num]['Vid Count'] = meanPerDay_rawLiveVid[stim_num]['Vid Count'] + day_rawLiveVid_tbDict[stim_num]['Vid Count']
-            else: 
-                meanLuminance = day_rawLiveVid_tbDict[stim_num][key]['Summed Luminance'] / day_rawLiveVid_tbDict[stim_num][key]['Trial Count']
-                meanPerDay_rawLiveVid[stim_num][key] = {'Mean Luminance': meanLuminance, 'Trial Count': day_rawLiveVid_tbDict[stim_num][key]['Trial Count']}
-    return meanPerDay_rawLiveVid
+        timebuckets = [key for key in day_rawLiveVid_tbDict[stim_num].keys() if key != 'Vid Count']
+        summed_lums = [day_rawLiveVid_tbDict[stim_num][tb]['Summed Luminance'] for tb in timebuckets]
+        trial_counts = [day_rawLiveVid_tbDict[stim_num][tb]['Trial Count'] for tb in timebuckets]
+        daily_rawLiveVid.add(stim_num, timebuckets, summed_lums, trial_counts, day_rawLiveVid_tbDict[stim_num]['Vid Count'])
+    return daily_rawLiveVid
 
-def save_daily_worldCam_meanFrames(this_day_meanWorld_dict, this_day_month, save_folder):
-    for stim in this_day_meanWorld_dict.keys():
-        thisStimMeanWorldCam = []
-        for timebucket in this_day_meanWorld_dict[stim].keys():
-            if timebucket == 'Vid Count':
-                vidCount = this_day_meanWorld_dict[stim][timebucket]
-            else:
-                thisMeanFrame = this_day_meanWorld_dict[stim][timebucket]['Mean Frame']
-                thisMeanFrame_weight = this_day_meanWorld_dict[stim][timebucket]['Trial Count']
-                if np.nansum(thisMeanFrame) == 0:
-                    continue
-                else:
-                    thisStimMeanWorldCam.append([timebucket, thisMeanFrame_weight, thisMeanFrame])
-        thisStimMeanWorldCam_output = save_folder + os.sep + '%s_Stim%d_meanWorldCam_%dVids.npy' % (this_day_month, int(stim), vidCount)
-        np.save(thisStimMeanWorldCam_output, thisStimMeanWorldCam)
+def merge_aggregate_files(aggregate_files):
+    # fold saved partial aggregates (e.g. daily) into one aggregate (e.g. monthly), in any order
+    merged = WeightedMeanAggregate()
+    for aggregate_file in aggregate_files:
+        merged.update(WeightedMeanAggregate.load(aggregate_file))
+    return merged
 
-def save_daily_rawLiveStim_meanLums(this_day_rawLiveStim_dict, this_day_month, save_folder):
-    for stim in this_day_rawLiveStim_dict.keys():
-        thisStimRawLive = []
-        for timebucket in this_day_rawLiveStim_dict[stim].keys():
-            if timebucket == 'Vid Count':
-                vidCount = this_day_rawLiveStim_dict[stim][timebucket]
-            else:
-                thisMeanLum = this_day_rawLiveStim_dict[stim][timebucket]['Mean Luminance']
-                thisMeanLum_weight = this_day_rawLiveStim_dict[stim][timebucket]['Trial Count']
-                thisStimRawLive.append([timebucket, thisMeanLum_weight, thisMeanLum])
-        thisStimRawLive_output = save_folder + os.sep + '%s_Stim%d_meanRawLiveStim_%dVids.npy' % (this_day_month, int(stim), vidCount)
-        np.save(thisStimRawLive_output, thisStimRawLive)
+def trial_world_csv(trial_folder):
+    world_csvs = glob.glob(trial_folder + '/*world.csv')
+    return world_csvs[0] if world_csvs else None
 
-def extract_daily_means_and_add_to_worldCam_or_rawLiveStim(dailyMean_binaryFiles, this_month_all_worldCam, this_month_all_rawLiveStim):
-    for daily_mean_file in dailyMean_binaryFiles:
-        daily_date = os.path.basename(daily_mean_file).split('_')[0]
-        daily_mean_stim_num = stim_name_to_float[os.path.basename(daily_mean_file).split('_')[1]]
-        daily_mean_type = os.path.basename(daily_mean_file).split('_')[2]
-        daily_mean_vid_count = int(os.path.basename(daily_mean_file).split('_')[3][:-8])
-        if daily_mean_type == 'meanWorldCam':
-            this_file_dictionary = this_month_all_worldCam
-            timebucket_mean_name = 'Mean Frame'
-        if daily_mean_type == 'meanRawLiveStim':
-            this_file_dictionary = this_month_all_rawLiveStim
-            timebucket_mean_name = 'Mean Luminance'
-        this_file_dictionary[daily_mean_stim_num]['Vid Count'] = this_file_dictionary[daily_mean_stim_num]['Vid Count'] + daily_mean_vid_count
-        daily_mean = np.load(daily_mean_file, allow_pickle=True)
-        # format of daily_mean: [timebucket, thisTimebucketMean_trialCount, thisTimebucketMean]
-        for row in daily_mean:
-            timebucket = row[0]
-            thisTimebucketMean_trialCount = row[1]
-            thisTimebucketMean = row[2]
-            if timebucket in this_file_dictionary[daily_mean_stim_num].keys():
-                this_file_dictionary[daily_mean_stim_num][timebucket][daily_date] = {'Trial Count': thisTimebucketMean_trialCount, timebucket_mean_name: thisTimebucketMean}
-            else:
-                this_file_dictionary[daily_mean_stim_num][timebucket] = {daily_date: {'Trial Count': thisTimebucketMean_trialCount, timebucket_mean_name: thisTimebucketMean}}
+def project_daily_worldCam_mb(trial_folders):
+    # MB needed to extract all trials of a day at once: a float64 summed frame for every frame of the longest trial of each stimulus,
+    # held twice while the daily aggregate is built from the time bucket dict
+    import cv2
+    longest_trial = {}
+    frame_pixels = None
+    for trial_folder in trial_folders:
+        world_csv_path = trial_world_csv(trial_folder)
+        if world_csv_path is None:
+            continue
+        stimuli_name = world_csv_path.split("_")[-2]
+        with open(world_csv_path, 'r') as world_csv:
+            num_frames = sum(1 for line in world_csv)
+        longest_trial[stimuli_name] = max(longest_trial.get(stimuli_name, 0), num_frames)
+        if not frame_pixels:
+            world_vid = cv2.VideoCapture(world_csv_path[:-len('.csv')] + '.avi')
+            frame_pixels = int(world_vid.get(3))*int(world_vid.get(4))
+            world_vid.release()
+    if not frame_pixels:
+        return 0.0
+    return 2*sum(longest_trial.values())*frame_pixels*8/MB
 
-def save_monthly_weighted_meanStim(this_month_allStim_dict, stim_type):
-    monthly_mean_stim = {key:{'Vid Count':0} for key in stim_vids}
-    if stim_type == 'meanWorldCam':
-        timebucket_mean_name = 'Mean Frame'
-    if stim_type == 'meanRawLiveStim':
-        timebucket_mean_name = 'Mean Luminance'
-    for stim in this_month_allStim_dict.keys():
-        for timebucket in this_month_allStim_dict[stim].keys():
-            if timebucket == 'Vid Count':
-                monthly_mean_stim[stim]['Vid Count'] = monthly_mean_stim[stim]['Vid Count'] + this_month_allStim_dict[stim]['Vid Count']
-            else:
-                weighted_means = []
-                weights = []
-                for month in this_month_allStim_dict[stim][timebucket].keys():
-                    weighted_mean = this_month_allStim_dict[stim][timebucket][month]['Trial Count'] * this_month_allStim_dict[stim][timebucket][month][timebucket_mean_name]
-                    weighted_means.append(weighted_mean)
-                    weights.append(this_month_allStim_dict[stim][timebucket][month]['Trial Count'])
-                weighted_means_array = np.array(weighted_means)
-                weights_array = np.array(weights)
-                this_timebucket_weighted_mean = np.sum(weighted_means, axis=0)/np.sum(weights_array)
-                monthly_mean_stim[stim][timebucket] = {'Trial Count':np.sum(weights_array), timebucket_mean_name: this_timebucket_weighted_mean}
-    for stim in monthly_mean_stim.keys():
-        this_stim_weighted_mean = []
-        for timebucket in monthly_mean_stim[stim].keys():
-            if timebucket == 'Vid Count':
-                vid_count = monthly_mean_stim[stim][timebucket]
-            else:
-                this_mean_frame = monthly_mean_stim[stim][timebucket][timebucket_mean_name]
-                this_mean_frame_weight = monthly_mean_stim[stim][timebucket]['Trial Count']
-                this_stim_weighted_mean.append([timebucket, this_mean_frame_weight, this_mean_frame])
-        this_stim_weighted_mean_output = monthly_mean_folder + os.sep + '%s_Stim%d_%s_%dVids.npy' % (item_year_month, int(stim), stim_type, vid_count)
-        np.save(this_stim_weighted_mean_output, this_stim_weighted_mean)
+def group_trials_by_stimulus(trial_folders):
+    # chunks of trial folders that showed the same stimulus, trials without a world cam csv go in a chunk of their own
+    stimulus_trials = {}
+    for trial_folder in trial_folders:
+        world_csv_path = trial_world_csv(trial_folder)
+        stimuli_name = world_csv_path.split("_")[-2] if world_csv_path is not None else ''
+        stimulus_trials.setdefault(stimuli_name, []).append(trial_folder)
+    return [stimulus_trials[stimuli_name] for stimuli_name in sorted(stimulus_trials.keys())]
+
+def save_monthly_aggregates(days_extracted, save_folder, year_month, memory_budget=None):
+    for stim_type in ['meanWorldCam', 'meanRawLiveStim']:
+        daily_aggregate_files = [os.path.join(analysed_drive, day_extracted, 'Analysis', 'world', '%s_%s_aggregate.npz' % (day_extracted.split('_')[1], stim_type)) for day_extracted in days_extracted]
+        logging.info('Saving monthly weighted mean of %s for %s...'%(stim_type, year_month))
+        print('Saving monthly weighted mean of %s for %s...'%(stim_type, year_month))
+        monthly_aggregate = merge_aggregate_files(daily_aggregate_files)
+        monthly_aggregate.save(os.path.join(save_folder, '%s_%s_aggregate.npz' % (year_month, stim_type)))
+        if memory_budget is not None:
+            memory_budget.checkpoint('%s monthly %s' % (year_month, stim_type), monthly_aggregate=monthly_aggregate)
+
+def consolidate_month(days_extracted, year_month, memory_budget=None):
+    # create folder for this month mean files
+    monthly_mean_folder = analysed_drive + os.sep + 'MeanStimuli_' + year_month
+    if not os.path.exists(monthly_mean_folder):
+        os.makedirs(monthly_mean_folder)
+    # merge daily worldCam and rawLiveStim aggregates and save as monthly aggregate files
+    save_monthly_aggregates(days_extracted, monthly_mean_folder, year_month, memory_budget)
+    # delete daily mean intermediate files
+    for day_extracted in days_extracted:
+        daily_mean_folder = os.path.join(analysed_drive, day_extracted, 'Analysis', 'world')
+        logging.info("Deleting daily mean worldCam and rawStim video files for %s..." % (day_extracted.split('_')[1]))
+        shutil.rmtree(daily_mean_folder)
+        logging.info("Delete successful!")
+        logging.info("Making empty 'world' folder for %s..." % (day_extracted.split('_')[1]))
+        os.makedirs(daily_mean_folder)
+    logging.info("Finished averaging world video frames for %s!" % (year_month))
+    print("Finished averaging world video frames for %s!" % (year_month))
 
 ##########################################################
 # BEGIN SCRIPT
 ##########################################################
 if __name__=='__main__':
+    import cv2
+    import matplotlib.image as mpimg
+    ###################################
+    # SCRIPT LOGGER
+    ###################################
+    # grab today's date
+    now = datetime.datetime.now()
+    logging.basicConfig(filename="psa01_MonthlyMeans_WorldCam_RawLiveStim_" + now.strftime("%Y-%m-%d_%H-%M-%S") + ".log", filemode='w', level=logging.INFO, format='%(asctime)s %(name)-12s %(levelname)-8s %(message)s', datefmt='%m-%d %H:%M')
     # parse command line input
     parser = argparse.ArgumentParser()
     parser.add_argument("--a", nargs='?', default="check_string_for_empty")
     parser.add_argument("--loc", nargs='?', default='laptop')
+    parser.add_argument("--memory_budget", type=float, default=None, help="MB this script may use, days projected to need more are extracted one stimulus at a time (default: 80%% of available memory)")
+    parser.add_argument("--trace_memory", action='store_true', help="Trace python allocations with tracemalloc, so the memory report names the source lines holding the most memory (slower)")
+    parser.add_argument("--queue", nargs='?', const='', default=None, help="Claim days (and then months to consolidate) from a work queue folder on the shared filesystem (default: queues/psa01 in the intermediates folder), so several machines running with the same queue share the days")
+    parser.add_argument("--lease", type=float, default=600, help="Seconds without a heartbeat after which another worker retries a claimed day (default: 600)")
     args = parser.parse_args()
+    # track peak memory and switch to chunked extraction when a day would not fit
+    memory_budget = MemoryBudget('psa01', args.memory_budget, trace=args.trace_memory)
+    memory_report_path = os.path.join(current_working_directory, "instrumentation", "psa01Memory_" + now.strftime("%Y-%m-%d_%H-%M-%S") + ".json")
     # clean up current working directory
-    if 'world_temp' in os.listdir(current_working_directory):
+    # (not in queue mode, where other workers may be using this working directory)
+    if args.queue is None and 'world_temp' in os.listdir(current_working_directory):
         logging.info('Deleting old world_temp folder...')
         print('Deleting old world_temp folder...')
         shutil.rmtree(os.path.join(current_working_directory, 'world_temp'))
         print('Deleted!')
         time.sleep(5) # to have time to see that world_temp was in fact deleted
     zip_folders = fnmatch.filter(os.listdir(current_working_directory), '*.zip')
-    if len(zip_folders) > 0:
+    if args.queue is None and len(zip_folders) > 0:
         logging.info('Deleting old zip folders...')
         print('Deleting old zip folders...')
         for zfolder in zip_folders:
@@ -446,14 +383,31 @@ if __name__=='__main__':
     invalid_zipped = []
     # DAYS WITH NO WORLD VIDS (no valid trials)
     no_valid_trials = []
+    if args.queue is None:
+        work_queue = None
+        days_to_extract = zipped_data
+        # a temp folder in current working directory to store data (contents of unzipped folder)
+        world_temp_folder = os.path.join(current_working_directory, "world_temp")
+    else:
+        # extract the days this worker claims from the queue, alongside the workers of other machines using the same queue
+        # days extracted before the queue was started are skipped, days the queue knows about are retried even if their world folder exists
+        # months are consolidated after the day loop, by whichever worker claims them once all their days are done
+        queue_folder = args.queue or os.path.join(analysed_drive, 'queues', 'psa01')
+        logging.info('WORK QUEUE: %s' % (queue_folder))
+        print('WORK QUEUE: %s' % (queue_folder))
+        work_queue = WorkQueue(queue_folder, args.lease)
+        queued_days = [item[:-4] for item in zipped_data if item[:-4] not in already_extracted_daily or work_queue.known(item[:-4])]
+        days_to_extract = (day + '.zip' for day in work_queue.claimed(queued_days))
+        # every worker in this working directory unzips into its own temp folder
+        world_temp_folder = os.path.join(current_working_directory, "world_temp_" + work_queue.worker)
     # BEGIN WORLD VID FRAME EXTRACTION/AVERAGING 
-    for item in zipped_data:
+    for item in days_to_extract:
         this_day_date = item[:-4].split('_')[1]
         ########################################################################
         # check to see if this folder has already had world vid frames extracted
         # this condition is for when the script is interrupted
         ########################################################################
-        if item[:-4] in already_extracted_daily:
+        if work_queue is None and item[:-4] in already_extracted_daily:
             logging.info("World vid frames from %s has already been extracted" % (item))
             print("World vid frames from %s has already been extracted" % (item))
             ########################################################################################
@@ -474,7 +428,7 @@ if __name__=='__main__':
                     logging.warning('No valid trials during %s' % (day_extracted.split('_')[1]))
                 else:
                     day_extracted_files = os.listdir(os.path.join(analysed_drive, day_extracted, 'Analysis', 'world'))
-                    if len(day_extracted_files) != 12:
+                    if len(day_extracted_files) != 2:
                         this_month_extracted.pop(i)
             this_month_data = fnmatch.filter(zipped_data, 'SurprisingMinds_' + item_year_month + '*')
             this_month_invalid = fnmatch.filter(invalid_zipped, item_year_month + '*')
@@ -492,38 +446,13 @@ if __name__=='__main__':
             ##################################################################
             logging.info('This month extraction completed: %s' % (this_month_extracted))
             print('This month extraction completed: %s' % (this_month_extracted))
-            # load daily mean files and organize by worldCam/rawLiveStim and by stim
-            thisMonth_worldCam = {key:{'Vid Count':0} for key in stim_vids}
-            thisMonth_rawLiveStim = {key:{'Vid Count':0} for key in stim_vids}
-            for day_extracted in this_month_extracted:
-                daily_mean_files = glob.glob(analysed_drive + os.sep + day_extracted + os.sep + 'Analysis' + os.sep + 'world' + os.sep + '*.npy')
-                extract_daily_means_and_add_to_worldCam_or_rawLiveStim(daily_mean_files, thisMonth_worldCam, thisMonth_rawLiveStim)
-            # create folder for this month mean files
-            monthly_mean_folder = analysed_drive + os.sep + 'MeanStimuli_' + item_year_month
-            if not os.path.exists(monthly_mean_folder):
-                os.makedirs(monthly_mean_folder)
-            # take weighted mean at each timebucket and save as monthly mean intermediate binary file
-            logging.info('Saving monthly weighted mean of worldCam for %s...'%(item_year_month))
-            print('Saving monthly weighted mean of worldCam for %s...'%(item_year_month))
-            save_monthly_weighted_meanStim(thisMonth_worldCam, 'meanWorldCam')
-            logging.info('Saving monthly weighted mean of rawLive for %s...'%(item_year_month))
-            print('Saving monthly weighted mean of rawLive for %s...'%(item_year_month))
-            save_monthly_weighted_meanStim(thisMonth_rawLiveStim, 'meanRawLiveStim')
+            # merge daily worldCam and rawLiveStim aggregates into monthly aggregate files, then empty the daily world folders
+            consolidate_month(this_month_extracted, item_year_month, memory_budget)
             # update list of already extracted months
-            logging.INFO("Updating list of extracted months...")
+            logging.info("Updating list of extracted months...")
             analysed_folders = sorted(os.listdir(analysed_drive))
             monthly_extracted_data = fnmatch.filter(analysed_folders, 'MeanStimuli_*')
             extracted_months = [item.split('_')[1] for item in monthly_extracted_data]
-            # delete daily mean intermediate files
-            for day_extracted in this_month_extracted:
-                daily_mean_folder = os.path.join(analysed_drive, day_extracted, 'Analysis', 'world')
-                logging.INFO("Deleting daily mean worldCam and rawStim video files for %s..." % (day_extracted.split('_')[1]))
-                shutil.rmtree(daily_mean_folder)
-                logging.INFO("Delete successful!")
-                logging.INFO("Making empty 'world' folder for %s..." % (day_extracted.split('_')[1]))
-                os.makedirs(daily_mean_folder)
-            logging.info("Finished averaging world video frames for %s!" % (item_year_month))
-            print("Finished averaging world video frames for %s!" % (item_year_month))
             continue
         #############################################################################
         # if world vid frames in this folder haven't already been extracted, EXTRACT!
@@ -535,6 +464,8 @@ if __name__=='__main__':
         alignment_folder = os.path.join(analysis_folder, "alignment")
         if not os.path.exists(analysis_folder):
             logging.warning("No Analysis folder exists for folder %s!" % (item))
+            if work_queue is not None:
+                work_queue.complete(item[:-4], status='no analysis folder')
             continue
         # grab a folder 
         day_zipped = os.path.join(data_drive, item)
@@ -544,7 +475,7 @@ if __name__=='__main__':
         if not os.path.exists(world_folder):
             os.makedirs(world_folder)
         # create a temp folder in current working directory to store data (contents of unzipped folder)
-        day_folder = os.path.join(current_working_directory, "world_temp")
+        day_folder = world_temp_folder
         # at what time resolution to build raw live stim and world camera data?
         bucket_size = 4 #milliseconds
         #####################################################################################################
@@ -554,86 +485,106 @@ if __name__=='__main__':
         if unpack_to_temp(day_zipped, day_folder):
             # List all trial folders
             trial_folders = list_sub_folders(day_folder)
-            num_trials = len(trial_folders)
-            # intialize time bucket dictionary for world vids
-            this_day_worldCam_tbucket = {key:{'Vid Count':0} for key in stim_vids}
             this_day_world_vids_height = []
             this_day_world_vids_width = []
-            # initialize time bucket dictionary for raw live stim vids
-            this_day_rawLiveVid_tbucket = {key:{'Vid Count':0} for key in stim_vids}
-            ###################################
-            # extract world vid from each trial
-            ###################################
+            # daily aggregates, built from the time bucket dictionaries of each chunk of trials
+            thisDay_worldCam_aggregate = WeightedMeanAggregate()
+            thisDay_rawLiveVid_aggregate = WeightedMeanAggregate()
+            # extract all trials of the day at once if they fit in the memory budget, otherwise one stimulus at a time
+            if memory_budget.fits(project_daily_worldCam_mb(trial_folders), 'world cam frames of %s' % (this_day_date)):
+                trial_chunks = [trial_folders]
+            else:
+                trial_chunks = group_trials_by_stimulus(trial_folders)
+                logging.info('Extracting world vid frames from %s one stimulus at a time (%d chunks)' % (this_day_date, len(trial_chunks)))
+                print('Extracting world vid frames from %s one stimulus at a time (%d chunks)' % (this_day_date, len(trial_chunks)))
             current_trial = 0
-            for trial_folder in trial_folders:
-                # add exception handling so that a weird day doesn't totally break everything 
-                try:
-                    trial_name = trial_folder.split(os.sep)[-1]
-                    # check that the alignment frame for the day shows the correct start to the exhibit
-                    png_filename = trial_name + '.png'
-                    alignment_png_path = os.path.join(alignment_folder, png_filename)
-                    if os.path.exists(alignment_png_path):
-                        alignment_img = mpimg.imread(alignment_png_path)
-                        alignment_gray = cv2.cvtColor(alignment_img, cv2.COLOR_RGB2GRAY)
-                        monitor_zoom = alignment_gray[60:-200, 110:-110]
-                        monitor_score = np.sum(monitor_zoom)
-                        # pick a pixel where it should be bright because people are centering their eyes in the cameras
-                        if monitor_zoom[115,200]>=0.7:
-                            ###################################
-                            # Load CSVs and create timestamps
-                            # ------------------------------
-                            # Get world movie timestamp csv path
-                            world_csv_path = glob.glob(trial_folder + '/*world.csv')[0]
-                            # Get world video filepath
-                            world_video_path = glob.glob(trial_folder + '/*world.avi')[0]
-                            ####################################
-                            # while debugging
-                            #world_csv_path = r"C:\Users\taunsquared\Dropbox\SurprisingMinds\analysis\debuggingData\SurprisingMinds_2017-10-14\2017-10-14_09-42-40\2017-10-14_09-42-40_stimuli024_world.csv"
-                            #world_video_path = r"C:\Users\taunsquared\Dropbox\SurprisingMinds\analysis\debuggingData\SurprisingMinds_2017-10-14\2017-10-14_09-42-40\2017-10-14_09-42-40_stimuli024_world.avi"
-                            #world_folder = r"C:\Users\taunsquared\Dropbox\SurprisingMinds\analysis\dataPythonWorkflows\SurprisingMinds_2017-10-14\Analysis\world"
-                            ####################################
-                            stimuli_name = world_csv_path.split("_")[-2]
-                            stimuli_number = stim_name_to_float[stimuli_name]
-                            # Load world CSV
-                            world_timestamps = np.genfromtxt(world_csv_path, dtype=np.str, delimiter=' ') # row = timestamp, not frame
-                            ### EXTRACT FRAMES FROM WORLD VIDS AND PUT INTO TIME BUCKETS ###
-                            # create a "raw live stimulus video" array by combining framerate info from world cam with luminance values from raw vids
-                            logging.INFO("Extracting world vid frames and creating raw live stim vid for %s..." % os.path.basename(world_video_path))
-                            # save raw live stim vid as binary files and return world cam frames as a sanity check
-                            worldCam_vidWidth, worldCam_vidHeight, worldCam_supersampledFrames, rawLiveVid_supersampledFrames = supersampled_worldCam_rawLiveVid(world_video_path, world_timestamps, rawStimLum_dict, world_folder, bucket_size)
-                            #
-                            # ## SANITY CHECK
-                            # worldCam_meanLum = []
-                            # for frame in worldCam_supersampledFrames:
-                            #     worldCam_meanLum.append(np.nansum(frame))
-                            # worldCam_meanLum_array = np.array(worldCam_meanLum)
-                            # plt.plot(worldCam_meanLum_array)
-                            # plt.show()
-                            #
-                            add_to_daily_worldCam_dict(worldCam_supersampledFrames, stimuli_number, this_day_worldCam_tbucket)
-                            this_day_world_vids_width.append(worldCam_vidWidth)
-                            this_day_world_vids_height.append(worldCam_vidHeight)
-                            # ------------------------------
-                            add_to_daily_rawLiveVid_dict(rawLiveVid_supersampledFrames, stimuli_number, this_day_rawLiveVid_tbucket)
-                            # ------------------------------
-                            # Report progress
-                            cv2.destroyAllWindows()
-                            logging.info("Finished Trial: %s" % (current_trial))
-                            print("Finished Trial: %s" % (current_trial))
-                            current_trial = current_trial + 1
+            for chunk_number, trial_chunk in enumerate(trial_chunks):
+                # intialize time bucket dictionary for world vids
+                this_day_worldCam_tbucket = {key:{'Vid Count':0} for key in stim_vids}
+                # initialize time bucket dictionary for raw live stim vids
+                this_day_rawLiveVid_tbucket = {key:{'Vid Count':0} for key in stim_vids}
+                ###################################
+                # extract world vid from each trial
+                ###################################
+                for trial_folder in trial_chunk:
+                    # add exception handling so that a weird day doesn't totally break everything 
+                    try:
+                        trial_name = trial_folder.split(os.sep)[-1]
+                        # check that the alignment frame for the day shows the correct start to the exhibit
+                        png_filename = trial_name + '.png'
+                        alignment_png_path = os.path.join(alignment_folder, png_filename)
+                        if os.path.exists(alignment_png_path):
+                            alignment_img = mpimg.imread(alignment_png_path)
+                            alignment_gray = cv2.cvtColor(alignment_img, cv2.COLOR_RGB2GRAY)
+                            monitor_zoom = alignment_gray[60:-200, 110:-110]
+                            monitor_score = np.sum(monitor_zoom)
+                            # pick a pixel where it should be bright because people are centering their eyes in the cameras
+                            if monitor_zoom[115,200]>=0.7:
+                                ###################################
+                                # Load CSVs and create timestamps
+                                # ------------------------------
+                                # Get world movie timestamp csv path
+                                world_csv_path = glob.glob(trial_folder + '/*world.csv')[0]
+                                # Get world video filepath
+                                world_video_path = glob.glob(trial_folder + '/*world.avi')[0]
+                                ####################################
+                                # while debugging
+                                #world_csv_path = r"C:\Users\taunsquared\Dropbox\SurprisingMinds\analysis\debuggingData\SurprisingMinds_2017-10-14\2017-10-14_09-42-40\2017-10-14_09-42-40_stimuli024_world.csv"
+                                #world_video_path = r"C:\Users\taunsquared\Dropbox\SurprisingMinds\analysis\debuggingData\SurprisingMinds_2017-10-14\2017-10-14_09-42-40\2017-10-14_09-42-40_stimuli024_world.avi"
+                                #world_folder = r"C:\Users\taunsquared\Dropbox\SurprisingMinds\analysis\dataPythonWorkflows\SurprisingMinds_2017-10-14\Analysis\world"
+                                ####################################
+                                stimuli_name = world_csv_path.split("_")[-2]
+                                stimuli_number = stim_name_to_float[stimuli_name]
+                                # Load world CSV
+                                world_timestamps = np.genfromtxt(world_csv_path, dtype=str, delimiter=' ') # row = timestamp, not frame
+                                ### EXTRACT FRAMES FROM WORLD VIDS AND PUT INTO TIME BUCKETS ###
+                                # create a "raw live stimulus video" array by combining framerate info from world cam with luminance values from raw vids
+                                logging.info("Extracting world vid frames and creating raw live stim vid for %s..." % os.path.basename(world_video_path))
+                                # save raw live stim vid as binary files and return world cam frames as a sanity check
+                                worldCam_vidWidth, worldCam_vidHeight, worldCam_frameIndex, worldCam_decodedFrames, rawLiveVid_supersampledFrames = supersampled_worldCam_rawLiveVid(world_video_path, world_timestamps, rawStimLum_dict, world_folder, bucket_size)
+                                #
+                                # ## SANITY CHECK
+                                # worldCam_meanLum_array = np.where(worldCam_frameIndex >= 0, np.sum(worldCam_decodedFrames, axis=1)[worldCam_frameIndex], 0)
+                                # plt.plot(worldCam_meanLum_array)
+                                # plt.show()
+                                #
+                                add_to_daily_worldCam_dict(worldCam_frameIndex, worldCam_decodedFrames, stimuli_number, this_day_worldCam_tbucket)
+                                this_day_world_vids_width.append(worldCam_vidWidth)
+                                this_day_world_vids_height.append(worldCam_vidHeight)
+                                # ------------------------------
+                                add_to_daily_rawLiveVid_dict(rawLiveVid_supersampledFrames, stimuli_number, this_day_rawLiveVid_tbucket)
+                                # ------------------------------
+                                # Report progress
+                                cv2.destroyAllWindows()
+                                logging.info("Finished Trial: %s" % (current_trial))
+                                print("Finished Trial: %s" % (current_trial))
+                                current_trial = current_trial + 1
+                            else:
+                                logging.warning("Bad trial! Stimulus did not display properly for trial %s" % (current_trial))
+                                print("Bad trial! Stimulus did not display properly for trial %s" % (current_trial))
+                                current_trial = current_trial + 1
                         else:
-                            logging.warning("Bad trial! Stimulus did not display properly for trial %s" % (current_trial))
-                            print("Bad trial! Stimulus did not display properly for trial %s" % (current_trial))
+                            logging.warning("No alignment picture exists for trial %s" % (current_trial))
+                            print("No alignment picture exists for trial %s" % (current_trial))
                             current_trial = current_trial + 1
-                    else:
-                        logging.warning("No alignment picture exists for trial %s" % (current_trial))
-                        print("No alignment picture exists for trial %s" % (current_trial))
+                    except Exception: 
+                        cv2.destroyAllWindows()
+                        logging.warning("Trial %s failed!" % (current_trial))
+                        print("Trial %s failed!" % (current_trial))
                         current_trial = current_trial + 1
-                except Exception: 
-                    cv2.destroyAllWindows()
-                    logging.warning("Trial %s failed!" % (current_trial))
-                    print("Trial %s failed!" % (current_trial))
-                    current_trial = current_trial + 1
+                memory_budget.checkpoint('%s trial chunk %d of %d' % (this_day_date, chunk_number+1, len(trial_chunks)), this_day_worldCam_tbucket=this_day_worldCam_tbucket, this_day_rawLiveVid_tbucket=this_day_rawLiveVid_tbucket, thisDay_worldCam_aggregate=thisDay_worldCam_aggregate)
+                ##############################################################
+                # add this chunk of trials to the daily worldCam and rawLiveStim aggregates
+                ##############################################################
+                logging.info('Calculating mean world camera and raw live stim videos for %s' % (this_day_date))
+                print('Calculating mean world camera and raw live stim videos for %s' % (this_day_date))
+                chunk_worldCam_aggregate = build_daily_worldCam_aggregate(this_day_worldCam_tbucket)
+                chunk_rawLiveVid_aggregate = build_daily_rawLiveVid_aggregate(this_day_rawLiveVid_tbucket)
+                # free the summed frames of this chunk before folding it into the daily aggregates
+                del this_day_worldCam_tbucket, this_day_rawLiveVid_tbucket
+                thisDay_worldCam_aggregate.update(chunk_worldCam_aggregate)
+                thisDay_rawLiveVid_aggregate.update(chunk_rawLiveVid_aggregate)
+                del chunk_worldCam_aggregate, chunk_rawLiveVid_aggregate
             ##################################################
             # check that all videos have same height and width
             ##################################################
@@ -641,32 +592,27 @@ if __name__=='__main__':
                 logging.warning("No world vids averaged for %s" % (this_day_date))
                 no_valid_trials.append(item)
                 # delete temporary file with unzipped data contents
-                logging.INFO("Deleting temp folder of unzipped data...")
+                logging.info("Deleting temp folder of unzipped data...")
                 shutil.rmtree(day_folder)
-                logging.INFO("Delete successful!")
+                logging.info("Delete successful!")
+                if work_queue is not None:
+                    work_queue.complete(item[:-4], status='no valid trials')
                 continue
             if all(x == this_day_world_vids_height[0] for x in this_day_world_vids_height):
                 if all(x == this_day_world_vids_width[0] for x in this_day_world_vids_width):
                     unravel_height = this_day_world_vids_height[0]
                     unravel_width = this_day_world_vids_width[0]
             ###########################################
-            # average worldCam sanityCheck for each day
+            # save daily mean worldCam sanityCheck and rawLiveStim video
             ###########################################
-            logging.info('Calculating mean world camera videos for %s' % (this_day_date))
-            print('Calculating mean world camera videos for %s' % (this_day_date))
-            thisDay_meanWorldCam = calculate_meanPerDay_worldCam(this_day_worldCam_tbucket)
             logging.info('Saving non-NaN frames of daily mean world camera...')
             print('Saving non-NaN frames of daily mean world camera...')
-            save_daily_worldCam_meanFrames(thisDay_meanWorldCam, this_day_date, world_folder)
-            ###########################################
-            # average rawLiveStim video for each day
-            ###########################################
-            logging.info('Calculating mean raw live stim videos for %s' % (this_day_date))
-            print('Calculating mean raw live stim videos for %s' % (this_day_date))
-            thisDay_meanRawLiveVid = calculate_meanPerDay_rawLiveVid(this_day_rawLiveVid_tbucket)
+            thisDay_worldCam_aggregate.save(os.path.join(world_folder, '%s_meanWorldCam_aggregate.npz' % (this_day_date)))
             logging.info('Saving daily mean raw live stim videos...')
-            print('Calculating mean raw live stim videos for %s' % (this_day_date))
-            save_daily_rawLiveStim_meanLums(thisDay_meanRawLiveVid, this_day_date, world_folder)
+            print('Saving daily mean raw live stim videos...')
+            thisDay_rawLiveVid_aggregate.save(os.path.join(world_folder, '%s_meanRawLiveStim_aggregate.npz' % (this_day_date)))
+            memory_budget.checkpoint('%s daily aggregates' % (this_day_date), thisDay_worldCam_aggregate=thisDay_worldCam_aggregate, thisDay_rawLiveVid_aggregate=thisDay_rawLiveVid_aggregate)
+            del thisDay_worldCam_aggregate, thisDay_rawLiveVid_aggregate
             ####################################################
             # report progress and update already_extracted_daily
             ####################################################
@@ -676,19 +622,23 @@ if __name__=='__main__':
             ###################################################
             # delete temporary file with unzipped data contents
             ###################################################
-            logging.INFO("Deleting temp folder of unzipped data...")
+            logging.info("Deleting temp folder of unzipped data...")
             shutil.rmtree(day_folder)
-            logging.INFO("Delete successful!")
+            logging.info("Delete successful!")
+            if work_queue is not None:
+                work_queue.complete(item[:-4], status='extracted')
         else:
             logging.warning("Could not unzip data folder for day %s" % (this_day_date))
             invalid_zipped.append(this_day_date)
             logging.warning("Days that cannot be unzipped: %s" % (invalid_zipped))
+            if work_queue is not None:
+                work_queue.fail(item[:-4], 'could not unzip')
         #############################################
         # check if this was the last day in the month
         #############################################
         this_day_date = item.split('_')[1][:-4]
         item_year_month = this_day_date[:7]
-        if this_day_date in last_day_each_month:
+        if work_queue is None and this_day_date in last_day_each_month:
             ##################################################
             # build monthly mean worldCam and rawLive vid data
             ##################################################
@@ -708,7 +658,7 @@ if __name__=='__main__':
             this_month_extracted = fnmatch.filter(already_extracted_daily, 'SurprisingMinds_' + item_year_month + '*')
             for i, day_extracted in enumerate(this_month_extracted):
                 day_extracted_files = os.listdir(os.path.join(analysed_drive, day_extracted, 'Analysis', 'world'))
-                if len(day_extracted_files) != 12:
+                if len(day_extracted_files) != 2:
                     this_month_extracted.pop(i)
             this_month_data = fnmatch.filter(zipped_data, 'SurprisingMinds_' + item_year_month + '*')
             this_month_invalid = fnmatch.filter(invalid_zipped, item_year_month)
@@ -721,39 +671,50 @@ if __name__=='__main__':
             ##################################################################
             logging.info('This month extraction completed: %s' % (this_month_extracted))
             print('This month extraction completed: %s' % (this_month_extracted))
-            # load daily mean files and organize by worldCam/rawLiveStim and by stim
-            thisMonth_worldCam = {key:{'Vid Count':0} for key in stim_vids}
-            thisMonth_rawLiveStim = {key:{'Vid Count':0} for key in stim_vids}
-            for day_extracted in this_month_extracted:
-                daily_mean_files = glob.glob(analysed_drive + os.sep + day_extracted + os.sep + 'Analysis' + os.sep + 'world' + os.sep + '*.npy')
-                extract_daily_means_and_add_to_worldCam_or_rawLiveStim(daily_mean_files, thisMonth_worldCam, thisMonth_rawLiveStim)
-            # create folder for this month mean files
-            monthly_mean_folder = analysed_drive + os.sep + 'MeanStimuli_' + item_year_month
-            if not os.path.exists(monthly_mean_folder):
-                os.makedirs(monthly_mean_folder)
-            # take weighted mean at each timebucket and save as monthly mean intermediate binary file
-            logging.info('Saving monthly weighted mean of worldCam for %s...'%(item_year_month))
-            print('Saving monthly weighted mean of worldCam for %s...'%(item_year_month))
-            save_monthly_weighted_meanStim(thisMonth_worldCam, 'meanWorldCam')
-            logging.info('Saving monthly weighted mean of rawLive for %s...'%(item_year_month))
-            print('Saving monthly weighted mean of rawLive for %s...'%(item_year_month))
-            save_monthly_weighted_meanStim(thisMonth_rawLiveStim, 'meanRawLiveStim')
+            # merge daily worldCam and rawLiveStim aggregates into monthly aggregate files, then empty the daily world folders
+            consolidate_month(this_month_extracted, item_year_month, memory_budget)
             # update list of already extracted months
-            logging.INFO("Updating list of extracted months...")
+            logging.info("Updating list of extracted months...")
             analysed_folders = sorted(os.listdir(analysed_drive))
             monthly_extracted_data = fnmatch.filter(analysed_folders, 'MeanStimuli_*')
             extracted_months = [item.split('_')[1] for item in monthly_extracted_data]
-            # delete daily mean intermediate files
-            for day_extracted in this_month_extracted:
-                daily_mean_folder = os.path.join(analysed_drive, day_extracted, 'Analysis', 'world')
-                logging.INFO("Deleting daily mean worldCam and rawStim video files for %s..." % (day_extracted.split('_')[1]))
-                shutil.rmtree(daily_mean_folder)
-                logging.INFO("Delete successful!")
-                logging.INFO("Making empty 'world' folder for %s..." % (day_extracted.split('_')[1]))
-                os.makedirs(daily_mean_folder)
-            logging.info("Finished averaging world video frames for %s!" % (item_year_month))
-            print("Finished averaging world video frames for %s!" % (item_year_month))
+    if work_queue is not None:
+        ##################################################
+        # build monthly mean worldCam and rawLive vid data of the queue
+        ##################################################
+        # a month is ready when every one of its days is done or given up (or was extracted before the queue was started)
+        month_days = {}
+        for item in zipped_data:
+            month_days.setdefault(item.split('_')[1][:7], []).append(item[:-4])
+        months_to_consolidate = ['MeanStimuli_' + year_month for year_month in sorted(month_days) if year_month not in extracted_months]
+        def month_ready(month_task):
+            return all(day not in queued_days or work_queue.is_done(day) or work_queue.is_given_up(day) for day in month_days[month_task.split('_')[1]])
+        for month_task in work_queue.claimed(months_to_consolidate, ready=month_ready):
+            item_year_month = month_task.split('_')[1]
+            # days with both daily aggregates saved (days without valid trials have none)
+            this_month_extracted = []
+            for day in month_days[item_year_month]:
+                daily_mean_folder = os.path.join(analysed_drive, day, 'Analysis', 'world')
+                if os.path.exists(daily_mean_folder) and len(os.listdir(daily_mean_folder)) == 2:
+                    this_month_extracted.append(day)
+            if this_month_extracted:
+                logging.info('This month extraction completed: %s' % (this_month_extracted))
+                print('This month extraction completed: %s' % (this_month_extracted))
+                consolidate_month(this_month_extracted, item_year_month, memory_budget)
+            else:
+                logging.info("No valid trials collected during %s" % (item_year_month))
+                print("No valid trials collected during %s" % (item_year_month))
+            work_queue.complete(month_task, days=len(this_month_extracted))
 
     logging.info("Completed world camera frame extraction and raw live stimuli creation on all data folders in this drive!")
     print("Completed world camera frame extraction and raw live stimuli creation on all data folders in this drive!")
+    ###################################
+    # MEMORY REPORT
+    ###################################
+    if not os.path.exists(os.path.dirname(memory_report_path)):
+        os.makedirs(os.path.dirname(memory_report_path))
+    for line in format_report(memory_budget.save(memory_report_path)):
+        logging.info(line)
+        print(line)
+    memory_budget.close()
 #FIN
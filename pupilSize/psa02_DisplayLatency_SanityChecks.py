@@ -3,15 +3,17 @@
 # saves sanity check mean world cam video for each stimulus type
 # measures display latency (lag between when bonsai tells a frame to display and when it actually displays)
 # output display latency and sanity check plots/videos
-# NOTE: this script uses ImageMagick to easily install ffmpeg onto Windows 10 (https://www.imagemagick.org/script/download.php)
 # NOTE: in command line run with optional tags 
 #       1) '--a debug' to use only a subset of pupil location/size data
 #       2) '--a vid_output' to generate sanity check mean world cam videos
 #       3) '--a MOI' to find moments of interest in the mean world cam videos
 #       4) '--loc *' to run with various root data locations (see first function below)
+#       5) '--vid_scale N' to upscale sanity check mean world cam videos by an integer factor
+#       6) '--vid_normalize_contrast' to stretch mean world cam video contrast to the full 8-bit range
+#       7) '--memory_budget MB' to load world cam keyframes one stimulus at a time when all stimuli would not fit (default: 80% of available memory)
+#       8) '--trace_memory' to name the source lines holding the most memory in the memory report (tracemalloc, slower)
 ### --------------------------------------------------------------------------- ###
 import logging
-import pdb
 import os
 import glob
 import datetime
@@ -21,23 +23,16 @@ import itertools
 import csv
 import fnmatch
 import numpy as np
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from scipy import stats
 import argparse
-from IPython import embed
+# make the shared surprisingMinds package (in the repo root) importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from surprisingMinds.weightedMeanAggregates import WeightedMeanAggregate, load_monthly_aggregate
+from surprisingMinds.memoryBudget import MemoryBudget, format_report, MB
 ###################################
 # SET CURRENT WORKING DIRECTORY
 ###################################
 current_working_directory = os.getcwd()
 ###################################
-# SCRIPT LOGGER
-###################################
-# grab today's date
-now = datetime.datetime.now()
-logging.basicConfig(filename="psa02_DisplayLatency_SanityChecks" + now.strftime("%Y-%m-%d_%H-%M-%S") + ".log", filemode='w', level=logging.INFO)
-###################################
 # FUNCTIONS
 ###################################
 
@@ -71,44 +66,37 @@ def load_data(location='laptop'):
     return root_folder, plots_folder, monthly_mean_lums_folders, output_folders
 
 ##########################################################
-def extract_stim_data(stim_data_array, world_or_raw, stim_data_dict):
-    for row in stim_data_array:
-        timebucket = row[0]
-        weight = row[1]
-        mean_data = row[2]
-        this_tb_weighted_data = weight*mean_data
-        if world_or_raw=='world':
-            data_type = 'weighted keyframes'
-        elif world_or_raw=='raw':
-            data_type = 'weighted luminance'
-        else: 
-            print('Invalid stimulus data type! Must be world or raw.')
-            logging.warning('Invalid stimulus data type! Must be world or raw.')
-        if timebucket in stim_data_dict.keys():
-            stim_data_dict[timebucket][data_type].append(this_tb_weighted_data)
-            stim_data_dict[timebucket]['weights'].append(weight)
-        else:
-            stim_data_dict[timebucket] = {data_type:[this_tb_weighted_data], 'weights':[weight]}
+def keyframe_fill_index(ordered_keyframes, full_length_this_stim):
+    # for each world cam timebucket, index of the keyframe on display (forward filled across gaps between keyframes)
+    # -1 before the first keyframe
+    # when the first keyframe is not timebucket 0, all frames sit one timebucket earlier (same as the original gap filling)
+    offset = 0 if ordered_keyframes[0]==0 else 1
+    num_timebuckets = max(ordered_keyframes[-1]+1, full_length_this_stim+1) - offset
+    keyframe_index = np.full(num_timebuckets, -1)
+    keyframe_index[ordered_keyframes-offset] = np.arange(len(ordered_keyframes))
+    return np.maximum.accumulate(keyframe_index)
+
+def weighted_mean_world_frames(world_stim, timebuckets):
+    # gather weighted mean frames for the given timebuckets through the keyframe index, nan frames before the first keyframe
+    keyframe_index = world_stim['keyframe index'][timebuckets]
+    mean_frames = world_stim['keyframes, weighted sum'][keyframe_index]/world_stim['summed weights'][keyframe_index][..., np.newaxis]
+    mean_frames[keyframe_index<0] = np.nan
+    return mean_frames
 
-def calculate_weighted_sums(all_weighted_stim_data_dict, world_or_raw):
-    weighted_sums_stim_dict = {}
-    for stim in all_weighted_stim_data_dict.keys():
-        weighted_sums_stim_dict[stim] = {}
-        for timebucket in sorted(all_weighted_stim_data_dict[stim].keys()):
-            if world_or_raw=='world':
-                this_tb_weighted_sum = np.sum(np.array(all_weighted_stim_data_dict[stim][timebucket]['weighted keyframes']), axis=0)
-                weighted_sum_key = 'keyframe, weighted sum'
-            elif world_or_raw=='raw':
-                this_tb_weighted_sum = np.sum(all_weighted_stim_data_dict[stim][timebucket]['weighted luminance'])
-                weighted_sum_key = 'luminance, weighted sum'
-            else:
-                print('Invalid stimulus data type! Must be world or raw.')
-                logging.warning('Invalid stimulus data type! Must be world or raw.')
-            this_tb_weights_sum = np.sum(all_weighted_stim_data_dict[stim][timebucket]['weights'])
-            weighted_sums_stim_dict[stim][timebucket] = {weighted_sum_key:this_tb_weighted_sum, 'summed weight':this_tb_weights_sum}
-    return weighted_sums_stim_dict
+def weighted_mean_world_luminance(world_stim):
+    # weighted mean luminance of each keyframe, gathered for every timebucket
+    keyframes_mean_lum = world_stim['keyframes, weighted sum'].sum(axis=1)/world_stim['summed weights']
+    mean_lum = keyframes_mean_lum[world_stim['keyframe index']]
+    mean_lum[world_stim['keyframe index']<0] = np.nan
+    return mean_lum
+
+def display_mean_world_vid_frame(world_stim_dict, stim_num, timebucket):
+    import matplotlib.pyplot as plt
+    plt.imshow(np.reshape(weighted_mean_world_frames(world_stim_dict[stim_num], timebucket), (120,160)))
+    plt.show()
 
 def sanity_check_world_v_rawLive(world_dict, worldFull_or_worldCropped, raw_dict, timebucket_size, save_folder):
+    import matplotlib.pyplot as plt
     for stim in world_dict.keys():
         if worldFull_or_worldCropped == 'full':
             world_label = 'world (full)'
@@ -131,57 +119,66 @@ def sanity_check_world_v_rawLive(world_dict, worldFull_or_worldCropped, raw_dict
         plt.savefig(figPath)
         plt.close()
 
-def sanity_check_mean_world_vid(full_world_cam_dict, world_downsample_ms, original_sample_rate_ms, save_folder):
+def mean_world_vid_frames(world_stim, tbs_to_sample, frame_shape=(120,160), scale=1, normalize_contrast=False):
+    import cv2
+    # generate 8-bit mean world cam frames one at a time from the keyframe weighted sums
+    # contrast normalization stretches the range of all keyframe means of this stim to 0-255
+    if normalize_contrast:
+        lum_min = np.min(world_stim['keyframes, weighted sum'].min(axis=1)/world_stim['summed weights'])
+        lum_max = np.max(world_stim['keyframes, weighted sum'].max(axis=1)/world_stim['summed weights'])
+        lum_range = max(lum_max - lum_min, 1e-6)
+    for tb in tbs_to_sample:
+        frame = np.reshape(weighted_mean_world_frames(world_stim, tb), frame_shape)
+        if normalize_contrast:
+            frame = (frame - lum_min)*(255.0/lum_range)
+        frame = np.clip(np.nan_to_num(frame), 0, 255).astype(np.uint8)
+        if scale != 1:
+            frame = cv2.resize(frame, (frame_shape[1]*scale, frame_shape[0]*scale), interpolation=cv2.INTER_NEAREST)
+        yield frame
+
+def sanity_check_mean_world_vid(full_world_cam_dict, world_downsample_ms, original_sample_rate_ms, save_folder, scale=1, normalize_contrast=False):
+    import cv2
     fps_rate = int(1000/world_downsample_ms)
     world_cam_downsample_mult = int(world_downsample_ms/original_sample_rate_ms)
+    frame_shape = (120,160)
     for stim in full_world_cam_dict.keys():
-        tbs_to_sample = np.arange(0, len(full_world_cam_dict[stim]['all frames, weighted sum']), world_cam_downsample_mult)
-        downsampled_mean_frames = []
-        for current_tb in tbs_to_sample:
-            this_mean_frame = full_world_cam_dict[stim]['all frames, weighted sum'][current_tb]/full_world_cam_dict[stim]['weights'][current_tb]
-            downsampled_mean_frames.append(this_mean_frame)
-        # reshape into original world cam dimensions
-        downsampled_mean_frames_reshaped = []
-        for frame in downsampled_mean_frames:
-            reshaped_frame = np.reshape(frame,(120,160))
-            downsampled_mean_frames_reshaped.append(reshaped_frame)
-        downsampled_mean_frames_reshaped = np.array(downsampled_mean_frames_reshaped)
-        # save as mp4 video file
+        tbs_to_sample = np.arange(0, len(full_world_cam_dict[stim]['keyframe index']), world_cam_downsample_mult)
+        # save as mp4 video file, streaming one mean frame at a time into the encoder
         write_path = os.path.join(save_folder, 'Stim%d_MeanWorldCam.mp4'%(stim))
-        end_tbucket = len(downsampled_mean_frames_reshaped)
-        # temporarily switch matplotlib backend in order to write video
-        plt.switch_backend("Agg")
-        # Set up formatting for the movie files
-        Writer = animation.writers['ffmpeg']
-        FF_writer = animation.FFMpegWriter(fps=fps_rate, codec='h264', metadata=dict(artist='Danbee Kim', album='Surprising Minds'))
-        print('Drawing frames...')
-        fig = plt.figure()
-        i = 0
-        im = plt.imshow(downsampled_mean_frames_reshaped[i], cmap='gray', animated=True)
-        def updatefig(*args):
-            global i
-            if (i<end_tbucket-1):
-                i += 1
-            else:
-                i = 0
-            im.set_array(downsampled_mean_frames_reshaped[i])
-            return im,
-        ani = animation.FuncAnimation(fig, updatefig, frames=len(downsampled_mean_frames_reshaped), interval=world_downsample_ms, blit=True)
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        video_writer = cv2.VideoWriter(write_path, fourcc, fps_rate, (frame_shape[1]*scale, frame_shape[0]*scale), False)
+        if not video_writer.isOpened():
+            print('Could not open video writer for {path}'.format(path=write_path))
+            logging.warning('Could not open video writer for {path}'.format(path=write_path))
+            continue
         print("Writing average world video frames to {path}...".format(path=write_path))
-        ani.save(write_path, writer=FF_writer)
-        plt.close(fig)
+        for frame in mean_world_vid_frames(full_world_cam_dict[stim], tbs_to_sample, frame_shape, scale, normalize_contrast):
+            video_writer.write(frame)
+        video_writer.release()
         print("Finished writing!")
-        # restore default matplotlib backend
-        plt.switch_backend('TkAgg')
 
 ##########################################################
 # BEGIN SCRIPT
 ##########################################################
 if __name__=='__main__':
+    import matplotlib.pyplot as plt
+    ###################################
+    # SCRIPT LOGGER
+    ###################################
+    # grab today's date
+    now = datetime.datetime.now()
+    logging.basicConfig(filename="psa02_DisplayLatency_SanityChecks" + now.strftime("%Y-%m-%d_%H-%M-%S") + ".log", filemode='w', level=logging.INFO)
     parser = argparse.ArgumentParser()
     parser.add_argument("--a", nargs='?', default="no_vid_output")
     parser.add_argument("--loc", nargs='?', default='laptop')
+    parser.add_argument("--vid_scale", nargs='?', type=int, default=1)
+    parser.add_argument("--vid_normalize_contrast", action='store_true')
+    parser.add_argument("--memory_budget", type=float, default=None)
+    parser.add_argument("--trace_memory", action='store_true', help="Trace python allocations with tracemalloc, so the memory report names the source lines holding the most memory (slower)")
     args = parser.parse_args()
+    # track peak memory and switch to loading one stimulus at a time when the full dataset would not fit
+    memory_budget = MemoryBudget('psa02', args.memory_budget, trace=args.trace_memory)
+    memory_report_path = os.path.join(current_working_directory, "instrumentation", "psa02Memory_" + now.strftime("%Y-%m-%d_%H-%M-%S") + ".json")
     ###################################
     # SOURCE DATA AND OUTPUT FILE LOCATIONS 
     ###################################
@@ -209,125 +206,98 @@ if __name__=='__main__':
     stim_float_to_name = {24.0: "Stim24", 25.0: "Stim25", 26.0: "Stim26", 27.0: "Stim27", 28.0: "Stim28", 29.0: "Stim29"}
     phase_names = ['calib', 'octo', 'unique1', 'unique2', 'unique3', 'unique4', 'unique5', 'unique6']
     ###############################################################
-    # Load mean monthly raw live stim and world cam luminance files
-    # extract monthly mean world cam and raw live stim data (4ms resolution)
+    # Load mean monthly raw live stim luminance files
+    # merge monthly aggregates into full dataset aggregates (4ms resolution)
     ###############################################################
-    # world cam data structure
-    all_weighted_world_keyFrames = {key:{} for key in stim_vids}
-    # raw live stim data structure
-    all_weighted_rawLive_timebuckets = {key:{} for key in stim_vids}
+    all_rawLive_timebuckets = WeightedMeanAggregate()
     # collect length of each stimulus type in 4ms resolution
     supersampled_length_all_stims = {key:[] for key in stim_vids}
-    # extract raw live stim and world cam data
     for monthly_mean_folder in monthly_mean_lums_folders:
-        raw_live_stim_files = glob.glob(root_folder + os.sep + monthly_mean_folder + os.sep + '*_meanRawLiveStim_*.npy')
-        world_cam_files = glob.glob(root_folder + os.sep + monthly_mean_folder + os.sep + '*_meanWorldCam_*.npy')
-        # extract world cam data
-        for world_cam in world_cam_files:
-            stim_type = stim_name_to_float[os.path.basename(world_cam).split('_')[1]]
-            vid_count = float(os.path.basename(world_cam).split('_')[-1][:-8])
-            world_cam_frames = np.load(world_cam)
-            extract_stim_data(world_cam_frames, 'world', all_weighted_world_keyFrames[stim_type])
-        # extract raw live data
-        for raw_live_stim in raw_live_stim_files:
-            stim_type = stim_name_to_float[os.path.basename(raw_live_stim).split('_')[1]]
-            vid_count = float(os.path.basename(raw_live_stim).split('_')[-1][:-8])
-            raw_live_array = np.load(raw_live_stim)
-            supersampled_length_all_stims[stim_type].append(len(raw_live_array))
-            extract_stim_data(raw_live_array, 'raw', all_weighted_rawLive_timebuckets[stim_type])
-    ########################################################
-    # Calculate full dataset mean world cam for each stimulus
-    ########################################################
-    logging.info('Calculating full dataset mean world camera for each unique stimulus...')
-    print('Calculating full dataset mean world camera for each unique stimulus...')
-    weighted_sums_world_keyFrames = calculate_weighted_sums(all_weighted_world_keyFrames, 'world')
-    # Fill in gaps between keyframes in world cam
-    weighted_sums_world_all_frames = {key:{} for key in stim_vids}
-    for stim in weighted_sums_world_keyFrames.keys():
-        ordered_keyframes = sorted(weighted_sums_world_keyFrames[stim].keys())
-        this_stim_all_weighted_frames = []
-        this_stim_all_weights = []
-        for i, keyframe in enumerate(ordered_keyframes):
-            if i==0 and keyframe==0:
-                this_stim_all_weighted_frames.append(weighted_sums_world_keyFrames[stim][keyframe]['keyframe, weighted sum'])
-                this_stim_all_weights.append(weighted_sums_world_keyFrames[stim][keyframe]['summed weight'])
-            elif i==0 and keyframe!=0:
-                for frame in range(keyframe-1):
-                    this_stim_all_weighted_frames.append(np.nan)
-                    this_stim_all_weights.append(np.nan)
-                this_stim_all_weighted_frames.append(weighted_sums_world_keyFrames[stim][keyframe]['keyframe, weighted sum'])
-                this_stim_all_weights.append(weighted_sums_world_keyFrames[stim][keyframe]['summed weight'])
-            else:
-                prev_keyframe = ordered_keyframes[i-1]
-                if keyframe - prev_keyframe > 1:
-                    for frame in range(prev_keyframe, keyframe-1):
-                        this_stim_all_weighted_frames.append(weighted_sums_world_keyFrames[stim][prev_keyframe]['keyframe, weighted sum'])
-                        this_stim_all_weights.append(weighted_sums_world_keyFrames[stim][prev_keyframe]['summed weight'])
-                this_stim_all_weighted_frames.append(weighted_sums_world_keyFrames[stim][keyframe]['keyframe, weighted sum'])
-                this_stim_all_weights.append(weighted_sums_world_keyFrames[stim][keyframe]['summed weight'])
-        full_length_this_stim = np.min(supersampled_length_all_stims[stim])
-        if ordered_keyframes[-1] < full_length_this_stim:
-            for frame in range(ordered_keyframes[-1], full_length_this_stim):
-                this_stim_all_weighted_frames.append(weighted_sums_world_keyFrames[stim][ordered_keyframes[-1]]['keyframe, weighted sum'])
-                this_stim_all_weights.append(weighted_sums_world_keyFrames[stim][ordered_keyframes[-1]]['summed weight'])
-        weighted_sums_world_all_frames[stim] = {'all frames, weighted sum':this_stim_all_weighted_frames, 'weights':this_stim_all_weights}
-    # Calculate weighted mean frame and weighted mean luminance for each world cam timebucket
-    world_all_weighted_mean_frames = {key:None for key in stim_vids}
+        raw_live_month = load_monthly_aggregate(os.path.join(root_folder, monthly_mean_folder), 'meanRawLiveStim')
+        for stim_type in raw_live_month.stims():
+            supersampled_length_all_stims[stim_type].append(len(raw_live_month.weighted_mean(stim_type)[0]))
+        all_rawLive_timebuckets.update(raw_live_month)
+    ###############################################################
+    # Load mean monthly world cam keyframes, all stimuli at once if they fit in the memory budget, otherwise one stimulus at a time
+    # (aggregates are saved uncompressed, so their files are as large as their keyframes in memory)
+    ###############################################################
+    world_cam_files = []
+    for monthly_mean_folder in monthly_mean_lums_folders:
+        world_cam_files.extend(glob.glob(os.path.join(root_folder, monthly_mean_folder, '*_meanWorldCam_*')))
+    # merging a month into the full dataset holds the merged keyframes plus the month being added
+    projected_world_cam_mb = 2*sum(os.path.getsize(world_cam_file) for world_cam_file in world_cam_files)/MB
+    if memory_budget.fits(projected_world_cam_mb, 'full dataset mean world cam'):
+        stim_chunks = [stim_vids]
+    else:
+        stim_chunks = [[stim] for stim in stim_vids]
+        logging.info('Loading world cam keyframes one stimulus at a time...')
+        print('Loading world cam keyframes one stimulus at a time...')
     world_all_weighted_mean_luminance = {key:None for key in stim_vids}
-    for stim in weighted_sums_world_all_frames.keys():
-        this_stim_weighted_mean_frames = []
-        this_stim_weighted_mean_lum = []
-        for tb, summed_frame in enumerate(weighted_sums_world_all_frames[stim]['all frames, weighted sum']):
-            this_tb_weighted_mean_frame = summed_frame/weighted_sums_world_all_frames[stim]['weights'][tb]
-            this_stim_weighted_mean_frames.append(this_tb_weighted_mean_frame)
-            this_tb_weighted_mean_luminance = np.sum(this_tb_weighted_mean_frame)
-            this_stim_weighted_mean_lum.append(this_tb_weighted_mean_luminance)
-        world_all_weighted_mean_frames[stim] = np.array(this_stim_weighted_mean_frames)
-        world_all_weighted_mean_luminance[stim] = np.array(this_stim_weighted_mean_lum)
-    ########################################################
-    # Find timebuckets marking start and end of each phase
-    # UNDER CONSTRUCTION
-    ########################################################
+    for stim_chunk in stim_chunks:
+        all_world_keyFrames = WeightedMeanAggregate()
+        for monthly_mean_folder in monthly_mean_lums_folders:
+            all_world_keyFrames.update(load_monthly_aggregate(os.path.join(root_folder, monthly_mean_folder), 'meanWorldCam', stim_chunk))
+        ########################################################
+        # Calculate full dataset mean world cam for each stimulus
+        ########################################################
+        logging.info('Calculating full dataset mean world camera for each unique stimulus...')
+        print('Calculating full dataset mean world camera for each unique stimulus...')
+        # Fill in gaps between keyframes in world cam
+        # each timebucket points at the keyframe on display, mean frames are only computed when gathered
+        weighted_sums_world_all_frames = {key:{} for key in stim_chunk}
+        for stim in all_world_keyFrames.stims():
+            ordered_keyframes = all_world_keyFrames.timebuckets[stim]
+            keyframes_weighted_sum = all_world_keyFrames.weighted_sums[stim]
+            keyframes_summed_weight = all_world_keyFrames.weights[stim]
+            full_length_this_stim = np.min(supersampled_length_all_stims[stim])
+            this_stim_keyframe_index = keyframe_fill_index(ordered_keyframes, full_length_this_stim)
+            weighted_sums_world_all_frames[stim] = {'keyframes, weighted sum':keyframes_weighted_sum, 'summed weights':keyframes_summed_weight, 'keyframe index':this_stim_keyframe_index}
+        # Calculate weighted mean luminance for each world cam timebucket
+        for stim in weighted_sums_world_all_frames.keys():
+            world_all_weighted_mean_luminance[stim] = weighted_mean_world_luminance(weighted_sums_world_all_frames[stim])
+        memory_budget.checkpoint('world cam keyframes of stimuli %s' % (', '.join('%d' % (stim) for stim in stim_chunk)), weighted_sums_world_all_frames=weighted_sums_world_all_frames, all_rawLive_timebuckets=all_rawLive_timebuckets, world_all_weighted_mean_luminance=world_all_weighted_mean_luminance)
+        ########################################################
+        # Find timebuckets marking start and end of each phase
+        # UNDER CONSTRUCTION
+        ########################################################
+        if args.a == 'MOI':
+            for stim in weighted_sums_world_all_frames.keys():
+                for i in range(len(weighted_sums_world_all_frames[stim]['keyframe index'])):
+                    reshaped_frame = np.reshape(weighted_mean_world_frames(weighted_sums_world_all_frames[stim], i), (120,160))
+                    # figure path and title
+                    figPath = os.path.join(mean_world_cam_vids_folder, 'Stim%d_meanWorldCamSanityCheck_tb%06d_4msResolution.png'%(stim, i))
+                    figTitle = 'Stim%d: mean world cam sanity check \n timebucket: %06d'%(stim, i)
+                    plt.figure(figsize=(9, 9), dpi=200)
+                    plt.suptitle(figTitle, fontsize=12, y=0.98)
+                    plt.imshow(reshaped_frame)
+                    plt.savefig(figPath)
+                    plt.close()
+        ########################################################
+        # save full dataset mean world cam video
+        # downsample mean world cam video for 25 fps (one frame every 40 ms)
+        ########################################################
+        if args.a == 'vid_output':
+            logging.info('Saving sanity check videos of mean luminance for world cam...')
+            print('Saving sanity check videos of mean luminance for world cam...')
+            sanity_check_mean_world_vid(weighted_sums_world_all_frames, downsampled_bucket_size_ms, original_bucket_size_in_ms, mean_world_cam_vids_folder, args.vid_scale, args.vid_normalize_contrast)
+        # only the mean luminance of these stimuli is kept once the next chunk is loaded
+        del all_world_keyFrames, weighted_sums_world_all_frames
     if args.a == 'MOI':
-        reshaped_world_all_weighted_mean_frames = {key:None for key in stim_vids}
-        for stim in world_all_weighted_mean_frames.keys():
-            reshaped_frames = []
-            for i, frame in enumerate(world_all_weighted_mean_frames[stim]):
-                reshaped_frame = np.reshape(frame,(120,160))
-                reshaped_frames.append(reshaped_frame)
-                # figure path and title
-                figPath = os.path.join(mean_world_cam_vids_folder, 'Stim%d_meanWorldCamSanityCheck_tb%06d_4msResolution.png'%(stim, i))
-                figTitle = 'Stim%d: mean world cam sanity check \n timebucket: %06d'%(stim, i)
-                plt.figure(figsize=(9, 9), dpi=200)
-                plt.suptitle(figTitle, fontsize=12, y=0.98)
-                plt.imshow(reshaped_frame)
-                plt.savefig(figPath)
-                plt.close()
-                
-            reshaped_world_all_weighted_mean_frames[stim] = np.array(reshaped_frames)
         stim_to_check = input('Which unique stimulus would you like to check for moments of interest?')
         print('Checking %s'%(stim_to_check))
         go_to_timebucket = input('Jump to timebucket:')
+        from IPython import embed
         embed()
 
-def display_mean_world_vid_frame(world_vid_frames_dict, stim_num, timebucket):
-    plt.imshow(world_vid_frames_dict[stim_num][timebucket])
-    plt.show()
-
     ########################################################
     # Calculate full dataset raw live for each stimulus
     ########################################################
     logging.info('Calculating full dataset raw live vid for each unique stimulus...')
     print('Calculating full dataset raw live vid for each unique stimulus...')
-    weighted_sums_raw_timebuckets = calculate_weighted_sums(all_weighted_rawLive_timebuckets, 'raw')
     # Calculate weighted mean luminance for each raw live stim timebucket
     raw_all_weighted_mean_luminance = {key:None for key in stim_vids}
-    for stim in weighted_sums_raw_timebuckets.keys():
-        this_stim_weighted_mean_lum = []
-        for tb in sorted(weighted_sums_raw_timebuckets[stim].keys()):
-            this_tb_weighted_mean_lum = weighted_sums_raw_timebuckets[stim][tb]['luminance, weighted sum']/weighted_sums_raw_timebuckets[stim][tb]['summed weight']
-            this_stim_weighted_mean_lum.append(this_tb_weighted_mean_lum)
-        raw_all_weighted_mean_luminance[stim] = np.array(this_stim_weighted_mean_lum)
+    for stim in all_rawLive_timebuckets.stims():
+        raw_all_weighted_mean_luminance[stim] = all_rawLive_timebuckets.weighted_mean(stim)[1]
     ########################################################
     # Calculate display latency
     # this should be when the mean luminance in world cam drops more than 400,000
@@ -367,17 +337,21 @@ def display_mean_world_vid_frame(world_vid_frames_dict, stim_num, timebucket):
     print('Saving sanity check plots of mean luminance for world cam versus raw live stim...')
     sanity_check_world_v_rawLive(world_all_weighted_mean_luminance_cropped, 'cropped', raw_all_weighted_mean_luminance, original_bucket_size_in_ms, raw_v_world_sanity_check_folder)
     ########################################################
-    # save full dataset mean world cam video
-    # downsample mean world cam video for 25 fps (one frame every 40 ms)
+    # mean world cam videos were saved with each chunk of stimuli
     ########################################################
     if args.a == 'no_vid_output':
         logging.info('No mean world cam video output saved. To save mean world cam video, run with optional input --a vid_output.')
         print('No mean world cam video output saved. To save mean world cam video, run with optional input --a vid_output.')
-    elif args.a == 'vid_output':
-        logging.info('Saving sanity check videos of mean luminance for world cam...')
-        print('Saving sanity check videos of mean luminance for world cam...')
-        sanity_check_mean_world_vid(weighted_sums_world_all_frames, downsampled_bucket_size_ms, original_bucket_size_in_ms, mean_world_cam_vids_folder)
-    else:
+    elif args.a != 'vid_output':
         logging.warning('%s is not a valid optional input to this script! \n Completing script without generating mean world cam video output...' % (args.a))
         print('%s is not a valid optional input to this script! \n Completing script without generating mean world cam video output...' % (args.a))
+    ###################################
+    # MEMORY REPORT
+    ###################################
+    if not os.path.exists(os.path.dirname(memory_report_path)):
+        os.makedirs(os.path.dirname(memory_report_path))
+    for line in format_report(memory_budget.save(memory_report_path)):
+        logging.info(line)
+        print(line)
+    memory_budget.close()
 # FIN
\ No newline at end of file
@@ -8,9 +8,11 @@
 #       1) '--a debug' to use only a subset of pupil location/size data
 #       2) '--a incomplete' to run this script while psa01_MonthlyMeans_WorldCam_RawLiveStim.py is still running
 #       3) '--loc *' to run with various root data locations (see first function below)
+#       4) '--delays N' to fit pupil size vs luminance for delays of 0 to N-1 downsampled timebuckets (default: 25)
+#       5) '--no-save_per_delay' to save the normalized mean pupil sizes only at the best delay of each eye analysis (the ones psa04 loads)
+#       6) '--no-plot_per_delay' to skip the scatter plots of every delay, e.g. for long delay sweeps
 ### --------------------------------------------------------------------------- ###
 import logging
-import pdb
 import os
 import glob
 import datetime
@@ -20,22 +22,17 @@ import itertools
 import csv
 import fnmatch
 import numpy as np
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from scipy import stats
 import argparse
+# make the shared surprisingMinds package (in the repo root) importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from surprisingMinds.weightedMeanAggregates import load_monthly_aggregate
+from surprisingMinds.pupilData import load_daily_pupils, filter_to_nan
+from surprisingMinds.pupilSizeDelays import best_delay_indices
 ###################################
 # SET CURRENT WORKING DIRECTORY
 ###################################
 current_working_directory = os.getcwd()
 ###################################
-# SCRIPT LOGGER
-###################################
-# grab today's date
-now = datetime.datetime.now()
-logging.basicConfig(filename="psa03_PupilSizeVLum_" + now.strftime("%Y-%m-%d_%H-%M-%S") + ".log", filemode='w', level=logging.INFO)
-###################################
 # FUNCTIONS
 ###################################
 
@@ -78,171 +75,11 @@ def load_data(location='laptop'):
     return root_folder, plots_folder, monthly_mean_lums_folders, display_latencies_folder, output_folders
 
 ##########################################################
-def load_daily_pupils(which_eye, day_csv_folder_path, max_no_of_buckets, original_bucket_size, new_bucket_size, display_latency_dict):
-    if (new_bucket_size % original_bucket_size == 0):
-        new_sample_rate = int(new_bucket_size/original_bucket_size)
-        max_no_of_buckets = int(max_no_of_buckets)
-        #print("New bucket window = {size}, need to average every {sample_rate} buckets".format(size=new_bucket_size, sample_rate=new_sample_rate))
-        # List all csv trial files
-        trial_files = glob.glob(day_csv_folder_path + os.sep + which_eye + "*.csv")
-        num_trials = len(trial_files)
-        good_trials = num_trials
-        # contours
-        data_contours_X = np.empty((num_trials, max_no_of_buckets+1))
-        data_contours_X[:] = -6
-        data_contours_Y = np.empty((num_trials, max_no_of_buckets+1))
-        data_contours_Y[:] = -6
-        data_contours = np.empty((num_trials, max_no_of_buckets+1))
-        data_contours[:] = -6
-        # circles
-        data_circles_X = np.empty((num_trials, max_no_of_buckets+1))
-        data_circles_X[:] = -6
-        data_circles_Y = np.empty((num_trials, max_no_of_buckets+1))
-        data_circles_Y[:] = -6
-        data_circles = np.empty((num_trials, max_no_of_buckets+1))
-        data_circles[:] = -6
-        # iterate through trials
-        index = 0
-        for trial_file in trial_files:
-            trial_name = trial_file.split(os.sep)[-1]
-            trial_stimulus = trial_name.split("_")[1]
-            trial_stim_number = np.float(trial_stimulus[-2:])
-            trial = np.genfromtxt(trial_file, dtype=np.float, delimiter=",")
-            # crop out display latency from beginning of trial
-            this_trial_display_latency = int(display_latency_dict[trial_stim_number])
-            trial = trial[this_trial_display_latency:]
-            # if there are too many -5 rows (frames) in a row, don't analyse this trial
-            bad_frame_count = []
-            for frame in trial:
-                if frame[0]==-5:
-                    bad_frame_count.append(1)
-                else:
-                    bad_frame_count.append(0)
-            clusters =  [(x[0], len(list(x[1]))) for x in itertools.groupby(bad_frame_count)]
-            longest_cluster = 0
-            for cluster in clusters:
-                if cluster[0] == 1 and cluster[1]>longest_cluster:
-                    longest_cluster = cluster[1]
-            #print("For trial {name}, the longest cluster is {length}".format(name=trial_name, length=longest_cluster))
-            if longest_cluster<100:
-                no_of_samples = math.ceil(len(trial)/new_sample_rate)
-                this_trial_contours_X = []
-                this_trial_contours_Y = []
-                this_trial_contours = []
-                this_trial_circles_X = []
-                this_trial_circles_Y = []
-                this_trial_circles = []
-                # loop through the trial at given sample rate
-                for sample in range(no_of_samples):
-                    start = sample * new_sample_rate
-                    end = (sample * new_sample_rate) + (new_sample_rate - 1)
-                    this_slice = trial[start:end]
-                    for line in this_slice:
-                        if (line<0).any():
-                            line[:] = np.nan
-                        if (line>15000).any():
-                            line[:] = np.nan
-                    # extract pupil sizes and locations from valid time buckets
-                    this_slice_contours_X = []
-                    this_slice_contours_Y = []
-                    this_slice_contours = []
-                    this_slice_circles_X = []
-                    this_slice_circles_Y = []
-                    this_slice_circles = []
-                    for frame in this_slice:
-                        # contour x,y
-                        ## DON'T PAIR X-Y YET
-                        this_slice_contours_X.append(frame[0])
-                        this_slice_contours_Y.append(frame[1])
-                        # contour area
-                        this_slice_contours.append(frame[2])
-                        # circles x,y
-                        ## DON'T PAIR X-Y YET
-                        this_slice_circles_X.append(frame[3])
-                        this_slice_circles_Y.append(frame[4])
-                        # circles area
-                        this_slice_circles.append(frame[5])
-                    # average the pupil size and movement in this sample slice
-                    this_slice_avg_contour_X = np.nanmean(this_slice_contours_X)
-                    this_slice_avg_contour_Y = np.nanmean(this_slice_contours_Y)
-                    this_slice_avg_contour = np.nanmean(this_slice_contours)
-                    this_slice_avg_circle_X = np.nanmean(this_slice_circles_X)
-                    this_slice_avg_circle_Y = np.nanmean(this_slice_circles_Y)
-                    this_slice_avg_circle = np.nanmean(this_slice_circles)
-                    # append to list of downsampled pupil sizes and movements
-                    this_trial_contours_X.append(this_slice_avg_contour_X)
-                    this_trial_contours_Y.append(this_slice_avg_contour_Y)
-                    this_trial_contours.append(this_slice_avg_contour)
-                    this_trial_circles_X.append(this_slice_avg_circle_X)
-                    this_trial_circles_Y.append(this_slice_avg_circle_Y)
-                    this_trial_circles.append(this_slice_avg_circle)
-                # Find count of bad measurements
-                bad_count_contours_X = sum(np.isnan(this_trial_contours_X))
-                bad_count_contours_Y = sum(np.isnan(this_trial_contours_Y))
-                bad_count_contours = sum(np.isnan(this_trial_contours))
-                bad_count_circles_X = sum(np.isnan(this_trial_circles_X))
-                bad_count_circles_Y = sum(np.isnan(this_trial_circles_Y))
-                bad_count_circles = sum(np.isnan(this_trial_circles))
-                # if more than half of the trial is NaN, then throw away this trial
-                # otherwise, if it's a good enough trial...
-                bad_threshold = no_of_samples/2
-                if (bad_count_contours_X<bad_threshold):
-                    this_chunk_length = len(this_trial_contours_X)
-                    data_contours_X[index][0:this_chunk_length] = this_trial_contours_X
-                    data_contours_X[index][-1] = trial_stim_number
-                if (bad_count_contours_Y<bad_threshold):
-                    this_chunk_length = len(this_trial_contours_Y)
-                    data_contours_Y[index][0:this_chunk_length] = this_trial_contours_Y
-                    data_contours_Y[index][-1] = trial_stim_number
-                if (bad_count_contours<bad_threshold) or (bad_count_circles<bad_threshold):
-                    this_chunk_length = len(this_trial_contours)
-                    data_contours[index][0:this_chunk_length] = this_trial_contours
-                    data_contours[index][-1] = trial_stim_number
-                if (bad_count_circles_X<bad_threshold):
-                    this_chunk_length = len(this_trial_circles_X)
-                    data_circles_X[index][0:this_chunk_length] = this_trial_circles_X
-                    data_circles_X[index][-1] = trial_stim_number
-                if (bad_count_circles_Y<bad_threshold):
-                    this_chunk_length = len(this_trial_circles_Y)
-                    data_circles_Y[index][0:this_chunk_length] = this_trial_circles_Y
-                    data_circles_Y[index][-1] = trial_stim_number
-                if (bad_count_circles<bad_threshold):
-                    this_chunk_length = len(this_trial_circles)
-                    data_circles[index][0:this_chunk_length] = this_trial_circles
-                    data_circles[index][-1] = trial_stim_number
-                index = index + 1
-            else:
-                #print("Discarding trial {name}".format(name=trial_name))
-                index = index + 1
-                good_trials = good_trials - 1
-        return data_contours_X, data_contours_Y, data_contours, data_circles_X, data_circles_Y, data_circles, num_trials, good_trials
-    else:
-        print('Sample rate must be a multiple of %s'%(original_bucket_size))
-        logging.WARNING('Sample rate must be a multiple of %s'%(original_bucket_size))
-
-def threshold_to_nan(input_array, threshold, upper_or_lower):
-    for index in range(len(input_array)):
-        if upper_or_lower=='upper':
-            if np.isnan(input_array[index])==False and input_array[index]>threshold:
-                input_array[index] = np.nan
-        if upper_or_lower=='lower':
-            if np.isnan(input_array[index])==False and input_array[index]<threshold:
-                input_array[index] = np.nan
-    return input_array
-
-def filter_to_nan(list_of_dicts, upper_threshold, lower_threshold):
-    for dictionary in list_of_dicts:
-        for key in dictionary:
-            for trial in dictionary[key]:
-                trial = threshold_to_nan(trial, upper_threshold, 'upper')
-                trial = threshold_to_nan(trial, lower_threshold, 'lower')
-    return list_of_dicts
-
 def normPupilSizeData(pupilSizeArrays_allStim, eyeAnalysis_name):
     normed_pupils = []
     for i, stim_trials in enumerate(pupilSizeArrays_allStim):
         print('Normalizing trials for %s, unique stim %s'%(eyeAnalysis_name, i+1))
-        looging.INFO('Normalizing trials for %s, unique stim %s'%(eyeAnalysis_name, i+1))
+        logging.info('Normalizing trials for %s, unique stim %s'%(eyeAnalysis_name, i+1))
         thisUnique_normed = []
         for trial in stim_trials:
             trial_median = np.nanmedian(trial)
@@ -316,7 +153,51 @@ def phaseMeans_withDelay(delay_tb, normedPupils_array, calib_len_tb, allunique_l
         unique_means.append(thisUnique_mean)
     return calib_mean, octo_mean, unique_means
 
+def phaseMeans_allDelays(delays_tb, normedPupils_array, calib_len_tb, allunique_lens_tb, octo_len_tb):
+    # same split as phaseMeans_withDelay, for every delay in delays_tb at once
+    # returns (delay x phase x timebucket) array, phases ordered [calib, octo, unique1, ..., unique6], nan-padded to the longest phase
+    delays_tb = np.asarray(delays_tb, dtype=int)
+    phase_lens = [calib_len_tb, octo_len_tb] + list(allunique_lens_tb)
+    max_phase_len = max(phase_lens)
+    trial_len = max([np.shape(uniqueStim)[-1] for uniqueStim in normedPupils_array if len(uniqueStim)>0])
+    octo_offsets = [calib_len_tb+1+uniqueLen_tb+1 for uniqueLen_tb in allunique_lens_tb]
+    padded_len = max(trial_len, max(octo_offsets)+max_phase_len) + np.max(delays_tb) + 1
+    # sum and count valid (non-nan) normed pupil sizes across trials, once per unique stim
+    stim_sums = np.zeros((len(normedPupils_array), padded_len))
+    stim_counts = np.zeros((len(normedPupils_array), padded_len))
+    for i, uniqueStim in enumerate(normedPupils_array):
+        if len(uniqueStim)==0:
+            continue
+        uniqueStim = np.asarray(uniqueStim)
+        valid = np.logical_not(np.isnan(uniqueStim))
+        stim_sums[i, :uniqueStim.shape[-1]] = np.where(valid, uniqueStim, 0).sum(axis=0)
+        stim_counts[i, :uniqueStim.shape[-1]] = valid.sum(axis=0)
+    # lagged views: [stim, start timebucket, timebucket within phase]
+    sum_windows = np.lib.stride_tricks.sliding_window_view(stim_sums, max_phase_len, axis=-1)
+    count_windows = np.lib.stride_tricks.sliding_window_view(stim_counts, max_phase_len, axis=-1)
+    all_stims = np.arange(len(normedPupils_array))[:, np.newaxis]
+    phase_sums = np.zeros((len(delays_tb), len(phase_lens), max_phase_len))
+    phase_counts = np.zeros((len(delays_tb), len(phase_lens), max_phase_len))
+    # calib and octo pool trials from all unique stims, unique phases are kept separate
+    phase_sums[:, 0] = sum_windows[:, delays_tb].sum(axis=0)
+    phase_counts[:, 0] = count_windows[:, delays_tb].sum(axis=0)
+    octo_starts = delays_tb[np.newaxis, :] + np.array(octo_offsets)[:, np.newaxis]
+    phase_sums[:, 1] = sum_windows[all_stims, octo_starts].sum(axis=0)
+    phase_counts[:, 1] = count_windows[all_stims, octo_starts].sum(axis=0)
+    phase_sums[:, 2:] = np.swapaxes(sum_windows[:, delays_tb+calib_len_tb+1], 0, 1)
+    phase_counts[:, 2:] = np.swapaxes(count_windows[:, delays_tb+calib_len_tb+1], 0, 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        phase_means = phase_sums/phase_counts
+    for phase, phase_len in enumerate(phase_lens):
+        phase_means[:, phase, phase_len:] = np.nan
+    return phase_means
+
+def phaseMeans_allDelays_allEyeAnalyses(delays_tb, allEyeAnalyses_normedPupils, calib_len_tb, allunique_lens_tb, octo_len_tb):
+    # returns (eye_analysis x delay x phase x timebucket) array of mean normed pupil sizes, see phaseMeans_allDelays
+    return np.stack([phaseMeans_allDelays(delays_tb, normedPupils_array, calib_len_tb, allunique_lens_tb, octo_len_tb) for normedPupils_array in allEyeAnalyses_normedPupils])
+
 def leastSquares_pupilSize_lum(pupilSize_array, lum_array):
+    from scipy import stats
     # remove tb where pupil sizes are nans
     meanPupil_nonan = pupilSize_array[np.logical_not(np.isnan(pupilSize_array))]
     meanLum_nonan = lum_array[np.logical_not(np.isnan(pupilSize_array))]
@@ -327,18 +208,81 @@ def leastSquares_pupilSize_lum(pupilSize_array, lum_array):
     slope, intercept, rval, pval, stderr = stats.linregress(meanLum_nonan, meanPupil_nonan)
     return slope, intercept, rval, pval, stderr
 
-def LumVsPupilSize_ScatterLinRegress(lum_array, pupilSize_array, phase_name, eyeAnalysis_name, pupilDelay_ms, save_folder):
+# linear regression params, same fields and order as scipy.stats.linregress
+linRegress_dtype = np.dtype([('slope', np.float64), ('intercept', np.float64), ('rvalue', np.float64), ('pvalue', np.float64), ('stderr', np.float64)])
+
+def batched_leastSquares_pupilSize_lum(pupilSize_tensor, lum_tensor):
+    from scipy import stats
+    # least squares regression of pupil size against luminance along the last axis, for every other index at once
+    # pupilSize_tensor and lum_tensor must broadcast, timebuckets where either is nan are left out (shared nan mask)
+    # returns a linRegress_dtype structured array with the broadcast shape minus the last axis
+    lum, pupil = np.broadcast_arrays(np.asarray(lum_tensor, dtype=np.float64), np.asarray(pupilSize_tensor, dtype=np.float64))
+    valid = np.logical_not(np.isnan(lum) | np.isnan(pupil))
+    n = valid.sum(axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        lum_mean = np.where(valid, lum, 0).sum(axis=-1)/n
+        pupil_mean = np.where(valid, pupil, 0).sum(axis=-1)/n
+        # masked sums of squares and cross products, about the means
+        lum_dev = np.where(valid, lum - lum_mean[..., np.newaxis], 0)
+        pupil_dev = np.where(valid, pupil - pupil_mean[..., np.newaxis], 0)
+        ssxm = np.sum(lum_dev*lum_dev, axis=-1)/n
+        ssym = np.sum(pupil_dev*pupil_dev, axis=-1)/n
+        ssxym = np.sum(lum_dev*pupil_dev, axis=-1)/n
+        # r value, 0 (or nan) when either variable is constant
+        rval = np.clip(ssxym/np.sqrt(ssxm*ssym), -1.0, 1.0)
+        constant = (ssxm==0) | (ssym==0)
+        rval[constant] = np.where(ssxym[constant]==0, np.nan, 0.0)
+        slope = ssxym/ssxm
+        intercept = pupil_mean - slope*lum_mean
+        # n-2 degrees of freedom because 2 have been used to estimate the means
+        df = n - 2
+        TINY = 1.0e-20
+        tstat = rval*np.sqrt(df/((1.0 - rval + TINY)*(1.0 + rval + TINY)))
+        pval = 2*stats.t.sf(np.abs(tstat), df)
+        stderr = np.sqrt((1 - rval**2)*ssym/ssxm/df)
+    # two points always fit exactly
+    pval[n==2] = np.where(ssym[n==2]==0, 1.0, 0.0)
+    stderr[n==2] = 0.0
+    linRegress = np.empty(n.shape, dtype=linRegress_dtype)
+    linRegress['slope'] = slope
+    linRegress['intercept'] = intercept
+    linRegress['rvalue'] = rval
+    linRegress['pvalue'] = pval
+    linRegress['stderr'] = stderr
+    for field in linRegress_dtype.names:
+        linRegress[field][n<2] = np.nan
+    return linRegress
+
+def linRegress_allEyeAnalyses_allPhases_allDelays(pupilPhaseMeans_allDelays, lum_allPhases):
+    # pupilPhaseMeans_allDelays: (eye analysis x delay x phase x timebucket), from phaseMeans_allDelays_allEyeAnalyses
+    # lum_allPhases: list of mean luminance arrays, one per phase, in the same phase order
+    # returns linRegress_dtype array indexed by (eye analysis, phase, delay), phases ordered [allPhases, calib, octo, unique1, ..., unique6]
+    num_eyeAnalyses, num_delays, num_phases, max_phase_len = pupilPhaseMeans_allDelays.shape
+    lum_tensor = np.empty((num_phases, max_phase_len))
+    lum_tensor[:] = np.nan
+    for phase, phase_lum in enumerate(lum_allPhases):
+        lum_tensor[phase, :len(phase_lum)] = phase_lum
+    # each phase on its own, then all phases concatenated (nan padding is masked out)
+    linRegress_byPhase = batched_leastSquares_pupilSize_lum(pupilPhaseMeans_allDelays, lum_tensor)
+    linRegress_allPhasesConcat = batched_leastSquares_pupilSize_lum(pupilPhaseMeans_allDelays.reshape(num_eyeAnalyses, num_delays, 1, -1), lum_tensor.reshape(1, -1))
+    linRegress = np.concatenate([linRegress_allPhasesConcat, linRegress_byPhase], axis=2)
+    return np.swapaxes(linRegress, 1, 2)
+
+def LumVsPupilSize_ScatterLinRegress(lum_array, pupilSize_array, phase_name, eyeAnalysis_name, pupilDelay_ms, save_folder, plot=True):
+    import matplotlib.pyplot as plt
     # make sure pupil size and world cam lum arrays are same size
     plotting_numTB = min(len(lum_array), len(pupilSize_array))
     lum_plot = lum_array[:plotting_numTB]
     pupil_plot = pupilSize_array[:plotting_numTB]
     # calculate least squares regression line
     slope, intercept, rval, pval, stderr = leastSquares_pupilSize_lum(pupilSize_array, lum_array)
+    if not plot:
+        return slope, intercept, rval, pval, stderr
     # figure path and title
     figPath = os.path.join(save_folder, '%s_meanLum-mean%s_delay%dms.png'%(phase_name, eyeAnalysis_name, pupilDelay_ms))
     figTitle = 'Mean luminance of world cam vs mean pupil size (%s) during %s, pupil delay = %dms'%(eyeAnalysis_name, phase_name, pupilDelay_ms)
     print('Plotting %s'%(figTitle))
-    logging.INFO('Plotting %s'%(figTitle))
+    logging.info('Plotting %s'%(figTitle))
     # draw scatter plot
     plt.figure(figsize=(9, 9), dpi=200)
     plt.suptitle(figTitle, fontsize=12, y=0.98)
@@ -352,45 +296,35 @@ def LumVsPupilSize_ScatterLinRegress(lum_array, pupilSize_array, phase_name, eye
     plt.close()
     return slope, intercept, rval, pval, stderr
 
-def splitPupils_withDelay_plotScatterLinRegress(delay_tb, downsample_ms, lum_array, pupilSize_array, calib_len_tb, unique_lens_tb, octo_len_tb, eyeAnalysis_name, savePlotsFolder, saveDataFolder):
-    # split normalized pupil size data into trial phases
-    pupil_calib_mean, pupil_octo_mean, pupil_unique_means = phaseMeans_withDelay(delay_tb, pupilSize_array, calib_len_tb, unique_lens_tb, octo_len_tb)
+def splitPupils_withDelay_plotScatterLinRegress(delay_tb, downsample_ms, lum_array, pupilPhaseMeans, phase_lens, eyeAnalysis_name, savePlotsFolder, saveDataFolder, save_phaseMeans=True, plot_scatter=True):
+    # pupilPhaseMeans: (phase x timebucket) mean normed pupil sizes at this delay, from phaseMeans_allDelays
+    pupil_calib_mean, pupil_octo_mean = pupilPhaseMeans[0][:phase_lens[0]], pupilPhaseMeans[1][:phase_lens[1]]
+    pupil_unique_means = [pupilPhaseMeans[2+i][:phase_lens[2+i]] for i in range(6)]
     # save normalized, split and averaged pupil size data as intermediate files
-    ## output path
-    calib_output = saveDataFolder + os.sep + 'meanNormedPupilSize_calib_%dmsDelay_%s.npy'%(delay_tb*downsample_ms,eyeAnalysis_name)
-    octo_output = saveDataFolder + os.sep + 'meanNormedPupilSize_octo_%dmsDelay_%s.npy'%(delay_tb*downsample_ms,eyeAnalysis_name)
-    unique1_output = saveDataFolder + os.sep + 'meanNormedPupilSize_u1_%dmsDelay_%s.npy'%(delay_tb*downsample_ms,eyeAnalysis_name)
-    unique2_output = saveDataFolder + os.sep + 'meanNormedPupilSize_u2_%dmsDelay_%s.npy'%(delay_tb*downsample_ms,eyeAnalysis_name)
-    unique3_output = saveDataFolder + os.sep + 'meanNormedPupilSize_u3_%dmsDelay_%s.npy'%(delay_tb*downsample_ms,eyeAnalysis_name)
-    unique4_output = saveDataFolder + os.sep + 'meanNormedPupilSize_u4_%dmsDelay_%s.npy'%(delay_tb*downsample_ms,eyeAnalysis_name)
-    unique5_output = saveDataFolder + os.sep + 'meanNormedPupilSize_u5_%dmsDelay_%s.npy'%(delay_tb*downsample_ms,eyeAnalysis_name)
-    unique6_output = saveDataFolder + os.sep + 'meanNormedPupilSize_u6_%dmsDelay_%s.npy'%(delay_tb*downsample_ms,eyeAnalysis_name)
-    ## save file
-    np.save(calib_output, pupil_calib_mean)
-    np.save(octo_output, pupil_octo_mean)
-    np.save(unique1_output, pupil_unique_means[0])
-    np.save(unique2_output, pupil_unique_means[1])
-    np.save(unique3_output, pupil_unique_means[2])
-    np.save(unique4_output, pupil_unique_means[3])
-    np.save(unique5_output, pupil_unique_means[4])
-    np.save(unique6_output, pupil_unique_means[5])
+    if save_phaseMeans:
+        phase_file_names = ['calib', 'octo', 'u1', 'u2', 'u3', 'u4', 'u5', 'u6']
+        all_phase_means = [pupil_calib_mean, pupil_octo_mean] + pupil_unique_means
+        for phase_file_name, phase_mean in zip(phase_file_names, all_phase_means):
+            phase_output = saveDataFolder + os.sep + 'meanNormedPupilSize_%s_%dmsDelay_%s.npy'%(phase_file_name, delay_tb*downsample_ms, eyeAnalysis_name)
+            np.save(phase_output, phase_mean)
     # recombine to create a "master" scatter plot with regression
     all_phases_pupil_sizes = np.concatenate((pupil_calib_mean, pupil_octo_mean, pupil_unique_means[0], pupil_unique_means[1], pupil_unique_means[2], pupil_unique_means[3], pupil_unique_means[4], pupil_unique_means[5]), axis=0)
     all_phases_mean_lum = np.concatenate((lum_array[0], lum_array[1], lum_array[2], lum_array[3], lum_array[4], lum_array[5], lum_array[6], lum_array[7]), axis=0)
     # plot scatter plots with regression line
-    slope_allPhases, intercept_allPhases, rval_allPhases, pval_allPhases, stderr_allPhases = LumVsPupilSize_ScatterLinRegress(all_phases_mean_lum, all_phases_pupil_sizes, 'AllPhases', eyeAnalysis_name, delay_tb*downsample_ms, savePlotsFolder)
-    slope_calib, intercept_calib, rval_calib, pval_calib, stderr_calib = LumVsPupilSize_ScatterLinRegress(lum_array[0], pupil_calib_mean, 'calib', eyeAnalysis_name, delay_tb*downsample_ms, savePlotsFolder)
-    slope_octo, intercept_octo, rval_octo, pval_octo, stderr_octo = LumVsPupilSize_ScatterLinRegress(lum_array[1], pupil_octo_mean, 'octo', eyeAnalysis_name, delay_tb*downsample_ms, savePlotsFolder)
-    slope_u1, intercept_u1, rval_u1, pval_u1, stderr_u1 = LumVsPupilSize_ScatterLinRegress(lum_array[2], pupil_unique_means[0], 'unique01', eyeAnalysis_name, delay_tb*downsample_ms, savePlotsFolder)
-    slope_u2, intercept_u2, rval_u2, pval_u2, stderr_u2 = LumVsPupilSize_ScatterLinRegress(lum_array[3], pupil_unique_means[1], 'unique02', eyeAnalysis_name, delay_tb*downsample_ms, savePlotsFolder)
-    slope_u3, intercept_u3, rval_u3, pval_u3, stderr_u3 = LumVsPupilSize_ScatterLinRegress(lum_array[4], pupil_unique_means[2], 'unique03', eyeAnalysis_name, delay_tb*downsample_ms, savePlotsFolder)
-    slope_u4, intercept_u4, rval_u4, pval_u4, stderr_u4 = LumVsPupilSize_ScatterLinRegress(lum_array[5], pupil_unique_means[3], 'unique04', eyeAnalysis_name, delay_tb*downsample_ms, savePlotsFolder)
-    slope_u5, intercept_u5, rval_u5, pval_u5, stderr_u5 = LumVsPupilSize_ScatterLinRegress(lum_array[6], pupil_unique_means[4], 'unique05', eyeAnalysis_name, delay_tb*downsample_ms, savePlotsFolder)
-    slope_u6, intercept_u6, rval_u6, pval_u6, stderr_u6 = LumVsPupilSize_ScatterLinRegress(lum_array[7], pupil_unique_means[5], 'unique06', eyeAnalysis_name, delay_tb*downsample_ms, savePlotsFolder)
+    slope_allPhases, intercept_allPhases, rval_allPhases, pval_allPhases, stderr_allPhases = LumVsPupilSize_ScatterLinRegress(all_phases_mean_lum, all_phases_pupil_sizes, 'AllPhases', eyeAnalysis_name, delay_tb*downsample_ms, savePlotsFolder, plot_scatter)
+    slope_calib, intercept_calib, rval_calib, pval_calib, stderr_calib = LumVsPupilSize_ScatterLinRegress(lum_array[0], pupil_calib_mean, 'calib', eyeAnalysis_name, delay_tb*downsample_ms, savePlotsFolder, plot_scatter)
+    slope_octo, intercept_octo, rval_octo, pval_octo, stderr_octo = LumVsPupilSize_ScatterLinRegress(lum_array[1], pupil_octo_mean, 'octo', eyeAnalysis_name, delay_tb*downsample_ms, savePlotsFolder, plot_scatter)
+    slope_u1, intercept_u1, rval_u1, pval_u1, stderr_u1 = LumVsPupilSize_ScatterLinRegress(lum_array[2], pupil_unique_means[0], 'unique01', eyeAnalysis_name, delay_tb*downsample_ms, savePlotsFolder, plot_scatter)
+    slope_u2, intercept_u2, rval_u2, pval_u2, stderr_u2 = LumVsPupilSize_ScatterLinRegress(lum_array[3], pupil_unique_means[1], 'unique02', eyeAnalysis_name, delay_tb*downsample_ms, savePlotsFolder, plot_scatter)
+    slope_u3, intercept_u3, rval_u3, pval_u3, stderr_u3 = LumVsPupilSize_ScatterLinRegress(lum_array[4], pupil_unique_means[2], 'unique03', eyeAnalysis_name, delay_tb*downsample_ms, savePlotsFolder, plot_scatter)
+    slope_u4, intercept_u4, rval_u4, pval_u4, stderr_u4 = LumVsPupilSize_ScatterLinRegress(lum_array[5], pupil_unique_means[3], 'unique04', eyeAnalysis_name, delay_tb*downsample_ms, savePlotsFolder, plot_scatter)
+    slope_u5, intercept_u5, rval_u5, pval_u5, stderr_u5 = LumVsPupilSize_ScatterLinRegress(lum_array[6], pupil_unique_means[4], 'unique05', eyeAnalysis_name, delay_tb*downsample_ms, savePlotsFolder, plot_scatter)
+    slope_u6, intercept_u6, rval_u6, pval_u6, stderr_u6 = LumVsPupilSize_ScatterLinRegress(lum_array[7], pupil_unique_means[5], 'unique06', eyeAnalysis_name, delay_tb*downsample_ms, savePlotsFolder, plot_scatter)
     # return correlation coefficients
     return [[slope_allPhases, intercept_allPhases, rval_allPhases, pval_allPhases, stderr_allPhases], [slope_calib, intercept_calib, rval_calib, pval_calib, stderr_calib], [slope_octo, intercept_octo, rval_octo, pval_octo, stderr_octo], [slope_u1, intercept_u1, rval_u1, pval_u1, stderr_u1], [slope_u2, intercept_u2, rval_u2, pval_u2, stderr_u2], [slope_u3, intercept_u3, rval_u3, pval_u3, stderr_u3], [slope_u4, intercept_u4, rval_u4, pval_u4, stderr_u4], [slope_u5, intercept_u5, rval_u5, pval_u5, stderr_u5], [slope_u6, intercept_u6, rval_u6, pval_u6, stderr_u6]]
 
 def drawFitScoresVsDelay_full(allPhases_fullLinRegress, num_delays, eyeAnalysis_name, downsample_ms, save_folder):
+    import matplotlib.pyplot as plt
     rvals = []
     for delay in allPhases_fullLinRegress: 
         rvals.append(delay[2])
@@ -402,7 +336,7 @@ def drawFitScoresVsDelay_full(allPhases_fullLinRegress, num_delays, eyeAnalysis_
     figPath = os.path.join(save_folder, 'AllPhases_rValsVsDelays_%s.png'%(eyeAnalysis_name))
     figTitle = 'Correlation coefficients (r val) vs delays in pupil response time \n All Phases, %s; Best delay = %dms (rval = %f)'%(eyeAnalysis_name, best_delay*downsample_ms, best_rval)
     print('Plotting %s'%(figTitle))
-    logging.INFO('Plotting %s'%(figTitle))
+    logging.info('Plotting %s'%(figTitle))
     # draw fit scores vs delay
     plt.figure(dpi=150)
     plt.suptitle(figTitle, fontsize=12, y=0.98)
@@ -416,6 +350,7 @@ def drawFitScoresVsDelay_full(allPhases_fullLinRegress, num_delays, eyeAnalysis_
     plt.close()
 
 def drawFitScoresVsDelay_byPhase(linRegress_allPhases_list, num_delays, phases_strList, eyeAnalysis_name, downsample_ms, save_folder):
+    import matplotlib.pyplot as plt
     for i, phase in enumerate(linRegress_allPhases_list):
         rvals = []
         for delay in phase: 
@@ -428,7 +363,7 @@ def drawFitScoresVsDelay_byPhase(linRegress_allPhases_list, num_delays, phases_s
         figPath = os.path.join(save_folder, '%s_rValsVsDelays_%s.png'%(phases_strList[i], eyeAnalysis_name))
         figTitle = 'Correlation coefficients (r val) vs delays in pupil response time \n Phase: %s; %s; Best delay = %dms (rval = %f)'%(phases_strList[i], eyeAnalysis_name, best_delay*downsample_ms, best_rval)
         print('Plotting %s'%(figTitle))
-        logging.INFO('Plotting %s'%(figTitle))
+        logging.info('Plotting %s'%(figTitle))
         # draw fit scores vs delay
         plt.figure(dpi=150)
         plt.suptitle(figTitle, fontsize=12, y=0.98)
@@ -447,27 +382,27 @@ def worldCam_MOIs_all_stim():
     # For each end moment: [last timebucket when current phase is showing with no overlap from next phase, last timebucket when current phase is showing and may be overlapping with next phase]
     all_avg_world_moments = {}
     # Stimulus 24.0
-    all_avg_world_moments[24.0] = {'please center eyes': [0,0],
-    'do not move your head': [35,51],
-    'upper left dot appears': [1027,1047],
-    'lower right dot appears': [1727,1727],
-    'lower left dot appears': [2391,2391],
-    'upper right dot appears': [3071,3071],
-    'center dot appears': [3751,3751],
-    'calibration end': [],
-    'unique start': [4431,4431],
-    'cat appears': [4615,4615],
-    'front paws fully visible': [4720,4720],
+    all_avg_world_moments[24.0] = {'please center eyes': {0:['2017-10','2018-05']},
+    'do not move your head': {3:['2017-10','2018-05']},
+    'upper left dot appears': {102:['2017-10','2017-11','2018-03']},
+    'lower right dot appears': {170:['2017-10','2018-05']},
+    'lower left dot appears': {238:['2017-10','2018-05']},
+    'upper right dot appears': {306:['2017-10','2018-05']},
+    'center dot appears': {374:['2017-10','2018-05']},
+    'calibration end': {441:['2017-10','2017-11','2018-03']},
+    'unique start': {442:['2017-10','2018-03','2018-05'],443:['2017-11']},
+    'cat appears': {463:['2017-10','2018-01','2018-05'], 464:['2017-11']},
+    'front paws fully visible': {473:['2017-10','2018-01','2018-05'], 474:['2017-11']},
     'front paws first contact with toy': {513:['2017-10'], 514:['2018-05']},
     'cat back paws bounce': {549:['2017-10'],547:['2018-05']},
-    'unique end': [5922,5962],
-    'octo start': [5923,5963],
+    'unique end': {596:['2017-10','2017-11'],598:['2018-03']},
+    'octo start': {595:['2017-10','2018-03'],596:['2017-11']},
     'fish turns': {645:['2017-10','2018-05']},
     'octopus fully decamouflaged': {766:['2018-05'], 767:['2017-10']},
     'camera zooms in on octopus': {860:['2017-10','2018-05']},
     'octopus inks': {882:['2017-10'],883:['2017-11','2018-03']},
     'camera clears ink cloud': {916:['2017-10'],920:['2018-05']},
-    'octo end': [10803,10803]}
+    'octo end': {987:['2017-10'],989:['2017-11'],990:['2018-03']}}
     # Stimulus 25.0
     all_avg_world_moments[25.0] = {'please center eyes': [0,0],
     'do not move your head': [35,51],
@@ -588,9 +523,18 @@ def worldCam_MOIs_all_stim():
 # BEGIN SCRIPT
 ##########################################################
 if __name__=='__main__':
+    ###################################
+    # SCRIPT LOGGER
+    ###################################
+    # grab today's date
+    now = datetime.datetime.now()
+    logging.basicConfig(filename="psa03_PupilSizeVLum_" + now.strftime("%Y-%m-%d_%H-%M-%S") + ".log", filemode='w', level=logging.INFO)
     parser = argparse.ArgumentParser()
     parser.add_argument("--a", nargs='?', default="check_string_for_empty")
     parser.add_argument("--loc", nargs='?', default='laptop')
+    parser.add_argument("--delays", type=int, default=25, help="Number of delays of the pupil response to fit, in downsampled timebuckets (default: 25)")
+    parser.add_argument("--save_per_delay", action=argparse.BooleanOptionalAction, default=True, help="Save the normalized mean pupil sizes of every delay, not only of the best delay of each eye analysis (default: on)")
+    parser.add_argument("--plot_per_delay", action=argparse.BooleanOptionalAction, default=True, help="Draw the luminance vs pupil size scatter plots of every delay (default: on)")
     args = parser.parse_args()
     ###################################
     # SOURCE DATA AND OUTPUT FILE LOCATIONS 
@@ -693,47 +637,24 @@ if __name__=='__main__':
     supersampled_length_all_stims = {key:[] for key in stim_vids}
     # extract raw live stim
     for monthly_mean_folder in monthly_mean_lums_folders:
-        raw_live_stim_files = glob.glob(root_folder + os.sep + monthly_mean_folder + os.sep + '*_meanRawLiveStim_*.npy')
+        raw_live_month = load_monthly_aggregate(os.path.join(root_folder, monthly_mean_folder), 'meanRawLiveStim')
         # raw live - extract and split into phases
-        for raw_live_stim in raw_live_stim_files:
-            stim_type = stim_name_to_float[os.path.basename(raw_live_stim).split('_')[1]]
-            vid_count = float(os.path.basename(raw_live_stim).split('_')[-1][:-8])
-            raw_live_array = np.load(raw_live_stim)
-            supersampled_length_all_stims[stim_type].append(len(raw_live_array))
-            this_file_weighted_doNotMove = []
-            this_file_weights_doNotMove = []
-            this_file_weighted_pulsingDots = []
-            this_file_weights_pulsingDots = []
-            this_file_weighted_unique = []
-            this_file_weights_unique = []
-            this_file_weighted_octo = []
-            this_file_weights_octo = []
-            for row in raw_live_array:
-                timebucket = row[0]
-                weight = row[1]
-                mean_lum = row[2]
-                this_tb_weighted_lum = weight*mean_lum
-                if do_not_move_start[stim_type]['raw'] < timebucket < do_not_move_end[stim_type]['raw']:
-                    this_file_weighted_doNotMove.append(this_tb_weighted_lum)
-                    this_file_weights_doNotMove.append(weight)
-                    continue
-                elif pulsing_dots_start[stim_type]['raw'] < timebucket < pulsing_dots_end[stim_type]['raw']:
-                    this_file_weighted_pulsingDots.append(this_tb_weighted_lum)
-                    this_file_weights_pulsingDots.append(weight)
-                elif uniques_start[stim_type]['raw'] < timebucket < uniques_end[stim_type]['raw']:
-                    this_file_weighted_unique.append(this_tb_weighted_lum)
-                    this_file_weights_unique.append(weight)
-                elif octo_start[stim_type]['raw'] < timebucket < octo_end[stim_type]['raw']:
-                    this_file_weighted_octo.append(this_tb_weighted_lum)
-                    this_file_weights_octo.append(weight)
-            all_weighted_raw_doNotMove.append(np.array(this_file_weighted_doNotMove))
-            all_weights_raw_doNotMove.append(np.array(this_file_weights_doNotMove))
-            all_weighted_raw_pulsingDots.append(np.array(this_file_weighted_pulsingDots))
-            all_weights_raw_pulsingDots.append(np.array(this_file_weights_pulsingDots))
-            all_weighted_raw_unique[stim_type].append(np.array(this_file_weighted_unique))
-            all_weights_raw_unique[stim_type].append(np.array(this_file_weights_unique))
-            all_weighted_raw_octo.append(np.array(this_file_weighted_octo))
-            all_weights_raw_octo.append(np.array(this_file_weights_octo))
+        for stim_type in raw_live_month.stims():
+            timebuckets, mean_lums, weights = raw_live_month.weighted_mean(stim_type)
+            supersampled_length_all_stims[stim_type].append(len(timebuckets))
+            weighted_lums = weights*mean_lums
+            this_file_doNotMove = (do_not_move_start[stim_type]['raw'] < timebuckets) & (timebuckets < do_not_move_end[stim_type]['raw'])
+            this_file_pulsingDots = ~this_file_doNotMove & (pulsing_dots_start[stim_type]['raw'] < timebuckets) & (timebuckets < pulsing_dots_end[stim_type]['raw'])
+            this_file_unique = ~this_file_doNotMove & ~this_file_pulsingDots & (uniques_start[stim_type]['raw'] < timebuckets) & (timebuckets < uniques_end[stim_type]['raw'])
+            this_file_octo = ~this_file_doNotMove & ~this_file_pulsingDots & ~this_file_unique & (octo_start[stim_type]['raw'] < timebuckets) & (timebuckets < octo_end[stim_type]['raw'])
+            all_weighted_raw_doNotMove.append(weighted_lums[this_file_doNotMove])
+            all_weights_raw_doNotMove.append(weights[this_file_doNotMove])
+            all_weighted_raw_pulsingDots.append(weighted_lums[this_file_pulsingDots])
+            all_weights_raw_pulsingDots.append(weights[this_file_pulsingDots])
+            all_weighted_raw_unique[stim_type].append(weighted_lums[this_file_unique])
+            all_weights_raw_unique[stim_type].append(weights[this_file_unique])
+            all_weighted_raw_octo.append(weighted_lums[this_file_octo])
+            all_weights_raw_octo.append(weights[this_file_octo])
     # mean raw live luminance arrays
     mean_raw_live_doNotMove = calculate_weighted_mean_lum(all_weighted_raw_doNotMove, all_weights_raw_doNotMove)
     mean_raw_live_pulsingDots = calculate_weighted_mean_lum(all_weighted_raw_pulsingDots, all_weights_raw_pulsingDots)
@@ -819,13 +740,13 @@ if __name__=='__main__':
         day_name = day_folder.split("_")[-1]
         try:
             ## EXTRACT PUPIL SIZE AND POSITION
-            right_area_contours_X, right_area_contours_Y, right_area_contours, right_area_circles_X, right_area_circles_Y, right_area_circles, num_right_activations, num_good_right_trials = load_daily_pupils("right", csv_folder, downsampled_no_of_time_buckets, original_bucket_size_in_ms, downsampled_bucket_size_ms, disp_latency_dict)
-            left_area_contours_X, left_area_contours_Y, left_area_contours, left_area_circles_X, left_area_circles_Y, left_area_circles, num_left_activations, num_good_left_trials = load_daily_pupils("left", csv_folder, downsampled_no_of_time_buckets, original_bucket_size_in_ms, downsampled_bucket_size_ms, disp_latency_dict)
+            right_area_contours_X, right_area_contours_Y, right_area_contours, right_area_circles_X, right_area_circles_Y, right_area_circles, num_right_activations, num_good_right_trials = load_daily_pupils("right", csv_folder, downsampled_no_of_time_buckets, original_bucket_size_in_ms, downsampled_bucket_size_ms, display_latency_dict=disp_latency_dict)
+            left_area_contours_X, left_area_contours_Y, left_area_contours, left_area_circles_X, left_area_circles_Y, left_area_circles, num_left_activations, num_good_left_trials = load_daily_pupils("left", csv_folder, downsampled_no_of_time_buckets, original_bucket_size_in_ms, downsampled_bucket_size_ms, display_latency_dict=disp_latency_dict)
             #
             analysed_count[day_name] = [num_good_right_trials, num_good_left_trials]
             activation_count[day_name] = [num_right_activations, num_left_activations]
             print("On {day}, exhibit was activated {right_count} times (right) and {left_count} times (left), with {right_good_count} good right trials and {left_good_count} good left trials".format(day=day_name, right_count=num_right_activations, left_count=num_left_activations, right_good_count=num_good_right_trials, left_good_count=num_good_left_trials))
-            logging.INFO("On {day}, exhibit was activated {right_count} times (right) and {left_count} times (left), with {right_good_count} good right trials and {left_good_count} good left trials".format(day=day_name, right_count=num_right_activations, left_count=num_left_activations, right_good_count=num_good_right_trials, left_good_count=num_good_left_trials))
+            logging.info("On {day}, exhibit was activated {right_count} times (right) and {left_count} times (left), with {right_good_count} good right trials and {left_good_count} good left trials".format(day=day_name, right_count=num_right_activations, left_count=num_left_activations, right_good_count=num_good_right_trials, left_good_count=num_good_left_trials))
             # separate by stimulus number
             R_contours_X = {key:[] for key in stim_vids}
             R_contours_Y = {key:[] for key in stim_vids}
@@ -883,11 +804,11 @@ if __name__=='__main__':
                     for index in range(len(all_size_data[i][stimulus])):
                         all_trials_size_data[i][stimulus].append(all_size_data[i][stimulus][index])
             print("Day {day} succeeded!".format(day=day_name))
-            logging.INFO("Day {day} succeeded!".format(day=day_name))
+            logging.info("Day {day} succeeded!".format(day=day_name))
         except Exception:
             failed_days.append(day_name)
             print("Day {day} failed!".format(day=day_name))
-            logging.WARNING("Day {day} failed!".format(day=day_name))
+            logging.warning("Day {day} failed!".format(day=day_name))
     ###################################
     # Normalize pupil size data 
     ###################################
@@ -909,121 +830,47 @@ if __name__=='__main__':
     # create scatter plot of pupil size against world cam luminance values
     # include least squares regression line in scatter plot
     ###################################
-    delays = 25
-    # by phase
-    Rco_calibLinRegress_allDelays = []
-    Rci_calibLinRegress_allDelays = []
-    Lco_calibLinRegress_allDelays = []
-    Lci_calibLinRegress_allDelays = []
-    Rco_octoLinRegress_allDelays = []
-    Rci_octoLinRegress_allDelays = []
-    Lco_octoLinRegress_allDelays = []
-    Lci_octoLinRegress_allDelays = []
-    Rco_u1LinRegress_allDelays = []
-    Rci_u1LinRegress_allDelays = []
-    Lco_u1LinRegress_allDelays = []
-    Lci_u1LinRegress_allDelays = []
-    Rco_u2LinRegress_allDelays = []
-    Rci_u2LinRegress_allDelays = []
-    Lco_u2LinRegress_allDelays = []
-    Lci_u2LinRegress_allDelays = []
-    Rco_u3LinRegress_allDelays = []
-    Rci_u3LinRegress_allDelays = []
-    Lco_u3LinRegress_allDelays = []
-    Lci_u3LinRegress_allDelays = []
-    Rco_u4LinRegress_allDelays = []
-    Rci_u4LinRegress_allDelays = []
-    Lco_u4LinRegress_allDelays = []
-    Lci_u4LinRegress_allDelays = []
-    Rco_u5LinRegress_allDelays = []
-    Rci_u5LinRegress_allDelays = []
-    Lco_u5LinRegress_allDelays = []
-    Lci_u5LinRegress_allDelays = []
-    Rco_u6LinRegress_allDelays = []
-    Rci_u6LinRegress_allDelays = []
-    Lco_u6LinRegress_allDelays = []
-    Lci_u6LinRegress_allDelays = []
-    # all phases
-    Rco_allPhasesConcatLinRegress_allDelays = []
-    Rci_allPhasesConcatLinRegress_allDelays = []
-    Lco_allPhasesConcatLinRegress_allDelays = []
-    Lci_allPhasesConcatLinRegress_allDelays = []
+    delays = args.delays # in downsampled timebuckets
+    # per-delay outputs are optional, so that long delay sweeps only cost the regression
+    save_normedMeanPupilSizes_perDelay = args.save_per_delay
+    plot_scatter_perDelay = args.plot_per_delay
+    # mean normed pupil sizes for every delay at once, (eye analysis x delay x phase x timebucket)
+    phase_lens = [calib_len, octo_len] + unique_lens
+    eyeAnalysis_names = ['RightContours', 'RightCircles', 'LeftContours', 'LeftCircles']
+    scatter_folders = [Rco_scatter_folder, Rci_scatter_folder, Lco_scatter_folder, Lci_scatter_folder]
+    rvalVsDelay_folders = [Rco_rvalVsDelay_folder, Rci_rvalVsDelay_folder, Lco_rvalVsDelay_folder, Lci_rvalVsDelay_folder]
+    pupilPhaseMeans_allDelays = phaseMeans_allDelays_allEyeAnalyses(np.arange(delays), [Rco_normed, Rci_normed, Lco_normed, Lci_normed], calib_len, unique_lens, octo_len)
+    # linear regression params for every eye analysis, phase and delay, see linRegress_allEyeAnalyses_allPhases_allDelays
+    linRegress_allDelays = linRegress_allEyeAnalyses_allPhases_allDelays(pupilPhaseMeans_allDelays, downsampled_mean_RL_all_phases)
+    # psa04 loads the normed mean pupil sizes of each eye analysis at its best delay, so those are always saved
+    best_delays = best_delay_indices(linRegress_allDelays['rvalue'][:, 0, :])
+    # optional per-delay outputs
     for delay in range(delays):
+        save_eyes = [eye for eye in range(len(eyeAnalysis_names)) if save_normedMeanPupilSizes_perDelay or best_delays[eye] == delay]
+        if not save_eyes and not plot_scatter_perDelay:
+            continue
         print('Delay: %d timebucket(s)'%(delay))
-        logging.INFO('Delay: %d timebucket(s)'%(delay))
-        # Right Contours
-        linRegress_Rco = splitPupils_withDelay_plotScatterLinRegress(delay, downsampled_bucket_size_ms, downsampled_mean_RL_all_phases, Rco_normed, calib_len, unique_lens, octo_len, 'RightContours', Rco_scatter_folder, normedMeanPupilSizes_folder)
-        Rco_allPhasesConcatLinRegress_allDelays.append(linRegress_Rco[0])
-        Rco_calibLinRegress_allDelays.append(linRegress_Rco[1])
-        Rco_octoLinRegress_allDelays.append(linRegress_Rco[2])
-        Rco_u1LinRegress_allDelays.append(linRegress_Rco[3])
-        Rco_u2LinRegress_allDelays.append(linRegress_Rco[4])
-        Rco_u3LinRegress_allDelays.append(linRegress_Rco[5])
-        Rco_u4LinRegress_allDelays.append(linRegress_Rco[6])
-        Rco_u5LinRegress_allDelays.append(linRegress_Rco[7])
-        Rco_u6LinRegress_allDelays.append(linRegress_Rco[8])
-        # Right Circles
-        linRegress_Rci = splitPupils_withDelay_plotScatterLinRegress(delay, downsampled_bucket_size_ms, downsampled_mean_RL_all_phases, Rci_normed, calib_len, unique_lens, octo_len, 'RightCircles', Rci_scatter_folder, normedMeanPupilSizes_folder)
-        Rci_allPhasesConcatLinRegress_allDelays.append(linRegress_Rci[0])
-        Rci_calibLinRegress_allDelays.append(linRegress_Rci[1])
-        Rci_octoLinRegress_allDelays.append(linRegress_Rci[2])
-        Rci_u1LinRegress_allDelays.append(linRegress_Rci[3])
-        Rci_u2LinRegress_allDelays.append(linRegress_Rci[4])
-        Rci_u3LinRegress_allDelays.append(linRegress_Rci[5])
-        Rci_u4LinRegress_allDelays.append(linRegress_Rci[6])
-        Rci_u5LinRegress_allDelays.append(linRegress_Rci[7])
-        Rci_u6LinRegress_allDelays.append(linRegress_Rci[8])
-        # Left Contours
-        linRegress_Lco = splitPupils_withDelay_plotScatterLinRegress(delay, downsampled_bucket_size_ms, downsampled_mean_RL_all_phases, Lco_normed, calib_len, unique_lens, octo_len, 'LeftContours', Lco_scatter_folder, normedMeanPupilSizes_folder)
-        Lco_allPhasesConcatLinRegress_allDelays.append(linRegress_Lco[0])
-        Lco_calibLinRegress_allDelays.append(linRegress_Lco[1])
-        Lco_octoLinRegress_allDelays.append(linRegress_Lco[2])
-        Lco_u1LinRegress_allDelays.append(linRegress_Lco[3])
-        Lco_u2LinRegress_allDelays.append(linRegress_Lco[4])
-        Lco_u3LinRegress_allDelays.append(linRegress_Lco[5])
-        Lco_u4LinRegress_allDelays.append(linRegress_Lco[6])
-        Lco_u5LinRegress_allDelays.append(linRegress_Lco[7])
-        Lco_u6LinRegress_allDelays.append(linRegress_Lco[8])
-        # Left Circles
-        linRegress_Lci = splitPupils_withDelay_plotScatterLinRegress(delay, downsampled_bucket_size_ms, downsampled_mean_RL_all_phases, Lci_normed, calib_len, unique_lens, octo_len, 'LeftCircles', Lci_scatter_folder, normedMeanPupilSizes_folder)
-        Lci_allPhasesConcatLinRegress_allDelays.append(linRegress_Lci[0])
-        Lci_calibLinRegress_allDelays.append(linRegress_Lci[1])
-        Lci_octoLinRegress_allDelays.append(linRegress_Lci[2])
-        Lci_u1LinRegress_allDelays.append(linRegress_Lci[3])
-        Lci_u2LinRegress_allDelays.append(linRegress_Lci[4])
-        Lci_u3LinRegress_allDelays.append(linRegress_Lci[5])
-        Lci_u4LinRegress_allDelays.append(linRegress_Lci[6])
-        Lci_u5LinRegress_allDelays.append(linRegress_Lci[7])
-        Lci_u6LinRegress_allDelays.append(linRegress_Lci[8])
+        logging.info('Delay: %d timebucket(s)'%(delay))
+        for eye, eyeAnalysis_name in enumerate(eyeAnalysis_names):
+            if eye in save_eyes or plot_scatter_perDelay:
+                splitPupils_withDelay_plotScatterLinRegress(delay, downsampled_bucket_size_ms, downsampled_mean_RL_all_phases, pupilPhaseMeans_allDelays[eye, delay], phase_lens, eyeAnalysis_name, scatter_folders[eye], normedMeanPupilSizes_folder, eye in save_eyes, plot_scatter_perDelay)
     ###################################
     # plot fit scores (rvals) vs delay
     ###################################
-    # all phases combined
-    drawFitScoresVsDelay_full(Rco_allPhasesConcatLinRegress_allDelays, delays, 'RightContours', downsampled_bucket_size_ms, Rco_rvalVsDelay_folder) 
-    drawFitScoresVsDelay_full(Rci_allPhasesConcatLinRegress_allDelays, delays, 'RightCircles', downsampled_bucket_size_ms, Rci_rvalVsDelay_folder) 
-    drawFitScoresVsDelay_full(Lco_allPhasesConcatLinRegress_allDelays, delays, 'LeftContours', downsampled_bucket_size_ms, Lco_rvalVsDelay_folder) 
-    drawFitScoresVsDelay_full(Lci_allPhasesConcatLinRegress_allDelays, delays, 'LeftCircles', downsampled_bucket_size_ms, Lci_rvalVsDelay_folder) 
-    # by phase
-    allRcoPhases = [Rco_calibLinRegress_allDelays, Rco_octoLinRegress_allDelays, Rco_u1LinRegress_allDelays, Rco_u2LinRegress_allDelays, Rco_u3LinRegress_allDelays, Rco_u4LinRegress_allDelays, Rco_u5LinRegress_allDelays, Rco_u6LinRegress_allDelays]
-    drawFitScoresVsDelay_byPhase(allRcoPhases, delays, phase_names, 'RightContours', downsampled_bucket_size_ms, Rco_rvalVsDelay_folder)
-    allRciPhases = [Rci_calibLinRegress_allDelays, Rci_octoLinRegress_allDelays, Rci_u1LinRegress_allDelays, Rci_u2LinRegress_allDelays, Rci_u3LinRegress_allDelays, Rci_u4LinRegress_allDelays, Rci_u5LinRegress_allDelays, Rci_u6LinRegress_allDelays]
-    drawFitScoresVsDelay_byPhase(allRciPhases, delays, phase_names, 'RightCircles', downsampled_bucket_size_ms, Rci_rvalVsDelay_folder)
-    allLcoPhases = [Lco_calibLinRegress_allDelays, Lco_octoLinRegress_allDelays, Lco_u1LinRegress_allDelays, Lco_u2LinRegress_allDelays, Lco_u3LinRegress_allDelays, Lco_u4LinRegress_allDelays, Lco_u5LinRegress_allDelays, Lco_u6LinRegress_allDelays]
-    drawFitScoresVsDelay_byPhase(allLcoPhases, delays, phase_names, 'LeftContours', downsampled_bucket_size_ms, Lco_rvalVsDelay_folder)
-    allLciPhases = [Lci_calibLinRegress_allDelays, Lci_octoLinRegress_allDelays, Lci_u1LinRegress_allDelays, Lci_u2LinRegress_allDelays, Lci_u3LinRegress_allDelays, Lci_u4LinRegress_allDelays, Lci_u5LinRegress_allDelays, Lci_u6LinRegress_allDelays]
-    drawFitScoresVsDelay_byPhase(allLciPhases, delays, phase_names, 'LeftCircles', downsampled_bucket_size_ms, Lci_rvalVsDelay_folder)
+    for eye, eyeAnalysis_name in enumerate(eyeAnalysis_names):
+        # all phases combined
+        drawFitScoresVsDelay_full(linRegress_allDelays[eye, 0], delays, eyeAnalysis_name, downsampled_bucket_size_ms, rvalVsDelay_folders[eye])
+        # by phase
+        drawFitScoresVsDelay_byPhase(linRegress_allDelays[eye, 1:], delays, phase_names, eyeAnalysis_name, downsampled_bucket_size_ms, rvalVsDelay_folders[eye])
     ###################################
     # save linear regression parameters as binary files
     ###################################
-    # output path
-    Rco_allPhasesConcat_linRegress_output = pupilSizeVsDelayLinRegress_folder + os.sep + 'pupilSizeVsDelayLinRegressParams_RightContours_allPhasesConcat_%dTBDelays.npy'%(delays)
-    Rci_allPhasesConcat_linRegress_output = pupilSizeVsDelayLinRegress_folder + os.sep + 'pupilSizeVsDelayLinRegressParams_RightCircles_allPhasesConcat_%dTBDelays.npy'%(delays)
-    Lco_allPhasesConcat_linRegress_output = pupilSizeVsDelayLinRegress_folder + os.sep + 'pupilSizeVsDelayLinRegressParams_LeftContours_allPhasesConcat_%dTBDelays.npy'%(delays)
-    Lci_allPhasesConcat_linRegress_output = pupilSizeVsDelayLinRegress_folder + os.sep + 'pupilSizeVsDelayLinRegressParams_LeftCircles_allPhasesConcat_%dTBDelays.npy'%(delays)
-    # save file
-    np.save(Rco_allPhasesConcat_linRegress_output, Rco_allPhasesConcatLinRegress_allDelays)
-    np.save(Rci_allPhasesConcat_linRegress_output, Rci_allPhasesConcatLinRegress_allDelays)
-    np.save(Lco_allPhasesConcat_linRegress_output, Lco_allPhasesConcatLinRegress_allDelays)
-    np.save(Lci_allPhasesConcat_linRegress_output, Lci_allPhasesConcatLinRegress_allDelays)
+    # all eye analyses, phases and delays in one structured array, indexed by (eye analysis, phase, delay)
+    linRegress_output = pupilSizeVsDelayLinRegress_folder + os.sep + 'pupilSizeVsDelayLinRegressParams_allEyeAnalyses_allPhases_%dTBDelays.npy'%(delays)
+    np.save(linRegress_output, linRegress_allDelays)
+    # all phases concatenated, one (delay x [slope, intercept, rval, pval, stderr]) array per eye analysis
+    for eye, eyeAnalysis_name in enumerate(eyeAnalysis_names):
+        allPhasesConcat_linRegress_output = pupilSizeVsDelayLinRegress_folder + os.sep + 'pupilSizeVsDelayLinRegressParams_%s_allPhasesConcat_%dTBDelays.npy'%(eyeAnalysis_name, delays)
+        np.save(allPhasesConcat_linRegress_output, np.array(linRegress_allDelays[eye, 0].tolist()))
 
 # FIN
\ No newline at end of file
@@ -5,25 +5,23 @@
 # compares to observed pupil sizes to find moments where observed deviates from predicted pupil size
 # NOTE: in command line run with optional tags 
 #       1) '--loc *' to run with various root data locations (see first function below)
+#       2) '--candidates *.npy' to predict pupil sizes for candidate stimulus luminance traces (candidate x timebucket)
 ### --------------------------------------------------------------------------- ###
 import os
 import numpy as np 
-import matplotlib.pyplot as plt
 import glob
 import datetime
 import logging
 import argparse
+import sys
+# make the shared surprisingMinds package (in the repo root) importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from surprisingMinds.pupilSizeDelays import best_delay_indices
 ###################################
 # SET CURRENT WORKING DIRECTORY
 ###################################
 current_working_directory = os.getcwd()
 ###################################
-# SCRIPT LOGGER
-###################################
-# grab today's date
-now = datetime.datetime.now()
-logging.basicConfig(filename="psa03_LumBasedPupilSizePredictor_" + now.strftime("%Y-%m-%d_%H-%M-%S") + ".log", filemode='w', level=logging.INFO)
-###################################
 # FUNCTIONS
 ###################################
 
@@ -61,27 +59,45 @@ def load_data(location='laptop'):
     return root_folder, plots_folder, normedMeanPupils_folder, linRegressParams_folder, stimVidLums_folder, output_folders
 
 ##########################################################
-def predictPupilSizeFromStimVidLums(stimVidLumArrays_allPhases, linRegParams_allDelays, bestDelayIndex):
-    # for each delay, params are [slope, intercept, rval, pval, stderr]
-    slope = linRegParams_allDelays[bestDelayIndex][0]
-    intercept = linRegParams_allDelays[bestDelayIndex][1]
-    predictedPupilSizes_allPhases = []
-    for phase in stimVidLumArrays_allPhases:
-        predictedPupilSizes_thisPhase = []
-        for timebucket in phase:
-            pupilSize = slope*timebucket + intercept
-            predictedPupilSizes_thisPhase.append(pupilSize)
-        predictedPupilSizes_allPhases.append(np.array(predictedPupilSizes_thisPhase))
-    return predictedPupilSizes_allPhases
+class PupilSizePredictor(object):
+    # linear model of pupil size from stimulus luminance, for all eye analyses at once
+    # loads the (eye analysis, phase, delay) linear regression params saved by psa03 and keeps the best delay of each eye analysis
+    def __init__(self, linRegressParams_file, eyeAnalysis_names=('RightContours', 'RightCircles', 'LeftContours', 'LeftCircles'), phase_index=0):
+        self.eyeAnalysis_names = list(eyeAnalysis_names)
+        self.linRegParams = np.load(linRegressParams_file)
+        # phase 0 is all phases concatenated
+        rVals = self.linRegParams['rvalue'][:, phase_index, :]
+        # the same best delays psa03 saves the normed mean pupil sizes of
+        self.bestDelay_indices = best_delay_indices(rVals)
+        eyes = np.arange(len(self.eyeAnalysis_names))
+        self.bestLinRegParams = self.linRegParams[eyes, phase_index, self.bestDelay_indices]
+        self.bestRVals = self.bestLinRegParams['rvalue']
+        self.slopes = self.bestLinRegParams['slope']
+        self.intercepts = self.bestLinRegParams['intercept']
+
+    def bestDelays_ms(self, downsample_ms):
+        return self.bestDelay_indices*downsample_ms
+
+    def predict(self, lums):
+        # lums: luminance array of any shape, e.g. one trace (timebucket) or a batch of traces (stimulus x timebucket)
+        # returns predicted pupil sizes with a leading eye analysis axis, (eye analysis x lums.shape)
+        lums = np.asarray(lums, dtype=np.float64)
+        params_shape = (len(self.eyeAnalysis_names),) + (1,)*lums.ndim
+        return self.slopes.reshape(params_shape)*lums + self.intercepts.reshape(params_shape)
+
+    def predict_allPhases(self, lumArrays_allPhases):
+        # phases differ in length, so predict each phase separately
+        return [self.predict(phase) for phase in lumArrays_allPhases]
 
-def drawPredictedVsRealPupilSize(predictedPupilSizes_allPhases, realPupilSizes_allPhases_bestDelay, phaseOrderStrList, bestDelay_ms, downsample_ms, saveFolder):
+def drawPredictedVsRealPupilSize(predictedPupilSizes_allPhases, realPupilSizes_allPhases_bestDelay, phaseOrderStrList, bestDelay_ms, downsample_ms, saveFolder, eyeAnalysis_name='RightContours'):
+    import matplotlib.pyplot as plt
     for i, phase in enumerate(predictedPupilSizes_allPhases):
         lenOfPhase = len(realPupilSizes_allPhases_bestDelay[i])
         # figure path and title
-        figPath = os.path.join(saveFolder, '%s_predVsRealPupilSizes_%s.png'%(phaseOrderStrList[i], 'RightContours'))
-        figTitle = 'Predicted (based on stimulus luminance) vs Real Pupil Sizes \n Phase: %s; %s; Best delay = %dms'%(phaseOrderStrList[i], 'RightContours', bestDelay_ms)
+        figPath = os.path.join(saveFolder, '%s_predVsRealPupilSizes_%s.png'%(phaseOrderStrList[i], eyeAnalysis_name))
+        figTitle = 'Predicted (based on stimulus luminance) vs Real Pupil Sizes \n Phase: %s; %s; Best delay = %dms'%(phaseOrderStrList[i], eyeAnalysis_name, bestDelay_ms)
         print('Plotting %s'%(figTitle))
-        logging.INFO('Plotting %s'%(figTitle))
+        logging.info('Plotting %s'%(figTitle))
         # draw predicted vs real pupil size
         plt.figure(dpi=150)
         plt.suptitle(figTitle, fontsize=12, y=0.98)
@@ -99,9 +115,16 @@ def drawPredictedVsRealPupilSize(predictedPupilSizes_allPhases, realPupilSizes_a
 # BEGIN SCRIPT
 ##########################################################
 if __name__=='__main__':
+    ###################################
+    # SCRIPT LOGGER
+    ###################################
+    # grab today's date
+    now = datetime.datetime.now()
+    logging.basicConfig(filename="psa04_LumBasedPupilSizePredictor_" + now.strftime("%Y-%m-%d_%H-%M-%S") + ".log", filemode='w', level=logging.INFO)
     parser = argparse.ArgumentParser()
     parser.add_argument("--a", nargs='?', default="check_string_for_empty")
     parser.add_argument("--loc", nargs='?', default='laptop')
+    parser.add_argument("--candidates", nargs='?', default=None)
     args = parser.parse_args()
     ###################################
     # SOURCE DATA AND OUTPUT FILE LOCATIONS 
@@ -125,45 +148,32 @@ if __name__=='__main__':
     # organise by eyeAnalysis_type, phase_type, and delay_ms
     ###################################
     # extract linear regression parameters to find best delay
-    linRegressParams_files = glob.glob(linRegressParams_folder + os.sep + '*.npy')
-    for linReg_file in linRegressParams_files:
-        eyeAnalysis = os.path.basename(linReg_file).split('.')[0].split('_')[1]
-        thisEyeAnalysis_linRegParams = np.load(linReg_file)
-        best_rVal = 0
-        best_delay = 0
-        for i, delay in enumerate(thisEyeAnalysis_linRegParams):
-            if delay[2]<best_rVal:
-                best_rVal = delay[2]
-                best_delay = i
-        if eyeAnalysis == 'RightContours':
-            Rco_linRegParams = thisEyeAnalysis_linRegParams
-            Rco_bestRVal = best_rVal
-            Rco_bestDelay_index = best_delay
-        if eyeAnalysis == 'RightCircles':
-            Rci_linRegParams = thisEyeAnalysis_linRegParams
-            Rci_bestRVal = best_rVal
-            Rci_bestDelay_index = best_delay
-        if eyeAnalysis == 'LeftContours':
-            Lco_linRegParams = thisEyeAnalysis_linRegParams
-            Lco_bestRVal = best_rVal
-            Lco_bestDelay_index = best_delay
-        if eyeAnalysis == 'LeftCircles':
-            Lci_linRegParams = thisEyeAnalysis_linRegParams
-            Lci_bestRVal = best_rVal
-            Lci_bestDelay_index = best_delay
-    # now we should have:
-    # Rco_linRegParams, Rco_bestRVal, Rco_bestDelay_index
-    # Rci_linRegParams, Rci_bestRVal, Rci_bestDelay_index
-    # Lco_linRegParams, Lco_bestRVal, Lco_bestDelay_index
-    # Lci_linRegParams, Lci_bestRVal, Lci_bestDelay_index
-    Rco_bestDelay_ms = Rco_bestDelay_index*downsampled_bucket_size_ms
-    Rci_bestDelay_ms = Rci_bestDelay_index*downsampled_bucket_size_ms
-    Lco_bestDelay_ms = Lco_bestDelay_index*downsampled_bucket_size_ms
-    Lci_bestDelay_ms = Lci_bestDelay_index*downsampled_bucket_size_ms
+    # structured array output by psa03, indexed by (eye analysis, phase, delay), phase 0 is all phases concatenated
+    # psa03 runs with different numbers of delays leave one file each, and which one to use is not ours to guess
+    linRegressParams_files = sorted(glob.glob(linRegressParams_folder + os.sep + 'pupilSizeVsDelayLinRegressParams_allEyeAnalyses_allPhases_*.npy'))
+    if len(linRegressParams_files) != 1:
+        raise ValueError('Expected one psa03 linear regression params file in %s, found %d: %s' % (linRegressParams_folder, len(linRegressParams_files), ', '.join(os.path.basename(linRegressParams_file) for linRegressParams_file in linRegressParams_files)))
+    linRegressParams_file = linRegressParams_files[0]
+    predictor = PupilSizePredictor(linRegressParams_file)
+    bestDelays_ms = predictor.bestDelays_ms(downsampled_bucket_size_ms)
+    predictedVsReal_folders = [Rco_predictedVsReal_folder, Rci_predictedVsReal_folder, Lco_predictedVsReal_folder, Lci_predictedVsReal_folder]
+    for eye, eyeAnalysis_name in enumerate(predictor.eyeAnalysis_names):
+        logging.info('%s: best delay = %dms (rval = %f)' % (eyeAnalysis_name, bestDelays_ms[eye], predictor.bestRVals[eye]))
+        print('%s: best delay = %dms (rval = %f)' % (eyeAnalysis_name, bestDelays_ms[eye], predictor.bestRVals[eye]))
+    ###################################
+    # screen candidate stimuli (luminance traces never shown in the exhibit)
+    ###################################
+    if args.candidates is not None:
+        candidate_lums = np.load(args.candidates)
+        candidate_predictions = predictor.predict(candidate_lums)
+        candidate_predictions_output = os.path.splitext(args.candidates)[0] + '_predictedPupilSizes.npy'
+        np.save(candidate_predictions_output, candidate_predictions)
+        logging.info('Saved predicted pupil sizes (eye analysis x candidate x timebucket) to %s' % (candidate_predictions_output))
+        print('Saved predicted pupil sizes (eye analysis x candidate x timebucket) to %s' % (candidate_predictions_output))
     ###################################
     # load stim vid avg luminances
     ###################################
-    stimVidLums_files = glob.glob(stimVidLums_folder + os.sep + '*.npy')
+    stimVidLums_files = sorted(glob.glob(stimVidLums_folder + os.sep + '*.npy'))
     unique_lums = []
     for stimVid_file in stimVidLums_files:
         phaseType = os.path.basename(stimVid_file).split('.')[0].split('_')[0][12]
@@ -178,55 +188,24 @@ if __name__=='__main__':
     ###################################
     # build prediction from linear regression params
     ###################################
-    Rco_predictedPupilSizes_allPhases = predictPupilSizeFromStimVidLums(stimVidLums_allPhases, Rco_linRegParams, Rco_bestDelay_index)
-    Rci_predictedPupilSizes_allPhases = predictPupilSizeFromStimVidLums(stimVidLums_allPhases, Rci_linRegParams, Rci_bestDelay_index)
-    Lco_predictedPupilSizes_allPhases = predictPupilSizeFromStimVidLums(stimVidLums_allPhases, Lco_linRegParams, Lco_bestDelay_index)
-    Lci_predictedPupilSizes_allPhases = predictPupilSizeFromStimVidLums(stimVidLums_allPhases, Lci_linRegParams, Lci_bestDelay_index)
+    # list of phases, each (eye analysis x timebucket)
+    predictedPupilSizes_allPhases = predictor.predict_allPhases(stimVidLums_allPhases)
     ###################################
-    # load normalised mean pupil size files
-    # organise by eyeAnalysis_type, phase_type, and delay_ms
+    # load normalised mean pupil sizes for each eye analysis at its best delay
     ###################################
-    # extract mean pupil sizes for best delay
-    normedMeanPupils_files = glob.glob(normedMeanPupils_folder + os.sep + '*.npy')
-    Rco_bestDelay_allPhases = []
-    Rco_bestDelay_phaseOrder = []
-    Rci_bestDelay_allPhases = []
-    Rci_bestDelay_phaseOrder = []
-    Lco_bestDelay_allPhases = []
-    Lco_bestDelay_phaseOrder = []
-    Lci_bestDelay_allPhases = []
-    Lci_bestDelay_phaseOrder = []
-    for nmpSize_file in normedMeanPupils_files:
-        delay_ms = int(os.path.basename(nmpSize_file).split('_')[2][:-7])
-        eyeAnalysis_type = os.path.basename(nmpSize_file).split('_')[3][:-4]
-        phase_type = os.path.basename(nmpSize_file).split('_')[1]
-        this_nmpSize = np.load(nmpSize_file)
-        if eyeAnalysis_type == 'RightContours':
-            if delay_ms == Rco_bestDelay_ms:
-                Rco_bestDelay_allPhases.append(this_nmpSize)
-                Rco_bestDelay_phaseOrder.append(phase_type)
-                continue
-        if eyeAnalysis_type == 'RightCircles':
-            if delay_ms == Rci_bestDelay_ms:
-                Rci_bestDelay_allPhases.append(this_nmpSize)
-                Rci_bestDelay_phaseOrder.append(phase_type)
-                continue
-        if eyeAnalysis_type == 'LeftContours':
-            if delay_ms == Lco_bestDelay_ms:
-                Lco_bestDelay_allPhases.append(this_nmpSize)
-                Lco_bestDelay_phaseOrder.append(phase_type)
-                continue
-        if eyeAnalysis_type == 'LeftCircles':
-            if delay_ms == Lci_bestDelay_ms:
-                Lci_bestDelay_allPhases.append(this_nmpSize)
-                Lci_bestDelay_phaseOrder.append(phase_type)
-                continue
-    ###################################
-    # plot predicted vs real pupil size
-    ###################################
-    drawPredictedVsRealPupilSize(Rco_predictedPupilSizes_allPhases, Rco_bestDelay_allPhases, Rco_bestDelay_phaseOrder, Rco_bestDelay_ms, downsampled_bucket_size_ms, Rco_predictedVsReal_folder)
-    drawPredictedVsRealPupilSize(Rci_predictedPupilSizes_allPhases, Rci_bestDelay_allPhases, Rci_bestDelay_phaseOrder, Rci_bestDelay_ms, downsampled_bucket_size_ms, Rci_predictedVsReal_folder)
-    drawPredictedVsRealPupilSize(Lco_predictedPupilSizes_allPhases, Lco_bestDelay_allPhases, Lco_bestDelay_phaseOrder, Lco_bestDelay_ms, downsampled_bucket_size_ms, Lco_predictedVsReal_folder)
-    drawPredictedVsRealPupilSize(Lci_predictedPupilSizes_allPhases, Lci_bestDelay_allPhases, Lci_bestDelay_phaseOrder, Lci_bestDelay_ms, downsampled_bucket_size_ms, Lci_predictedVsReal_folder)
+    phase_file_names = ['calib', 'octo', 'u1', 'u2', 'u3', 'u4', 'u5', 'u6']
+    for eye, eyeAnalysis_name in enumerate(predictor.eyeAnalysis_names):
+        bestDelay_allPhases = []
+        for phase_file_name in phase_file_names:
+            nmpSize_file = normedMeanPupils_folder + os.sep + 'meanNormedPupilSize_%s_%dmsDelay_%s.npy'%(phase_file_name, bestDelays_ms[eye], eyeAnalysis_name)
+            if not os.path.exists(nmpSize_file):
+                # e.g. left over from a psa03 run with --no-save_per_delay and other delays
+                raise IOError('%s not found, rerun psa03_PupilSizeVLum.py: it saves the normed mean pupil sizes at the best delay of each eye analysis (and at every delay with --save_per_delay)' % (nmpSize_file))
+            bestDelay_allPhases.append(np.load(nmpSize_file))
+        ###################################
+        # plot predicted vs real pupil size
+        ###################################
+        thisEye_predictedPupilSizes_allPhases = [phase[eye] for phase in predictedPupilSizes_allPhases]
+        drawPredictedVsRealPupilSize(thisEye_predictedPupilSizes_allPhases, bestDelay_allPhases, phase_file_names, bestDelays_ms[eye], downsampled_bucket_size_ms, predictedVsReal_folders[eye], eyeAnalysis_name)
 
-# FIN
\ No newline at end of file
+# FIN
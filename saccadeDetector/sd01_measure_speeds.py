@@ -15,9 +15,14 @@ Resolution = 4ms per "timebucket", as that was the sampling rate used to generat
 import os
 import glob
 import numpy as np
-import matplotlib.pyplot as plt
 import datetime
 import os.path
+import argparse
+import logging
+import sys
+# make the shared surprisingMinds package (in the repo root) importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from surprisingMinds.workQueue import WorkQueue
 
 ###################################
 # SET CURRENT WORKING DIRECTORY
@@ -27,6 +32,63 @@ current_working_directory = os.getcwd()
 # FUNCTIONS
 ###################################
 
+def measure_speed(data, bad_trial_cutoff):
+    # data: one pupil tracking csv (time buckets x [contour x, contour y, contour area, circle x, circle y, circle area])
+    # returns interpolated and smoothed x, y, area and the "speed" (change in x and y) per time bucket
+    # returns None for crappy trials, with fewer than bad_trial_cutoff valid time buckets
+    x = np.copy(data[:,0])
+    y = np.copy(data[:,1])
+    area = np.copy(data[:,2])
+    num_samples = len(x)
+
+    # Extract valid X and Y values
+    good_indices = np.where(area > 0)[0]
+
+    # Exclude crappy trials
+    if(len(good_indices) < bad_trial_cutoff): 
+        return None
+    good_x = x[good_indices]
+    good_y = y[good_indices]
+    good_area = area[good_indices]
+    num_valid = len(good_indices)
+
+    # Start with first valid values
+    if x[0] < 0:
+        x[0] = good_x[0]
+        y[0] = good_y[0]
+        area[0] = good_area[0]
+
+    # Interpolate X and Y values across tracking errors/empty frames
+    count = 1
+    for i in range(1, num_valid):
+        next_valid_index = good_indices[i]
+        next_valid_x = good_x[i]
+        next_valid_y = good_y[i]
+        next_valid_area = good_area[i]
+        step_count = (next_valid_index - count + 1)
+        step_x = (next_valid_x - x[count - 1]) / step_count
+        step_y = (next_valid_y - y[count - 1]) / step_count
+        step_area = (next_valid_area - area[count - 1]) / step_count
+        for j in range(step_count):
+            x[count] = x[count - 1] + step_x
+            y[count] = y[count - 1] + step_y
+            area[count] = area[count - 1] + step_area
+            count += 1
+    # Now we have X, Y, and Area for every time bucket (linearly interpolated)
+
+    # Smooth (8 time-buckets: ~ 32 ms, 30 Hz)
+    smooth_kernel = np.ones(8) / 8
+    x = np.convolve(x, smooth_kernel, mode='same')
+    y = np.convolve(y, smooth_kernel, mode='same')
+    area = np.convolve(area, smooth_kernel, mode='same')
+
+    # Measure "speed" (change in x and y)
+    dx = np.diff(x, prepend=[0])
+    dy = np.diff(y, prepend=[0])
+    speed = np.sqrt(dx*dx + dy*dy)
+    speed = np.float32(speed)
+    return x, y, area, speed
+
 ##########################################################
 #### MODIFY THIS FIRST FUNCTION BASED ON THE LOCATIONS OF:
 # 1) dataset_dir (folder with csv files of full pupil tracking dataset)
@@ -44,6 +106,7 @@ def load_data():
 # BEGIN SCRIPT
 ##########################################################
 if __name__=='__main__':
+    import matplotlib.pyplot as plt
     parser = argparse.ArgumentParser(
         description='''Measure speed of pupil.
         Collects csv files of pupil tracking data from all subjects/days of experiment/exhibit.
@@ -52,6 +115,8 @@ if __name__=='__main__':
         WARNING: This script overwrites speed data outputted from previous runs of this script. TO SAVE OLD SPEED DATA, RENAME THE FOLDER CONTAINING OLD SPEED DATA.
         Resolution = 4ms per "timebucket", as that was the sampling rate used to generate the csv files of pupil tracking data. ''')
     parser.add_argument("--a", nargs='?', default="check_string_for_empty")
+    parser.add_argument("--queue", nargs='?', const='', default=None, help="Claim days from a work queue folder on the shared filesystem (default: queues/sd01 in the intermediates folder), so several machines running with the same queue share the days. Speed data of earlier runs is kept, start a new queue folder to measure every day again")
+    parser.add_argument("--lease", type=float, default=600, help="Seconds without a heartbeat after which another worker retries a claimed day (default: 600)")
     args = parser.parse_args()
     ###################################
     # SCRIPT LOGGER
@@ -69,7 +134,7 @@ if __name__=='__main__':
     ###################################
     # FIND DAILY PUPIL TRACKING DATA
     ###################################
-    daily_folders = glob.glob(data_folder + os.sep + 'SurprisingMinds*')
+    daily_folders = glob.glob(raw_dataset_folder + os.sep + 'SurprisingMinds*')
     # If you only want to find saccades in a subset of the data...
     #daily_folders = daily_folders[10:100]
     ###################################
@@ -93,7 +158,7 @@ if __name__=='__main__':
         logging.info("Creating speed data folder.")
         print("Creating speed data folder.")
         os.makedirs(speed_data_folder)
-    if os.path.exists(speed_data_folder):
+    if os.path.exists(speed_data_folder) and args.queue is None:
         # make sure it's empty
         logging.info("Deleting old speed data...")
         print("Deleting old speed data...")
@@ -109,7 +174,20 @@ if __name__=='__main__':
     ###################################
     trial_count = 0
     stim_count = {0:0, 1:0, 2:0, 3:0, 4:0, 5:0}
-    for df, daily_folder in enumerate(daily_folders):
+    if args.queue is None:
+        work_queue = None
+        days_to_measure = daily_folders
+    else:
+        # measure the days this worker claims from the queue, alongside the workers of other machines using the same queue
+        queue_folder = args.queue or os.path.join(output_folder, 'queues', 'sd01')
+        logging.info('WORK QUEUE: %s' % (queue_folder))
+        print('WORK QUEUE: %s' % (queue_folder))
+        work_queue = WorkQueue(queue_folder, args.lease)
+        day_folders = {os.path.basename(daily_folder): daily_folder for daily_folder in daily_folders}
+        days_to_measure = (day_folders[day] for day in work_queue.claimed(day_folders))
+    for df, daily_folder in enumerate(days_to_measure):
+        day_name = os.path.basename(daily_folder)
+        day_trial_count = 0
 
         # Find csv paths
         csv_paths = glob.glob(daily_folder + os.sep + 'analysis' + os.sep + 'csv'+ os.sep + '*.csv')
@@ -132,62 +210,24 @@ if __name__=='__main__':
             raw_x = data[:,0]
             raw_y = data[:,1]
             raw_area = data[:,2]
-            x = np.copy(raw_x)
-            y = np.copy(raw_y)
-            area = np.copy(raw_area)
-            num_samples = len(x)
-
-            # Extract valid X and Y values
-            good_indices = np.where(area > 0)[0]
+            measured = measure_speed(data, bad_trial_cutoff)
 
             # Exclude crappy trials
-            if(len(good_indices) < bad_trial_cutoff): 
+            if measured is None: 
                 break
-            good_x = x[good_indices]
-            good_y = y[good_indices]
-            good_area = area[good_indices]
-            num_valid = len(good_indices)
-
-            # Start with first valid values
-            if x[0] < 0:
-                x[0] = good_x[0]
-                y[0] = good_y[0]
-                area[0] = good_area[0]
-
-            # Interpolate X and Y values across tracking errors/empty frames
-            count = 1
-            for i in range(1, num_valid):
-                next_valid_index = good_indices[i]
-                next_valid_x = good_x[i]
-                next_valid_y = good_y[i]
-                next_valid_area = good_area[i]
-                step_count = (next_valid_index - count + 1)
-                step_x = (next_valid_x - x[count - 1]) / step_count
-                step_y = (next_valid_y - y[count - 1]) / step_count
-                step_area = (next_valid_area - area[count - 1]) / step_count
-                for j in range(step_count):
-                    x[count] = x[count - 1] + step_x
-                    y[count] = y[count - 1] + step_y
-                    area[count] = area[count - 1] + step_area
-                    count += 1
-            # Now we have X, Y, and Area for every time bucket (linearly interpolated)
-
-            # Smooth (8 time-buckets: ~ 32 ms, 30 Hz)
-            smooth_kernel = np.ones(8) / 8
-            x = np.convolve(x, smooth_kernel, mode='same')
-            y = np.convolve(y, smooth_kernel, mode='same')
-            area = np.convolve(area, smooth_kernel, mode='same')
-
-            # Measure "speed" (change in x and y)
-            dx = np.diff(x, prepend=[0])
-            dy = np.diff(y, prepend=[0])
-            speed = np.sqrt(dx*dx + dy*dy)
-            speed = np.float32(speed)
+            x, y, area, speed = measured
 
             # Store
-            output_path = speed_data_folder + os.sep + 'stim%d_%s_peak_%d.data' % (stimulus, eye, trial_count)
-            speed.tofile(output_path)
+            if work_queue is None:
+                output_path = speed_data_folder + os.sep + 'stim%d_%s_peak_%d.data' % (stimulus, eye, trial_count)
+            else:
+                # trial counts of other workers are unknown, so number trials within the day (a retried day writes the same files)
+                output_path = speed_data_folder + os.sep + 'stim%d_%s_peak_%s-%d.data' % (stimulus, eye, day_name, day_trial_count)
+            # write to a temp file first, so a worker that dies while saving never leaves a partial speed file behind
+            speed.tofile(output_path + '.tmp')
+            os.replace(output_path + '.tmp', output_path)
             trial_count = trial_count + 1
+            day_trial_count = day_trial_count + 1
 
             # Plot
             plot = False
@@ -208,6 +248,8 @@ if __name__=='__main__':
 
             # Report progress
             print('Trial count: {t}'.format(t=trial_count))
+        if work_queue is not None:
+            work_queue.complete(day_name, trials=day_trial_count)
     logging.info('Total trial count: {t}'.format(t=trial_count))
 
 
@@ -14,9 +14,15 @@ Resolution = 4ms per "timebucket", as that was the sampling rate used to generat
 import os
 import glob
 import numpy as np
-import matplotlib.pyplot as plt
 import datetime
 import os.path
+import argparse
+import logging
+import json
+import sys
+# make the shared surprisingMinds package (in the repo root) importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from surprisingMinds.instrumentation import StageInstruments, write_run_summary, format_summary
 
 ###################################
 # SET CURRENT WORKING DIRECTORY
@@ -26,6 +32,56 @@ current_working_directory = os.getcwd()
 # FUNCTIONS
 ###################################
 
+def detect_peaks(speed, low_threshold, high_threshold):
+    # speed: "speed" per time bucket of one trial, from sd01_measure_speeds.py
+    # a peak starts when speed rises above high_threshold and stops when it falls below low_threshold
+    # returns speed, index, duration and interval (from the previous peak) of the good saccades
+    peak_start_times = []
+    peak_stop_times = []
+    peaking = False
+    for i, sp in enumerate(speed):
+        # Look for a new peak
+        if(not peaking):
+            if(sp > high_threshold):
+                peaking = True
+                peak_start_times.append(i)
+        # Track ongoing peak    
+        else:
+            if(sp < low_threshold):
+                peaking = False       
+                peak_stop_times.append(i)
+    # Convert to arrays
+    peak_start_times = np.array(peak_start_times)
+    peak_stop_times = np.array(peak_stop_times)
+    # Throw out the first peak
+    peak_start_times = peak_start_times[1:]
+    peak_stop_times = peak_stop_times[1:]
+    # Throw out last peak if incomplete
+    if len(peak_start_times) > len(peak_stop_times):
+        peak_start_times = peak_start_times[:-1]
+    # Find peak durations
+    peak_durations = peak_stop_times - peak_start_times
+    # Find peak speed and indices
+    peak_speeds = []
+    peak_indices = []
+    for start, stop in zip(peak_start_times,peak_stop_times):
+        peak_speed = np.max(speed[start:stop])
+        peak_index = np.argmax(speed[start:stop])
+        peak_speeds.append(peak_speed)
+        peak_indices.append(start + peak_index)
+    # Convert to arrays
+    peak_speeds = np.array(peak_speeds)
+    peak_indices = np.array(peak_indices)
+    # Measure inter-peak_interval
+    peak_intervals = np.diff(peak_indices, prepend=[0])
+    # Filter for good saccades
+    good_peaks = (peak_intervals > 25) * (peak_durations < 30) * (peak_durations > 4) * (peak_speeds < 100)
+    peak_speeds = peak_speeds[good_peaks]
+    peak_indices = peak_indices[good_peaks]
+    peak_durations = peak_durations[good_peaks]
+    peak_intervals = peak_intervals[good_peaks]
+    return peak_speeds, peak_indices, peak_durations, peak_intervals
+
 ##########################################################
 #### MODIFY THIS FIRST FUNCTION BASED ON THE LOCATIONS OF:
 # 1) data_dir (folder with all intermediate data for this project, used as both input and output location of data for this script)
@@ -57,6 +113,10 @@ if __name__=='__main__':
     now = datetime.datetime.now()
     todays_datetime = datetime.datetime.today().strftime('%Y%m%d-%H%M%S')
     logging.basicConfig(filename="sd02DetectSaccades_" + todays_datetime + ".log", filemode='w', level=logging.INFO)
+    # timers and counters, one json line per stimulus in the instrumentation folder
+    instrumentation_folder = os.path.join(current_working_directory, "instrumentation")
+    instrumentation_run = "sd02DetectSaccades_" + todays_datetime
+    instruments = StageInstruments(instrumentation_run, instrumentation_folder, stage='sd02')
     ###################################
     # SOURCE DATA AND OUTPUT FILE LOCATIONS 
     ###################################
@@ -123,55 +183,17 @@ if __name__=='__main__':
             # Check if current stimulus number
             if(stimulus == s):
                 # Load speed_file
-                speed = np.fromfile(speed_file, dtype=np.float32)
+                with instruments.timer('load'):
+                    speed = np.fromfile(speed_file, dtype=np.float32)
+                if len(speed) >= trial_len_cutoff:
+                    instruments.count('too_long_trials')
                 if len(speed) < trial_len_cutoff:
                     # Find "peaks" greater than some threshold?
                     low_threshold = 0.5
                     high_threshold = 1.5
-                    peak_start_times = []
-                    peak_stop_times = []
-                    peaking = False
-                    for i, sp in enumerate(speed):
-                        # Look for a new peak
-                        if(not peaking):
-                            if(sp > high_threshold):
-                                peaking = True
-                                peak_start_times.append(i)
-                        # Track ongoing peak    
-                        else:
-                            if(sp < low_threshold):
-                                peaking = False       
-                                peak_stop_times.append(i)
-                    # Convert to arrays
-                    peak_start_times = np.array(peak_start_times)
-                    peak_stop_times = np.array(peak_stop_times)
-                    # Throw out the first peak
-                    peak_start_times = peak_start_times[1:]
-                    peak_stop_times = peak_stop_times[1:]
-                    # Throw out last peak if incomplete
-                    if len(peak_start_times) > len(peak_stop_times):
-                        peak_start_times = peak_start_times[:-1]
-                    # Find peak durations
-                    peak_durations = peak_stop_times - peak_start_times
-                    # Find peak speed and indices
-                    peak_speeds = []
-                    peak_indices = []
-                    for start, stop in zip(peak_start_times,peak_stop_times):
-                        peak_speed = np.max(speed[start:stop])
-                        peak_index = np.argmax(speed[start:stop])
-                        peak_speeds.append(peak_speed)
-                        peak_indices.append(start + peak_index)
-                    # Convert to arrays
-                    peak_speeds = np.array(peak_speeds)
-                    peak_indices = np.array(peak_indices)
-                    # Measure inter-peak_interval
-                    peak_intervals = np.diff(peak_indices, prepend=[0])
-                    # Filter for good saccades
-                    good_peaks = (peak_intervals > 25) * (peak_durations < 30) * (peak_durations > 4) * (peak_speeds < 100)
-                    peak_speeds = peak_speeds[good_peaks]
-                    peak_indices = peak_indices[good_peaks]
-                    peak_durations = peak_durations[good_peaks]
-                    peak_intervals = peak_intervals[good_peaks]
+                    with instruments.timer('detect', items=len(speed)):
+                        peak_speeds, peak_indices, peak_durations, peak_intervals = detect_peaks(speed, low_threshold, high_threshold)
+                    instruments.count('saccades', len(peak_indices))
                     # categorise peaks according to the sequence they happened within
                     # peak speeds
                     calib_peaks_speeds = []
@@ -198,28 +220,33 @@ if __name__=='__main__':
                     octo_peaks_indices = np.array(octo_peaks_indices)
                     unique_peaks_indices = np.array(unique_peaks_indices)
                     # Store
-                    # calibration
-                    calib_path = calib_folder + os.sep + 'stim%d_%s_calib-peaks_%d.npz' % (stimulus, eye, calib_trials)
-                    np.savez(calib_path, speeds=calib_peaks_speeds, indices=calib_peaks_indices)
-                    calib_trials = calib_trials + 1
-                    # octo
-                    octo_path = octo_folder + os.sep + 'stim%d_%s_octo-peaks_%d.npz' % (stimulus, eye, octo_trials)
-                    np.savez(octo_path, speeds=octo_peaks_speeds, indices=octo_peaks_indices)
-                    octo_trials = octo_trials + 1
-                    # unique
-                    unique_path = unique_folders[stimulus] + os.sep + 'stim%d_%s_unique-peaks_%d.npz' % (stimulus, eye, unique_trials[stimulus])
-                    np.savez(unique_path, speeds=unique_peaks_speeds, indices=unique_peaks_indices)
-                    unique_trials[stimulus] = unique_trials[stimulus] + 1
-                    # report progress
-                    print('Calib trial count: {c}'.format(c=calib_trials))
-                    print('Octo trial count: {o}'.format(o=octo_trials))
-                    print('Unique stim {s} count: {u}'.format(s=stimulus, u=unique_trials[stimulus]))
-                    print('---')
-                    print('---')
+                    with instruments.timer('save', items=3):
+                        # calibration
+                        calib_path = calib_folder + os.sep + 'stim%d_%s_calib-peaks_%d.npz' % (stimulus, eye, calib_trials)
+                        np.savez(calib_path, speeds=calib_peaks_speeds, indices=calib_peaks_indices)
+                        calib_trials = calib_trials + 1
+                        # octo
+                        octo_path = octo_folder + os.sep + 'stim%d_%s_octo-peaks_%d.npz' % (stimulus, eye, octo_trials)
+                        np.savez(octo_path, speeds=octo_peaks_speeds, indices=octo_peaks_indices)
+                        octo_trials = octo_trials + 1
+                        # unique
+                        unique_path = unique_folders[stimulus] + os.sep + 'stim%d_%s_unique-peaks_%d.npz' % (stimulus, eye, unique_trials[stimulus])
+                        np.savez(unique_path, speeds=unique_peaks_speeds, indices=unique_peaks_indices)
+                        unique_trials[stimulus] = unique_trials[stimulus] + 1
+                    instruments.count('trials')
+        # report progress once per stimulus
+        record = instruments.flush('stimulus', 'stim%d' % (s))
+        print('Stimulus {s}: {u} unique trials, {n} saccades, calib trial count {c}, octo trial count {o}, {w:.1f}s'.format(s=s, u=unique_trials[s], n=record['counters'].get('saccades', 0), c=calib_trials, o=octo_trials, w=record['wall_s']))
         logging.info('Stimulus number {s} complete'.format(s=s+1))
-        logging.info('Total unique stim {s} trial count: {u}'.format(s=s+1, u=unique_trials[stimulus]))
+        logging.info('Total unique stim {s} trial count: {u}'.format(s=s+1, u=unique_trials[s]))
+        logging.info(json.dumps(record))
     logging.info('Total calibration trial count: {c}'.format(c=calib_trials))
     logging.info('Total octopus trial count: {o}'.format(o=octo_trials))
+    instruments.close()
+    run_summary, summary_path = write_run_summary(instrumentation_folder, instrumentation_run)
+    for line in format_summary(run_summary):
+        print(line)
+        logging.info(line)
 
 
 # FIN
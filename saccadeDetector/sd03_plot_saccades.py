@@ -22,13 +22,14 @@ Optional flags:
 import os
 import glob
 import numpy as np
-import matplotlib.pyplot as plt
 import datetime
 import os.path
 import argparse
 import logging
-import time
-from joblib import Parallel, delayed
+import sys
+# make the shared surprisingMinds package (in the repo root) importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from surprisingMinds.instrumentation import StageInstruments, write_run_summary, format_summary
 
 ###################################
 # SET CURRENT WORKING DIRECTORY
@@ -38,6 +39,7 @@ current_working_directory = os.getcwd()
 # FUNCTIONS
 ###################################
 def plot_sequence(seq_type):
+    import matplotlib.pyplot as plt
     peak_files = seq_peak_files[seq_type]
     seq_trial_count = len(peak_files)
     # set figure save path and title
@@ -56,7 +58,8 @@ def plot_sequence(seq_type):
         alpha_plotting = 0.3
         x_max = 2759
     count = 0
-    start_time = time.time_ns()
+    # timers and counters of this sequence, in this worker's records file
+    instruments = StageInstruments(instrumentation_run, instrumentation_folder, stage='sd03')
     for i, peak_file in enumerate(peak_files):
         # Get stimulus number
         trial_name = os.path.basename(peak_file)
@@ -65,60 +68,62 @@ def plot_sequence(seq_type):
         stimulus = int(fields[0][-1])
         seq = fields[2].split('-')[0]
         # Load peak_file
-        peaks = np.load(peak_file)
-        peak_speeds = peaks['speeds']
-        peak_indices = peaks['indices']
+        with instruments.timer('load'):
+            peaks = np.load(peak_file)
+            peak_speeds = peaks['speeds']
+            peak_indices = peaks['indices']
         # Make some peak categories
         big_speeds = (peak_speeds < big_upper) * (peak_speeds > big_lower)
         med_speeds = (peak_speeds < med_upper) * (peak_speeds > med_lower)
         lil_speeds = (peak_speeds < lil_upper) * (peak_speeds > lil_lower)
         # Plot a saccade raster
-        ## big saccades
-        num_peaks = np.sum(big_speeds)
-        row_value = count*np.ones(num_peaks)
-        plt.subplot(3,1,1)
-        plt.ylabel('Individual Trials', fontsize=9)
-        plt.title('Big Saccades (pupil movements between {l} and {u} pixels per frame)'.format(l=big_lower, u=big_upper), fontsize=10, color='grey', style='italic')
-        plot_xticks = np.arange(0, x_max, step=250)
-        plt.xticks(plot_xticks, ['%.1f'%(x/250) for x in plot_xticks])
-        plt.plot(peak_indices[big_speeds], row_value, 'r.', alpha=alpha_plotting)
-        ## medium saccades
-        num_peaks = np.sum(med_speeds)
-        row_value = count*np.ones(num_peaks)
-        plt.subplot(3,1,2)
-        plt.ylabel('Individual Trials', fontsize=9)
-        plt.title('Medium Saccades (pupil movements between {l} and {u} pixels per frame)'.format(l=med_lower, u=med_upper), fontsize=10, color='grey', style='italic')
-        plot_xticks = np.arange(0, x_max, step=250)
-        plt.xticks(plot_xticks, ['%.1f'%(x/250) for x in plot_xticks])
-        plt.plot(peak_indices[med_speeds], row_value, 'b.', alpha=alpha_plotting)
-        ## little saccades
-        num_peaks = np.sum(lil_speeds)
-        row_value = count*np.ones(num_peaks)
-        plt.subplot(3,1,3)
-        plt.ylabel('Individual Trials', fontsize=9)
-        plt.xlabel('Time (seconds) since beginning of this sequence', fontsize=9)
-        plt.title('Small Saccades (pupil movements between {l} and {u} pixels per frame)'.format(l=lil_lower, u=lil_upper), fontsize=10, color='grey', style='italic')
-        plot_xticks = np.arange(0, x_max, step=250)
-        plt.xticks(plot_xticks, ['%.1f'%(x/250) for x in plot_xticks])
-        plt.plot(peak_indices[lil_speeds], row_value, 'k.', alpha=alpha_plotting)
-        # Report
-        end_time = time.time_ns()
-        elapsed_time = (end_time - start_time)/1000000000
-        logging.info('Sequence type: {s}, Trial count: {c}'.format(s=seq_type, c=count))
-        logging.info('Elapsed time: {e}'.format(e=elapsed_time))
-        logging.info('Rate: {r}'.format(r=count/elapsed_time))
-        print('Sequence type: {s}, Trial count: {c}'.format(s=seq_type, c=count))
-        # print('Elapsed time: {e}'.format(e=elapsed_time))
-        # print('Rate: {r}'.format(r=count/elapsed_time))
-        print("--")
-        print("--")
+        with instruments.timer('plot'):
+            ## big saccades
+            num_peaks = np.sum(big_speeds)
+            row_value = count*np.ones(num_peaks)
+            plt.subplot(3,1,1)
+            plt.ylabel('Individual Trials', fontsize=9)
+            plt.title('Big Saccades (pupil movements between {l} and {u} pixels per frame)'.format(l=big_lower, u=big_upper), fontsize=10, color='grey', style='italic')
+            plot_xticks = np.arange(0, x_max, step=250)
+            plt.xticks(plot_xticks, ['%.1f'%(x/250) for x in plot_xticks])
+            plt.plot(peak_indices[big_speeds], row_value, 'r.', alpha=alpha_plotting)
+            ## medium saccades
+            num_peaks = np.sum(med_speeds)
+            row_value = count*np.ones(num_peaks)
+            plt.subplot(3,1,2)
+            plt.ylabel('Individual Trials', fontsize=9)
+            plt.title('Medium Saccades (pupil movements between {l} and {u} pixels per frame)'.format(l=med_lower, u=med_upper), fontsize=10, color='grey', style='italic')
+            plot_xticks = np.arange(0, x_max, step=250)
+            plt.xticks(plot_xticks, ['%.1f'%(x/250) for x in plot_xticks])
+            plt.plot(peak_indices[med_speeds], row_value, 'b.', alpha=alpha_plotting)
+            ## little saccades
+            num_peaks = np.sum(lil_speeds)
+            row_value = count*np.ones(num_peaks)
+            plt.subplot(3,1,3)
+            plt.ylabel('Individual Trials', fontsize=9)
+            plt.xlabel('Time (seconds) since beginning of this sequence', fontsize=9)
+            plt.title('Small Saccades (pupil movements between {l} and {u} pixels per frame)'.format(l=lil_lower, u=lil_upper), fontsize=10, color='grey', style='italic')
+            plot_xticks = np.arange(0, x_max, step=250)
+            plt.xticks(plot_xticks, ['%.1f'%(x/250) for x in plot_xticks])
+            plt.plot(peak_indices[lil_speeds], row_value, 'k.', alpha=alpha_plotting)
+        instruments.count('trials')
+        instruments.count('saccades', len(peak_indices))
         count = count + 1
+    # Report once per sequence
+    record = instruments.flush('sequence', seq_type)
+    logging.info('Sequence type: {s}, Trial count: {c}'.format(s=seq_type, c=count))
+    logging.info('Elapsed time: {e}'.format(e=record['wall_s']))
+    if record['wall_s'] > 0:
+        logging.info('Rate: {r}'.format(r=count/record['wall_s']))
+    print('Sequence type: {s}, Trial count: {c}, {w:.1f}s'.format(s=seq_type, c=count, w=record['wall_s']))
     # save and display
     #plt.subplots_adjust(hspace=0.5)
-    plt.savefig(figure_path)
+    with instruments.timer('save'):
+        plt.savefig(figure_path)
     plt.show(block=False)
     plt.pause(1)
     plt.close()
+    instruments.close()
 
 ##########################################################
 #### MODIFY THIS FIRST FUNCTION BASED ON THE LOCATIONS OF:
@@ -135,6 +140,7 @@ def load_data():
 # BEGIN SCRIPT
 ##########################################################
 if __name__=='__main__':
+    from joblib import Parallel, delayed
     parser = argparse.ArgumentParser(
         description='''Detect saccades.
         Loads speed files generated by pm01_measure_speeds.py and finds the saccades
@@ -157,6 +163,9 @@ if __name__=='__main__':
     now = datetime.datetime.now()
     todays_datetime = datetime.datetime.today().strftime('%Y%m%d-%H%M%S')
     logging.basicConfig(filename="sd03PlotSaccades_" + todays_datetime + ".log", filemode='w', level=logging.INFO)
+    # timers and counters of every sequence, as json lines in the instrumentation folder
+    instrumentation_folder = os.path.join(current_working_directory, "instrumentation")
+    instrumentation_run = "sd03PlotSaccades_" + todays_datetime
     ###################################
     # SOURCE DATA AND OUTPUT FILE LOCATIONS 
     ###################################
@@ -187,4 +196,9 @@ if __name__=='__main__':
     fsize = 200 #dpi
     # parallelize the plotting process to make it faster
     Parallel()(delayed(plot_sequence)(seq_type) for seq_type in seq_peak_files.keys())
+    # merge the timers and counters of all sequences
+    run_summary, summary_path = write_run_summary(instrumentation_folder, instrumentation_run)
+    for line in format_summary(run_summary):
+        print(line)
+        logging.info(line)
 # FIN
\ No newline at end of file
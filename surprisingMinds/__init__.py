@@ -0,0 +1,5 @@
+### --------------------------------------------------------------------------- ###
+# shared building blocks of the Surprising Minds analysis scripts
+# importing anything from this package has no side effects (no logging setup, no data processing)
+# scripts in preprocessing/, pupilMotion/, pupilSize/ and saccadeDetector/ add the repo root to sys.path to import it
+### --------------------------------------------------------------------------- ###
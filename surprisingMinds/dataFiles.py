@@ -0,0 +1,28 @@
+### --------------------------------------------------------------------------- ###
+# locating and unpacking the daily folders of the Surprising Minds dataset
+### --------------------------------------------------------------------------- ###
+import os
+import shutil
+import zipfile
+import logging
+
+def unpack_to_temp(path_to_zipped, path_to_temp):
+    # copy a zipped day folder into the current working directory, then extract it into path_to_temp
+    # the copy is always deleted, also when unzipping fails
+    path_to_copied_zipped = None
+    try:
+        path_to_copied_zipped = shutil.copy2(path_to_zipped, os.getcwd())
+        with zipfile.ZipFile(path_to_copied_zipped, mode="r") as day_unzipped:
+            day_unzipped.extractall(path_to_temp)
+        return True
+    except Exception:
+        print("Could not unzip {folder}".format(folder=path_to_zipped))
+        logging.warning("Could not unzip {folder}".format(folder=path_to_zipped))
+        return False
+    finally:
+        if path_to_copied_zipped is not None and os.path.exists(path_to_copied_zipped):
+            os.remove(path_to_copied_zipped)
+
+def list_sub_folders(path_to_root_folder):
+    # full paths of all sub folders, in directory listing order
+    return [entry.path for entry in os.scandir(path_to_root_folder) if entry.is_dir()]
@@ -0,0 +1,197 @@
+### --------------------------------------------------------------------------- ###
+# on-disk cache of decoded grayscale eye video frames, so repeat pupil detection runs skip the zip copy, unzip and decode
+# one entry per eye video of a trial: frames.npy (uint8, frames x height x width, loaded memory-mapped), the timestamps csv as an array of strings,
+# and entry.json (frame count, source frame size, crop and scale), in <cache folder>/<day>/<trial>_<eye>
+# frames can be cropped (left, top, width, height in source pixels) and then downscaled, CachedFrames maps detections back to source pixels
+# entries are written to a temp folder and renamed into place, so a crash never leaves a half-written entry
+# entry.json is touched on every use, and the least recently used entries are deleted when the cache grows over its disk quota
+# a day manifest (<day>.json) lists the trials of a day once all of them are cached, so a cached day needs no unzipping at all
+### --------------------------------------------------------------------------- ###
+import os
+import json
+import shutil
+import logging
+import numpy as np
+
+MB = 1024*1024
+
+class CachedFrames(object):
+    # decoded frames of one eye video, frames[i] is the grayscale frame i (None past the last decoded frame)
+    def __init__(self, entry_folder, entry):
+        self.entry_folder = entry_folder
+        self.video = entry['video']
+        self.no_of_frames = entry['frames']
+        self.source_size = tuple(entry['source_size'])
+        self.crop = tuple(entry['crop']) if entry['crop'] is not None else None
+        self.scale = entry['scale']
+        self.frames = np.load(os.path.join(entry_folder, 'frames.npy'), mmap_mode='r')
+        self.timestamps = np.load(os.path.join(entry_folder, 'timestamps.npy'))
+
+    def __len__(self):
+        return self.no_of_frames
+
+    def __getitem__(self, frame_number):
+        if frame_number >= self.no_of_frames:
+            return None
+        return self.frames[frame_number]
+
+    def to_source(self, x, y):
+        # cached frame pixel -> source video pixel
+        left, top = (self.crop[0], self.crop[1]) if self.crop is not None else (0, 0)
+        return x/self.scale + left, y/self.scale + top
+
+    def area_to_source(self, area):
+        return area/(self.scale*self.scale)
+
+class FrameCache(object):
+    def __init__(self, cache_folder, quota_mb, scale=1.0, crop=None):
+        # quota_mb: disk space the cache may use, least recently used entries are deleted beyond it
+        # scale: downscale factor of cached frames (1.0 keeps full resolution)
+        # crop: (left, top, width, height) of the source frames to keep, None keeps whole frames
+        self.cache_folder = cache_folder
+        self.quota_mb = quota_mb
+        self.scale = scale
+        self.crop = tuple(crop) if crop is not None else None
+        if not os.path.exists(cache_folder):
+            os.makedirs(cache_folder, exist_ok=True)
+        # entry folder -> [bytes, last used], of every entry on disk (other processes may add more, see evict)
+        self.entries = self.scan()
+
+    def entry_folder(self, day, trial, eye):
+        return os.path.join(self.cache_folder, day, '%s_%s' % (trial, eye))
+
+    def manifest_path(self, day):
+        return os.path.join(self.cache_folder, day + '.json')
+
+    def scan(self):
+        entries = {}
+        for day_entry in os.scandir(self.cache_folder):
+            if not day_entry.is_dir():
+                continue
+            for entry in os.scandir(day_entry.path):
+                # entries other processes are still writing are theirs to finish or clean up
+                if '.tmp-' in entry.name:
+                    continue
+                entry_json = os.path.join(entry.path, 'entry.json')
+                if entry.is_dir() and os.path.exists(entry_json):
+                    entries[entry.path] = [sum(item.stat().st_size for item in os.scandir(entry.path)), os.path.getmtime(entry_json)]
+        return entries
+
+    def size_mb(self):
+        return sum(size for size, last_used in self.entries.values())/MB
+
+    def read_entry(self, entry_folder):
+        # entry.json of a cached eye video, None if it is not cached (or was cached with another crop or scale)
+        try:
+            with open(os.path.join(entry_folder, 'entry.json'), 'r') as entry_file:
+                entry = json.load(entry_file)
+        except (IOError, OSError, ValueError):
+            return None
+        if entry['scale'] != self.scale or (tuple(entry['crop']) if entry['crop'] is not None else None) != self.crop:
+            return None
+        return entry
+
+    def get(self, day, trial, eye):
+        # CachedFrames of an eye video, None if it is not cached
+        entry_folder = self.entry_folder(day, trial, eye)
+        entry = self.read_entry(entry_folder)
+        if entry is None:
+            return None
+        try:
+            os.utime(os.path.join(entry_folder, 'entry.json'), None)
+            cached = CachedFrames(entry_folder, entry)
+        except (IOError, OSError, ValueError):
+            # evicted by another process meanwhile
+            return None
+        if entry_folder in self.entries:
+            self.entries[entry_folder][1] = os.path.getmtime(os.path.join(entry_folder, 'entry.json'))
+        return cached
+
+    def put(self, day, trial, eye, video_path, timestamps):
+        # decode every frame of an eye video into the cache, returns its CachedFrames
+        import cv2
+        entry_folder = self.entry_folder(day, trial, eye)
+        temp_folder = entry_folder + '.tmp-%d' % (os.getpid())
+        if os.path.exists(temp_folder):
+            shutil.rmtree(temp_folder)
+        os.makedirs(temp_folder)
+        video = cv2.VideoCapture(video_path)
+        source_size = (int(video.get(cv2.CAP_PROP_FRAME_WIDTH)), int(video.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        left, top, width, height = self.crop if self.crop is not None else (0, 0, source_size[0], source_size[1])
+        cached_size = (int(round(width*self.scale)), int(round(height*self.scale)))
+        # room for a frame per timestamp, frames past the end of the video stay unused
+        frames = np.lib.format.open_memmap(os.path.join(temp_folder, 'frames.npy'), mode='w+', dtype=np.uint8, shape=(len(timestamps), cached_size[1], cached_size[0]))
+        no_of_frames = 0
+        for frame_number in range(len(timestamps)):
+            ret, frame = video.read()
+            if frame is None:
+                break
+            # same conversion as find_pupil
+            gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)[top:top+height, left:left+width]
+            if self.scale != 1.0:
+                gray = cv2.resize(gray, cached_size, interpolation=cv2.INTER_AREA)
+            frames[frame_number] = gray
+            no_of_frames = no_of_frames + 1
+        video.release()
+        frames.flush()
+        del frames
+        np.save(os.path.join(temp_folder, 'timestamps.npy'), np.asarray(timestamps, dtype=str))
+        entry = {'video': os.path.basename(video_path), 'frames': no_of_frames, 'source_size': source_size, 'crop': self.crop, 'scale': self.scale}
+        with open(os.path.join(temp_folder, 'entry.json'), 'w') as entry_file:
+            json.dump(entry, entry_file)
+        if os.path.exists(entry_folder):
+            # an entry with another crop or scale
+            shutil.rmtree(entry_folder)
+        try:
+            os.replace(temp_folder, entry_folder)
+        except OSError:
+            # another process cached the same video meanwhile
+            shutil.rmtree(temp_folder, ignore_errors=True)
+        self.entries[entry_folder] = [sum(item.stat().st_size for item in os.scandir(entry_folder)), os.path.getmtime(os.path.join(entry_folder, 'entry.json'))]
+        # the other eye of the trial was likely just cached too, and is about to be used with this one
+        self.evict(keep=[self.entry_folder(day, trial, trial_eye) for trial_eye in ('right', 'left')])
+        return CachedFrames(entry_folder, entry)
+
+    def evict(self, keep=()):
+        # delete least recently used entries until the cache fits its quota, never the entry folders in keep
+        if self.size_mb() <= self.quota_mb:
+            return
+        # other processes may share the cache folder, count their entries too
+        self.entries = self.scan()
+        for entry_folder, (size, last_used) in sorted(self.entries.items(), key=lambda item: item[1][1]):
+            if self.size_mb() <= self.quota_mb:
+                break
+            if entry_folder in keep:
+                continue
+            logging.info('Frame cache over its %.0f MB quota, deleting %s' % (self.quota_mb, entry_folder))
+            shutil.rmtree(entry_folder, ignore_errors=True)
+            if os.path.exists(entry_folder):
+                # files still open (e.g. memory-mapped by another process on Windows) are not deleted, keep counting what is left
+                self.entries[entry_folder][0] = sum(item.stat().st_size for item in os.scandir(entry_folder))
+                logging.warning('Could not delete all of %s from the frame cache, %.0f MB left' % (entry_folder, self.entries[entry_folder][0]/MB))
+            else:
+                del self.entries[entry_folder]
+            # the day is no longer completely cached
+            day_manifest = self.manifest_path(os.path.basename(os.path.dirname(entry_folder)))
+            if os.path.exists(day_manifest):
+                os.remove(day_manifest)
+
+    def save_manifest(self, day, trials):
+        # trials: [trial name, stimuli name] of every trial of the day, in the order they were analysed
+        manifest_path = self.manifest_path(day)
+        with open(manifest_path + '.tmp-%d' % (os.getpid()), 'w') as manifest_file:
+            json.dump({'day': day, 'trials': trials}, manifest_file)
+        os.replace(manifest_path + '.tmp-%d' % (os.getpid()), manifest_path)
+
+    def cached_trials(self, day, eyes=('right', 'left')):
+        # [trial name, stimuli name] of every trial of a day if every eye video of the day is cached, None otherwise
+        try:
+            with open(self.manifest_path(day), 'r') as manifest_file:
+                trials = json.load(manifest_file)['trials']
+        except (IOError, OSError, ValueError):
+            return None
+        for trial, stimuli_name in trials:
+            for eye in eyes:
+                if self.read_entry(self.entry_folder(day, trial, eye)) is None:
+                    return None
+        return trials
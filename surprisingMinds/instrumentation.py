@@ -0,0 +1,299 @@
+### --------------------------------------------------------------------------- ###
+# lightweight named timers and counters for the stage scripts, cheap enough to leave on
+# timers sum calls, wall seconds, cpu seconds (of the whole process) and items, counters sum integers
+# flush() appends one json line with the sums since the last flush (e.g. one trial or one day) to the records file of this worker process
+# every worker process writes its own file (no locking between joblib workers), close() appends the totals of the instruments
+# merge_run_records() sums the totals of every worker of a run, per worker and for the whole run
+# with a FrameProfile, the timers of its steps also keep the wall seconds of every step in every frame, and the result code of every frame,
+# summarized (percentiles and code histogram) per trial and per day
+### --------------------------------------------------------------------------- ###
+import os
+import glob
+import json
+import time
+import socket
+import datetime
+import itertools
+import numpy as np
+
+# numbers the instruments made in one process, so records of separate instruments (e.g. joblib tasks) stay apart
+instrument_ids = itertools.count()
+
+class StageTimer(object):
+    # context manager around one named step, made once per name and reused on every call
+    __slots__ = ('stats', 'items', 'wall_start', 'cpu_start')
+
+    def __init__(self, stats):
+        # stats: [calls, wall seconds, cpu seconds, items], shared with the instruments
+        self.stats = stats
+        self.items = 0
+
+    def __enter__(self):
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        stats = self.stats
+        stats[0] += 1
+        stats[1] += time.perf_counter() - self.wall_start
+        stats[2] += time.process_time() - self.cpu_start
+        stats[3] += self.items
+        return False
+
+class ProfiledStageTimer(StageTimer):
+    # also adds its wall seconds to its step in the current frame of a FrameProfile
+    __slots__ = ('frame_profile', 'column')
+
+    def __init__(self, stats, frame_profile, column):
+        StageTimer.__init__(self, stats)
+        self.frame_profile = frame_profile
+        self.column = column
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall_s = time.perf_counter() - self.wall_start
+        stats = self.stats
+        stats[0] += 1
+        stats[1] += wall_s
+        stats[2] += time.process_time() - self.cpu_start
+        stats[3] += self.items
+        self.frame_profile.frame[self.column] += wall_s
+        return False
+
+class FrameProfile(object):
+    def __init__(self, steps):
+        # names of the timers that run inside a frame (others, like a csv write per trial, are not part of a frame)
+        # wall seconds of each step in the current frame (0 = step did not run)
+        self.steps = list(steps)
+        self.frame = [0.0]*len(self.steps)
+        # finished frames (lists of step seconds) and their result codes, of the current trial and day
+        self.trial_frames = []
+        self.trial_codes = []
+        self.day_frames = []
+        self.day_codes = []
+
+    def end_frame(self, code):
+        self.trial_frames.append(self.frame)
+        self.trial_codes.append(code)
+        self.frame = [0.0]*len(self.steps)
+
+    def end_trial(self, **fields):
+        # summary of the frames since the last end_trial, which then count towards the day
+        summary = profile_summary(self.steps, self.trial_frames, self.trial_codes)
+        summary.update(fields)
+        self.day_frames.extend(self.trial_frames)
+        self.day_codes.extend(self.trial_codes)
+        self.trial_frames = []
+        self.trial_codes = []
+        return summary
+
+    def end_day(self, **fields):
+        # summary of every frame of the trials since the last end_day
+        summary = profile_summary(self.steps, self.day_frames, self.day_codes)
+        summary.update(fields)
+        self.day_frames = []
+        self.day_codes = []
+        return summary
+
+def profile_summary(steps, frames, codes):
+    # code histogram, and per step the frames it ran in, total seconds, median, 95th percentile and max milliseconds
+    summary = {'frames': len(frames), 'codes': {}, 'steps': {}}
+    for code in codes:
+        summary['codes'][code] = summary['codes'].get(code, 0) + 1
+    if not frames:
+        return summary
+    frame_seconds = np.array(frames)
+    for column, step in enumerate(steps):
+        ran = frame_seconds[:, column][frame_seconds[:, column] > 0]
+        if len(ran) == 0:
+            continue
+        summary['steps'][step] = {'frames': len(ran), 'total_s': round(float(ran.sum()), 3), 'median_ms': round(1000*float(np.median(ran)), 3),
+                                  'p95_ms': round(1000*float(np.percentile(ran, 95)), 3), 'max_ms': round(1000*float(ran.max()), 3)}
+    per_frame = frame_seconds.sum(axis=1)
+    summary['frame_ms'] = {'median': round(1000*float(np.median(per_frame)), 3), 'p95': round(1000*float(np.percentile(per_frame, 95)), 3), 'max': round(1000*float(per_frame.max()), 3)}
+    return summary
+
+def format_profile_summary(summary):
+    # one line: frames, code histogram, then median/95th percentile ms of each step
+    line = '%d frames (%s)' % (summary['frames'], ', '.join('%s %d' % (code, number) for code, number in sorted(summary['codes'].items(), key=lambda item: -item[1])))
+    steps = ', '.join('%s %.1f/%.1f ms' % (step, stats['median_ms'], stats['p95_ms']) for step, stats in summary['steps'].items())
+    if steps:
+        line = line + ', median/p95: ' + steps
+    return line
+
+class NullTimer(object):
+    # what disabled instruments hand out: does nothing
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+null_timer = NullTimer()
+
+class StageInstruments(object):
+    def __init__(self, run_name=None, records_folder=None, stage=None, enabled=True, frame_profile=None):
+        # without a records folder the sums are only kept in memory (and returned by flush and close)
+        # with a frame_profile (FrameProfile), the timers also record every frame (see end_frame)
+        self.enabled = enabled
+        self.frame_profile = frame_profile if enabled else None
+        self.run_name = run_name
+        self.stage = stage
+        self.worker = '%s-%d' % (socket.gethostname(), os.getpid())
+        self.instrument_id = '%s-%d-%d' % (self.worker, int(time.time()*1000), next(instrument_ids))
+        self.records_path = None
+        if enabled and records_folder is not None and run_name is not None:
+            run_folder = os.path.join(records_folder, run_name)
+            if not os.path.exists(run_folder):
+                os.makedirs(run_folder, exist_ok=True)
+            self.records_path = os.path.join(run_folder, self.worker + '.jsonl')
+        self.timers = {}
+        self.timer_stats = {}
+        self.counters = {}
+        self.total_timer_stats = {}
+        self.total_counters = {}
+        self.started = time.perf_counter()
+        self.interval_started = self.started
+
+    def timer(self, name, items=1):
+        # with instruments.timer('blur'): ... adds one call, its wall and cpu seconds, and items (e.g. frames) to 'blur'
+        if not self.enabled:
+            return null_timer
+        stage_timer = self.timers.get(name)
+        if stage_timer is None:
+            self.timer_stats[name] = [0, 0.0, 0.0, 0]
+            if self.frame_profile is not None and name in self.frame_profile.steps:
+                stage_timer = self.timers[name] = ProfiledStageTimer(self.timer_stats[name], self.frame_profile, self.frame_profile.steps.index(name))
+            else:
+                stage_timer = self.timers[name] = StageTimer(self.timer_stats[name])
+        stage_timer.items = items
+        return stage_timer
+
+    def count(self, name, number=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + number
+
+    def end_frame(self, code):
+        # counts the result code of a frame (e.g. why no pupil was found) and, when profiling, closes the frame
+        if not self.enabled:
+            return
+        self.counters[code] = self.counters.get(code, 0) + 1
+        if self.frame_profile is not None:
+            self.frame_profile.end_frame(code)
+
+    def flush(self, scope, label=None, **fields):
+        # one record with the sums since the last flush, which start again from zero
+        if not self.enabled:
+            return None
+        now = time.perf_counter()
+        record = {'run': self.run_name, 'stage': self.stage, 'worker': self.worker, 'instruments': self.instrument_id, 'scope': scope, 'label': label,
+                  'time': datetime.datetime.now().isoformat(timespec='seconds'), 'wall_s': now - self.interval_started,
+                  'timers': timers_record(self.timer_stats), 'counters': dict(self.counters)}
+        record.update(fields)
+        for name, stats in self.timer_stats.items():
+            total_stats = self.total_timer_stats.setdefault(name, [0, 0.0, 0.0, 0])
+            for index in range(4):
+                total_stats[index] += stats[index]
+                stats[index] = 0 if index in (0, 3) else 0.0
+        for name, number in self.counters.items():
+            self.total_counters[name] = self.total_counters.get(name, 0) + number
+        self.counters = {}
+        self.interval_started = now
+        self.write_record(record)
+        return record
+
+    def close(self, **fields):
+        # flushes what is left (if anything), then writes the totals of these instruments
+        if not self.enabled:
+            return None
+        if any(stats[0] for stats in self.timer_stats.values()) or self.counters:
+            self.flush('rest')
+        record = {'run': self.run_name, 'stage': self.stage, 'worker': self.worker, 'instruments': self.instrument_id, 'scope': 'total', 'label': None,
+                  'time': datetime.datetime.now().isoformat(timespec='seconds'), 'wall_s': time.perf_counter() - self.started,
+                  'timers': timers_record(self.total_timer_stats), 'counters': dict(self.total_counters)}
+        record.update(fields)
+        self.write_record(record)
+        return record
+
+    def write_record(self, record):
+        if self.records_path is None:
+            return
+        # one write per line in append mode, so lines of a worker never interleave
+        with open(self.records_path, 'a') as records_file:
+            records_file.write(json.dumps(record) + '\n')
+
+def timers_record(timer_stats):
+    timers = {}
+    for name, (calls, wall_s, cpu_s, items) in timer_stats.items():
+        if calls == 0:
+            continue
+        timers[name] = {'calls': calls, 'wall_s': wall_s, 'cpu_s': cpu_s, 'items': items}
+        if wall_s > 0:
+            timers[name]['items_per_s'] = items/wall_s
+    return timers
+
+def add_record(summary, record):
+    # sum the timers, counters and wall seconds of one record into a summary
+    summary['wall_s'] = summary.get('wall_s', 0.0) + record['wall_s']
+    for name, timer in record['timers'].items():
+        summed = summary['timers'].setdefault(name, {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'items': 0})
+        for key in ['calls', 'wall_s', 'cpu_s', 'items']:
+            summed[key] += timer[key]
+    for name, number in record['counters'].items():
+        summary['counters'][name] = summary['counters'].get(name, 0) + number
+
+def add_rates(summary):
+    for timer in summary['timers'].values():
+        if timer['wall_s'] > 0:
+            timer['items_per_s'] = timer['items']/timer['wall_s']
+    return summary
+
+def merge_run_records(records_folder, run_name):
+    # totals per worker and for the whole run
+    # instruments that never closed (e.g. a crashed worker) count with the sum of their flushed records
+    records_by_instruments = {}
+    for records_path in glob.glob(os.path.join(records_folder, run_name, '*.jsonl')):
+        with open(records_path, 'r') as records_file:
+            for line in records_file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # a line cut short by a crash
+                    continue
+                records_by_instruments.setdefault(record['instruments'], []).append(record)
+    run_summary = {'run': run_name, 'wall_s': 0.0, 'timers': {}, 'counters': {}, 'workers': {}}
+    for records in records_by_instruments.values():
+        totals = [record for record in records if record['scope'] == 'total']
+        worker_summary = run_summary['workers'].setdefault(records[0]['worker'], {'wall_s': 0.0, 'timers': {}, 'counters': {}})
+        for record in (totals[-1:] if totals else records):
+            add_record(worker_summary, record)
+            add_record(run_summary, record)
+    for worker_summary in run_summary['workers'].values():
+        add_rates(worker_summary)
+    # wall seconds of the run summary are summed over workers (worker-seconds), not elapsed time
+    return add_rates(run_summary)
+
+def write_run_summary(records_folder, run_name):
+    run_summary = merge_run_records(records_folder, run_name)
+    summary_path = os.path.join(records_folder, run_name, 'summary.json')
+    # no worker wrote records (e.g. no days to process), so the run folder was never made
+    if not os.path.exists(os.path.dirname(summary_path)):
+        os.makedirs(os.path.dirname(summary_path))
+    with open(summary_path + '.tmp', 'w') as summary_file:
+        json.dump(run_summary, summary_file, indent=1)
+    os.replace(summary_path + '.tmp', summary_path)
+    return run_summary, summary_path
+
+def format_summary(summary):
+    # one line per timer (slowest first) and one line of counters
+    lines = []
+    for name, timer in sorted(summary['timers'].items(), key=lambda item: -item[1]['wall_s']):
+        line = '%-16s %8.2fs wall %8.2fs cpu %8d calls' % (name, timer['wall_s'], timer['cpu_s'], timer['calls'])
+        if 'items_per_s' in timer:
+            line = line + ' %10.1f items/s' % (timer['items_per_s'])
+        lines.append(line)
+    if summary['counters']:
+        lines.append(', '.join('%s: %d' % (name, number) for name, number in sorted(summary['counters'].items())))
+    return lines
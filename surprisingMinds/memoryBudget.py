@@ -0,0 +1,188 @@
+### --------------------------------------------------------------------------- ###
+# peak memory accounting and a memory budget for the stage scripts
+# checkpoint() records resident memory (RSS) now and at peak, the size of the named data structures a stage holds,
+# and (with tracemalloc on, which stages turn on with --trace_memory) the source lines holding the most python-allocated memory
+# the budget itself only needs RSS, so tracing is off by default
+# stages project the memory a step will need with fits() and switch to chunked processing (e.g. per stimulus or per month)
+# when the projection is over budget, instead of dying with MemoryError or swapping
+# save() writes every checkpoint and decision, plus the data structure that dominated at the peak checkpoint, as json
+### --------------------------------------------------------------------------- ###
+import os
+import sys
+import json
+import socket
+import logging
+import datetime
+import tracemalloc
+import numpy as np
+
+MB = 1024*1024
+# budget when a stage is not given one: this fraction of the memory available when the stage starts
+default_budget_fraction = 0.8
+
+def current_rss_mb():
+    # resident memory of this process now, None where it can't be measured
+    try:
+        with open('/proc/self/status', 'r') as status_file:
+            for line in status_file:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])*1024/MB
+    except (IOError, OSError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss/MB
+    except ImportError:
+        return None
+
+def peak_rss_mb():
+    # peak resident memory of this process so far, None where it can't be measured
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset/MB
+        except (ImportError, AttributeError):
+            return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes everywhere else
+    if sys.platform == 'darwin':
+        return peak_rss/MB
+    return peak_rss*1024/MB
+
+def available_memory_mb():
+    # memory the machine can give this process without swapping, None where it can't be measured
+    try:
+        with open('/proc/meminfo', 'r') as meminfo_file:
+            for line in meminfo_file:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1])*1024/MB
+    except (IOError, OSError):
+        pass
+    try:
+        import psutil
+        return psutil.virtual_memory().available/MB
+    except ImportError:
+        return None
+
+def default_memory_budget_mb():
+    available = available_memory_mb()
+    if available is None:
+        return None
+    return default_budget_fraction*available
+
+def data_size_mb(data):
+    # memory held by numpy arrays, numbers and strings in (nested) dicts, lists and tuples
+    # views count the array they keep alive, every buffer is counted once
+    seen = set()
+    def size_bytes(item):
+        if id(item) in seen:
+            return 0
+        seen.add(id(item))
+        if isinstance(item, np.ndarray):
+            if isinstance(item.base, np.ndarray):
+                return size_bytes(item.base)
+            return item.nbytes
+        if isinstance(item, dict):
+            return sys.getsizeof(item) + sum(size_bytes(key) + size_bytes(value) for key, value in item.items())
+        if isinstance(item, (list, tuple, set)):
+            return sys.getsizeof(item) + sum(size_bytes(value) for value in item)
+        if hasattr(item, '__dict__') and not isinstance(item, type):
+            return sys.getsizeof(item) + size_bytes(vars(item))
+        return sys.getsizeof(item)
+    return size_bytes(data)/MB
+
+class MemoryBudget(object):
+    def __init__(self, stage, budget_mb=None, trace=False, top=5):
+        # budget_mb: None uses default_budget_fraction of the memory available now
+        # trace: turn tracemalloc on, so checkpoints name the source lines holding the most memory (slows allocation heavy code noticeably)
+        self.stage = stage
+        self.budget_mb = budget_mb if budget_mb is not None else default_memory_budget_mb()
+        self.top = top
+        self.started = datetime.datetime.now().isoformat(timespec='seconds')
+        self.checkpoints = []
+        self.decisions = []
+        self.traced = trace and not tracemalloc.is_tracing()
+        if self.traced:
+            tracemalloc.start()
+
+    def checkpoint(self, label, **structures):
+        # structures: name=data of the structures the stage holds at this point, sized with data_size_mb
+        checkpoint = {'label': label, 'rss_mb': current_rss_mb(), 'peak_rss_mb': peak_rss_mb()}
+        checkpoint['structures_mb'] = {name: data_size_mb(data) for name, data in structures.items()}
+        if tracemalloc.is_tracing():
+            traced_mb, traced_peak_mb = tracemalloc.get_traced_memory()
+            checkpoint['traced_mb'] = traced_mb/MB
+            checkpoint['traced_peak_mb'] = traced_peak_mb/MB
+            statistics = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)]).statistics('lineno')
+            checkpoint['top_allocations'] = [{'line': '%s:%d' % (stat.traceback[0].filename, stat.traceback[0].lineno), 'mb': stat.size/MB, 'count': stat.count} for stat in statistics[:self.top]]
+        self.checkpoints.append(checkpoint)
+        logging.info('%s memory at %s: %s' % (self.stage, label, format_checkpoint(checkpoint)))
+        return checkpoint
+
+    def fits(self, projected_mb, label):
+        # True if a step projected to need projected_mb (on top of what the process holds now) stays within budget
+        # always True without a budget (memory available could not be measured)
+        rss = current_rss_mb() or 0.0
+        fits = self.budget_mb is None or rss + projected_mb <= self.budget_mb
+        self.decisions.append({'label': label, 'rss_mb': rss, 'projected_mb': projected_mb, 'budget_mb': self.budget_mb, 'fits': fits})
+        if not fits:
+            logging.warning('%s projected to need %.0f MB on top of %.0f MB for %s, over the %.0f MB memory budget' % (self.stage, projected_mb, rss, label, self.budget_mb))
+            print('%s projected to need %.0f MB on top of %.0f MB for %s, over the %.0f MB memory budget' % (self.stage, projected_mb, rss, label, self.budget_mb))
+        return fits
+
+    def peak_checkpoint(self):
+        if not self.checkpoints:
+            return None
+        return max(self.checkpoints, key=lambda checkpoint: checkpoint['rss_mb'] or sum(checkpoint['structures_mb'].values()))
+
+    def dominant_structure(self):
+        # (name, MB) of the largest structure at the peak checkpoint, None if no structures were sized
+        peak = self.peak_checkpoint()
+        if peak is None or not peak['structures_mb']:
+            return None
+        return max(peak['structures_mb'].items(), key=lambda item: item[1])
+
+    def report(self):
+        peak = self.peak_checkpoint()
+        report = {'stage': self.stage, 'started': self.started, 'hostname': socket.gethostname(), 'pid': os.getpid(), 'budget_mb': self.budget_mb, 'peak_rss_mb': peak_rss_mb(), 'checkpoints': self.checkpoints, 'decisions': self.decisions}
+        report['peak_checkpoint'] = peak['label'] if peak is not None else None
+        dominant = self.dominant_structure()
+        report['dominant_structure'] = {'name': dominant[0], 'mb': dominant[1]} if dominant is not None else None
+        report['chunked'] = [decision['label'] for decision in self.decisions if not decision['fits']]
+        return report
+
+    def save(self, path):
+        report = self.report()
+        with open(path + '.tmp', 'w') as report_file:
+            json.dump(report, report_file, indent=1)
+        os.replace(path + '.tmp', path)
+        return report
+
+    def close(self):
+        if self.traced and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.traced = False
+
+def format_checkpoint(checkpoint):
+    line = 'RSS %s MB (peak %s MB)' % (format_mb(checkpoint['rss_mb']), format_mb(checkpoint['peak_rss_mb']))
+    if checkpoint['structures_mb']:
+        line = line + ', ' + ', '.join('%s %.1f MB' % (name, mb) for name, mb in sorted(checkpoint['structures_mb'].items(), key=lambda item: -item[1]))
+    return line
+
+def format_mb(mb):
+    return '?' if mb is None else '%.0f' % (mb)
+
+def format_report(report):
+    # one line for the budget and peak, one naming the dominant structure, one per chunked step
+    lines = ['%s peak RSS %s MB, memory budget %s MB, peak at checkpoint %s' % (report['stage'], format_mb(report['peak_rss_mb']), format_mb(report['budget_mb']), report['peak_checkpoint'])]
+    if report['dominant_structure'] is not None:
+        lines.append('dominant data structure: %s (%.1f MB)' % (report['dominant_structure']['name'], report['dominant_structure']['mb']))
+    peak = [checkpoint for checkpoint in report['checkpoints'] if checkpoint['label'] == report['peak_checkpoint']]
+    if peak and peak[0].get('top_allocations'):
+        top = peak[0]['top_allocations'][0]
+        lines.append('largest python allocation: %s (%.1f MB in %d blocks)' % (top['line'], top['mb'], top['count']))
+    for label in report['chunked']:
+        lines.append('processed in chunks: %s' % (label))
+    return lines
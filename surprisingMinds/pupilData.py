@@ -0,0 +1,138 @@
+### --------------------------------------------------------------------------- ###
+# loading, filtering and downsampling of the daily pupil tracking csv files
+# each csv row is one 4ms time bucket: contour x, contour y, contour area, circle x, circle y, circle area
+# -5 marks time buckets with no pupil found
+# trials saved as sparse per-frame records (.npz, see surprisingMinds.pupilRecords) are rebuilt in 4ms time buckets and downsampled like the csv,
+# or, for bucket sizes that are not a multiple of 4ms, resampled straight from the frames (no time bucket left out, so not comparable with csv trials)
+### --------------------------------------------------------------------------- ###
+import os
+import glob
+import math
+import logging
+import warnings
+import numpy as np
+from surprisingMinds.instrumentation import StageInstruments
+from surprisingMinds.pupilRecords import load_pupil_records, pupil_record_buckets, pupil_record_means
+
+def load_pupil_csv(trial_csv_path):
+    # time bucket x 6 pupil measurements, nan where a value could not be parsed
+    try:
+        trial = np.loadtxt(trial_csv_path, delimiter=",", ndmin=2)
+    except ValueError:
+        trial = np.atleast_2d(np.genfromtxt(trial_csv_path, dtype=float, delimiter=","))
+    if trial.size == 0:
+        trial = np.empty((0, 6))
+    return trial
+
+def longest_run(bool_array):
+    # length of the longest run of consecutive True values
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], np.asarray(bool_array, dtype=np.int8), [0]))))
+    if len(edges) == 0:
+        return 0
+    return int((edges[1::2] - edges[0::2]).max())
+
+def downsample_pupil_trial(trial, new_sample_rate):
+    # mean of each pupil measurement over every new_sample_rate time buckets (samples x 6)
+    # time buckets with any measurement below 0 or above 15000 are left out
+    # the last time bucket of each sample is left out too, as the original per-slice loop did
+    no_of_samples = math.ceil(len(trial)/new_sample_rate)
+    padded = np.full((no_of_samples*new_sample_rate, trial.shape[1]), np.nan)
+    padded[:len(trial)] = trial
+    with np.errstate(invalid='ignore'):
+        padded[(padded < 0).any(axis=1) | (padded > 15000).any(axis=1)] = np.nan
+    sample_slices = padded.reshape(no_of_samples, new_sample_rate, trial.shape[1])[:, :new_sample_rate-1, :]
+    with warnings.catch_warnings():
+        # samples with no valid time bucket average to nan
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        return np.nanmean(sample_slices, axis=1)
+
+def load_daily_pupils(which_eye, day_csv_folder_path, max_no_of_buckets, original_bucket_size, new_bucket_size, bad_trial_cutoff=100, display_latency_dict=None, instruments=None):
+    # downsampled pupil data of every trial of one eye on one day, one row per trial
+    # returns contours X, contours Y, contours, circles X, circles Y, circles, number of trials, number of good trials
+    # last column of each row is the stimulus number, rows of discarded trials stay -6
+    # trials with bad_trial_cutoff or more -5 time buckets in a row are discarded
+    # display_latency_dict (stimulus number -> time buckets of original_bucket_size) crops the display latency from the beginning of each trial
+    # instruments (StageInstruments) time the csv reading and downsampling
+    # csv trials are downsampled in whole original time buckets, so new_bucket_size must be a multiple of original_bucket_size,
+    # trials saved as pupil records are downsampled the same way (same samples as their csv would give) when it is one,
+    # and take any other new_bucket_size as the mean of the frames in each new bucket (pupil_record_means)
+    if instruments is None:
+        instruments = StageInstruments(enabled=False)
+    max_no_of_buckets = int(max_no_of_buckets)
+    # List all trial files, a trial saved both ways is read from its records
+    record_files = glob.glob(day_csv_folder_path + os.sep + which_eye + "*.npz")
+    recorded_trials = set(os.path.splitext(record_file)[0] for record_file in record_files)
+    csv_files = [csv_file for csv_file in glob.glob(day_csv_folder_path + os.sep + which_eye + "*.csv") if os.path.splitext(csv_file)[0] not in recorded_trials]
+    if csv_files and (new_bucket_size % original_bucket_size != 0):
+        print("Sample rate must be a multiple of {bucket}".format(bucket=original_bucket_size))
+        logging.warning("Sample rate must be a multiple of {bucket}".format(bucket=original_bucket_size))
+        return None
+    new_sample_rate = int(new_bucket_size/original_bucket_size)
+    trial_files = csv_files + record_files
+    num_trials = len(trial_files)
+    good_trials = num_trials
+    # contours X, contours Y, contours, circles X, circles Y, circles
+    pupil_data = np.full((6, num_trials, max_no_of_buckets+1), -6.0)
+    for index, trial_file in enumerate(trial_files):
+        trial_name = trial_file.split(os.sep)[-1]
+        trial_stimulus = trial_name.split("_")[1]
+        trial_stim_number = float(trial_stimulus[-2:])
+        latency = int(display_latency_dict[trial_stim_number]) if display_latency_dict is not None else 0
+        if trial_file.endswith(".npz"):
+            with instruments.timer('records_read'):
+                records = load_pupil_records(trial_file)
+            # bad trials are found in the original time buckets, as in the csv
+            trial = pupil_record_buckets(records, original_bucket_size, latency*original_bucket_size)
+        else:
+            with instruments.timer('csv_read'):
+                trial = load_pupil_csv(trial_file)
+            trial = trial[latency:]
+        # if there are too many -5 rows (frames) in a row, don't analyse this trial
+        if longest_run(trial[:, 0] == -5) >= bad_trial_cutoff:
+            good_trials = good_trials - 1
+            instruments.count('bad_trials')
+            continue
+        if trial_file.endswith(".npz") and new_bucket_size % original_bucket_size != 0:
+            with instruments.timer('resample', items=len(records)):
+                trial_samples = pupil_record_means(records, new_bucket_size, latency*original_bucket_size)
+        else:
+            with instruments.timer('downsample', items=len(trial)):
+                trial_samples = downsample_pupil_trial(trial, new_sample_rate)
+        no_of_samples = len(trial_samples)
+        this_chunk_length = min(no_of_samples, max_no_of_buckets+1)
+        # if more than half of the trial is NaN, then throw away this measurement
+        good_measurements = np.isnan(trial_samples).sum(axis=0) < no_of_samples/2
+        # contour areas are kept if either contour or circle areas are good
+        good_measurements[2] = good_measurements[2] or good_measurements[5]
+        for measurement in np.flatnonzero(good_measurements):
+            pupil_data[measurement, index, 0:this_chunk_length] = trial_samples[:this_chunk_length, measurement]
+            pupil_data[measurement, index, -1] = trial_stim_number
+    data_contours_X, data_contours_Y, data_contours, data_circles_X, data_circles_Y, data_circles = pupil_data
+    return data_contours_X, data_contours_Y, data_contours, data_circles_X, data_circles_Y, data_circles, num_trials, good_trials
+
+def threshold_to_nan(input_array, threshold, upper_or_lower):
+    # values above ('upper') or below ('lower') threshold become nan, in place
+    # takes one array, or a list of arrays (e.g. one per trial)
+    if isinstance(input_array, list) or (isinstance(input_array, np.ndarray) and input_array.dtype == object):
+        for index in range(len(input_array)):
+            input_array[index] = threshold_to_nan(input_array[index], threshold, upper_or_lower)
+        return input_array
+    if not isinstance(input_array, np.ndarray):
+        # a single value
+        if (upper_or_lower=='upper' and input_array>threshold) or (upper_or_lower=='lower' and input_array<threshold):
+            return np.nan
+        return input_array
+    with np.errstate(invalid='ignore'):
+        if upper_or_lower=='upper':
+            input_array[input_array>threshold] = np.nan
+        if upper_or_lower=='lower':
+            input_array[input_array<threshold] = np.nan
+    return input_array
+
+def filter_to_nan(list_of_dicts, upper_threshold, lower_threshold):
+    # threshold every trial of every stimulus, in place
+    for dictionary in list_of_dicts:
+        for key in dictionary:
+            dictionary[key] = threshold_to_nan(dictionary[key], upper_threshold, 'upper')
+            dictionary[key] = threshold_to_nan(dictionary[key], lower_threshold, 'lower')
+    return list_of_dicts
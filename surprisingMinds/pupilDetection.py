@@ -0,0 +1,218 @@
+### --------------------------------------------------------------------------- ###
+# pupil detection in one grayscale eye frame, shared by the detection stage (Average_Clip_Per_Day_PupilDetection.py) and its parameter sweep
+# median blur, Hough circles, the darkest circle, then a threshold and the largest contour in a square cropped around it, and an ellipse fit to that
+# the steps are separate functions so a sweep can reuse one blur per blur size and one circle per Hough setting
+# frame codes are written into the contour and circle area columns of the pupil csv files when no pupil is found
+### --------------------------------------------------------------------------- ###
+import math
+import numpy as np
+from surprisingMinds.instrumentation import StageInstruments
+
+# what happened to each frame in find_pupil
+pupil_frame_codes = {0: 'pupil_found', -1: 'too_small', -2: 'no_contour', -3: 'off_screen', -4: 'no_circles'}
+# parameters of detect_pupil, in pixels of the full resolution (800x600) eye videos
+# blur_size: median blur, param1/param2/min_radius/max_radius: HoughCircles, crop_size: square cropped around the darkest circle,
+# threshold_factor: the pupil is darker than the average of the crop edges minus threshold_factor times their stdev
+pupil_detection_params = {'blur_size': 25, 'param1': 55, 'param2': 20, 'min_radius': 10, 'max_radius': 150, 'crop_size': 128, 'threshold_factor': 4.5}
+# parameters that only change the circle search (find_pupil_circle), and those that only change the fit inside the crop (fit_pupil)
+hough_params = ['param1', 'param2', 'min_radius', 'max_radius']
+fit_params = ['crop_size', 'threshold_factor']
+
+def find_darkest_circle(list_of_circles, source_image):
+    import cv2
+    #print("Finding darkest circle in {list}...".format(list=list_of_circles))
+    # starting parameters
+    darkest_intensity = 255
+    darkest_index = 0
+    # check that source_image is a grayscaled image
+    if len(source_image.shape) > 2: 
+        print("{Image} is not grayscale!".format(Image=source_image))
+        exit()
+    for i in range(len(list_of_circles)):
+        # make a copy of the source image
+        copied_image = source_image.copy()
+        # create a mask image that is the same size as source_image
+        mask = np.zeros(copied_image.shape, copied_image.dtype)
+        # get center coordinates and radius of circle from list_of_circle
+        # HoughCircles gives float circles, drawing functions need whole pixels
+        center = (int(list_of_circles[i][0]), int(list_of_circles[i][1]))
+        radius = int(list_of_circles[i][2])
+        #print("Center: {x},{y}".format(x=center[0], y=center[1]))
+        # draw mask circle at coordinates and w/radius of circle from list_of_circles
+        mask_circle = cv2.circle(mask, center, radius, 255, -1)
+        ## for debugging
+        # this_circle = cv2.circle(copied_image, center, radius, (0, 0, 255), 2)
+        # plt.imshow(copied_image)
+        # plt.show()
+        # get coordinates of mask circle pixels
+        where = np.where(mask==255)
+        # find those same coordinates in source_image
+        intensity_inside_circle_on_source_image = source_image[where[0], where[1]]
+        # take average of those pixels in source_image
+        average_intensity = np.average(intensity_inside_circle_on_source_image)
+        #print("Average intensity of circle {number}: {intensity}".format(number=i, intensity=average_intensity))
+        # check this circle's intensity against darkest circle found so far
+        if (average_intensity < darkest_intensity):
+            darkest_intensity = average_intensity
+            darkest_index = i
+    #print("Darkest circle: {number}, intensity {intensity}".format(number=darkest_index, intensity=darkest_intensity))
+    return list_of_circles[darkest_index]
+
+def scale_pupil_detection_params(params, scale):
+    # the same detection on frames downscaled by scale: sizes in pixels shrink with the frame (the median blur size stays odd)
+    if scale == 1.0:
+        return params
+    scaled = dict(params)
+    scaled['blur_size'] = max(3, int(round(params['blur_size']*scale)) | 1)
+    for name in ['min_radius', 'max_radius', 'crop_size']:
+        scaled[name] = max(1, int(round(params[name]*scale)))
+    return scaled
+
+def blur_frame(gray, params):
+    import cv2
+    return cv2.medianBlur(gray, params['blur_size'])
+
+def find_pupil_circle(blurred, params, instruments=None, rows=None):
+    import cv2
+    # the darkest Hough circle of a median blurred frame
+    # returns the frame code (-4 without circles), the Hough circles and the darkest circle (x, y, radius)
+    # rows: rows of the whole frame when blurred is a window of it, circles closer than rows/9 are merged as in the whole frame
+    if instruments is None:
+        instruments = StageInstruments(enabled=False)
+    # Hough circle detection
+    if rows is None:
+        rows = blurred.shape[0]
+    ## sometimes the image seems really clean and easy to find the pupil and yet it still fails
+    with instruments.timer('hough'):
+        circles = cv2.HoughCircles(blurred, cv2.HOUGH_GRADIENT, 1.0, rows / 9.0,
+                                param1=params['param1'], param2=params['param2'],
+                                minRadius=params['min_radius'], maxRadius=params['max_radius'])
+    # If there are no circles, then what??
+    if circles is None:
+        return -4, None, None
+    instruments.count('hough_circles', len(circles[0]))
+    # check that we are taking the darkest circle
+    with instruments.timer('darkest_circle'):
+        darkest_circle = find_darkest_circle(circles[0], blurred)
+    return 0, circles, darkest_circle
+
+def fit_pupil(blurred, darkest_circle, params, instruments=None):
+    import cv2
+    # threshold the square around the darkest circle and fit an ellipse to the largest contour
+    # returns the frame code, the pupil [contour x, contour y, contour area, circle x, circle y, circle area] (None unless found),
+    # and the ellipse and its centre in frame pixels (None unless found)
+    if instruments is None:
+        instruments = StageInstruments(enabled=False)
+    # Using the best circle...crop around center
+    # Threshold
+    # Fit an ellipse
+    # Crop
+    eye_circle = np.uint16(np.around(darkest_circle))
+    crop_size = params['crop_size']
+    # as python ints, uint16 arithmetic wraps around instead of going below 0 near the frame edge
+    left = int(eye_circle[0]) - crop_size//2
+    top = int(eye_circle[1]) - crop_size//2
+    # Check boundarys of image
+    if not ( (left >= 0) and (top >= 0) and ((left + crop_size) < blurred.shape[1]) and ((top + crop_size) < blurred.shape[0]) ):
+        return -3, None, None
+    cropped = blurred[top:(top + crop_size), left:(left+crop_size)]
+    # Compute average and stdev of all pixel luminances along border
+    ## this currently averages the rightmost and leftmost edges of the cropped window, because we assume that these pixels are not the pupil
+    avg = (np.mean(cropped[:, 0]) + np.mean(cropped[:, -1])) / 2
+    std = (np.std(cropped[:, 0]) + np.std(cropped[:, -1])) / 2
+    ## Find shape of pupil
+    with instruments.timer('contour'):
+        # Threshold
+        thresholded = np.uint8(cv2.threshold(cropped, avg-(std*params['threshold_factor']), 255, cv2.THRESH_BINARY_INV)[1])
+        # Find contours
+        contours, heirarchy = cv2.findContours(thresholded, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+    # if more than one contour
+    if len(contours) == 0:
+        return -2, None, None
+    # Get largest contour
+    largest_contour = max(contours, key=cv2.contourArea)
+    # sanity check size of largest contour
+    ## SHOULD MAKE SURE THAT LARGEST CONTOUR ISN'T BIGGER THAN CROPPED
+    # make sure contour is large enough to fit an ellipse to it
+    if len(largest_contour) <= 5:
+        return -1, None, None
+    # Fit ellipse to largest contour
+    with instruments.timer('ellipse'):
+        ellipse = cv2.fitEllipse(largest_contour)
+    # Shift ellipse back to full frame coordinates
+    shifted_center = (int(ellipse[0][0]) + left, int(ellipse[0][1]) + top)
+    # data from both findContours and find_darkest_circle
+    pupil = [shifted_center[0], shifted_center[1], cv2.contourArea(largest_contour), darkest_circle[0], darkest_circle[1], (darkest_circle[2]**2) * math.pi]
+    return 0, pupil, (ellipse, shifted_center)
+
+def detect_pupil(blurred, params, instruments=None):
+    # find the pupil in one median blurred grayscale eye frame
+    # returns the frame code (a key of pupil_frame_codes), the pupil [contour x, contour y, contour area, circle x, circle y, circle area] (None unless found),
+    # and what the debug display draws (hough circles, darkest circle, ellipse and its centre in frame pixels)
+    code, circles, darkest_circle = find_pupil_circle(blurred, params, instruments)
+    if code != 0:
+        return code, None, None
+    code, pupil, fitted = fit_pupil(blurred, darkest_circle, params, instruments)
+    if code != 0:
+        return code, None, None
+    return 0, pupil, (circles, darkest_circle) + fitted
+
+def detect_pupil_pyramid(gray, params, level, instruments=None):
+    import cv2
+    # coarse to fine: the darkest circle is found in the frame downscaled by 2**level (blur size and radii scaled to match),
+    # its centre is refined level by level with circle searches in a window around it (down to half resolution),
+    # then only the square around it is median blurred at full resolution, where fit_pupil thresholds it and fits the ellipse
+    # returns the same as detect_pupil (for the unblurred grayscale frame), the circle columns hold the refined circle in full resolution pixels
+    # level 0 is the full resolution detection
+    if instruments is None:
+        instruments = StageInstruments(enabled=False)
+    if level == 0:
+        with instruments.timer('blur'):
+            blurred = blur_frame(gray, params)
+        return detect_pupil(blurred, params, instruments)
+    # pyramid[l] is the frame at 1/2**l resolution, each level averages 2x2 pixels of the one above
+    with instruments.timer('pyramid'):
+        pyramid = [gray]
+        for finer in range(level):
+            pyramid.append(cv2.resize(pyramid[-1], (pyramid[-1].shape[1]//2, pyramid[-1].shape[0]//2), interpolation=cv2.INTER_AREA))
+    level_params = scale_pupil_detection_params(params, 1.0/2**level)
+    with instruments.timer('blur'):
+        coarse_blurred = blur_frame(pyramid[level], level_params)
+    code, circles, circle = find_pupil_circle(coarse_blurred, level_params, instruments)
+    if code != 0:
+        return code, None, None
+    circles = circles[0]
+    for finer in range(level - 1, -1, -1):
+        # pixel i of a level covers pixels 2i and 2i+1 of the level above
+        circle = np.array([circle[0]*2 + 0.5, circle[1]*2 + 0.5, circle[2]*2], dtype=np.float32)
+        circles = circles*2 + np.array([0.5, 0.5, 0], dtype=np.float32)
+        if finer == 0:
+            break
+        # search again in a window around the circle, large enough for any circle the parameters allow (plus half a blur kernel)
+        level_params = scale_pupil_detection_params(params, 1.0/2**finer)
+        frame = pyramid[finer]
+        margin = level_params['max_radius'] + level_params['blur_size']//2 + 2
+        centre_x, centre_y = (int(value) for value in np.around(circle[:2]))
+        left, top = max(centre_x - margin, 0), max(centre_y - margin, 0)
+        right, bottom = min(centre_x + margin, frame.shape[1]), min(centre_y + margin, frame.shape[0])
+        with instruments.timer('blur'):
+            window_blurred = blur_frame(np.ascontiguousarray(frame[top:bottom, left:right]), level_params)
+        window_code, window_circles, window_circle = find_pupil_circle(window_blurred, level_params, instruments, rows=frame.shape[0])
+        if window_code == 0:
+            offset = np.array([left, top, 0], dtype=np.float32)
+            circle = window_circle + offset
+            circles = window_circles[0] + offset
+    darkest_circle = circle
+    # blur the crop of fit_pupil plus half a blur kernel around it, so the crop is the same as in the blurred whole frame
+    centre_x, centre_y = (int(value) for value in np.around(darkest_circle[:2]))
+    margin = params['crop_size']//2 + params['blur_size']//2 + 1
+    left, top = max(centre_x - margin, 0), max(centre_y - margin, 0)
+    right, bottom = min(centre_x + margin, gray.shape[1]), min(centre_y + margin, gray.shape[0])
+    blurred = np.zeros_like(gray)
+    with instruments.timer('blur'):
+        blurred[top:bottom, left:right] = cv2.medianBlur(np.ascontiguousarray(gray[top:bottom, left:right]), params['blur_size'])
+    code, pupil, fitted = fit_pupil(blurred, darkest_circle, params, instruments)
+    if code != 0:
+        return code, None, None
+    # hough circles in full resolution pixels, for the debug display
+    return 0, pupil, (circles[np.newaxis], darkest_circle) + fitted
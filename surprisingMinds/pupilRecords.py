@@ -0,0 +1,98 @@
+### --------------------------------------------------------------------------- ###
+# sparse pupil tracking output: one record per decoded eye video frame instead of one csv row per 4ms time bucket
+# a record is the frame timestamp (int64 ns), frame number, the 6 pupil measurements (float32, nan if no pupil was found)
+# and the frame code (0 pupil found, negative codes as in surprisingMinds.pupilDetection.pupil_frame_codes)
+# saved per trial as <eye>_<stimulus>_<trial>.npz next to the dense csvs, with the timestamps of the alignment frame and of the last frame
+# the records are resampled to time buckets of any size when they are loaded, so no stage is tied to the 4ms grid:
+# load_daily_pupils rebuilds the 4ms buckets (pupil_record_buckets) and downsamples them like a csv trial when the new bucket size is a multiple of 4ms,
+# so a trial gives the same samples however it was saved, and averages the frames of each bucket (pupil_record_means) for any other bucket size
+### --------------------------------------------------------------------------- ###
+import os
+import numpy as np
+
+# one column per pupil measurement, in the order of the dense csv
+pupil_measurements = ('contour_x', 'contour_y', 'contour_area', 'circle_x', 'circle_y', 'circle_area')
+
+class PupilRecords(object):
+    # the records of one eye video of one trial, from its alignment frame to its last frame
+    # start_ns, end_ns: timestamps of the alignment frame and of the last timestamp of the video, the span of its time buckets
+    def __init__(self, timestamps_ns, frames, measurements, codes, start_ns, end_ns):
+        self.timestamps_ns = np.asarray(timestamps_ns, dtype=np.int64)
+        self.frames = np.asarray(frames, dtype=np.int32)
+        self.measurements = np.asarray(measurements, dtype=np.float32).reshape(-1, len(pupil_measurements))
+        self.codes = np.asarray(codes, dtype=np.int8)
+        self.start_ns = int(start_ns)
+        self.end_ns = int(end_ns)
+
+    def __len__(self):
+        return len(self.timestamps_ns)
+
+def timestamps_to_ns(timestamp_strings):
+    # bonsai timestamp strings -> int64 nanoseconds, timezone dropped, every digit of the fraction kept
+    timestamp_strings = np.char.partition(np.asarray(timestamp_strings, dtype=str), '+')[:, 0]
+    return timestamp_strings.astype('datetime64[ns]').astype(np.int64)
+
+def exhibit_us(timestamps_ns):
+    # timestamps in microseconds as parse_timestamp reads them (the last 3 of the 7 digits of the fraction dropped)
+    return (np.asarray(timestamps_ns, dtype=np.int64)//100000)*100
+
+def save_pupil_records(records_path, records):
+    # write to a temp file first, so a worker that dies while saving never leaves partial records behind
+    with open(records_path + '.tmp', 'wb') as records_file:
+        np.savez(records_file, timestamps_ns=records.timestamps_ns, frames=records.frames, measurements=records.measurements, codes=records.codes, span_ns=np.array([records.start_ns, records.end_ns], dtype=np.int64))
+    os.replace(records_path + '.tmp', records_path)
+
+def load_pupil_records(records_path):
+    with np.load(records_path) as saved:
+        start_ns, end_ns = saved['span_ns']
+        return PupilRecords(saved['timestamps_ns'], saved['frames'], saved['measurements'], saved['codes'], start_ns, end_ns)
+
+def record_bucket_indices(records, bucket_size_ms, offset_ms=0):
+    # time bucket of each record (-1 before the first bucket) and number of buckets, for buckets of any size
+    # buckets start offset_ms after the alignment frame and end with the bucket of the last timestamp of the video
+    # bucket edges are those of find_pupil's dense csv: timestamps truncated like parse_timestamp,
+    # and a record exactly on a bucket boundary belongs to the earlier bucket (the alignment frame itself to the first one)
+    bucket_size_us = int(bucket_size_ms*1000)
+    start_us = int(exhibit_us(records.start_ns)) + int(offset_ms*1000)
+    elapsed_us = exhibit_us(records.timestamps_ns) - start_us
+    bucket_indices = (elapsed_us + bucket_size_us - 1)//bucket_size_us - 1
+    if offset_ms == 0:
+        bucket_indices[elapsed_us == 0] = 0
+    bucket_indices[bucket_indices < 0] = -1
+    no_of_buckets = max((int(exhibit_us(records.end_ns)) - start_us)//bucket_size_us + 1, 0)
+    return bucket_indices, no_of_buckets
+
+def last_in_bucket(bucket_indices, selected):
+    # buckets holding a selected record, and the index of the last selected record in each of them
+    record_indices = np.flatnonzero(selected)[::-1]
+    buckets, first_reversed = np.unique(bucket_indices[record_indices], return_index=True)
+    return buckets, record_indices[first_reversed]
+
+def pupil_record_buckets(records, bucket_size_ms, offset_ms=0):
+    # records in time buckets (buckets x 6), laid out like the dense csv, so 4ms buckets give the same rows find_pupil writes
+    # a bucket holds the last frame in it that found a pupil, -5 if none did,
+    # and its contour and circle areas hold the code of the last frame in it when that frame found no pupil
+    bucket_indices, no_of_buckets = record_bucket_indices(records, bucket_size_ms, offset_ms)
+    buckets = np.full((no_of_buckets, len(pupil_measurements)), -5.0)
+    in_buckets = (bucket_indices >= 0) & (bucket_indices < no_of_buckets)
+    found_buckets, found_records = last_in_bucket(bucket_indices, in_buckets & (records.codes == 0))
+    buckets[found_buckets] = records.measurements[found_records]
+    last_buckets, last_records = last_in_bucket(bucket_indices, in_buckets)
+    failed = records.codes[last_records] != 0
+    buckets[last_buckets[failed], 2] = records.codes[last_records[failed]]
+    buckets[last_buckets[failed], 5] = records.codes[last_records[failed]]
+    return buckets
+
+def pupil_record_means(records, bucket_size_ms, offset_ms=0, valid_range=(0, 15000)):
+    # mean of each pupil measurement over the frames of each time bucket (buckets x 6), nan in buckets with no valid frame
+    # valid frames found a pupil and have every measurement within valid_range (as downsample_pupil_trial keeps them)
+    # unlike downsampling pupil_record_buckets, every valid frame counts: not only the last one of each 4ms bucket, and none in the last 4ms of a bucket is left out
+    bucket_indices, no_of_buckets = record_bucket_indices(records, bucket_size_ms, offset_ms)
+    values = records.measurements.astype(np.float64)
+    valid = (bucket_indices >= 0) & (bucket_indices < no_of_buckets) & (records.codes == 0)
+    with np.errstate(invalid='ignore'):
+        valid &= ((values >= valid_range[0]) & (values <= valid_range[1])).all(axis=1)
+    counts = np.bincount(bucket_indices[valid], minlength=no_of_buckets)
+    sums = np.stack([np.bincount(bucket_indices[valid], weights=values[valid, measurement], minlength=no_of_buckets) for measurement in range(values.shape[1])], axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums/counts[:, np.newaxis]
@@ -0,0 +1,13 @@
+### --------------------------------------------------------------------------- ###
+# delay of the pupil response to luminance, shared by psa03 (which saves pupil sizes at the best delay) and psa04 (which loads them)
+# r values come from the pupil size vs luminance linear regressions of psa03, one per eye analysis and delay
+### --------------------------------------------------------------------------- ###
+import numpy as np
+
+def best_delay_indices(rVals):
+    # rVals: (eye analysis x delay) r values of pupil size vs luminance, returns the best delay of each eye analysis
+    # best delay = most negative correlation between luminance and pupil size (the first, if several are equal)
+    # delay 0 when no delay correlates negatively, or no delay has an r value (no usable trials of that eye)
+    with np.errstate(invalid='ignore'):
+        negative = (rVals < 0).any(axis=1)
+    return np.where(negative, np.argmin(np.where(np.isnan(rVals), np.inf, rVals), axis=1), 0)
@@ -0,0 +1,92 @@
+### --------------------------------------------------------------------------- ###
+# fast loading of *_world_LuminancePerFrame.csv files (timestamp and luminance of each world cam frame)
+# and averaging of luminance per timebucket across all trials of a stimulus
+# per-trial timebucket sums and counts are cached next to the processed outputs, so reruns skip parsing
+### --------------------------------------------------------------------------- ###
+import os
+import numpy as np
+
+def load_luminance_per_frame_csv(csv_path):
+    # timestamps as int64 microseconds and luminance as float32, one row per frame
+    # timestamps are truncated like the original strptime parsing: timezone dropped, then the last 3 digits of the fraction
+    with open(csv_path, 'r') as csv_file:
+        tokens = np.array(csv_file.read().split())
+    timestamp_strings = np.char.partition(tokens[0::2], '+')[:, 0]
+    luminances = tokens[1::2].astype(np.float32)
+    timestamp_lengths = np.char.str_len(timestamp_strings)
+    if len(timestamp_strings) > 0 and np.all(timestamp_lengths == timestamp_lengths[0]):
+        timestamp_strings = timestamp_strings.astype('U%d' % (timestamp_lengths[0]-3))
+    else:
+        timestamp_strings = np.array([timestamp[:-3] for timestamp in timestamp_strings])
+    timestamps_us = timestamp_strings.astype('datetime64[us]').astype(np.int64)
+    return timestamps_us, luminances
+
+def timestamp_bucket_indices(timestamps_us, bucket_size_ms):
+    # timebucket of each timestamp, counted from the first timestamp
+    # timestamps exactly on a bucket boundary belong to the earlier bucket (same as find_nearest_timestamp_key)
+    bucket_size_us = int(bucket_size_ms*1000)
+    elapsed_us = timestamps_us - timestamps_us[0]
+    bucket_indices = np.maximum((elapsed_us + bucket_size_us - 1)//bucket_size_us - 1, 0)
+    no_of_buckets = int(elapsed_us[-1]//bucket_size_us) + 1
+    return bucket_indices, no_of_buckets
+
+def trial_bucket_sums(timestamps_us, luminances, bucket_size_ms):
+    # summed luminance and number of frames in each timebucket of one trial
+    if len(timestamps_us) == 0:
+        return np.zeros(0), np.zeros(0, dtype=np.int64)
+    bucket_indices, no_of_buckets = timestamp_bucket_indices(timestamps_us, bucket_size_ms)
+    bucket_sums = np.bincount(bucket_indices, weights=luminances, minlength=no_of_buckets)
+    bucket_counts = np.bincount(bucket_indices, minlength=no_of_buckets)
+    return bucket_sums, bucket_counts
+
+def load_trial_bucket_sums(csv_path, bucket_size_ms, cache_folder=None):
+    # cached as <csv name>_<bucket size>msBuckets.npz in cache_folder, reused while the csv keeps the same size and modification time
+    csv_stat = os.stat(csv_path)
+    if cache_folder is not None:
+        cache_path = os.path.join(cache_folder, '%s_%dmsBuckets.npz' % (os.path.basename(csv_path)[:-4], bucket_size_ms))
+        if os.path.exists(cache_path):
+            with np.load(cache_path) as cached:
+                if cached['source_size'] == csv_stat.st_size and cached['source_mtime'] == csv_stat.st_mtime:
+                    return cached['bucket_sums'], cached['bucket_counts']
+    timestamps_us, luminances = load_luminance_per_frame_csv(csv_path)
+    bucket_sums, bucket_counts = trial_bucket_sums(timestamps_us, luminances, bucket_size_ms)
+    if cache_folder is not None:
+        if not os.path.exists(cache_folder):
+            os.makedirs(cache_folder)
+        # write to a temp file first, so an interrupted run never leaves a partial cache file behind
+        with open(cache_path + '.tmp', 'wb') as cache_file:
+            np.savez(cache_file, bucket_sums=bucket_sums, bucket_counts=bucket_counts, source_size=csv_stat.st_size, source_mtime=csv_stat.st_mtime)
+        os.replace(cache_path + '.tmp', cache_path)
+    return bucket_sums, bucket_counts
+
+def trial_bucket_means(bucket_sums, bucket_counts, no_of_timebuckets):
+    # mean luminance per timebucket of one trial, nan where no frame landed or mean below 0 (as threshold_to_nan did)
+    trial_means = np.full(no_of_timebuckets, np.nan)
+    no_of_buckets = min(len(bucket_sums), no_of_timebuckets)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        trial_means[:no_of_buckets] = bucket_sums[:no_of_buckets]/bucket_counts[:no_of_buckets]
+    trial_means[trial_means < 0] = np.nan
+    return trial_means
+
+def trial_timebucket_luminance(luminance_csv_paths, bucket_size_ms, no_of_timebuckets, cache_folder=None):
+    # mean luminance per timebucket for each trial (trial x timebucket)
+    no_of_timebuckets = int(no_of_timebuckets)
+    all_trial_means = np.full((len(luminance_csv_paths), no_of_timebuckets), np.nan, dtype=np.float32)
+    for trial, csv_path in enumerate(luminance_csv_paths):
+        bucket_sums, bucket_counts = load_trial_bucket_sums(csv_path, bucket_size_ms, cache_folder)
+        all_trial_means[trial] = trial_bucket_means(bucket_sums, bucket_counts, no_of_timebuckets)
+    return all_trial_means
+
+def build_timebucket_avg_luminance(luminance_csv_paths, bucket_size_ms, no_of_timebuckets, cache_folder=None):
+    # mean across trials of each trial's mean luminance per timebucket, nan where no trial has data
+    no_of_timebuckets = int(no_of_timebuckets)
+    summed_trial_means = np.zeros(no_of_timebuckets)
+    trial_counts = np.zeros(no_of_timebuckets)
+    for csv_path in luminance_csv_paths:
+        bucket_sums, bucket_counts = load_trial_bucket_sums(csv_path, bucket_size_ms, cache_folder)
+        trial_means = trial_bucket_means(bucket_sums, bucket_counts, no_of_timebuckets)
+        valid = ~np.isnan(trial_means)
+        summed_trial_means[valid] += trial_means[valid]
+        trial_counts[valid] += 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return summed_trial_means/trial_counts
@@ -0,0 +1,287 @@
+### --------------------------------------------------------------------------- ###
+# synthetic Surprising Minds exhibit data, in the same on-disk layout as the real dataset
+# every trial has a world cam and two eye cams with jittered timestamps and dropped frames
+# eye videos show a dark pupil ellipse whose true position and shape are saved, so pupil detection accuracy can be checked
+# everything is generated from one seed, each day from its own (seed, day) random stream
+### --------------------------------------------------------------------------- ###
+import os
+import shutil
+import zipfile
+import datetime
+import numpy as np
+from surprisingMinds.stimLuminance import timestamp_bucket_indices
+from surprisingMinds.pupilRecords import last_in_bucket
+
+stim_names = ['stimuli024', 'stimuli025', 'stimuli026', 'stimuli027', 'stimuli028', 'stimuli029']
+# length in (30fps) frames of each phase of the stimulus sequence
+# unique lengths are the ones used by WorldVid_AvgLum, the others are approximate
+unique_lengths_frames = {'stimuli024':168, 'stimuli025':172, 'stimuli026':247, 'stimuli027':179, 'stimuli028':246, 'stimuli029':313}
+doNotMove_length_frames = 135
+calib_length_frames = 480
+octo_length_frames = 486
+world_fps = 30
+eye_fps = 60
+# no pupil found values of find_pupil
+no_frame_value = -5
+no_circles_value = -4
+
+def dataset_folders(root_folder):
+    # where each part of the synthetic dataset goes, matching the folders the load_data() functions point at
+    return {'data_drive': os.path.join(root_folder, 'SurprisingMinds'),
+            'analysed_drive': os.path.join(root_folder, 'dataPythonWorkflows'),
+            'raw_stim_lums': os.path.join(root_folder, 'dataPythonWorkflows', 'rawStimLums'),
+            'luminance_per_frame': os.path.join(root_folder, 'LuminancePerFrame'),
+            'ground_truth': os.path.join(root_folder, 'groundTruth'),
+            'intermediates': os.path.join(root_folder, 'intermediates')}
+
+def smooth_random_walk(rng, no_of_frames, low, high, step_sd):
+    # slowly varying luminance trace between low and high
+    trace = np.cumsum(rng.normal(0, step_sd, no_of_frames)) + rng.uniform(low, high)
+    span = high - low
+    # fold back into [low, high]
+    trace = np.abs((trace - low) % (2*span) - span)
+    return low + span - trace
+
+def make_raw_stim_luminances(seed):
+    # luminance per frame of each raw stimulus video, keyed by stimulus phase name (as in the rawStimLums csv names)
+    rng = np.random.default_rng([seed, 0])
+    raw_stim_lums = {}
+    raw_stim_lums['DoNotMove-English'] = 40 + rng.normal(0, 1, doNotMove_length_frames)
+    # pulsing calibration dots
+    calib_frames = np.arange(calib_length_frames)
+    raw_stim_lums['Calibration'] = 60 + 25*np.sin(2*np.pi*calib_frames/60.0) + rng.normal(0, 1, calib_length_frames)
+    # the octopus clip is the same after every unique clip, with one transition frame in between
+    octo = smooth_random_walk(rng, octo_length_frames, 30, 200, 4)
+    for stim_name in stim_names:
+        unique = smooth_random_walk(rng, unique_lengths_frames[stim_name], 20, 230, 6)
+        raw_stim_lums[stim_name] = np.concatenate((unique, [unique[-1]], octo))
+    return raw_stim_lums
+
+def write_raw_stim_luminances(raw_stim_lums, raw_stim_lums_folder):
+    if not os.path.exists(raw_stim_lums_folder):
+        os.makedirs(raw_stim_lums_folder)
+    for stim_phase, lums in raw_stim_lums.items():
+        np.savetxt(os.path.join(raw_stim_lums_folder, stim_phase + '_LuminancePerFrame.csv'), lums, fmt='%.4f', delimiter=',')
+
+def frame_timestamps_us(start_us, fps, no_of_frames, rng, jitter_ms=1.5, drop_probability=0.005):
+    # frame times in microseconds with gaussian jitter, dropped frames are missing
+    frame_times = start_us + np.round(np.arange(no_of_frames)*1e6/fps + rng.normal(0, jitter_ms*1000, no_of_frames)).astype(np.int64)
+    frame_times = np.maximum.accumulate(frame_times)
+    kept = rng.random(no_of_frames) >= drop_probability
+    kept[0] = True
+    return frame_times[kept]
+
+def format_timestamps(timestamps_us, rng, utc_offset='+01:00'):
+    # bonsai style timestamps with 7 fraction digits, e.g. 2017-08-05T10:15:23.1234567+01:00
+    timestamp_strings = np.datetime_as_string(timestamps_us.astype('datetime64[us]'), unit='us')
+    extra_digits = rng.integers(0, 10, len(timestamps_us)).astype('U1')
+    return np.char.add(np.char.add(timestamp_strings, extra_digits), utc_offset)
+
+def exhibit_timestamps_us(timestamps_us):
+    # timestamps as the pipeline sees them after parse_timestamp drops the last 3 fraction digits
+    return (timestamps_us//100)*100
+
+def blink_mask(times_s, rng, blink_rate=0.25):
+    # True where the eye is closed, blinks last 100-250ms
+    duration = times_s[-1] if len(times_s) > 0 else 0
+    no_of_blinks = rng.poisson(blink_rate*duration)
+    blink_starts = rng.uniform(0, duration, no_of_blinks)
+    blink_ends = blink_starts + rng.uniform(0.1, 0.25, no_of_blinks)
+    closed = np.zeros(len(times_s), dtype=bool)
+    for start, end in zip(blink_starts, blink_ends):
+        closed[(times_s >= start) & (times_s < end)] = True
+    return closed
+
+def gaze_path(times_s, rng, max_offset):
+    # fixations with exponential durations joined by 30-60ms saccades, as offsets (x, y) from the centre of the eye
+    duration = times_s[-1] if len(times_s) > 0 else 0
+    no_of_fixations = int(duration/0.1) + 2
+    fixation_starts = np.concatenate(([0], np.cumsum(0.1 + rng.exponential(0.25, no_of_fixations))))
+    targets = rng.uniform(-max_offset, max_offset, (len(fixation_starts), 2))
+    saccade_durations = rng.uniform(0.03, 0.06, len(fixation_starts))
+    fixation = np.maximum(np.searchsorted(fixation_starts, times_s, side='right') - 1, 0)
+    previous_targets = targets[np.maximum(fixation - 1, 0)]
+    progress = np.clip((times_s - fixation_starts[fixation])/saccade_durations[fixation], 0, 1)[:, None]
+    progress = progress*progress*(3 - 2*progress)
+    return previous_targets + (targets[fixation] - previous_targets)*progress
+
+def pupil_trajectory(times_s, gaze, closed, frame_size, luminance_times_s, luminance, rng, pupil_radius=None):
+    # true pupil ellipse of each eye frame: centre, full axes lengths, angle, and whether the pupil is visible
+    # the pupil constricts ~250ms after the stimulus gets brighter
+    width, height = frame_size
+    if pupil_radius is None:
+        pupil_radius = rng.uniform(0.045, 0.07)*height
+    luminance_norm = (luminance - luminance.min())/max(np.ptp(luminance), 1e-6)
+    lagged_luminance = np.interp(times_s - 0.25, luminance_times_s, luminance_norm)
+    smoothed_luminance = np.empty(len(times_s))
+    level = lagged_luminance[0] if len(times_s) > 0 else 0
+    for frame, value in enumerate(lagged_luminance):
+        level = level + 0.1*(value - level)
+        smoothed_luminance[frame] = level
+    radius = pupil_radius*(1.2 - 0.4*smoothed_luminance)
+    eye_gaze = gaze + rng.normal(0, 0.3, gaze.shape)
+    x = width/2.0 + eye_gaze[:, 0]
+    y = height/2.0 + eye_gaze[:, 1]
+    # the pupil looks more elliptical the further it turns from the camera
+    eccentricity = np.hypot(eye_gaze[:, 0], eye_gaze[:, 1])/(0.5*height)
+    major_axis = 2*radius
+    minor_axis = major_axis*(1 - 0.3*np.clip(eccentricity, 0, 1)**2)
+    angle = np.degrees(np.arctan2(eye_gaze[:, 1], eye_gaze[:, 0]))
+    return {'x': x, 'y': y, 'major_axis': major_axis, 'minor_axis': minor_axis, 'angle': angle, 'visible': ~closed}
+
+def write_eye_video(video_path, trajectory, frame_size, rng):
+    # dark pupil inside a darker iris on a textured background, eyelid over the eye during blinks
+    import cv2
+    width, height = frame_size
+    background = cv2.GaussianBlur(np.clip(rng.normal(175, 8, (height, width)), 0, 255).astype(np.uint8), (5, 5), 0)
+    eyelid = cv2.GaussianBlur(np.clip(rng.normal(200, 6, (height, width)), 0, 255).astype(np.uint8), (5, 5), 0)
+    # coarse iris texture, it has to survive the 25 pixel median blur of find_pupil (which thresholds the pupil against the iris variation)
+    iris_texture = np.clip(110 + 12*cv2.resize(rng.normal(0, 1, (height//24 + 1, width//24 + 1)), (width, height), interpolation=cv2.INTER_CUBIC), 0, 255).astype(np.float32)
+    iris_mask = np.zeros((height, width), np.uint8)
+    # slow flicker of the infrared lighting (per-pixel sensor noise would make the videos incompressible)
+    flicker = np.round(3*np.sin(np.arange(len(trajectory['x']))/37.0) + 3).astype(np.uint8)
+    video = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'FMP4'), eye_fps, (width, height), False)
+    # cv2.ellipse takes fixed point coordinates for sub-pixel drawing
+    shift = 4
+    scale = 2**shift
+    for frame_number in range(len(trajectory['x'])):
+        if trajectory['visible'][frame_number]:
+            center = (int(round(trajectory['x'][frame_number]*scale)), int(round(trajectory['y'][frame_number]*scale)))
+            pupil_axes = (int(round(trajectory['major_axis'][frame_number]*scale/2)), int(round(trajectory['minor_axis'][frame_number]*scale/2)))
+            iris_axes = (int(pupil_axes[0]*2.6), int(pupil_axes[1]*2.6))
+            angle = float(trajectory['angle'][frame_number])
+            iris_mask[:] = 0
+            cv2.ellipse(iris_mask, center, iris_axes, angle, 0, 360, 255, -1, cv2.LINE_AA, shift)
+            iris_weight = iris_mask/np.float32(255)
+            frame = (background + (iris_texture - background)*iris_weight).astype(np.uint8)
+            cv2.ellipse(frame, center, pupil_axes, angle, 0, 360, 25, -1, cv2.LINE_AA, shift)
+            # corneal reflection
+            glint = (center[0] + pupil_axes[0]//3, center[1] - pupil_axes[1]//3)
+            cv2.circle(frame, glint, 4*scale, 250, -1, cv2.LINE_AA, shift)
+        else:
+            frame = eyelid.copy()
+        video.write(cv2.add(frame, int(flicker[frame_number])))
+    video.release()
+
+def write_world_video(video_path, screen_luminance, frame_size, rng):
+    # world cam films the stimulus screen in a dim room, returns mean luminance of each frame
+    import cv2
+    width, height = frame_size
+    room = np.clip(rng.normal(25, 4, (height, width)), 0, 255)
+    screen_texture = rng.normal(0, 2, (height, width))
+    screen = (slice(height//6, height - height//6), slice(width//6, width - width//6))
+    frame_luminance = np.empty(len(screen_luminance))
+    video = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'FMP4'), world_fps, (width, height), False)
+    for frame_number, luminance in enumerate(screen_luminance):
+        frame = room.copy()
+        frame[screen] = frame[screen] + 0.9*luminance + screen_texture[screen]
+        frame = np.clip(frame, 0, 255).astype(np.uint8)
+        frame_luminance[frame_number] = frame.mean()
+        video.write(frame)
+    video.release()
+    return frame_luminance
+
+def pupil_buckets_from_trajectory(timestamps_us, trajectory, rng, bucket_size_ms=4):
+    # the csv find_pupil would write for this eye video: one row per time bucket
+    # contour x, contour y, contour area, circle x, circle y, circle area
+    bucket_indices, no_of_buckets = timestamp_bucket_indices(exhibit_timestamps_us(timestamps_us), bucket_size_ms)
+    pupil_buckets = np.full((no_of_buckets, 6), float(no_frame_value))
+    visible = trajectory['visible']
+    semi_major = trajectory['major_axis']/2
+    semi_minor = trajectory['minor_axis']/2
+    circle_radius = np.round((semi_major + semi_minor)/2 + rng.normal(0, 0.5, len(visible)))
+    measured = np.column_stack((np.round(trajectory['x'] + rng.normal(0, 0.3, len(visible))),
+                                np.round(trajectory['y'] + rng.normal(0, 0.3, len(visible))),
+                                np.pi*semi_major*semi_minor*rng.normal(1, 0.02, len(visible)),
+                                np.round(trajectory['x'] + rng.normal(0, 1, len(visible))),
+                                np.round(trajectory['y'] + rng.normal(0, 1, len(visible))),
+                                np.pi*circle_radius**2))
+    # as find_pupil fills them frame by frame: a bucket holds the last visible frame in it,
+    # and its contour and circle areas hold the frame code when the last frame in it is closed
+    visible_buckets, last_visible = last_in_bucket(bucket_indices, visible)
+    pupil_buckets[visible_buckets] = measured[last_visible]
+    frame_buckets, last_frames = last_in_bucket(bucket_indices, np.ones(len(visible), dtype=bool))
+    closed_buckets = frame_buckets[~visible[last_frames]]
+    pupil_buckets[closed_buckets, 2] = no_circles_value
+    pupil_buckets[closed_buckets, 5] = no_circles_value
+    return pupil_buckets
+
+def make_trial(trial_start_us, stim_name, raw_stim_lums, rng, eye_size=(800, 600), world_size=(160, 120), write_videos=True, trial_folder=None):
+    # all files of one trial, returns world/eye timestamps and true pupil trajectories of both eyes
+    stim_sequence = np.concatenate((raw_stim_lums['DoNotMove-English'], raw_stim_lums['Calibration'], raw_stim_lums[stim_name]))
+    world_timestamps = frame_timestamps_us(trial_start_us, world_fps, len(stim_sequence), rng)
+    # each world frame shows the next stimulus frame, so dropped world frames shift the stimulus later
+    screen_luminance = stim_sequence[:len(world_timestamps)]
+    world_times_s = (world_timestamps - trial_start_us)/1e6
+    trial_duration_s = len(stim_sequence)/float(world_fps)
+    # both eyes look at the same place, blink together and have the same pupil size
+    gaze_times_s = np.arange(0, trial_duration_s + 1, 1.0/eye_fps)
+    gaze_trace = gaze_path(gaze_times_s, rng, 0.2*eye_size[1])
+    closed_trace = blink_mask(gaze_times_s, rng)
+    pupil_radius = rng.uniform(0.045, 0.07)*eye_size[1]
+    eye_data = {}
+    for eye in ['right', 'left']:
+        eye_start_us = trial_start_us + int(rng.uniform(0, 20000))
+        eye_timestamps = frame_timestamps_us(eye_start_us, eye_fps, int(trial_duration_s*eye_fps), rng)
+        eye_times_s = (eye_timestamps - trial_start_us)/1e6
+        gaze = np.column_stack([np.interp(eye_times_s, gaze_times_s, gaze_trace[:, axis]) for axis in range(2)])
+        closed = closed_trace[np.minimum(np.searchsorted(gaze_times_s, eye_times_s), len(gaze_times_s) - 1)]
+        trajectory = pupil_trajectory(eye_times_s, gaze, closed, eye_size, world_times_s, screen_luminance, rng, pupil_radius)
+        eye_data[eye] = {'timestamps_us': eye_timestamps, 'timestamps': format_timestamps(eye_timestamps, rng), 'trajectory': trajectory}
+    world_timestamp_strings = format_timestamps(world_timestamps, rng)
+    world_luminance = 0.9*screen_luminance + 25
+    if trial_folder is not None:
+        trial_name = os.path.basename(trial_folder)
+        if not os.path.exists(trial_folder):
+            os.makedirs(trial_folder)
+        file_prefix = os.path.join(trial_folder, trial_name + '_' + stim_name + '_')
+        np.savetxt(file_prefix + 'world.csv', world_timestamp_strings, fmt='%s')
+        if write_videos:
+            world_luminance = write_world_video(file_prefix + 'world.avi', screen_luminance, world_size, rng)
+        for eye in eye_data:
+            np.savetxt(file_prefix + eye + 'eye.csv', eye_data[eye]['timestamps'], fmt='%s')
+            if write_videos:
+                write_eye_video(file_prefix + eye + 'eye.avi', eye_data[eye]['trajectory'], eye_size, rng)
+    return {'world_timestamps': world_timestamp_strings, 'world_luminance': world_luminance, 'screen_luminance': screen_luminance, 'eyes': eye_data}
+
+def make_day(root_folder, day_date, trials_per_day, raw_stim_lums, seed, day_number, eye_size=(800, 600), world_size=(160, 120), write_videos=True):
+    # one exhibit day: SurprisingMinds_YYYY-MM-DD.zip, the pupil csv folder find_pupil would have made,
+    # world LuminancePerFrame csvs and the true pupil trajectories of every trial
+    # returns False if this day already exists
+    folders = dataset_folders(root_folder)
+    day_name = 'SurprisingMinds_' + day_date.strftime('%Y-%m-%d')
+    zip_path = os.path.join(folders['data_drive'], day_name + '.zip')
+    if os.path.exists(zip_path):
+        return False
+    rng = np.random.default_rng([seed, day_number])
+    staging_folder = os.path.join(folders['data_drive'], day_name + '_staging')
+    csv_folder = os.path.join(folders['analysed_drive'], day_name, 'Analysis', 'csv')
+    ground_truth_folder = os.path.join(folders['ground_truth'], day_name)
+    for folder in [staging_folder, csv_folder, ground_truth_folder, folders['luminance_per_frame']]:
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+    # visitors between 10:00 and 17:00, at least one minute apart
+    no_of_trials = rng.poisson(trials_per_day)
+    opening_us = int((datetime.datetime.combine(day_date, datetime.time(10)) - datetime.datetime(1970, 1, 1)).total_seconds()*1e6)
+    free_time_s = max(7*3600.0 - 60*no_of_trials, 0)
+    trial_starts_us = opening_us + (np.sort(rng.uniform(0, free_time_s, no_of_trials)) + 60*np.arange(no_of_trials))*1e6
+    for trial_number, trial_start_us in enumerate(trial_starts_us.astype(np.int64)):
+        stim_name = stim_names[rng.integers(len(stim_names))]
+        trial_name = str(trial_start_us.astype('datetime64[us]').astype(datetime.datetime).strftime('%Y-%m-%d_%H-%M-%S'))
+        trial = make_trial(int(trial_start_us), stim_name, raw_stim_lums, rng, eye_size, world_size, write_videos, os.path.join(staging_folder, trial_name))
+        lum_csv_path = os.path.join(folders['luminance_per_frame'], trial_name + '_' + stim_name + '_world_LuminancePerFrame.csv')
+        # whole number luminance, two spaces after the timestamp (the layout the original genfromtxt loader of pp02 reads)
+        np.savetxt(lum_csv_path, np.column_stack((trial['world_timestamps'], np.char.mod('%d', np.round(trial['world_luminance'])))), fmt='%s', delimiter='  ')
+        for eye, eye_data in trial['eyes'].items():
+            pupil_buckets = pupil_buckets_from_trajectory(eye_data['timestamps_us'], eye_data['trajectory'], rng)
+            padded_filename = eye + '_' + stim_name + '_' + str(trial_number).zfill(4) + '.csv'
+            np.savetxt(os.path.join(csv_folder, padded_filename), pupil_buckets, fmt='%.2f', delimiter=',')
+            np.savez(os.path.join(ground_truth_folder, trial_name + '_' + stim_name + '_' + eye + 'eye.npz'), timestamps=eye_data['timestamps'], **eye_data['trajectory'])
+    # zip the trial folders (videos are already compressed), then move the finished zip into place
+    with zipfile.ZipFile(zip_path + '.tmp', mode='w', compression=zipfile.ZIP_STORED) as day_zip:
+        for trial_name in sorted(os.listdir(staging_folder)):
+            for file_name in sorted(os.listdir(os.path.join(staging_folder, trial_name))):
+                day_zip.write(os.path.join(staging_folder, trial_name, file_name), trial_name + '/' + file_name)
+    os.replace(zip_path + '.tmp', zip_path)
+    shutil.rmtree(staging_folder)
+    return True
@@ -0,0 +1,49 @@
+### --------------------------------------------------------------------------- ###
+# timestamp parsing and fixed-width time buckets (4ms by default in the stage scripts)
+# bucket i covers [first timestamp + i*window, first timestamp + (i+1)*window]
+# a timestamp exactly on a bucket boundary belongs to the earlier bucket
+### --------------------------------------------------------------------------- ###
+import copy
+import datetime
+
+def parse_timestamp(timestamp):
+    # bonsai timestamp string -> datetime, dropping the timezone and the last 3 digits of the fraction
+    timestamp = timestamp.split('+')[0][:-3]
+    try:
+        return datetime.datetime.fromisoformat(timestamp)
+    except ValueError:
+        return datetime.datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S.%f")
+
+def make_time_buckets(start_timestamp, bucket_size_ms, end_timestamp, fill_pattern, copy_fill=False):
+    # dict of bucket start datetime -> fill_pattern, for every bucket from start to end timestamp
+    # copy_fill=True gives each bucket its own copy of fill_pattern (needed when bucket values are modified in place)
+    buckets_start_time = parse_timestamp(start_timestamp)
+    buckets_end_time = parse_timestamp(end_timestamp)
+    window = datetime.timedelta(milliseconds=bucket_size_ms)
+    no_of_buckets = max((buckets_end_time - buckets_start_time)//window + 1, 0)
+    time_buckets = [buckets_start_time + bucket*window for bucket in range(no_of_buckets)]
+    if copy_fill:
+        return {key:copy.copy(fill_pattern) for key in time_buckets}
+    return dict.fromkeys(time_buckets, fill_pattern)
+
+def find_timestamp_bucket_index(timestamp_dt, first_bucket_dt, bucket_window):
+    # index of the time bucket this timestamp falls into, without scanning every bucket
+    bucket_index, remainder = divmod(timestamp_dt - first_bucket_dt, bucket_window)
+    if remainder == datetime.timedelta(0) and bucket_index > 0:
+        bucket_index = bucket_index - 1
+    return bucket_index
+
+def find_nearest_timestamp_key(timestamp_to_check, dict_of_timestamps, time_window):
+    # key of the time bucket into which timestamp_to_check falls, None if it falls outside every bucket
+    # buckets made by make_time_buckets are evenly spaced, so the key is computed directly
+    if not dict_of_timestamps:
+        return None
+    first_key = next(iter(dict_of_timestamps))
+    if timestamp_to_check >= first_key:
+        key = first_key + find_timestamp_bucket_index(timestamp_to_check, first_key, time_window)*time_window
+        if key in dict_of_timestamps and key <= timestamp_to_check <= (key + time_window):
+            return key
+    # not evenly spaced (or outside the buckets): check every bucket in order
+    for key in dict_of_timestamps.keys():
+        if key <= timestamp_to_check <= (key + time_window):
+            return key
@@ -0,0 +1,140 @@
+### --------------------------------------------------------------------------- ###
+# mergeable weighted mean aggregates of world cam frames and raw live stim luminance
+# for each stimulus, holds weighted sums and summed weights at every timebucket (4ms resolution) with data
+# aggregates merge by array addition, so daily aggregates fold into monthly aggregates and monthly into the full dataset
+# in any order, and partial aggregates can be saved (as .npz files) and merged later
+### --------------------------------------------------------------------------- ###
+import os
+import glob
+import numpy as np
+
+class WeightedMeanAggregate(object):
+    def __init__(self):
+        # per stimulus: sorted timebuckets, weighted sums (timebucket x sample shape) and summed weights (timebucket)
+        # only timebuckets with data get a row, so world cam keyframes stay compact
+        self.timebuckets = {}
+        self.weighted_sums = {}
+        self.weights = {}
+        self.vid_counts = {}
+
+    def stims(self):
+        return sorted(self.vid_counts.keys())
+
+    def add(self, stim, timebuckets, weighted_sums, weights, vid_count=0):
+        # add weighted sums and weights at the given timebuckets, summing rows that share a timebucket
+        self.vid_counts[stim] = self.vid_counts.get(stim, 0) + vid_count
+        timebuckets = np.asarray(timebuckets, dtype=np.int64)
+        if len(timebuckets) == 0:
+            return
+        weighted_sums = np.asarray(weighted_sums, dtype=np.float64)
+        weights = np.asarray(weights, dtype=np.float64)
+        unique_timebuckets = np.unique(timebuckets)
+        if stim in self.timebuckets:
+            all_timebuckets = np.union1d(self.timebuckets[stim], unique_timebuckets)
+        else:
+            all_timebuckets = unique_timebuckets
+        all_weighted_sums = np.zeros((len(all_timebuckets),) + weighted_sums.shape[1:])
+        all_weights = np.zeros(len(all_timebuckets))
+        if stim in self.timebuckets:
+            rows = np.searchsorted(all_timebuckets, self.timebuckets[stim])
+            all_weighted_sums[rows] = self.weighted_sums[stim]
+            all_weights[rows] = self.weights[stim]
+        rows = np.searchsorted(all_timebuckets, timebuckets)
+        if len(unique_timebuckets) == len(timebuckets):
+            all_weighted_sums[rows] += weighted_sums
+            all_weights[rows] += weights
+        else:
+            np.add.at(all_weighted_sums, rows, weighted_sums)
+            np.add.at(all_weights, rows, weights)
+        self.timebuckets[stim] = all_timebuckets
+        self.weighted_sums[stim] = all_weighted_sums
+        self.weights[stim] = all_weights
+
+    def merge(self, other):
+        # associative and commutative: returns a new aggregate, neither input is modified
+        merged = WeightedMeanAggregate()
+        for aggregate in (self, other):
+            for stim in aggregate.stims():
+                if stim in aggregate.timebuckets:
+                    merged.add(stim, aggregate.timebuckets[stim], aggregate.weighted_sums[stim], aggregate.weights[stim], aggregate.vid_counts[stim])
+                else:
+                    merged.add(stim, [], None, None, aggregate.vid_counts[stim])
+        return merged
+
+    def update(self, other):
+        # merge other into this aggregate in place, without copying the stimuli other does not hold
+        # (keeps peak memory down when folding many large partial aggregates, e.g. world cam keyframes)
+        for stim in other.stims():
+            if stim in other.timebuckets:
+                self.add(stim, other.timebuckets[stim], other.weighted_sums[stim], other.weights[stim], other.vid_counts[stim])
+            else:
+                self.add(stim, [], None, None, other.vid_counts[stim])
+        return self
+
+    def weighted_mean(self, stim):
+        # timebuckets, weighted means and summed weights for this stimulus
+        if stim not in self.timebuckets:
+            return np.array([], dtype=np.int64), np.array([]), np.array([])
+        weights = self.weights[stim]
+        means = self.weighted_sums[stim]/weights.reshape((-1,) + (1,)*(self.weighted_sums[stim].ndim-1))
+        return self.timebuckets[stim], means, weights
+
+    def save(self, path):
+        arrays = {}
+        for stim in self.stims():
+            stim_name = 'Stim%d' % (int(stim))
+            arrays[stim_name + '_vidCount'] = np.array(self.vid_counts[stim])
+            if stim in self.timebuckets:
+                arrays[stim_name + '_timebuckets'] = self.timebuckets[stim]
+                arrays[stim_name + '_weightedSums'] = self.weighted_sums[stim]
+                arrays[stim_name + '_weights'] = self.weights[stim]
+        # write to a temp file first, so an interrupted run never leaves a partial aggregate behind
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as temp_file:
+            np.savez(temp_file, **arrays)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path, stims=None):
+        # stims: load only these stimuli (None loads all), arrays of other stimuli are never read from the file
+        aggregate = cls()
+        with np.load(path) as saved:
+            for key in saved.files:
+                if key.endswith('_vidCount'):
+                    stim_name = key[:-len('_vidCount')]
+                    stim = float(stim_name[len('Stim'):])
+                    if stims is not None and stim not in stims:
+                        continue
+                    if stim_name + '_timebuckets' in saved.files:
+                        aggregate.add(stim, saved[stim_name + '_timebuckets'], saved[stim_name + '_weightedSums'], saved[stim_name + '_weights'], int(saved[key]))
+                    else:
+                        aggregate.add(stim, [], None, None, int(saved[key]))
+        return aggregate
+
+    @classmethod
+    def from_weighted_mean_rows(cls, stim, rows, vid_count):
+        # convert rows of [timebucket, weight, mean] (format of older daily and monthly .npy files)
+        aggregate = cls()
+        if len(rows) == 0:
+            aggregate.add(stim, [], None, None, vid_count)
+            return aggregate
+        timebuckets = np.array([row[0] for row in rows])
+        weights = np.array([row[1] for row in rows], dtype=np.float64)
+        means = np.array([row[2] for row in rows], dtype=np.float64)
+        weighted_sums = means*weights.reshape((-1,) + (1,)*(means.ndim-1))
+        aggregate.add(stim, timebuckets, weighted_sums, weights, vid_count)
+        return aggregate
+
+def load_monthly_aggregate(monthly_mean_folder, stim_type, stims=None):
+    # monthly 'meanWorldCam' or 'meanRawLiveStim' aggregate saved by psa01, only of the given stims (None loads all)
+    # months saved by older versions of psa01 as [timebucket, weight, mean] rows per stimulus are converted
+    month_aggregate = WeightedMeanAggregate()
+    for aggregate_file in glob.glob(monthly_mean_folder + os.sep + '*_%s_aggregate.npz' % (stim_type)):
+        month_aggregate.update(WeightedMeanAggregate.load(aggregate_file, stims))
+    for rows_file in glob.glob(monthly_mean_folder + os.sep + '*_%s_*Vids.npy' % (stim_type)):
+        stim = float(os.path.basename(rows_file).split('_')[1][len('Stim'):])
+        if stims is not None and stim not in stims:
+            continue
+        vid_count = int(os.path.basename(rows_file).split('_')[-1][:-8])
+        month_aggregate.update(WeightedMeanAggregate.from_weighted_mean_rows(stim, np.load(rows_file, allow_pickle=True), vid_count))
+    return month_aggregate
@@ -0,0 +1,219 @@
+### --------------------------------------------------------------------------- ###
+# work queue of day-level tasks for several machines (or processes) that share a filesystem, without a coordinator service
+# a queue is a folder on the share, a task is a name (e.g. a day folder)
+# claiming attempt n of a task creates <task>.<n>.lease with O_EXCL, so exactly one worker gets each attempt
+# the worker holding a lease touches it every lease_s/4 seconds, a lease not touched for lease_s seconds is stale
+# (the worker crashed or lost the share), and the next worker to see it claims attempt n+1
+# the worker of attempt n notices attempt n+1 and stops renewing, so a task that was taken over is never reported done twice
+# a finished task gets an atomically written <task>.done marker (json, with whatever fields the stage reports)
+# tasks that failed max_attempts times are given up and left for someone to look at
+# lease ages are measured against the mtime of a file this worker touches in the queue folder, so machines with different clocks agree
+### --------------------------------------------------------------------------- ###
+import os
+import json
+import time
+import socket
+import logging
+import datetime
+import threading
+
+class WorkQueue(object):
+    def __init__(self, queue_folder, lease_s=600, max_attempts=3, poll_s=30, worker=None):
+        # lease_s: seconds a lease stays valid without being renewed
+        # max_attempts: claims of a task (first try plus retries) before it is given up
+        # poll_s: seconds to wait before looking again when every remaining task is leased by other workers
+        self.queue_folder = queue_folder
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        self.poll_s = poll_s
+        self.worker = worker if worker is not None else '%s-%d' % (socket.gethostname(), os.getpid())
+        if not os.path.exists(queue_folder):
+            os.makedirs(queue_folder, exist_ok=True)
+        self.clock_path = os.path.join(queue_folder, '.clock-' + self.worker)
+        # task -> attempt of the leases this worker holds
+        self.held = {}
+        self.lost = set()
+        self.lock = threading.Lock()
+        self.stop_heartbeat = threading.Event()
+        self.heartbeat = None
+
+    def lease_path(self, task, attempt):
+        return os.path.join(self.queue_folder, '%s.%d.lease' % (task, attempt))
+
+    def done_path(self, task):
+        return os.path.join(self.queue_folder, task + '.done')
+
+    def now(self):
+        # current time of the shared filesystem
+        with open(self.clock_path, 'a'):
+            pass
+        os.utime(self.clock_path, None)
+        return os.path.getmtime(self.clock_path)
+
+    def attempts(self, task):
+        # number of the latest attempt at a task, 0 if it was never claimed
+        attempt = 0
+        while os.path.exists(self.lease_path(task, attempt + 1)):
+            attempt = attempt + 1
+        return attempt
+
+    def is_done(self, task):
+        return os.path.exists(self.done_path(task))
+
+    def result(self, task):
+        # fields of the done marker of a task, None if it is not done
+        try:
+            with open(self.done_path(task), 'r') as done_file:
+                return json.load(done_file)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def known(self, task):
+        # True if a worker of this queue ever claimed the task
+        return self.is_done(task) or self.attempts(task) > 0
+
+    def is_stale(self, task, attempt, now):
+        lease_path = self.lease_path(task, attempt)
+        try:
+            with open(lease_path, 'r') as lease_file:
+                lease = json.load(lease_file)
+            if lease.get('released'):
+                return True
+            return now - os.path.getmtime(lease_path) > self.lease_s
+        except FileNotFoundError:
+            return True
+        except ValueError:
+            # the lease is being written right now (or its writer died while writing it)
+            try:
+                return now - os.path.getmtime(lease_path) > self.lease_s
+            except FileNotFoundError:
+                return True
+
+    def claim(self, task):
+        # True if this worker now holds the lease of the task
+        if self.is_done(task):
+            return False
+        attempt = self.attempts(task)
+        if attempt > 0 and not self.is_stale(task, attempt, self.now()):
+            return False
+        if attempt >= self.max_attempts:
+            return False
+        lease = {'task': task, 'worker': self.worker, 'attempt': attempt + 1, 'claimed': datetime.datetime.now().isoformat(timespec='seconds'), 'released': False}
+        try:
+            lease_fd = os.open(self.lease_path(task, attempt + 1), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            # another worker claimed this attempt first
+            return False
+        with os.fdopen(lease_fd, 'w') as lease_file:
+            json.dump(lease, lease_file)
+        with self.lock:
+            self.held[task] = attempt + 1
+        if attempt > 0:
+            logging.warning('%s retrying %s (attempt %d of %d), the lease of attempt %d went stale' % (self.worker, task, attempt + 1, self.max_attempts, attempt))
+            print('%s retrying %s (attempt %d of %d), the lease of attempt %d went stale' % (self.worker, task, attempt + 1, self.max_attempts, attempt))
+        self.start_heartbeat()
+        return True
+
+    def renew(self):
+        # touch the leases this worker holds, drop the ones another worker took over
+        with self.lock:
+            for task, attempt in list(self.held.items()):
+                if os.path.exists(self.lease_path(task, attempt + 1)) or self.is_done(task):
+                    self.lost.add(task)
+                    del self.held[task]
+                    logging.warning('%s lost the lease of %s to another worker' % (self.worker, task))
+                    continue
+                try:
+                    os.utime(self.lease_path(task, attempt), None)
+                except OSError:
+                    logging.warning('%s could not renew the lease of %s' % (self.worker, task))
+
+    def start_heartbeat(self):
+        if self.heartbeat is not None and self.heartbeat.is_alive():
+            return
+        self.stop_heartbeat.clear()
+        def beat():
+            while not self.stop_heartbeat.wait(self.lease_s/4):
+                self.renew()
+        self.heartbeat = threading.Thread(target=beat, name='lease heartbeat', daemon=True)
+        self.heartbeat.start()
+
+    def complete(self, task, **fields):
+        # mark a held task done, with fields (e.g. what the stage made of the day) in the done marker
+        with self.lock:
+            attempt = self.held.pop(task, None)
+            lost = task in self.lost
+            self.lost.discard(task)
+        if attempt is None and not lost:
+            raise ValueError('%s does not hold the lease of %s' % (self.worker, task))
+        if lost or os.path.exists(self.lease_path(task, attempt + 1)):
+            # the worker that took over reports the task, results of both attempts are the same files written atomically
+            logging.warning('%s finished %s after losing its lease, leaving it to the worker that took over' % (self.worker, task))
+            return False
+        done = {'task': task, 'worker': self.worker, 'attempt': attempt, 'finished': datetime.datetime.now().isoformat(timespec='seconds')}
+        done.update(fields)
+        done_path = self.done_path(task)
+        with open(done_path + '.tmp-' + self.worker, 'w') as done_file:
+            json.dump(done, done_file)
+        os.replace(done_path + '.tmp-' + self.worker, done_path)
+        return True
+
+    def fail(self, task, reason=None):
+        # give a held task back, another worker (or this one) retries it until max_attempts
+        with self.lock:
+            attempt = self.held.pop(task, None)
+            self.lost.discard(task)
+        if attempt is None:
+            return
+        lease = {'task': task, 'worker': self.worker, 'attempt': attempt, 'released': True, 'reason': reason}
+        lease_path = self.lease_path(task, attempt)
+        with open(lease_path + '.tmp-' + self.worker, 'w') as lease_file:
+            json.dump(lease, lease_file)
+        os.replace(lease_path + '.tmp-' + self.worker, lease_path)
+        if attempt >= self.max_attempts:
+            logging.warning('%s gave up on %s after %d attempts: %s' % (self.worker, task, attempt, reason))
+            print('%s gave up on %s after %d attempts: %s' % (self.worker, task, attempt, reason))
+
+    def is_given_up(self, task):
+        attempt = self.attempts(task)
+        return attempt >= self.max_attempts and self.is_stale(task, attempt, self.now())
+
+    def claimed(self, tasks, ready=None, wait=True):
+        # yields the tasks this worker claims, in order, until every task is done or given up
+        # the loop body calls complete() or fail(), a task it does neither with is failed when the next one is asked for
+        # ready: function of a task, False while it can't start yet (e.g. a month whose days are not all done)
+        # wait: keep polling while other workers hold leases, so their tasks are retried if they die
+        tasks = list(tasks)
+        try:
+            while True:
+                remaining = [task for task in tasks if not self.is_done(task) and not self.is_given_up(task)]
+                if not remaining:
+                    return
+                claimed_any = False
+                for task in remaining:
+                    if ready is not None and not ready(task):
+                        continue
+                    if not self.claim(task):
+                        continue
+                    claimed_any = True
+                    yield task
+                    if task in self.held or task in self.lost:
+                        self.fail(task, 'not completed')
+                if not claimed_any:
+                    if not wait:
+                        return
+                    logging.info('%s waiting for %d tasks leased by other workers' % (self.worker, len(remaining)))
+                    time.sleep(self.poll_s)
+        finally:
+            # the loop body raised or stopped early
+            for task in list(self.held):
+                self.fail(task, 'worker stopped')
+            self.close()
+
+    def close(self):
+        self.stop_heartbeat.set()
+        if self.heartbeat is not None:
+            self.heartbeat.join()
+            self.heartbeat = None
+        if os.path.exists(self.clock_path):
+            os.remove(self.clock_path)
@@ -0,0 +1,7 @@
+### --------------------------------------------------------------------------- ###
+# tests of the shared surprisingMinds package and the benchmark tools, run with python -m pytest from the repo root
+### --------------------------------------------------------------------------- ###
+import os
+import sys
+# make the shared surprisingMinds package (in the repo root) importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
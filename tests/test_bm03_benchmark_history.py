@@ -0,0 +1,84 @@
+import os
+import sys
+import json
+import glob
+import subprocess
+
+benchmarks_folder = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks')
+sys.path.insert(0, benchmarks_folder)
+import bm03_benchmark_history as bm03
+
+def stage_results(started, commit, frames_per_s=100.0):
+    # bm02 results of one gated stage, commit None as git_info() returns outside a git checkout
+    measurement = {'stage': 'pupil_detection', 'implementation': 'current', 'throughput': {'frames_per_s': frames_per_s},
+                   'seconds': [1.0, 1.0, 1.0], 'median_seconds': 1.0, 'peak_rss_mb': 100.0}
+    return {'started': started, 'git': {'commit': commit, 'dirty': None}, 'machine': {'hostname': 'testhost'},
+            'settings': {'scale': 1, 'seed': 0}, 'measurements': [measurement]}
+
+def write_results(tmp_path, results):
+    results_path = str(tmp_path / ('results_%s.json' % (results['started'].replace(':', ''))))
+    with open(results_path, 'w') as results_file:
+        json.dump(results, results_file)
+    return results_path
+
+def test_history_file_name_without_commit():
+    assert bm03.history_file_name(stage_results('2024-05-01T10:00:00', None)) == 'testhost_scale1_seed0_20240501T100000.json'
+    assert bm03.history_file_name(stage_results('2024-05-01T10:00:00', '0123456789abcdef')) == 'testhost_scale1_seed0_20240501T100000_0123456789ab.json'
+
+def test_runs_without_commit_are_recorded_and_reported(tmp_path):
+    history_folder = str(tmp_path / 'history')
+    for started in ['2024-05-01T10:00:00', '2024-05-02T10:00:00']:
+        run = subprocess.run([sys.executable, os.path.join(benchmarks_folder, 'bm03_benchmark_history.py'), write_results(tmp_path, stage_results(started, None)), '--history', history_folder],
+                             capture_output=True, text=True)
+        assert run.returncode == 0, run.stderr
+        assert 'commit unknown' in run.stdout
+    # the second run is compared against the first, and does not replace it
+    assert 'vs baseline of 1 recorded run(s)' in run.stdout
+    assert len(glob.glob(os.path.join(history_folder, '*.json'))) == 2
+    assert 'unknown unknown' in open(os.path.join(history_folder, 'report.html'), encoding='utf-8').read()
+
+def run_bm03(*arguments):
+    return subprocess.run([sys.executable, os.path.join(benchmarks_folder, 'bm03_benchmark_history.py')] + list(arguments), capture_output=True, text=True)
+
+def record_baseline(history_folder, frames_per_s=100.0):
+    # three recorded runs of earlier commits, with identical repeats (no noise, so the tolerance is --tolerance)
+    for day in range(1, 4):
+        bm03.record_run(history_folder, stage_results('2024-05-0%dT10:00:00' % (day), 'c0ffee%d' % (day), frames_per_s))
+
+def test_gate_flags_throughput_drop(tmp_path):
+    history_folder = str(tmp_path / 'history')
+    record_baseline(history_folder)
+    run = run_bm03(write_results(tmp_path, stage_results('2024-05-04T10:00:00', 'c0ffee4', 80.0)), '--history', history_folder, '--tolerance', '0.10')
+    assert run.returncode == 1, run.stdout + run.stderr
+    assert 'REGRESSED: throughput' in run.stdout
+    assert '1 stage(s) regressed: pupil_detection' in run.stdout
+
+def test_gate_passes_drop_within_tolerance(tmp_path):
+    history_folder = str(tmp_path / 'history')
+    record_baseline(history_folder)
+    run = run_bm03(write_results(tmp_path, stage_results('2024-05-04T10:00:00', 'c0ffee4', 95.0)), '--history', history_folder, '--tolerance', '0.10')
+    assert run.returncode == 0, run.stdout + run.stderr
+    assert 'REGRESSED' not in run.stdout
+    assert ' -5.0% (tol 10%)' in run.stdout
+
+def test_rerun_replaces_recorded_run_of_same_commit(tmp_path):
+    history_folder = str(tmp_path / 'history')
+    first_path = bm03.record_run(history_folder, stage_results('2024-05-01T10:00:00', 'c0ffee1'))
+    # history files renamed (or named by an older version of bm03) are still replaced
+    os.rename(first_path, os.path.join(history_folder, 'renamed.json'))
+    bm03.record_run(history_folder, stage_results('2024-05-02T10:00:00', 'c0ffee1'))
+    assert [os.path.basename(path) for path in glob.glob(os.path.join(history_folder, '*.json'))] == ['testhost_scale1_seed0_20240502T100000_c0ffee1.json']
+
+def test_report_skips_unreadable_history_and_missing_rates(tmp_path):
+    history_folder = str(tmp_path / 'history')
+    record_baseline(history_folder)
+    latest = stage_results('2024-05-04T10:00:00', 'c0ffee4')
+    latest['measurements'][0]['throughput'] = {}
+    bm03.record_run(history_folder, latest)
+    with open(os.path.join(history_folder, 'corrupt.json'), 'w') as corrupt_file:
+        corrupt_file.write('{"started": ')
+    run = run_bm03('--history', history_folder)
+    assert run.returncode == 0, run.stderr
+    assert 'Skipping unreadable history file' in run.stdout
+    assert 'last n/a' in run.stdout
+    assert 'n/a' in open(os.path.join(history_folder, 'report.html'), encoding='utf-8').read()
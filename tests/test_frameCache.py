@@ -0,0 +1,83 @@
+import os
+import json
+import logging
+import numpy as np
+import pytest
+from surprisingMinds import frameCache
+from surprisingMinds.frameCache import FrameCache, MB
+
+def fake_entry(cache, day, trial, last_used):
+    # a 1 MB cached eye video, used last at last_used
+    entry_folder = cache.entry_folder(day, trial, 'right')
+    os.makedirs(entry_folder)
+    np.save(os.path.join(entry_folder, 'frames.npy'), np.zeros(MB, dtype=np.uint8))
+    with open(os.path.join(entry_folder, 'entry.json'), 'w') as entry_file:
+        json.dump({'video': trial + '.avi', 'frames': 1, 'source_size': [1024, 1024], 'crop': None, 'scale': 1.0}, entry_file)
+    os.utime(os.path.join(entry_folder, 'entry.json'), (last_used, last_used))
+    return entry_folder
+
+def test_evict_least_recently_used(tmp_path):
+    cache = FrameCache(str(tmp_path), quota_mb=10)
+    older = fake_entry(cache, 'day1', 'trial1', 1000)
+    newer = fake_entry(cache, 'day1', 'trial2', 2000)
+    cache.save_manifest('day1', [['trial1', 'stimuli024'], ['trial2', 'stimuli024']])
+    cache.entries = cache.scan()
+    cache.quota_mb = 1.5
+    cache.evict()
+    assert not os.path.exists(older) and os.path.exists(newer)
+    assert list(cache.entries) == [newer]
+    assert cache.cached_trials('day1') is None
+
+def test_evict_keeps_entry_that_could_not_be_deleted(tmp_path, monkeypatch, caplog):
+    cache = FrameCache(str(tmp_path), quota_mb=10)
+    older = fake_entry(cache, 'day1', 'trial1', 1000)
+    newer = fake_entry(cache, 'day1', 'trial2', 2000)
+    cache.entries = cache.scan()
+    cache.quota_mb = 1.5
+    # frames of the older entry still open elsewhere: only its entry.json goes
+    rmtree = frameCache.shutil.rmtree
+    def partial_rmtree(path, ignore_errors=False):
+        if path == older:
+            os.remove(os.path.join(path, 'entry.json'))
+        else:
+            rmtree(path, ignore_errors=ignore_errors)
+    monkeypatch.setattr(frameCache.shutil, 'rmtree', partial_rmtree)
+    with caplog.at_level(logging.WARNING):
+        cache.evict()
+    assert older in cache.entries and cache.entries[older][0] == os.path.getsize(os.path.join(older, 'frames.npy'))
+    assert 'Could not delete all of %s' % (older) in caplog.text
+    # the next entry is evicted instead, to get back under the quota
+    assert newer not in cache.entries and not os.path.exists(newer)
+
+def test_entries_being_written_are_not_evicted(tmp_path):
+    cache = FrameCache(str(tmp_path), quota_mb=10)
+    fake_entry(cache, 'day1', 'trial1', 1000)
+    # another process has written entry.json into its temp folder, and not yet renamed it into place
+    writing = fake_entry(cache, 'day1', 'trial2_right.tmp-12345', 2000)[:-len('_right')]
+    os.rename(writing + '_right', writing)
+    cache.entries = cache.scan()
+    assert writing not in cache.entries
+    cache.quota_mb = 0.5
+    cache.evict()
+    assert os.path.exists(writing)
+
+def write_video(video_path, no_of_frames=20):
+    import cv2
+    video = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (64, 64))
+    for frame_number in range(no_of_frames):
+        video.write(np.full((64, 64, 3), frame_number*10, dtype=np.uint8))
+    video.release()
+
+def test_put_keeps_both_eyes_of_the_trial(tmp_path):
+    pytest.importorskip('cv2')
+    video_path = str(tmp_path / 'eye.avi')
+    write_video(video_path)
+    timestamps = ['2017-07-01T10:00:00.%07d+01:00' % (frame_number*333333) for frame_number in range(20)]
+    # room for a little more than one eye video (20 frames of 64x64)
+    cache = FrameCache(str(tmp_path / 'cache'), quota_mb=0.1)
+    older = cache.put('day1', 'trial1', 'right', video_path, timestamps).entry_folder
+    right = cache.put('day1', 'trial2', 'right', video_path, timestamps).entry_folder
+    left = cache.put('day1', 'trial2', 'left', video_path, timestamps).entry_folder
+    assert not os.path.exists(older)
+    assert os.path.exists(right) and os.path.exists(left)
+    assert sorted(cache.entries) == sorted([right, left])
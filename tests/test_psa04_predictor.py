@@ -0,0 +1,31 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'pupilSize'))
+from psa03_PupilSizeVLum import linRegress_dtype
+from psa04_LumBasedPupilSizePredictor import PupilSizePredictor
+
+def baseline_best_delay(rVals):
+    # the per-delay loop of the original psa04: only a negative r is a best delay, delay 0 otherwise
+    best_rVal = 0
+    best_delay = 0
+    for i, rVal in enumerate(rVals):
+        if rVal < best_rVal:
+            best_rVal = rVal
+            best_delay = i
+    return best_delay
+
+def test_best_delays_match_baseline(tmp_path):
+    # eye analyses: no usable trials (all nan), only positive r, negative r with nans, two equally negative delays
+    rVals = np.array([[np.nan]*5, [0.2, 0.1, 0.3, np.nan, 0.4], [0.1, np.nan, -0.3, -0.5, -0.2], [-0.4, -0.6, 0.0, -0.6, np.nan]])
+    linRegParams = np.zeros((4, 2, 5), dtype=linRegress_dtype)
+    linRegParams['rvalue'][:, 0, :] = rVals
+    linRegParams['slope'][:, 0, :] = np.arange(5)
+    params_file = str(tmp_path / 'pupilSizeVsDelayLinRegressParams_allEyeAnalyses_allPhases_5TBDelays.npy')
+    np.save(params_file, linRegParams)
+    predictor = PupilSizePredictor(params_file)
+    expected = [baseline_best_delay(eye_rVals) for eye_rVals in rVals]
+    np.testing.assert_array_equal(predictor.bestDelay_indices, expected)
+    np.testing.assert_array_equal(predictor.slopes, expected)
+    np.testing.assert_array_equal(predictor.bestDelays_ms(40), np.array(expected)*40)
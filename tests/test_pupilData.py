@@ -0,0 +1,124 @@
+import os
+import sys
+import math
+import warnings
+import numpy as np
+import pytest
+from surprisingMinds.pupilData import longest_run, downsample_pupil_trial, load_daily_pupils, threshold_to_nan, filter_to_nan
+
+# original stage code, the reference of the vectorized versions
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+from originalStages import pp01
+
+def per_slice_downsample(trial, new_sample_rate):
+    # the per-slice loop of the original load_daily_pupils
+    trial = trial.copy()
+    samples = []
+    for sample in range(math.ceil(len(trial)/new_sample_rate)):
+        start = sample * new_sample_rate
+        end = (sample * new_sample_rate) + (new_sample_rate - 1)
+        this_slice = trial[start:end]
+        for line in this_slice:
+            if (line<0).any():
+                line[:] = np.nan
+            if (line>15000).any():
+                line[:] = np.nan
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            samples.append(np.nanmean(this_slice, axis=0))
+    return np.array(samples)
+
+def random_trial(no_of_buckets, seed=0):
+    rng = np.random.default_rng(seed)
+    trial = np.column_stack([rng.uniform(300, 500, no_of_buckets), rng.uniform(200, 400, no_of_buckets), rng.uniform(2000, 8000, no_of_buckets),
+                             rng.uniform(300, 500, no_of_buckets), rng.uniform(200, 400, no_of_buckets), rng.uniform(2000, 20000, no_of_buckets)])
+    # buckets with no frame, and frames with no pupil (areas hold the frame code)
+    trial[rng.random(no_of_buckets) < 0.3] = -5
+    failed = rng.random(no_of_buckets) < 0.05
+    trial[failed, 2] = -2
+    trial[failed, 5] = -2
+    return trial
+
+@pytest.mark.parametrize('new_sample_rate', [2, 3, 10])
+def test_downsample_matches_per_slice_loop(new_sample_rate):
+    trial = random_trial(1003)
+    np.testing.assert_array_equal(downsample_pupil_trial(trial, new_sample_rate), per_slice_downsample(trial, new_sample_rate))
+
+def test_downsample_drops_last_bucket_of_each_sample():
+    trial = np.full((20, 6), 100.0)
+    trial[9] = 200.0
+    trial[19] = 200.0
+    np.testing.assert_array_equal(downsample_pupil_trial(trial, 10), np.full((2, 6), 100.0))
+
+def test_downsample_drops_buckets_outside_0_to_15000():
+    trial = np.full((10, 6), 100.0)
+    trial[0, 3] = -1
+    trial[1, 5] = 15001
+    trial[2:9, 0] = 300.0
+    np.testing.assert_array_equal(downsample_pupil_trial(trial, 10)[0], [300, 100, 100, 100, 100, 100])
+
+def test_downsample_all_nan_sample():
+    trial = np.full((25, 6), 100.0)
+    trial[10:20] = -5
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        samples = downsample_pupil_trial(trial, 10)
+    assert samples.shape == (3, 6)
+    assert np.isnan(samples[1]).all()
+    np.testing.assert_array_equal(samples[[0, 2]], np.full((2, 6), 100.0))
+
+def test_threshold_to_nan_matches_loop():
+    values = np.array([-3.0, 0.0, np.nan, 798.0, 799.0, 15001.0])
+    for threshold, upper_or_lower in [(798, 'upper'), (0, 'lower')]:
+        np.testing.assert_array_equal(threshold_to_nan(values.copy(), threshold, upper_or_lower), pp01.threshold_to_nan(values.copy(), threshold, upper_or_lower))
+
+def test_threshold_to_nan_list_and_object_array():
+    trials = [np.array([1.0, 900.0, np.nan]), np.array([-1.0, 5.0])]
+    expected = [pp01.threshold_to_nan(trial.copy(), 798, 'upper') for trial in trials]
+    as_list = threshold_to_nan([trial.copy() for trial in trials], 798, 'upper')
+    as_object_array = np.empty(2, dtype=object)
+    as_object_array[0], as_object_array[1] = trials[0].copy(), trials[1].copy()
+    as_object_array = threshold_to_nan(as_object_array, 798, 'upper')
+    for index in range(len(trials)):
+        np.testing.assert_array_equal(as_list[index], expected[index])
+        np.testing.assert_array_equal(as_object_array[index], expected[index])
+
+def test_filter_to_nan_in_place():
+    stim_trials = {24.0: [np.array([-1.0, 5.0, 900.0])]}
+    filter_to_nan([stim_trials], 798, 0)
+    np.testing.assert_array_equal(stim_trials[24.0][0], [np.nan, 5.0, np.nan])
+
+def test_longest_run():
+    assert longest_run([]) == 0
+    assert longest_run([False, False]) == 0
+    assert longest_run([True, True, True]) == 3
+    assert longest_run([True, False, True, True, False, True]) == 2
+    assert longest_run(np.array([1, 2, -5, -5, 3]) == -5) == 2
+
+def write_trial(csv_folder, name, trial):
+    np.savetxt(os.path.join(csv_folder, name), trial, fmt='%.2f', delimiter=',')
+
+def test_load_daily_pupils_matches_original(tmp_path):
+    for trial_number, stim in enumerate(['24', '25', '26', '24']):
+        write_trial(str(tmp_path), 'right_stimuli0%s_%04d.csv' % (stim, trial_number), random_trial(2000, seed=trial_number))
+    current = load_daily_pupils('right', str(tmp_path), 250, 4, 40, bad_trial_cutoff=100)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        original = pp01.load_daily_pupils('right', str(tmp_path), 250, 4, 40, 100)
+    for current_array, original_array in zip(current[:6], original[:6]):
+        # nanmean over an axis and over a list sum in a different order
+        np.testing.assert_allclose(current_array, original_array, rtol=1e-12)
+    assert current[6:] == original[6:]
+
+def test_load_daily_pupils_bad_trial_cutoff(tmp_path):
+    trial = np.full((1000, 6), 100.0)
+    # 100 buckets in a row with no pupil
+    trial[300:400] = -5
+    write_trial(str(tmp_path), 'right_stimuli024_0001.csv', trial)
+    discarded = load_daily_pupils('right', str(tmp_path), 100, 4, 40, bad_trial_cutoff=100)
+    assert discarded[6:] == (1, 0)
+    assert (discarded[2] == -6).all()
+    kept = load_daily_pupils('right', str(tmp_path), 100, 4, 40, bad_trial_cutoff=101)
+    assert kept[6:] == (1, 1)
+    assert kept[2][0, -1] == 24.0
+    assert kept[2][0, 0] == 100.0
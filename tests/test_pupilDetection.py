@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from surprisingMinds.pupilDetection import pupil_frame_codes, pupil_detection_params, blur_frame, detect_pupil, detect_pupil_pyramid, fit_pupil
+
+cv2 = pytest.importorskip('cv2')
+
+# 800x600 eye frame, the darkest circle in the middle, the 128 pixel crop around it spans columns 336-463 and rows 236-363
+centre = (400, 300)
+crop_left, crop_top, crop_size = 336, 236, 128
+
+def eye_frame(pupil_radius=40, seed=0):
+    # dark pupil in a textured iris on a textured background (as in surprisingMinds.syntheticData), a flat frame has no gradients for HoughCircles
+    rng = np.random.default_rng(seed)
+    frame = cv2.GaussianBlur(np.clip(rng.normal(175, 8, (600, 800)), 0, 255).astype(np.uint8), (5, 5), 0)
+    if pupil_radius:
+        iris_texture = np.clip(110 + 12*cv2.resize(rng.normal(0, 1, (26, 35)), (800, 600), interpolation=cv2.INTER_CUBIC), 0, 255).astype(np.uint8)
+        iris_mask = np.zeros((600, 800), np.uint8)
+        cv2.circle(iris_mask, centre, int(pupil_radius*2.6), 255, -1)
+        frame[iris_mask > 0] = iris_texture[iris_mask > 0]
+        cv2.circle(frame, centre, pupil_radius, 25, -1)
+    return frame
+
+def flat_frame():
+    return np.full((600, 800), 200, dtype=np.uint8)
+
+def crop_edges(frame, values):
+    # left and right edge columns of the crop, whose mean and stdev set the pupil threshold
+    column = np.resize(np.array(values, dtype=np.uint8), crop_size)
+    frame[crop_top:crop_top+crop_size, crop_left] = column
+    frame[crop_top:crop_top+crop_size, crop_left+crop_size-1] = column
+    return frame
+
+def test_pupil_found():
+    frame = eye_frame()
+    code, pupil, drawn = detect_pupil(blur_frame(frame, pupil_detection_params), pupil_detection_params)
+    assert pupil_frame_codes[code] == 'pupil_found'
+    assert abs(pupil[0] - centre[0]) <= 2 and abs(pupil[1] - centre[1]) <= 2
+    assert abs(pupil[2] - np.pi*40**2)/(np.pi*40**2) < 0.1
+
+def test_pupil_found_pyramid():
+    code, pupil, drawn = detect_pupil_pyramid(eye_frame(), pupil_detection_params, 2)
+    assert pupil_frame_codes[code] == 'pupil_found'
+    assert abs(pupil[0] - centre[0]) <= 3 and abs(pupil[1] - centre[1]) <= 3
+
+def test_no_circles():
+    frame = flat_frame()
+    code, pupil, drawn = detect_pupil(blur_frame(frame, pupil_detection_params), pupil_detection_params)
+    assert (code, pupil) == (-4, None)
+    assert pupil_frame_codes[code] == 'no_circles'
+
+def test_crop_off_screen():
+    # the crop around a circle near the frame edge leaves the frame
+    for darkest_circle in [(30.0, 300.0, 20.0), (400.0, 30.0, 20.0), (770.0, 300.0, 20.0), (400.0, 570.0, 20.0)]:
+        code, pupil, drawn = fit_pupil(eye_frame(), darkest_circle, pupil_detection_params)
+        assert (code, pupil) == (-3, None)
+        assert pupil_frame_codes[code] == 'off_screen'
+
+def test_no_contour():
+    # edges so uneven that the threshold falls below every pixel, nothing is darker than it
+    frame = crop_edges(flat_frame(), [0, 255])
+    code, pupil, drawn = fit_pupil(frame, (400.0, 300.0, 40.0), pupil_detection_params)
+    assert (code, pupil) == (-2, None)
+    assert pupil_frame_codes[code] == 'no_contour'
+
+def test_contour_too_small():
+    # a single dark pixel is the only contour, too few points to fit an ellipse
+    frame = crop_edges(flat_frame(), [199, 201])
+    frame[centre[1], centre[0]] = 0
+    code, pupil, drawn = fit_pupil(frame, (400.0, 300.0, 40.0), pupil_detection_params)
+    assert (code, pupil) == (-1, None)
+    assert pupil_frame_codes[code] == 'too_small'
@@ -0,0 +1,86 @@
+import os
+import numpy as np
+from surprisingMinds.pupilData import load_daily_pupils
+from surprisingMinds.pupilRecords import PupilRecords, save_pupil_records, load_pupil_records, record_bucket_indices, pupil_record_buckets, pupil_record_means
+
+def random_records(no_of_frames=400, frame_interval_ms=1.7, seed=0):
+    # eye frames faster than the 4ms buckets, so most buckets hold more than one frame, a fifth of them without a pupil
+    rng = np.random.default_rng(seed)
+    start_ns = 1530000000000000000
+    timestamps_ns = start_ns + np.cumsum(rng.integers(int(frame_interval_ms*0.5e6), int(frame_interval_ms*1.5e6), no_of_frames))
+    measurements = np.column_stack([rng.uniform(300, 500, no_of_frames), rng.uniform(200, 400, no_of_frames), rng.uniform(2000, 8000, no_of_frames),
+                                    rng.uniform(300, 500, no_of_frames), rng.uniform(200, 400, no_of_frames), rng.uniform(2000, 8000, no_of_frames)])
+    codes = np.where(rng.random(no_of_frames) < 0.2, rng.integers(-4, 0, no_of_frames), 0)
+    measurements[codes != 0] = np.nan
+    return PupilRecords(timestamps_ns, np.arange(no_of_frames), measurements, codes, start_ns, timestamps_ns[-1] + 3000000)
+
+def frame_by_frame_buckets(records, bucket_size_ms, offset_ms=0):
+    # buckets as find_pupil fills them, one frame after the other
+    bucket_indices, no_of_buckets = record_bucket_indices(records, bucket_size_ms, offset_ms)
+    buckets = np.full((no_of_buckets, 6), -5.0)
+    for bucket, measurements, code in zip(bucket_indices, records.measurements, records.codes):
+        if bucket < 0 or bucket >= no_of_buckets:
+            continue
+        if code == 0:
+            buckets[bucket] = measurements
+        else:
+            buckets[bucket, 2] = code
+            buckets[bucket, 5] = code
+    return buckets
+
+def test_buckets_hold_last_frame():
+    records = random_records()
+    for bucket_size_ms, offset_ms in [(4, 0), (4, 12), (10, 0)]:
+        np.testing.assert_array_equal(pupil_record_buckets(records, bucket_size_ms, offset_ms), frame_by_frame_buckets(records, bucket_size_ms, offset_ms))
+
+def test_bucket_of_failed_last_frame():
+    # found, then failed in the same bucket: measurements of the found frame, areas hold the code of the failed one
+    start_ns = 1530000000000000000
+    measurements = np.array([[400, 300, 5000, 401, 301, 5100], [np.nan]*6])
+    records = PupilRecords([start_ns + 1000000, start_ns + 2000000], [0, 1], measurements, [0, -2], start_ns, start_ns + 3000000)
+    np.testing.assert_array_equal(pupil_record_buckets(records, 4), [[400, 300, -2, 401, 301, -2]])
+
+def test_means_of_every_valid_frame():
+    records = random_records()
+    bucket_indices, no_of_buckets = record_bucket_indices(records, 10)
+    means = pupil_record_means(records, 10)
+    for bucket in range(no_of_buckets):
+        valid = (bucket_indices == bucket) & (records.codes == 0)
+        if valid.any():
+            np.testing.assert_allclose(means[bucket], records.measurements[valid].astype(np.float64).mean(axis=0))
+        else:
+            assert np.isnan(means[bucket]).all()
+
+def test_save_and_load(tmp_path):
+    records = random_records()
+    records_path = str(tmp_path / 'right_stimuli024_0001.npz')
+    save_pupil_records(records_path, records)
+    loaded = load_pupil_records(records_path)
+    for name in ['timestamps_ns', 'frames', 'measurements', 'codes', 'start_ns', 'end_ns']:
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(records, name))
+
+def test_trial_saved_both_ways(tmp_path):
+    # one 200Hz trial saved as the csv find_pupil writes and as its records, in separate day folders
+    records = random_records(no_of_frames=1500, frame_interval_ms=5, seed=1)
+    for folder in ['csv', 'records']:
+        os.makedirs(str(tmp_path / folder))
+    np.savetxt(str(tmp_path / 'csv' / 'right_stimuli024_0001.csv'), pupil_record_buckets(records, 4), fmt='%.2f', delimiter=',')
+    save_pupil_records(str(tmp_path / 'records' / 'right_stimuli024_0001.npz'), records)
+    for new_bucket_size, latency in [(40, None), (40, {24.0: 3}), (80, None)]:
+        from_csv = load_daily_pupils('right', str(tmp_path / 'csv'), 1000, 4, new_bucket_size, display_latency_dict=latency)
+        from_records = load_daily_pupils('right', str(tmp_path / 'records'), 1000, 4, new_bucket_size, display_latency_dict=latency)
+        assert from_csv[6:] == from_records[6:] == (1, 1)
+        for csv_array, records_array in zip(from_csv[:6], from_records[:6]):
+            assert (csv_array != -6).any()
+            # the csv holds 2 decimals
+            np.testing.assert_allclose(csv_array, records_array, rtol=0, atol=0.005)
+
+def test_records_resampled_to_any_bucket_size(tmp_path):
+    # 10ms is not a multiple of the 4ms csv buckets, records are averaged straight from their frames
+    records = random_records(no_of_frames=1500, frame_interval_ms=5, seed=1)
+    save_pupil_records(str(tmp_path / 'right_stimuli024_0001.npz'), records)
+    resampled = load_daily_pupils('right', str(tmp_path), 1000, 4, 10)
+    means = pupil_record_means(records, 10)
+    assert len(means) < 1000
+    np.testing.assert_array_equal(resampled[0][0, :len(means)], means[:, 0])
+    assert resampled[0][0, -1] == 24.0
@@ -0,0 +1,37 @@
+import numpy as np
+from surprisingMinds.stimLuminance import timestamp_bucket_indices
+from surprisingMinds.syntheticData import pupil_buckets_from_trajectory, exhibit_timestamps_us, no_frame_value, no_circles_value
+
+def random_trajectory(no_of_frames=3000, frame_interval_us=3000, seed=0):
+    # eye frames about as fast as the 4ms buckets, so some buckets hold a closed and a visible frame
+    rng = np.random.default_rng(seed)
+    timestamps_us = 1500000000000000 + np.cumsum(rng.integers(frame_interval_us//2, frame_interval_us*3//2, no_of_frames))
+    trajectory = {'x': rng.uniform(300, 500, no_of_frames), 'y': rng.uniform(200, 400, no_of_frames), 'major_axis': rng.uniform(40, 80, no_of_frames),
+                  'minor_axis': rng.uniform(30, 40, no_of_frames), 'visible': rng.random(no_of_frames) > 0.3}
+    return timestamps_us, trajectory
+
+def test_pupil_buckets_hold_last_frame():
+    timestamps_us, trajectory = random_trajectory()
+    visible = trajectory['visible']
+    pupil_buckets = pupil_buckets_from_trajectory(timestamps_us, trajectory, np.random.default_rng(1))
+    bucket_indices, no_of_buckets = timestamp_bucket_indices(exhibit_timestamps_us(timestamps_us), 4)
+    # frame by frame, as find_pupil fills its buckets: the last visible frame and whether the last frame was visible
+    last_visible_frame = np.full(no_of_buckets, -1)
+    last_frame_visible = np.zeros(no_of_buckets, dtype=bool)
+    has_frame = np.zeros(no_of_buckets, dtype=bool)
+    for frame, bucket in enumerate(bucket_indices):
+        has_frame[bucket] = True
+        last_frame_visible[bucket] = visible[frame]
+        if visible[frame]:
+            last_visible_frame[bucket] = frame
+    np.testing.assert_array_equal(pupil_buckets[~has_frame], no_frame_value)
+    closed = has_frame & ~last_frame_visible
+    np.testing.assert_array_equal(pupil_buckets[closed][:, [2, 5]], no_circles_value)
+    assert (pupil_buckets[last_frame_visible][:, [2, 5]] > 0).all()
+    # positions of the last visible frame (measured with a little noise), -5 in buckets with no visible frame
+    with_pupil = last_visible_frame >= 0
+    assert (np.abs(pupil_buckets[with_pupil, 0] - trajectory['x'][last_visible_frame[with_pupil]]) < 3).all()
+    assert (np.abs(pupil_buckets[with_pupil, 1] - trajectory['y'][last_visible_frame[with_pupil]]) < 3).all()
+    np.testing.assert_array_equal(pupil_buckets[has_frame & ~with_pupil][:, [0, 1, 3, 4]], no_frame_value)
+    # the cases that matter: buckets with a closed frame before their last, visible one
+    assert (last_frame_visible & np.isin(np.arange(no_of_buckets), bucket_indices[~visible])).any()
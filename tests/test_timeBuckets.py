@@ -0,0 +1,35 @@
+import datetime
+from surprisingMinds.timeBuckets import parse_timestamp, make_time_buckets, find_timestamp_bucket_index, find_nearest_timestamp_key
+
+window = datetime.timedelta(milliseconds=4)
+first = datetime.datetime(2017, 7, 1, 10, 0, 0)
+
+def test_parse_timestamp_drops_timezone_and_last_digits():
+    assert parse_timestamp('2017-07-01T10:00:00.0057130+01:00') == datetime.datetime(2017, 7, 1, 10, 0, 0, 5700)
+
+def test_bucket_index_inside_bucket():
+    assert find_timestamp_bucket_index(first, first, window) == 0
+    assert find_timestamp_bucket_index(first + datetime.timedelta(microseconds=100), first, window) == 0
+    assert find_timestamp_bucket_index(first + datetime.timedelta(microseconds=9900), first, window) == 2
+
+def test_bucket_index_on_boundary_is_earlier_bucket():
+    # bucket i covers [first + i*window, first + (i+1)*window], a timestamp on the boundary belongs to bucket i
+    assert find_timestamp_bucket_index(first + window, first, window) == 0
+    assert find_timestamp_bucket_index(first + 3*window, first, window) == 2
+
+def test_bucket_index_matches_bucket_scan():
+    buckets = make_time_buckets('2017-07-01T10:00:00.0000000+01:00', 4, '2017-07-01T10:00:01.0000000+01:00', [-5]*6)
+    keys = list(buckets.keys())
+    for microseconds in range(0, 1000000, 700):
+        timestamp = first + datetime.timedelta(microseconds=microseconds)
+        # the original linear scan: first bucket whose window holds the timestamp
+        expected = next(key for key in keys if key <= timestamp <= key + window)
+        assert keys[find_timestamp_bucket_index(timestamp, first, window)] == expected
+        assert find_nearest_timestamp_key(timestamp, buckets, window) == expected
+
+def test_make_time_buckets_copy_fill():
+    buckets = make_time_buckets('2017-07-01T10:00:00.0000000+01:00', 4, '2017-07-01T10:00:00.0200000+01:00', [-5]*6, copy_fill=True)
+    assert len(buckets) == 6
+    first_bucket = buckets[first]
+    first_bucket[0] = 1
+    assert all(bucket[0] == -5 for key, bucket in buckets.items() if key != first)